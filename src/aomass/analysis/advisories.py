@@ -0,0 +1,131 @@
+"""OSV advisory parsing and version range matching."""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .dependencies import normalize_package_name
+from .versions import version_key
+
+SEVERITY_LEVELS = ("CRITICAL", "HIGH", "MODERATE", "MEDIUM", "LOW")
+
+# A version interval: (introduced, upper bound, whether the bound is affected).
+# A None lower bound is unbounded below, a None upper bound unbounded above.
+VersionRange = Tuple[Optional[str], Optional[str], bool]
+
+
+class AffectedPackage(NamedTuple):
+    """One package affected by an advisory, with its pre-parsed version ranges."""
+    advisory_id: str
+    ecosystem: str
+    package: str  # Normalized name
+    ranges: List[VersionRange]
+    versions: List[str]  # Explicitly listed affected versions
+    summary: str
+    severity: str
+    aliases: List[str]
+
+
+def _events_to_ranges(ecosystem: str, events: List[Dict[str, str]]) -> List[VersionRange]:
+    """Turn the introduced / fixed / last_affected events of a range into intervals."""
+    keys = [
+        () if event.get("introduced") == "0"
+        else version_key(ecosystem, next(iter(event.values()), ""))
+        for event in events
+    ]
+    if None not in keys:
+        # OSV does not guarantee event order; keep it as given if a bound won't parse
+        events = [event for _key, event in sorted(zip(keys, events), key=lambda item: item[0])]
+
+    ranges: List[VersionRange] = []
+    introduced: Optional[str] = None
+    is_open = False
+    for event in events:
+        if "introduced" in event:
+            introduced = None if event["introduced"] == "0" else event["introduced"]
+            is_open = True
+        elif is_open and "fixed" in event:
+            ranges.append((introduced, event["fixed"], False))
+            is_open = False
+        elif is_open and "last_affected" in event:
+            ranges.append((introduced, event["last_affected"], True))
+            is_open = False
+    if is_open:
+        ranges.append((introduced, None, False))
+    return ranges
+
+
+def _severity(advisory: Dict[str, Any], affected: Dict[str, Any]) -> str:
+    for source in (affected.get("database_specific") or {},
+                   advisory.get("database_specific") or {}):
+        severity = str(source.get("severity", "")).upper()
+        if severity in SEVERITY_LEVELS:
+            return severity
+    return "UNKNOWN"
+
+
+def parse_osv(advisory: Dict[str, Any]) -> List[AffectedPackage]:
+    """Get the affected packages of an OSV advisory.
+
+    Withdrawn advisories affect nothing, and git commit ranges are skipped
+    since dependencies are matched by version.
+    """
+    if advisory.get("withdrawn"):
+        return []
+
+    affected_packages = []
+    for affected in advisory.get("affected", []):
+        package = affected.get("package") or {}
+        ecosystem = package.get("ecosystem", "")
+        name = package.get("name")
+        if not ecosystem or not name:
+            continue
+        ranges = []
+        for version_range in affected.get("ranges", []):
+            if version_range.get("type") in ("ECOSYSTEM", "SEMVER"):
+                ranges.extend(_events_to_ranges(ecosystem, version_range.get("events", [])))
+        affected_packages.append(AffectedPackage(
+            advisory_id=advisory["id"],
+            ecosystem=ecosystem,
+            package=normalize_package_name(ecosystem, name),
+            ranges=ranges,
+            versions=list(affected.get("versions", [])),
+            summary=advisory.get("summary") or advisory.get("details", "")[:200],
+            severity=_severity(advisory, affected),
+            aliases=list(advisory.get("aliases", []))
+        ))
+    return affected_packages
+
+
+class CompiledAdvisory(NamedTuple):
+    """An affected package with its version bounds converted to sort keys."""
+    affected: AffectedPackage
+    bounds: List[Tuple[Optional[tuple], Optional[tuple], bool, Optional[str]]]
+    versions: frozenset
+
+    @classmethod
+    def compile(cls, affected: AffectedPackage) -> "CompiledAdvisory":
+        bounds = []
+        for introduced, upper, inclusive in affected.ranges:
+            lower_key = version_key(affected.ecosystem, introduced) if introduced else None
+            upper_key = version_key(affected.ecosystem, upper) if upper else None
+            if (introduced and lower_key is None) or (upper and upper_key is None):
+                continue
+            bounds.append((lower_key, upper_key, inclusive, upper))
+        return cls(affected, bounds, frozenset(affected.versions))
+
+    def match(self, version: str, key: Optional[tuple]) -> Tuple[bool, Optional[str]]:
+        """Whether a version is affected, and the version fixing it if known.
+
+        The ranges decide the fixing version; the explicitly listed
+        versions, which OSV records usually enumerate as well, only add
+        affected versions the ranges miss.
+        """
+        if key is not None:
+            for lower, upper, inclusive, upper_version in self.bounds:
+                if lower is not None and key < lower:
+                    continue
+                if upper is None:
+                    return True, None
+                if key < upper:
+                    return True, None if inclusive else upper_version
+                if inclusive and key == upper:
+                    return True, None
+        return version in self.versions, None
@@ -0,0 +1,141 @@
+"""Codemods rewriting the contents of indexed files."""
+import re
+from typing import Callable, Dict, NamedTuple, Optional
+
+from .dependencies import (
+    REQUIREMENT_PATTERN,
+    manifest_format_for_path,
+    normalize_package_name,
+)
+
+# PEP 440 clauses naming a minimum or exact version; upper bounds and
+# exclusions are left as they are
+PEP440_CLAUSE = re.compile(r"(===|==|~=|>=|>)\s*([^\s,;\"']+)")
+# Semver constraint with an optional range operator, as in package.json or Poetry
+SEMVER_CONSTRAINT = re.compile(r"^(\^|~|>=|==|=|v)?\s*\d[0-9A-Za-z.+-]*$")
+QUOTED = re.compile(r"\"([^\"\n]*)\"|'([^'\n]*)'")
+
+
+class DependencyBump(NamedTuple):
+    """Raise a package to a target version in the manifests declaring it.
+
+    Only manifests are rewritten; lock files are left for the package
+    manager to regenerate, as are unpinned requirements, which already
+    resolve to the latest version.
+    """
+    ecosystem: str
+    name: str
+    version: str
+
+    def apply(self, path: str, content: bytes) -> Optional[bytes]:
+        """Rewrite one file; None if it is not a manifest or leaves the package as is."""
+        manifest_format = manifest_format_for_path(path)
+        if manifest_format is None or manifest_format.ecosystem != self.ecosystem:
+            return None
+        rewrite = REWRITERS.get(manifest_format.pattern)
+        if rewrite is None:
+            return None
+        text = content.decode("utf-8")
+        rewritten = rewrite(self, text)
+        return rewritten.encode("utf-8") if rewritten != text else None
+
+    def _declares(self, name: str) -> bool:
+        return normalize_package_name(self.ecosystem, name) == self.name
+
+    def _pep440(self, specifier: str) -> str:
+        """Move the minimum or exact version of a PEP 440 specifier to the target."""
+        def clause(match: re.Match) -> str:
+            operator = {"===": "==", ">": ">="}.get(match.group(1), match.group(1))
+            return f"{operator}{self.version}"
+        return PEP440_CLAUSE.sub(clause, specifier)
+
+    def _semver(self, constraint: str) -> str:
+        """Move a semver constraint to the target, keeping its range operator."""
+        match = SEMVER_CONSTRAINT.match(constraint.strip())
+        if match is None:
+            return constraint
+        return f"{match.group(1) or ''}{self.version}"
+
+    def _requirement(self, requirement: str) -> str:
+        match = REQUIREMENT_PATTERN.match(requirement)
+        if match is None or not self._declares(match.group(1)):
+            return requirement
+        start, end = match.span(3)
+        return requirement[:start] + self._pep440(requirement[start:end]) + requirement[end:]
+
+
+def _rewrite_requirements(bump: DependencyBump, text: str) -> str:
+    lines = text.splitlines(keepends=True)
+    for index, line in enumerate(lines):
+        body = line.rstrip("\r\n")
+        requirement, _, comment = body.partition(" #")
+        if not requirement.strip() or requirement.lstrip().startswith(("#", "-")):
+            continue
+        rewritten = bump._requirement(requirement)
+        if rewritten != requirement:
+            lines[index] = rewritten + (" #" + comment if comment else "") + line[len(body):]
+    return "".join(lines)
+
+
+def _rewrite_pyproject(bump: DependencyBump, text: str) -> str:
+    """Rewrite PEP 621 requirement strings and Poetry dependency tables."""
+    lines = text.splitlines(keepends=True)
+    table = ""
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            table = stripped
+            continue
+        if table.startswith("[tool.poetry") and "dependencies" in table:
+            key, equals, value = line.partition("=")
+            if equals and bump._declares(key.strip().strip("\"'")):
+                lines[index] = key + equals + _rewrite_poetry_constraint(bump, value)
+            continue
+        lines[index] = QUOTED.sub(
+            lambda match: _rewrite_quoted(match, bump._requirement), line
+        )
+    return "".join(lines)
+
+
+def _rewrite_poetry_constraint(bump: DependencyBump, value: str) -> str:
+    """Rewrite ``"^1.2"`` or the version of ``{ version = "^1.2", ... }``."""
+    if value.lstrip().startswith("{"):
+        return re.sub(
+            r"(version\s*=\s*)(\"[^\"]*\"|'[^']*')",
+            lambda match: match.group(1) + QUOTED.sub(
+                lambda quoted: _rewrite_quoted(quoted, bump._semver), match.group(2)
+            ),
+            value,
+            count=1
+        )
+    return QUOTED.sub(lambda match: _rewrite_quoted(match, bump._semver), value, count=1)
+
+
+def _rewrite_quoted(match: re.Match, rewrite: Callable[[str], str]) -> str:
+    quote = '"' if match.group(1) is not None else "'"
+    inner = match.group(1) if match.group(1) is not None else match.group(2)
+    return f"{quote}{rewrite(inner)}{quote}"
+
+
+def _rewrite_package_json(bump: DependencyBump, text: str) -> str:
+    # Package names only appear as keys of dependency maps
+    pattern = re.compile(r"(\"" + re.escape(bump.name) + r"\"\s*:\s*\")([^\"]*)(\")", re.I)
+    return pattern.sub(
+        lambda match: match.group(1) + bump._semver(match.group(2)) + match.group(3), text
+    )
+
+
+def _rewrite_go_mod(bump: DependencyBump, text: str) -> str:
+    pattern = re.compile(
+        r"^(\s*(?:require\s+)?" + re.escape(bump.name) + r"\s+)v[^\s/]+(?=\s|$)", re.M
+    )
+    return pattern.sub(lambda match: f"{match.group(1)}v{bump.version.lstrip('v')}", text)
+
+
+# Rewriter of each manifest file pattern; lock files have none
+REWRITERS: Dict[str, Callable[[DependencyBump, str], str]] = {
+    "requirements*.txt": _rewrite_requirements,
+    "pyproject.toml": _rewrite_pyproject,
+    "package.json": _rewrite_package_json,
+    "go.mod": _rewrite_go_mod,
+}
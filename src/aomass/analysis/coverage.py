@@ -0,0 +1,282 @@
+"""Streaming parsers for test coverage reports and per-function coverage."""
+import posixpath
+import re
+from array import array
+from typing import BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from xml.parsers import expat
+
+import numpy as np
+
+REPORT_FORMATS = ("cobertura", "jacoco", "lcov", "go")
+READ_SIZE = 1 << 20  # Bytes fed to the XML parser at a time
+SNIFF_SIZE = 4096
+
+TEST_DIRECTORIES = frozenset({"test", "tests", "__tests__", "spec", "testing"})
+TEST_FILE_PATTERN = re.compile(
+    r"^(test_.*\.py|.*_test\.(py|go)|conftest\.py|.*\.(test|spec)\.[jt]sx?|.*Tests?\.java)$"
+)
+
+
+class FileCoverage(NamedTuple):
+    """Line hits of one file of a coverage report."""
+    path: str
+    lines: np.ndarray  # Executable line numbers, ascending
+    hits: np.ndarray  # Execution count of each line; 0 when never run
+
+
+class _LineHits:
+    """Line hits accumulated per file while a report streams by.
+
+    Values go into compact ``array`` buffers rather than Python lists, so
+    a report with millions of lines costs a few bytes per line.
+    """
+
+    def __init__(self):
+        self._files: Dict[str, Tuple[array, array]] = {}
+
+    def file(self, path: str) -> Tuple[array, array]:
+        """Line and hit buffers of a file, created on first use."""
+        buffers = self._files.get(path)
+        if buffers is None:
+            buffers = self._files[path] = (array("i"), array("q"))
+        return buffers
+
+    def files(self) -> List[FileCoverage]:
+        return [
+            collapse(path, np.frombuffer(lines, dtype=np.int32), np.frombuffer(hits, np.int64))
+            for path, (lines, hits) in self._files.items()
+            if lines
+        ]
+
+
+def collapse(path: str, lines: np.ndarray, hits: np.ndarray) -> FileCoverage:
+    """Sort line hits and merge repeated lines, keeping their highest count."""
+    order = np.argsort(lines, kind="stable")
+    lines, hits = lines[order], hits[order]
+    unique, starts = np.unique(lines, return_index=True)
+    return FileCoverage(path, unique.astype(np.int32), np.maximum.reduceat(hits, starts))
+
+
+def detect_format(head: bytes, name: str = "") -> Optional[str]:
+    """Guess the format of a report from its first bytes and file name."""
+    if name.lower().endswith((".info", ".lcov")):
+        return "lcov"
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if stripped.startswith(b"mode:"):
+        return "go"
+    if stripped.startswith((b"TN:", b"SF:")):
+        return "lcov"
+    if b"<report" in head or b"JACOCO" in head:
+        return "jacoco"
+    if b"<coverage" in head:
+        return "cobertura"
+    return None
+
+
+def sniff_format(stream: BinaryIO, name: str = "") -> str:
+    """Detect the format of a report from a seekable stream, leaving it at the start.
+
+    Raises:
+        ValueError: If the format is not recognized.
+    """
+    head = stream.read(SNIFF_SIZE)
+    stream.seek(0)
+    report_format = detect_format(head, name)
+    if report_format is None:
+        raise ValueError("Unrecognized coverage report format")
+    return report_format
+
+
+def parse_report(
+    stream: BinaryIO, report_format: Optional[str] = None, name: str = ""
+) -> List[FileCoverage]:
+    """Parse a coverage report into line hits per file, without loading it whole.
+
+    XML reports go through expat a chunk at a time and text reports are
+    read line by line, so memory grows with the number of executable lines
+    rather than the size of the report. The format is detected from the
+    first bytes when not given, which needs a seekable ``stream``.
+
+    Raises:
+        ValueError: If the format is unknown or the report is malformed.
+    """
+    if report_format is None:
+        report_format = sniff_format(stream, name)
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported coverage report format: {report_format}")
+
+    hits = _LineHits()
+    if report_format == "lcov":
+        _parse_lcov(stream, hits)
+    elif report_format == "go":
+        _parse_go(stream, hits)
+    else:
+        handlers = _cobertura_handlers if report_format == "cobertura" else _jacoco_handlers
+        _parse_xml(stream, *handlers(hits))
+    return hits.files()
+
+
+def _parse_xml(stream: BinaryIO, start, end) -> None:
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    try:
+        while True:
+            chunk = stream.read(READ_SIZE)
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                return
+    except expat.ExpatError as e:
+        raise ValueError(f"Malformed coverage report: {e}") from e
+
+
+def _cobertura_handlers(hits: _LineHits):
+    # Lines are listed per class, then again per method: only read the former
+    current = None
+    methods = 0
+
+    def start(tag: str, attrs: Dict[str, str]) -> None:
+        nonlocal current, methods
+        if tag == "line":
+            if current is not None and not methods:
+                current[0].append(int(attrs["number"]))
+                current[1].append(int(attrs.get("hits", 0)))
+        elif tag == "class":
+            current = hits.file(attrs.get("filename", ""))
+        elif tag == "methods":
+            methods += 1
+
+    def end(tag: str) -> None:
+        nonlocal current, methods
+        if tag == "methods":
+            methods -= 1
+        elif tag == "class":
+            current = None
+
+    return start, end
+
+
+def _jacoco_handlers(hits: _LineHits):
+    # Source files are named relative to their package directory
+    package = ""
+    current = None
+
+    def start(tag: str, attrs: Dict[str, str]) -> None:
+        nonlocal package, current
+        if tag == "line":
+            if current is not None:
+                current[0].append(int(attrs["nr"]))
+                current[1].append(int(attrs.get("ci", 0)))  # Covered instructions
+        elif tag == "sourcefile":
+            name = attrs.get("name", "")
+            current = hits.file(f"{package}/{name}" if package else name)
+        elif tag == "package":
+            package = attrs.get("name", "")
+
+    def end(tag: str) -> None:
+        nonlocal current
+        if tag == "sourcefile":
+            current = None
+
+    return start, end
+
+
+def _parse_lcov(stream: BinaryIO, hits: _LineHits) -> None:
+    current = None
+    try:
+        for line in stream:
+            if line.startswith(b"DA:"):
+                if current is not None:
+                    fields = line[3:].split(b",")
+                    current[0].append(int(fields[0]))
+                    current[1].append(int(fields[1]))
+            elif line.startswith(b"SF:"):
+                current = hits.file(line[3:].strip().decode())
+            elif line.startswith(b"end_of_record"):
+                current = None
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Malformed lcov report: {e}") from e
+
+
+def _parse_go(stream: BinaryIO, hits: _LineHits) -> None:
+    # Blocks are "file:line.col,line.col statements count"; every line of a
+    # block gets its count, and lines shared by blocks keep the highest one
+    current_path, current = None, None
+    try:
+        for line in stream:
+            location, _, block = line.rpartition(b":")
+            if not location or line.startswith(b"mode:"):
+                continue
+            span, statements, count = block.split()
+            if statements == b"0":
+                continue
+            if location != current_path:
+                current_path, current = location, hits.file(location.decode())
+            start, end = span.split(b",")
+            first, last = int(start.split(b".")[0]), int(end.split(b".")[0])
+            current[0].extend(range(first, last + 1))
+            current[1].extend([int(count)] * (last - first + 1))
+    except ValueError as e:
+        raise ValueError(f"Malformed Go coverage profile: {e}") from e
+
+
+class PathResolver:
+    """Maps the paths written in coverage reports onto repository paths.
+
+    Reports name files relative to a source root, a package directory or
+    an absolute build directory. A report path matches a repository path
+    when one is a suffix of the other, component-wise; the longest match
+    wins and ties are left unresolved rather than guessed.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self._by_name: Dict[str, List[List[str]]] = {}
+        for path in paths:
+            self._by_name.setdefault(posixpath.basename(path), []).append(path.split("/"))
+
+    def resolve(self, report_path: str) -> Optional[str]:
+        """Get the repository path of a report path, if exactly one matches best."""
+        parts = [
+            part for part in report_path.replace("\\", "/").split("/") if part not in ("", ".")
+        ]
+        if not parts:
+            return None
+        best, best_length, tied = None, 0, False
+        for candidate in self._by_name.get(parts[-1], ()):
+            length = 0
+            for mine, theirs in zip(reversed(parts), reversed(candidate)):
+                if mine != theirs:
+                    break
+                length += 1
+            if length < min(len(parts), len(candidate)):
+                continue
+            if length > best_length:
+                best, best_length, tied = candidate, length, False
+            elif length == best_length:
+                tied = True
+        if best is None or tied:
+            return None
+        return "/".join(best)
+
+
+def function_coverage(
+    coverage: FileCoverage, starts: np.ndarray, ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Executable and covered line counts within each ``[start, end]`` line range.
+
+    Ranges are located with binary searches over the file's executable
+    lines and counted from a prefix sum of covered lines, so the cost is
+    O((lines + ranges) log lines) whatever the nesting of the ranges.
+    """
+    lo = np.searchsorted(coverage.lines, starts, side="left")
+    hi = np.searchsorted(coverage.lines, ends, side="right")
+    covered = np.concatenate(([0], np.cumsum(coverage.hits > 0)))
+    return hi - lo, covered[hi] - covered[lo]
+
+
+def is_test_path(path: str) -> bool:
+    """Whether a path looks like test code rather than code under test."""
+    parts = path.split("/")
+    return bool(TEST_DIRECTORIES.intersection(parts[:-1])) or bool(
+        TEST_FILE_PATTERN.match(parts[-1])
+    )
@@ -0,0 +1,239 @@
+"""Dependency extraction from package manifests and lock files."""
+import fnmatch
+import json
+import re
+import tomllib
+from pathlib import PurePosixPath
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from ..models.core import Dependency, Language
+
+# PEP 508 requirement: name, extras, version specifier, environment marker
+REQUIREMENT_PATTERN = re.compile(
+    r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*([^;@]*?)\s*(?:;.*)?$"
+)
+EXACT_PEP440_PATTERN = re.compile(r"^===?\s*([^\s,*]+)$")
+EXACT_SEMVER_PATTERN = re.compile(r"^=?v?(\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.-]+)?)$")
+
+
+class ManifestFormat(NamedTuple):
+    """A manifest file name pattern and how to read dependencies from it."""
+    pattern: str
+    ecosystem: str
+    language: Language
+    parse: Callable[[bytes], List[Dependency]]
+
+
+def normalize_package_name(ecosystem: str, name: str) -> str:
+    """Normalize a package name the way its registry compares names."""
+    if ecosystem == "PyPI":
+        return re.sub(r"[-_.]+", "-", name).lower()
+    if ecosystem in ("npm", "crates.io"):
+        return name.lower()
+    return name
+
+
+def package_key(ecosystem: str, name: str) -> str:
+    """Lookup key of a package within an ecosystem."""
+    return f"{ecosystem}:{name}"
+
+
+def _python_requirement(requirement: str) -> Optional[Dependency]:
+    match = REQUIREMENT_PATTERN.match(requirement)
+    if match is None:
+        return None
+    name, _extras, specifier = match.groups()
+    exact = EXACT_PEP440_PATTERN.match(specifier.replace(" ", ""))
+    return Dependency(
+        ecosystem="PyPI",
+        name=normalize_package_name("PyPI", name),
+        version=exact.group(1) if exact else None,
+        specifier=specifier
+    )
+
+
+def parse_requirements(content: bytes) -> List[Dependency]:
+    """Read a pip requirements file."""
+    dependencies = []
+    for line in content.decode("utf-8", errors="replace").splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")) or "://" in line:
+            continue
+        dependency = _python_requirement(line)
+        if dependency:
+            dependencies.append(dependency)
+    return dependencies
+
+
+def parse_pyproject(content: bytes) -> List[Dependency]:
+    """Read PEP 621 and Poetry dependency tables of a pyproject.toml."""
+    data = tomllib.loads(content.decode("utf-8", errors="replace"))
+    project = data.get("project", {})
+    requirements = list(project.get("dependencies", []))
+    for extra in project.get("optional-dependencies", {}).values():
+        requirements.extend(extra)
+    dependencies = [dep for dep in map(_python_requirement, requirements) if dep]
+
+    poetry = data.get("tool", {}).get("poetry", {})
+    for name, constraint in poetry.get("dependencies", {}).items():
+        if name.lower() == "python":
+            continue
+        if isinstance(constraint, dict):
+            constraint = constraint.get("version", "")
+        exact = EXACT_SEMVER_PATTERN.match(str(constraint))
+        dependencies.append(Dependency(
+            ecosystem="PyPI",
+            name=normalize_package_name("PyPI", name),
+            version=exact.group(1) if exact else None,
+            specifier=str(constraint)
+        ))
+    return dependencies
+
+
+def _lock_packages(ecosystem: str, packages: Iterable[dict]) -> List[Dependency]:
+    return [
+        Dependency(
+            ecosystem=ecosystem,
+            name=normalize_package_name(ecosystem, package["name"]),
+            version=str(package["version"]),
+            specifier=f"=={package['version']}"
+        )
+        for package in packages
+        if "name" in package and "version" in package
+    ]
+
+
+def parse_poetry_lock(content: bytes) -> List[Dependency]:
+    """Read the locked packages of a poetry.lock."""
+    data = tomllib.loads(content.decode("utf-8", errors="replace"))
+    return _lock_packages("PyPI", data.get("package", []))
+
+
+def parse_pipfile_lock(content: bytes) -> List[Dependency]:
+    """Read the locked packages of a Pipfile.lock."""
+    data = json.loads(content)
+    dependencies = []
+    for section in ("default", "develop"):
+        for name, entry in data.get(section, {}).items():
+            version = entry.get("version", "")
+            dependencies.append(Dependency(
+                ecosystem="PyPI",
+                name=normalize_package_name("PyPI", name),
+                version=version.lstrip("=") or None,
+                specifier=version
+            ))
+    return dependencies
+
+
+def parse_package_json(content: bytes) -> List[Dependency]:
+    """Read the declared dependencies of a package.json."""
+    data = json.loads(content)
+    dependencies = []
+    for section in ("dependencies", "devDependencies", "optionalDependencies"):
+        for name, specifier in (data.get(section) or {}).items():
+            exact = EXACT_SEMVER_PATTERN.match(str(specifier).strip())
+            dependencies.append(Dependency(
+                ecosystem="npm",
+                name=normalize_package_name("npm", name),
+                version=exact.group(1) if exact else None,
+                specifier=str(specifier)
+            ))
+    return dependencies
+
+
+def parse_package_lock(content: bytes) -> List[Dependency]:
+    """Read the installed packages of a package-lock.json (any lockfile version)."""
+    data = json.loads(content)
+    packages = []
+    if "packages" in data:
+        for path, entry in data["packages"].items():
+            if "node_modules/" in path and "version" in entry and not entry.get("link"):
+                packages.append({"name": path.rsplit("node_modules/", 1)[1],
+                                 "version": entry["version"]})
+    else:
+        for name, entry in data.get("dependencies", {}).items():
+            if "version" in entry:
+                packages.append({"name": name, "version": entry["version"]})
+    return _lock_packages("npm", packages)
+
+
+def parse_cargo_lock(content: bytes) -> List[Dependency]:
+    """Read the locked packages of a Cargo.lock."""
+    data = tomllib.loads(content.decode("utf-8", errors="replace"))
+    return _lock_packages("crates.io", data.get("package", []))
+
+
+def parse_go_mod(content: bytes) -> List[Dependency]:
+    """Read the required modules of a go.mod."""
+    dependencies = []
+    in_block = False
+    for line in content.decode("utf-8", errors="replace").splitlines():
+        line = line.split("//", 1)[0].strip()
+        if line.startswith("require ("):
+            in_block = True
+            continue
+        if in_block and line == ")":
+            in_block = False
+            continue
+        if line.startswith("require "):
+            line = line[len("require "):].strip()
+        elif not in_block:
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            dependencies.append(Dependency(
+                ecosystem="Go",
+                name=parts[0],
+                version=parts[1].lstrip("v").split("+", 1)[0],
+                specifier=parts[1]
+            ))
+    return dependencies
+
+
+MANIFEST_FORMATS = (
+    ManifestFormat("requirements*.txt", "PyPI", Language.PYTHON, parse_requirements),
+    ManifestFormat("pyproject.toml", "PyPI", Language.PYTHON, parse_pyproject),
+    ManifestFormat("poetry.lock", "PyPI", Language.PYTHON, parse_poetry_lock),
+    ManifestFormat("Pipfile.lock", "PyPI", Language.PYTHON, parse_pipfile_lock),
+    ManifestFormat("package.json", "npm", Language.JAVASCRIPT, parse_package_json),
+    ManifestFormat("package-lock.json", "npm", Language.JAVASCRIPT, parse_package_lock),
+    ManifestFormat("Cargo.lock", "crates.io", Language.RUST, parse_cargo_lock),
+    ManifestFormat("go.mod", "Go", Language.GO, parse_go_mod),
+)
+
+# Dependency files generated by package managers from the manifests above
+LOCK_FILES = frozenset({"poetry.lock", "Pipfile.lock", "package-lock.json", "Cargo.lock"})
+
+DEPENDENCY_FILES = tuple(manifest_format.pattern for manifest_format in MANIFEST_FORMATS)
+
+ECOSYSTEM_LANGUAGES: Dict[str, Language] = {
+    manifest_format.ecosystem: manifest_format.language for manifest_format in MANIFEST_FORMATS
+}
+
+
+def manifest_format_for_path(path: str) -> Optional[ManifestFormat]:
+    """Get the manifest format of a file, or None if it is not a manifest."""
+    name = PurePosixPath(path).name
+    for manifest_format in MANIFEST_FORMATS:
+        if fnmatch.fnmatchcase(name, manifest_format.pattern):
+            return manifest_format
+    return None
+
+
+def extract_dependencies(path: str, content: bytes) -> List[Dependency]:
+    """Read the dependencies declared in a manifest file.
+
+    Files that are not manifests, or cannot be parsed, declare none.
+    """
+    manifest_format = manifest_format_for_path(path)
+    if manifest_format is None:
+        return []
+    try:
+        dependencies = manifest_format.parse(content)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return []
+    # Keep the first declaration of each package
+    unique = {}
+    for dependency in dependencies:
+        unique.setdefault((dependency.name, dependency.version), dependency)
+    return list(unique.values())
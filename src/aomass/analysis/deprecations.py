@@ -0,0 +1,135 @@
+"""Rules detecting uses of deprecated APIs."""
+from typing import Dict
+
+from ..models.core import Language
+from .rules import FileContext, Rule, register_rule
+
+# Deprecated Python callables (matched on the dotted name suffix) -> replacement
+PYTHON_DEPRECATED_CALLS: Dict[str, str] = {
+    "datetime.utcnow": "datetime.now(timezone.utc)",
+    "datetime.utcfromtimestamp": "datetime.fromtimestamp(ts, timezone.utc)",
+    "logging.warn": "logging.warning",
+    "ssl.wrap_socket": "SSLContext.wrap_socket",
+    "inspect.getargspec": "inspect.signature",
+    "locale.getdefaultlocale": "locale.getlocale",
+    "pkg_resources.resource_filename": "importlib.resources.files",
+    "pkg_resources.get_distribution": "importlib.metadata.version",
+}
+
+# Deprecated or removed Python modules -> replacement
+PYTHON_DEPRECATED_MODULES: Dict[str, str] = {
+    "imp": "importlib",
+    "distutils": "setuptools / packaging",
+    "asynchat": "asyncio",
+    "asyncore": "asyncio",
+    "pipes": "shlex",
+    "pkg_resources": "importlib.metadata / importlib.resources",
+}
+
+# Names that moved out of a Python module: module -> {name: replacement}
+PYTHON_MOVED_NAMES: Dict[str, Dict[str, str]] = {
+    "collections": {
+        name: f"collections.abc.{name}"
+        for name in ("Mapping", "MutableMapping", "Sequence", "MutableSequence",
+                     "Iterable", "Iterator", "Callable", "Set", "MutableSet")
+    },
+}
+
+# Deprecated Node.js calls (matched on the dotted callee suffix) -> replacement
+JS_DEPRECATED_CALLS: Dict[str, str] = {
+    "fs.exists": "fs.existsSync / fs.promises.access",
+    "url.parse": "new URL()",
+    "util.isArray": "Array.isArray",
+    "util.isDate": "value instanceof Date",
+    "crypto.createCipher": "crypto.createCipheriv",
+    "crypto.createDecipher": "crypto.createDecipheriv",
+}
+
+# Deprecated Node.js constructors -> replacement
+JS_DEPRECATED_CONSTRUCTORS: Dict[str, str] = {
+    "Buffer": "Buffer.from / Buffer.alloc",
+}
+
+
+def _match_suffix(name: str, table: Dict[str, str]):
+    """Find the table entry whose key is ``name`` or a dotted suffix of it."""
+    for api, replacement in table.items():
+        if name == api or name.endswith("." + api):
+            return api, replacement
+    return None
+
+
+@register_rule
+class PythonDeprecatedApiRule(Rule):
+    """Calls to, and imports of, deprecated Python APIs."""
+
+    id = "python-deprecated-api"
+    languages = frozenset({Language.PYTHON})
+    node_types = ("call", "import_statement", "import_from_statement")
+
+    def visit(self, node, ctx: FileContext) -> None:
+        if node.type == "call":
+            function = node.child_by_field_name("function")
+            if function is None or function.type not in ("attribute", "identifier"):
+                return
+            match = _match_suffix(ctx.text(function), PYTHON_DEPRECATED_CALLS)
+            if match:
+                api, replacement = match
+                ctx.report(self, node, f"{api} is deprecated, use {replacement}",
+                           api=api, replacement=replacement)
+            return
+
+        if node.type == "import_statement":
+            modules = [
+                ctx.text(child.child_by_field_name("name") or child)
+                for child in node.named_children
+            ]
+            imported_names = []
+        else:
+            module_node = node.child_by_field_name("module_name")
+            modules = [ctx.text(module_node)] if module_node else []
+            imported_names = [
+                ctx.text(child.child_by_field_name("name") or child)
+                for child in node.children_by_field_name("name")
+            ]
+
+        for module in modules:
+            root = module.split(".")[0]
+            if root in PYTHON_DEPRECATED_MODULES:
+                replacement = PYTHON_DEPRECATED_MODULES[root]
+                ctx.report(self, node, f"Module {root} is deprecated, use {replacement}",
+                           api=root, replacement=replacement)
+            moved = PYTHON_MOVED_NAMES.get(module, {})
+            for name in imported_names:
+                if name in moved:
+                    api = f"{module}.{name}"
+                    ctx.report(self, node, f"{api} was moved, use {moved[name]}",
+                               api=api, replacement=moved[name])
+
+
+@register_rule
+class JavaScriptDeprecatedApiRule(Rule):
+    """Calls to deprecated Node.js APIs."""
+
+    id = "js-deprecated-api"
+    languages = frozenset({Language.JAVASCRIPT, Language.TYPESCRIPT})
+    node_types = ("call_expression", "new_expression")
+
+    def visit(self, node, ctx: FileContext) -> None:
+        if node.type == "new_expression":
+            constructor = node.child_by_field_name("constructor")
+            name = ctx.text(constructor) if constructor else ""
+            if name in JS_DEPRECATED_CONSTRUCTORS:
+                replacement = JS_DEPRECATED_CONSTRUCTORS[name]
+                ctx.report(self, node, f"new {name}() is deprecated, use {replacement}",
+                           api=f"new {name}", replacement=replacement)
+            return
+
+        function = node.child_by_field_name("function")
+        if function is None or function.type != "member_expression":
+            return
+        match = _match_suffix(ctx.text(function), JS_DEPRECATED_CALLS)
+        if match:
+            api, replacement = match
+            ctx.report(self, node, f"{api} is deprecated, use {replacement}",
+                       api=api, replacement=replacement)
@@ -0,0 +1,260 @@
+"""Churn, authorship and recency of files and symbols from git history."""
+import ast
+import math
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+# Reference time of decayed commit weights: 2020-01-01T00:00:00Z
+HEAT_EPOCH = 1577836800
+COMMIT_MARKER = b"\x1e"  # Starts the header line of each commit in the log
+_INFINITY = 1 << 62
+
+
+def git_log_command(revision_range: str, since_days: Optional[int] = None) -> List[str]:
+    """The ``git log`` invocation streamed by :func:`parse_log`.
+
+    Patches use no context lines, so each hunk header locates a change and
+    the diff lines themselves are skipped; line counts are those of
+    ``--numstat``. Renames are not followed and merges are left out, as
+    their changes already appear in the commits they merge.
+    """
+    command = [
+        "git", "-c", "core.quotepath=off", "log", "--no-merges", "--no-renames",
+        "--no-color", "--no-ext-diff", "--topo-order", "-p", "-U0",
+        f"--format={COMMIT_MARKER.decode()}%H %at %aE",
+    ]
+    if since_days:
+        command.append(f"--since={since_days}.days")
+    command.extend([revision_range, "--"])
+    return command
+
+
+class Hunk(NamedTuple):
+    """A changed region: ``old_count`` lines at ``old_start`` became ``new_count`` lines."""
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+
+
+class FileChange(NamedTuple):
+    """The changes of one commit to one file."""
+    path: str
+    hunks: List[Hunk]
+
+
+class Commit(NamedTuple):
+    """A commit with the files it changed."""
+    sha: str
+    timestamp: int
+    author: str
+    changes: List[FileChange]
+
+
+def parse_log(lines: Iterable[bytes]) -> Iterator[Commit]:
+    """Parse the output of :func:`git_log_command` one commit at a time."""
+    commit: Optional[Commit] = None
+    hunks: Optional[List[Hunk]] = None
+    for line in lines:
+        if line.startswith(COMMIT_MARKER):
+            if commit is not None:
+                yield commit
+            sha, timestamp, author = line[1:].decode("utf-8", "replace").split(" ", 2)
+            commit = Commit(sha, int(timestamp), author.strip().lower(), [])
+            hunks = None
+        elif line.startswith(b"@@ ") and hunks is not None:
+            old, new = line.split(b" ", 3)[1:3]
+            hunks.append(Hunk(*_hunk_range(old), *_hunk_range(new)))
+        elif line.startswith(b"diff --git ") and commit is not None:
+            hunks = []
+            commit.changes.append(FileChange(_diff_path(line), hunks))
+    if commit is not None:
+        yield commit
+
+
+def _hunk_range(text: bytes) -> Tuple[int, int]:
+    start, _, count = text[1:].partition(b",")
+    return int(start), int(count) if count else 1
+
+
+def _diff_path(line: bytes) -> str:
+    # "diff --git a/<path> b/<path>": without renames both paths are equal
+    names = line[len(b"diff --git "):].rstrip(b"\n").decode("utf-8", "replace")
+    if names.startswith('"'):
+        # Quoted when the path has control characters or quotes
+        quoted = names[:names.index('" "') + 1]
+        return ast.literal_eval(quoted).encode("latin-1").decode("utf-8", "replace")[2:]
+    return names[2:(len(names) - 1) // 2]
+
+
+class LineMap:
+    """Maps lines of an older version of a file to lines of the newest one.
+
+    Kept as sorted ``(start, end, offset)`` segments: line ``n`` of the
+    older version, with ``start <= n < end``, is line ``n + offset`` of the
+    newest version. Lines in no segment were changed or removed since.
+    """
+
+    __slots__ = ("segments",)
+
+    def __init__(self, segments: Optional[List[Tuple[int, int, int]]] = None):
+        self.segments = segments if segments is not None else [(1, _INFINITY, 0)]
+
+    def lookup(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Newest-version line ranges of the lines ``[start, end)``."""
+        ranges = []
+        for segment_start, segment_end, offset in self.segments:
+            if segment_start >= end:
+                break
+            low, high = max(start, segment_start), min(end, segment_end)
+            if low < high:
+                ranges.append((low + offset, high + offset))
+        return ranges
+
+    def before(self, hunks: List[Hunk]) -> "LineMap":
+        """The map of the version a commit with ``hunks`` was applied to."""
+        # Unchanged runs of the parent version and how far they moved
+        moved = []
+        parent, child = 1, 1
+        for hunk in hunks:
+            parent_end = hunk.old_start if hunk.old_count else hunk.old_start + 1
+            moved.append((parent, parent_end, child - parent))
+            parent = hunk.old_start + hunk.old_count if hunk.old_count else hunk.old_start + 1
+            child = hunk.new_start + hunk.new_count if hunk.new_count else hunk.new_start + 1
+        moved.append((parent, _INFINITY, child - parent))
+
+        segments = []
+        index = 0
+        for start, end, delta in moved:
+            if start >= end:
+                continue
+            # Parent lines [start, end) are child lines [start + delta, end + delta)
+            while index < len(self.segments) and self.segments[index][1] <= start + delta:
+                index += 1
+            position = index
+            while position < len(self.segments):
+                segment_start, segment_end, offset = self.segments[position]
+                if segment_start >= end + delta:
+                    break
+                low = max(start, segment_start - delta)
+                high = min(end, segment_end - delta)
+                if low < high:
+                    segments.append((low, high, delta + offset))
+                position += 1
+        return LineMap(segments)
+
+
+class ChurnTotals:
+    """Running churn of one file or symbol."""
+
+    __slots__ = ("commits", "added", "deleted", "authors", "last_commit_at", "heat")
+
+    def __init__(self):
+        self.commits = 0
+        self.added = 0
+        self.deleted = 0
+        self.authors: Set[str] = set()
+        self.last_commit_at = 0
+        self.heat = 0.0
+
+    def add(self, commit: Commit, added: int, deleted: int, half_life: float) -> None:
+        self.commits += 1
+        self.added += added
+        self.deleted += deleted
+        self.authors.add(commit.author)
+        self.last_commit_at = max(self.last_commit_at, commit.timestamp)
+        self.heat += commit_weight(commit.timestamp, half_life)
+
+
+def commit_weight(timestamp: int, half_life: float) -> float:
+    """Weight of a commit, halving every ``half_life`` seconds toward the past.
+
+    Weights are relative to a fixed epoch rather than to now, so totals
+    accumulated at different times add up; divide by ``commit_weight(now)``
+    to get the number of commits counted at full weight today.
+    """
+    return math.exp2((timestamp - HEAT_EPOCH) / half_life)
+
+
+class ChurnAggregator:
+    """Accumulates churn per file and per symbol while the log streams by.
+
+    Commits arrive newest first. Each file keeps a :class:`LineMap` from the
+    version being read back to the newest version, so a change made long
+    ago is attributed to the symbols that now hold its lines. Only paths
+    given in ``symbols`` (those present at the newest commit) are tracked.
+    """
+
+    def __init__(self, symbols: Dict[str, List[Tuple[str, int, int]]], half_life: float):
+        self.half_life = half_life
+        self.files: Dict[str, ChurnTotals] = {}
+        self.symbols: Dict[Tuple[str, str], ChurnTotals] = {}
+        self.head: Optional[str] = None
+        self.commits = 0
+        self._symbols = {
+            path: (
+                [name for name, _, _ in entries],
+                np.array([line for _, line, _ in entries], dtype=np.int64),
+                np.array([end_line for _, _, end_line in entries], dtype=np.int64)
+            )
+            for path, entries in symbols.items()
+        }
+        self._line_maps: Dict[str, LineMap] = {}
+
+    def add(self, commit: Commit) -> None:
+        """Account for one commit, older than every commit added before."""
+        if self.head is None:
+            self.head = commit.sha
+        self.commits += 1
+        for change in commit.changes:
+            if change.path not in self._symbols:
+                continue
+            added = sum(hunk.new_count for hunk in change.hunks)
+            deleted = sum(hunk.old_count for hunk in change.hunks)
+            totals = self.files.get(change.path)
+            if totals is None:
+                totals = self.files[change.path] = ChurnTotals()
+            totals.add(commit, added, deleted, self.half_life)
+            if change.hunks:
+                self._add_to_symbols(commit, change)
+
+    def _add_to_symbols(self, commit: Commit, change: FileChange) -> None:
+        names, starts, ends = self._symbols[change.path]
+        line_map = self._line_maps.get(change.path) or LineMap()
+        if names:
+            added = np.zeros(len(names), dtype=np.int64)
+            deleted = np.zeros(len(names), dtype=np.int64)
+            for hunk in change.hunks:
+                # A pure deletion is placed on the line it happened after
+                start = hunk.new_start if hunk.new_count else max(hunk.new_start, 1)
+                for low, high in line_map.lookup(start, start + max(hunk.new_count, 1)):
+                    overlaps = (starts < high) & (ends >= low)
+                    lines = np.minimum(ends + 1, high) - np.maximum(starts, low)
+                    if hunk.new_count:
+                        added += np.where(overlaps, lines, 0)
+                    deleted += np.where(overlaps, hunk.old_count, 0)
+            for index in np.flatnonzero(added + deleted):
+                key = (change.path, names[index])
+                totals = self.symbols.get(key)
+                if totals is None:
+                    totals = self.symbols[key] = ChurnTotals()
+                totals.add(commit, int(added[index]), int(deleted[index]), self.half_life)
+        self._line_maps[change.path] = line_map.before(change.hunks)
+
+
+def heat_now(heat: float, half_life: float, now: Optional[float] = None) -> float:
+    """Decayed commit count of accumulated ``heat`` as of ``now`` (default: the current time)."""
+    return heat / commit_weight(int(now if now is not None else time.time()), half_life)
+
+
+def hotness(heat: np.ndarray) -> np.ndarray:
+    """Decayed commit counts scaled to [0, 1] against the hottest entry, on a log scale.
+
+    Churn is heavy-tailed: a log scale keeps warm files distinguishable
+    from cold ones instead of crushing everything but the top few to zero.
+    """
+    if not len(heat) or heat.max() <= 0:
+        return np.zeros(len(heat))
+    return np.log1p(heat) / np.log1p(heat.max())
@@ -0,0 +1,191 @@
+"""Import extraction and the repository import graph."""
+import posixpath
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..models.core import Language
+from .parsing import LANGUAGE_EXTENSIONS, language_for_path, node_text, parse
+
+PYTHON_IMPORT_NODES = ("import_statement", "import_from_statement")
+JS_IMPORT_NODES = ("import_statement", "export_statement", "call_expression")
+
+
+def extract_imports(source: bytes, language: Language, tree=None) -> List[str]:
+    """Get the raw import specifiers of a file, in order of appearance.
+
+    Python modules are reported as dotted names, keeping the leading dots of
+    relative imports, and ``from a import b`` reports both ``a`` and ``a.b``
+    since ``b`` may be a submodule. JavaScript and TypeScript modules are
+    reported as written in ``import``, ``export ... from`` and ``require()``.
+    Pass ``tree`` to reuse a syntax tree parsed by the caller.
+    """
+    if language == Language.PYTHON:
+        node_types, handler = PYTHON_IMPORT_NODES, _python_imports
+    elif language in (Language.JAVASCRIPT, Language.TYPESCRIPT):
+        node_types, handler = JS_IMPORT_NODES, _js_imports
+    else:
+        return []
+
+    if tree is None:
+        tree = parse(source, language)
+    if tree is None:
+        return []
+
+    specifiers: List[str] = []
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type in node_types:
+            handler(node, source, specifiers)
+        stack.extend(reversed(node.named_children))
+    # Keep the first occurrence of each specifier
+    return list(dict.fromkeys(specifiers))
+
+
+def _python_imports(node, source: bytes, specifiers: List[str]) -> None:
+    if node.type == "import_statement":
+        for child in node.named_children:
+            name = child.child_by_field_name("name") or child
+            specifiers.append(node_text(name, source))
+        return
+
+    module_node = node.child_by_field_name("module_name")
+    if module_node is None:
+        return
+    module = node_text(module_node, source)
+    specifiers.append(module)
+    separator = "" if module.endswith(".") else "."
+    for child in node.children_by_field_name("name"):
+        name = child.child_by_field_name("name") or child
+        specifiers.append(f"{module}{separator}{node_text(name, source)}")
+
+
+def _js_imports(node, source: bytes, specifiers: List[str]) -> None:
+    if node.type == "call_expression":
+        function = node.child_by_field_name("function")
+        if function is None or node_text(function, source) not in ("require", "import"):
+            return
+        arguments = node.child_by_field_name("arguments")
+        if arguments is None or not arguments.named_children:
+            return
+        source_node = arguments.named_children[0]
+    else:
+        source_node = node.child_by_field_name("source")
+
+    if source_node is not None and source_node.type == "string":
+        specifiers.append(node_text(source_node, source)[1:-1])
+
+
+def python_module_name(path: str) -> str:
+    """Get the dotted module name of a Python file path."""
+    module = posixpath.splitext(path)[0].replace("/", ".")
+    if module == "__init__":
+        return ""
+    if module.endswith(".__init__"):
+        module = module[:-len(".__init__")]
+    return module
+
+
+class ImportGraph:
+    """File-level import edges between the paths of one manifest.
+
+    Specifiers are resolved against the files of the manifest only, so
+    imports of the standard library or third-party packages have no edge.
+    """
+
+    def __init__(self, edges: Dict[str, Set[str]]):
+        self.edges = edges  # path -> paths it imports
+        self.reverse: Dict[str, Set[str]] = {}
+        for path, targets in edges.items():
+            for target in targets:
+                self.reverse.setdefault(target, set()).add(path)
+
+    @classmethod
+    def build(cls, entries: Dict[str, str], imports: Dict[str, List[str]]) -> "ImportGraph":
+        """Build the graph of a manifest from the import specifiers of its blobs."""
+        modules: Dict[str, str] = {}
+        for path in entries:
+            if language_for_path(path) == Language.PYTHON:
+                modules[python_module_name(path)] = path
+        resolver = _Resolver(set(entries), modules)
+
+        edges = {}
+        for path, blob_sha in entries.items():
+            targets = set()
+            for specifier in imports.get(blob_sha, ()):
+                target = resolver.resolve(path, specifier)
+                if target is not None and target != path:
+                    targets.add(target)
+            if targets:
+                edges[path] = targets
+        return cls(edges)
+
+    def dependents(self, paths: Iterable[str]) -> Set[str]:
+        """Get ``paths`` and every file that imports them, directly or transitively."""
+        seen = set(paths)
+        queue = deque(seen)
+        while queue:
+            for importer in self.reverse.get(queue.popleft(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    queue.append(importer)
+        return seen
+
+
+class _Resolver:
+    """Resolves import specifiers to the paths of a manifest."""
+
+    def __init__(self, paths: Set[str], modules: Dict[str, str]):
+        self.paths = paths
+        self.modules = modules
+        # Last-component index for absolute imports of packages below a
+        # source root such as ``src/``
+        self._by_suffix: Dict[str, List[str]] = {}
+        for module in modules:
+            self._by_suffix.setdefault(module.rsplit(".", 1)[-1], []).append(module)
+
+    def resolve(self, path: str, specifier: str) -> Optional[str]:
+        language = language_for_path(path)
+        if language == Language.PYTHON:
+            return self._resolve_python(path, specifier)
+        if language in (Language.JAVASCRIPT, Language.TYPESCRIPT):
+            return self._resolve_js(path, specifier)
+        return None
+
+    def _resolve_python(self, path: str, specifier: str) -> Optional[str]:
+        if specifier.startswith("."):
+            level = len(specifier) - len(specifier.lstrip("."))
+            package = python_module_name(path).split(".")
+            if not path.endswith("__init__.py"):
+                package = package[:-1]
+            if level - 1 > len(package):
+                return None
+            base = package[:len(package) - (level - 1)]
+            rest = specifier[level:]
+            module = ".".join(base + ([rest] if rest else []))
+            return self.modules.get(module)
+
+        if specifier in self.modules:
+            return self.modules[specifier]
+        candidates = [
+            module
+            for module in self._by_suffix.get(specifier.rsplit(".", 1)[-1], ())
+            if module.endswith("." + specifier)
+        ]
+        return self.modules[candidates[0]] if len(candidates) == 1 else None
+
+    def _resolve_js(self, path: str, specifier: str) -> Optional[str]:
+        if not specifier.startswith("."):
+            return None
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(path), specifier))
+        extensions = (
+            LANGUAGE_EXTENSIONS[Language.JAVASCRIPT] + LANGUAGE_EXTENSIONS[Language.TYPESCRIPT]
+        )
+        for candidate in (
+            [base]
+            + [base + ext for ext in extensions]
+            + [f"{base}/index{ext}" for ext in extensions]
+        ):
+            if candidate in self.paths:
+                return candidate
+        return None
@@ -0,0 +1,446 @@
+"""Rules finding work repeated on every iteration of a loop.
+
+Three patterns are reported: database queries issued once per iteration
+(N+1 queries), expensive calls whose arguments do not change between
+iterations, and membership tests scanning a list. Each finding carries an
+estimated cost multiplier: how many times more work the loop does than
+the batched, hoisted or hashed version would, assuming every loop runs
+``ASSUMED_ITERATIONS`` times.
+
+Calls made in loops are followed one level deep: a call to a function
+that issues a query is reported as a query in the loop. Functions of the
+same file are resolved here; calls to functions of other files are
+reported as ``loop_call`` facts, next to the ``query_function`` facts of
+each file, and resolved against the symbols of imported files by the miner.
+"""
+import builtins
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from ..models.core import Language
+from .rules import FileContext, Rule, register_rule
+from .symbols import SYMBOL_NODES, symbol_nodes
+
+ASSUMED_ITERATIONS = 100  # Iterations of a loop, and length of a list, for cost estimates
+MAX_COST_DEPTH = 3  # Loop nesting counted in cost estimates
+
+LOOP_NODES = frozenset({
+    "for_statement", "for_in_statement", "while_statement", "do_statement",
+    "list_comprehension", "set_comprehension", "dictionary_comprehension",
+    "generator_expression",
+})
+# Loop fields evaluated once, before the first iteration
+LOOP_ONCE_FIELDS = frozenset({"right", "initializer"})
+
+NAMED_FUNCTIONS = frozenset({
+    "function_definition", "function_declaration", "generator_function_declaration",
+    "method_definition",
+})
+CALLBACKS = frozenset({
+    "lambda", "arrow_function", "function_expression", "function", "generator_function",
+})
+# Methods calling their callback argument once per element
+ITERATION_METHODS = frozenset({
+    "forEach", "map", "flatMap", "filter", "reduce", "some", "every", "find", "findIndex",
+})
+
+CALLS = frozenset({"call", "call_expression", "new_expression"})
+ASSIGNMENTS = frozenset({"assignment", "variable_declarator", "assignment_expression"})
+
+# Methods issuing a database round trip on any receiver
+QUERY_METHODS = frozenset({"execute", "query", "raw", "scalar", "scalars"})
+# Methods issuing a query on an ORM manager, model or session
+ORM_METHODS = frozenset({
+    "get", "filter", "filter_by", "exclude", "all", "first", "last", "one", "one_or_none",
+    "count", "exists", "create", "update", "delete", "get_or_create", "update_or_create",
+    "aggregate", "values", "values_list", "merge", "refresh",
+    "findOne", "findAll", "findByPk", "findById", "find", "findUnique", "findFirst",
+    "findMany", "countDocuments", "findOneAndUpdate", "upsert",
+})
+# Receivers the ORM methods are recognized on, by the end of their dotted name
+ORM_RECEIVERS = (".objects", ".query")
+# Methods of SQLAlchemy sessions issuing a query, besides the query methods
+SESSION_METHODS = frozenset({"get", "merge", "refresh"})
+# Modules whose import makes ``session`` receivers SQLAlchemy sessions; HTTP
+# clients (requests, aiohttp) name theirs sessions too
+SQLALCHEMY_MODULES = frozenset({"sqlalchemy", "flask_sqlalchemy", "sqlmodel"})
+
+# Calls expensive enough to hoist out of a loop when their arguments do not change
+EXPENSIVE_CALLS = frozenset({
+    "re.compile", "json.loads", "json.load", "yaml.safe_load", "yaml.load",
+    "copy.deepcopy", "os.listdir", "os.walk", "glob.glob", "open", "sorted", "set",
+    "JSON.parse", "RegExp", "fs.readFileSync", "fs.readdirSync", "structuredClone",
+})
+
+# Methods scanning a list element by element
+LIST_SCANS = {
+    Language.PYTHON: frozenset({"index", "count", "remove"}),
+    Language.JAVASCRIPT: frozenset({"includes", "indexOf", "find", "findIndex"}),
+}
+LIST_SCANS[Language.TYPESCRIPT] = LIST_SCANS[Language.JAVASCRIPT]
+LIST_VALUES = frozenset({"list", "list_comprehension", "array"})
+LIST_CONSTRUCTORS = frozenset({
+    "list", "sorted", "Array.from", "map", "filter", "slice", "concat", "Object.keys",
+    "Object.values",
+})
+
+# Names never resolved to functions of the repository
+BUILTIN_NAMES = frozenset(dir(builtins)) | frozenset({
+    "require", "parseInt", "parseFloat", "setTimeout", "setInterval", "console",
+    "Promise", "Object", "Array", "String", "Number", "Boolean", "Math", "Date",
+})
+
+# Relative cost of one unnecessary operation, to rank findings of different kinds
+OPERATION_COSTS = {"query_in_loop": 1000, "invariant_call": 10, "list_scan": 1}
+
+
+def cost_multiplier(kind: str, depth: int) -> int:
+    """Estimated ratio of the work done by a pattern to the work needed."""
+    if kind == "list_scan":
+        return ASSUMED_ITERATIONS  # A hashed lookup replaces a scan of the whole list
+    return ASSUMED_ITERATIONS ** min(depth, MAX_COST_DEPTH)
+
+
+def _callee_name(callee, ctx: FileContext) -> str:
+    """Dotted name of a callee, or "" when it is not a plain name or attribute chain."""
+    if callee is not None and callee.type in ("identifier", "attribute", "member_expression"):
+        return ctx.text(callee)
+    return ""
+
+
+def _member(callee):
+    """Receiver and member name nodes of an attribute callee."""
+    return callee.child_by_field_name("object"), (
+        callee.child_by_field_name("attribute") or callee.child_by_field_name("property")
+    )
+
+
+def _imports_sqlalchemy(root, ctx: FileContext) -> bool:
+    """Whether a Python module imports SQLAlchemy at its top level."""
+    for node in root.named_children:
+        if node.type == "import_from_statement":
+            modules = [node.child_by_field_name("module_name")]
+        elif node.type == "import_statement":
+            modules = node.children_by_field_name("name")
+        else:
+            continue
+        for module in modules:
+            if module is not None and ctx.text(module).split()[0].split(".")[0] in (
+                SQLALCHEMY_MODULES
+            ):
+                return True
+    return False
+
+
+def _query_call(callee, ctx: FileContext, sqlalchemy: bool = False) -> Optional[str]:
+    """The query a call issues, if it looks like a database call.
+
+    ``session`` receivers are only SQLAlchemy sessions in files importing
+    SQLAlchemy (``sqlalchemy``), or as Flask-SQLAlchemy's ``db.session``.
+    """
+    if callee is None or callee.type not in ("attribute", "member_expression"):
+        return None
+    receiver, member = _member(callee)
+    if receiver is None or member is None:
+        return None
+    method = ctx.text(member)
+    if method in QUERY_METHODS:
+        return ctx.text(callee)
+    if method not in ORM_METHODS or receiver.type not in (
+        "identifier", "attribute", "member_expression"
+    ):
+        return None
+    receiver_name = ctx.text(receiver)
+    if receiver_name.endswith(ORM_RECEIVERS) or receiver_name.startswith("prisma."):
+        return ctx.text(callee)
+    if method in SESSION_METHODS and receiver_name.endswith("session") and (
+        sqlalchemy or receiver_name.endswith("db.session")
+    ):
+        return ctx.text(callee)
+    # JavaScript models: User.findOne(...)
+    if ctx.language != Language.PYTHON and receiver.type == "identifier" and (
+        receiver_name[:1].isupper() and method != "get"
+    ):
+        return ctx.text(callee)
+    return None
+
+
+def _identifiers(node, ctx: FileContext) -> Set[str]:
+    """Texts of the identifiers of a subtree."""
+    names = set()
+    cursor = node.walk()
+    while True:
+        if cursor.node.type in ("identifier", "shorthand_property_identifier"):
+            names.add(ctx.text(cursor.node))
+        elif cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent() or cursor.node == node:
+                return names
+
+
+class _Scope(NamedTuple):
+    """Function and loops enclosing a node, innermost loop first."""
+    function: str
+    loops: List[object]
+
+
+@register_rule
+class LoopCostRule(Rule):
+    """Queries, invariant calls and list scans repeated on every loop iteration."""
+
+    id = "loop-cost"
+    version = "2"
+    languages = frozenset({Language.PYTHON, Language.JAVASCRIPT, Language.TYPESCRIPT})
+    node_types = (*sorted(CALLS), *sorted(ASSIGNMENTS), "comparison_operator")
+
+    def begin_file(self, ctx: FileContext) -> None:
+        ctx.state[self.id] = []
+
+    def visit(self, node, ctx: FileContext) -> None:
+        ctx.state[self.id].append(node)
+
+    def end_file(self, ctx: FileContext) -> None:
+        nodes = ctx.state.pop(self.id)
+        if not nodes:
+            return
+        _FileLoops(self, ctx, nodes).run()
+
+
+class _FileLoops:
+    """Loop cost analysis of one file."""
+
+    def __init__(self, rule: LoopCostRule, ctx: FileContext, nodes: List[object]):
+        self.rule = rule
+        self.ctx = ctx
+        self.nodes = nodes
+        root = nodes[0]
+        while root.parent is not None:
+            root = root.parent
+
+        # Qualified names of the file's functions, as in the symbol index
+        self.functions: Dict[int, str] = {}
+        for name, kind, node in symbol_nodes(root, ctx.source, SYMBOL_NODES[ctx.language]):
+            if kind == "class":
+                continue
+            if node.type == "variable_declarator":
+                node = node.child_by_field_name("value")
+            self.functions[node.id] = name
+        self.local: Dict[str, str] = {}
+        for name in self.functions.values():
+            self.local.setdefault(name.rsplit(".", 1)[-1], name)
+
+        self.sqlalchemy = ctx.language == Language.PYTHON and _imports_sqlalchemy(root, ctx)
+        self.bound: Dict[int, Set[str]] = {}  # Loop node ID -> names bound in the loop
+        self.assigned: Dict[str, Dict[str, bool]] = {}  # Function -> local name -> holds a list
+
+    def run(self) -> None:
+        scopes = {node.id: self._scope(node) for node in self.nodes}
+        for node in self.nodes:
+            if node.type in ASSIGNMENTS:
+                self._record_assignment(node, scopes[node.id])
+
+        query_functions: Dict[str, Tuple[object, str]] = {}
+        loop_calls = []
+        for node in self.nodes:
+            scope = scopes[node.id]
+            if node.type == "comparison_operator":
+                if scope.loops:
+                    self._check_membership(node, scope)
+                continue
+            if node.type not in CALLS:
+                continue
+
+            callee = node.child_by_field_name("function") or node.child_by_field_name("constructor")
+            query = _query_call(callee, self.ctx, self.sqlalchemy)
+            if query is not None:
+                if scope.function != "<module>":
+                    query_functions.setdefault(scope.function, (node, query))
+                if scope.loops:
+                    self._report_query(node, scope, query)
+            elif scope.loops and callee is not None:
+                self._check_call(node, callee, scope, loop_calls)
+
+        for node, scope, name in loop_calls:
+            qualified = self.local.get(name)
+            if qualified is not None:
+                if qualified in query_functions and qualified != scope.function:
+                    self._report_query(node, scope, query_functions[qualified][1], via=qualified)
+            elif name not in BUILTIN_NAMES:
+                self.ctx.report(
+                    self.rule, node, f"{name} called in a loop",
+                    kind="loop_call", callee=name, function=scope.function,
+                    depth=len(scope.loops)
+                )
+        for function, (node, query) in query_functions.items():
+            self.ctx.report(
+                self.rule, node, f"{function} issues {query}",
+                kind="query_function", function=function,
+                name=function.rsplit(".", 1)[-1], query=query
+            )
+
+    def _scope(self, node) -> _Scope:
+        """Find the function and the loops a node runs in."""
+        loops = []
+        child, parent = node, node.parent
+        while parent is not None:
+            if parent.type in LOOP_NODES:
+                field = parent.field_name_for_child(
+                    next(i for i, c in enumerate(parent.children) if c == child)
+                ) if parent.type in ("for_statement", "for_in_statement") else None
+                if field not in LOOP_ONCE_FIELDS:
+                    loops.append(parent)
+            elif parent.type in NAMED_FUNCTIONS or parent.id in self.functions:
+                return _Scope(self.functions.get(parent.id, "<anonymous>"), loops)
+            elif parent.type in CALLBACKS and self._is_iteration_callback(parent):
+                loops.append(parent)
+            child, parent = parent, parent.parent
+        return _Scope("<module>", loops)
+
+    def _is_iteration_callback(self, function) -> bool:
+        """Whether a function is passed to a method calling it once per element."""
+        arguments = function.parent
+        if arguments is None or arguments.type != "arguments" or arguments.parent is None:
+            return False
+        callee = arguments.parent.child_by_field_name("function")
+        if callee is None or callee.type != "member_expression":
+            return False
+        _, member = _member(callee)
+        return member is not None and self.ctx.text(member) in ITERATION_METHODS
+
+    def _bound_names(self, loop) -> Set[str]:
+        """Names assigned within a loop, including its iteration variables."""
+        if loop.id in self.bound:
+            return self.bound[loop.id]
+        names: Set[str] = set()
+        if loop.type in CALLBACKS:
+            parameters = loop.child_by_field_name("parameters") or loop.child_by_field_name(
+                "parameter"
+            )
+            if parameters is not None:
+                names |= _identifiers(parameters, self.ctx)
+        cursor = loop.walk()
+        while True:
+            node = cursor.node
+            target = None
+            if node.type in ("assignment", "augmented_assignment", "assignment_expression",
+                             "augmented_assignment_expression", "for_statement",
+                             "for_in_statement", "for_in_clause"):
+                target = node.child_by_field_name("left")
+            elif node.type in ("variable_declarator", "named_expression"):
+                target = node.child_by_field_name("name")
+            elif node.type == "update_expression":
+                target = node.child_by_field_name("argument")
+            if target is not None:
+                names |= _identifiers(target, self.ctx)
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent() or cursor.node == loop:
+                    self.bound[loop.id] = names
+                    return names
+
+    def _invariant_levels(self, node, scope: _Scope) -> int:
+        """How many enclosing loops, innermost first, a node does not depend on."""
+        used = _identifiers(node, self.ctx)
+        levels = 0
+        for loop in scope.loops:
+            if used & self._bound_names(loop):
+                break
+            levels += 1
+        return levels
+
+    def _record_assignment(self, node, scope: _Scope) -> None:
+        """Track which names of a function hold lists."""
+        if node.type == "variable_declarator":
+            target, value = node.child_by_field_name("name"), node.child_by_field_name("value")
+        else:
+            target, value = node.child_by_field_name("left"), node.child_by_field_name("right")
+        if target is None or value is None or target.type != "identifier":
+            return
+        holds_list = value.type in LIST_VALUES
+        if value.type in CALLS:
+            name = _callee_name(value.child_by_field_name("function"), self.ctx)
+            holds_list = name in LIST_CONSTRUCTORS or name.rsplit(".", 1)[-1] in (
+                "map", "filter", "slice", "concat"
+            )
+        names = self.assigned.setdefault(scope.function, {})
+        name = self.ctx.text(target)
+        names[name] = names.get(name, True) and holds_list
+
+    def _holds_list(self, node, scope: _Scope) -> bool:
+        if node.type == "list_comprehension":
+            return True
+        return node.type == "identifier" and self.assigned.get(scope.function, {}).get(
+            self.ctx.text(node), False
+        )
+
+    def _check_membership(self, node, scope: _Scope) -> None:
+        """Report ``x in some_list`` tests in loops."""
+        operators = [child.type for child in node.children if not child.is_named]
+        operands = node.named_children
+        if operators not in (["in"], ["not in"]) or len(operands) != 2:
+            return
+        if self._holds_list(operands[1], scope):
+            self._report_scan(node, scope, self.ctx.text(operands[1]))
+
+    def _check_call(self, node, callee, scope: _Scope, loop_calls: list) -> None:
+        """Check a non-query call made in a loop."""
+        name = _callee_name(callee, self.ctx)
+        if not name:
+            return
+        method = name.rsplit(".", 1)[-1]
+        if name in EXPENSIVE_CALLS or ".".join(name.split(".")[-2:]) in EXPENSIVE_CALLS:
+            levels = self._invariant_levels(node, scope)
+            if levels:
+                self._report(
+                    node, scope, "invariant_call",
+                    f"{name}() gets the same arguments on every iteration; hoist it out of "
+                    "the loop", call=name, depth=levels
+                )
+            return
+
+        if callee.type in ("attribute", "member_expression"):
+            receiver, _ = _member(callee)
+            if receiver is None:
+                return
+            if method in LIST_SCANS.get(self.ctx.language, ()) and self._holds_list(
+                receiver, scope
+            ):
+                self._report_scan(node, scope, self.ctx.text(receiver))
+                return
+            if receiver.type not in ("identifier", "this"):
+                return
+            # Methods of local values (lists, strings, loop items) are not repository code
+            receiver_name = self.ctx.text(receiver)
+            if receiver_name in self.assigned.get(scope.function, {}) or any(
+                receiver_name in self._bound_names(loop) for loop in scope.loops
+            ):
+                return
+        loop_calls.append((node, scope, method))
+
+    def _report_query(self, node, scope: _Scope, query: str, via: Optional[str] = None) -> None:
+        depth = len(scope.loops)
+        invariant = self._invariant_levels(node, scope) == depth
+        where = f" through {via}" if via else ""
+        advice = (
+            "issues the same query on every iteration; run it once before the loop"
+            if invariant else "issues one query per iteration; batch or eager-load it"
+        )
+        self._report(
+            node, scope, "query_in_loop", f"{query}{where} {advice}",
+            call=query, depth=depth, via=via, invariant=invariant
+        )
+
+    def _report_scan(self, node, scope: _Scope, container: str) -> None:
+        self._report(
+            node, scope, "list_scan",
+            f"Each iteration scans the list {container}; use a set or dict for lookups",
+            call=container, depth=len(scope.loops)
+        )
+
+    def _report(self, node, scope: _Scope, kind: str, message: str, **metadata) -> None:
+        metadata.setdefault("via", None)
+        self.ctx.report(
+            self.rule, node, message, kind=kind, function=scope.function,
+            cost_multiplier=cost_multiplier(kind, metadata["depth"]), **metadata
+        )
@@ -0,0 +1,40 @@
+"""Ranking of opportunities within a repository and across the fleet."""
+from typing import Union
+
+import numpy as np
+
+from ..models.core import Opportunity
+
+# How much churn hotness raises an opportunity above others of equal priority
+HOTNESS_WEIGHT = 0.5
+PRIORITY_LEVELS = 10  # Priorities run from 1, the most urgent, to this
+# Bump whenever the formulas below change, so stored values are recomputed
+RANKING_VERSION = "1"
+
+Number = Union[float, np.ndarray]
+
+
+def hotness_of(opportunity: Opportunity) -> float:
+    """Churn hotness of the hottest file an opportunity affects, 0 without history."""
+    churn = opportunity.metadata.get("churn") or {}
+    return churn.get("hotness", 0.0)
+
+
+def rank_scores(confidence: Number, hotness: Number) -> Number:
+    """Rank within a priority: confidence, weighted toward hot code."""
+    return confidence * (1 + HOTNESS_WEIGHT * hotness)
+
+
+def ranking_score(opportunity: Opportunity) -> float:
+    """The :func:`rank_scores` of one opportunity."""
+    return rank_scores(opportunity.confidence, hotness_of(opportunity))
+
+
+def fleet_values(priority: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Value of opportunities across repositories, highest first.
+
+    Priority always dominates and the rank score orders opportunities of
+    equal priority, as within a repository; scores are scaled below 1 so
+    the two fold into one column that a single index can serve.
+    """
+    return (PRIORITY_LEVELS + 1 - priority) + scores / (1 + HOTNESS_WEIGHT)
@@ -0,0 +1,219 @@
+"""Single-traversal rule engine for syntax-tree detectors.
+
+Rules declare the node types they care about. The engine compiles every
+enabled rule into one dispatch table per language keyed by node type, so
+each file is parsed and walked exactly once no matter how many rules run,
+and files are spread over a process pool.
+"""
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from ..models.core import Language
+from ..utils.logging import get_logger
+from .parsing import node_text, parse
+
+logger = get_logger(__name__)
+
+
+class SourceFile(NamedTuple):
+    """A file handed to the engine."""
+    path: str
+    language: Language
+    source: bytes
+
+
+class RuleFinding(NamedTuple):
+    """A match reported by a rule."""
+    rule_id: str
+    path: str
+    line: int  # 1-based
+    end_line: int
+    message: str
+    metadata: Dict[str, Any]
+
+
+class FileContext:
+    """Per-file state shared by all rules during a traversal."""
+
+    def __init__(self, file: SourceFile):
+        self.path = file.path
+        self.language = file.language
+        self.source = file.source
+        self.findings: List[RuleFinding] = []
+        # Scratch space for rules, keyed by rule ID
+        self.state: Dict[str, Any] = {}
+
+    def text(self, node) -> str:
+        """Get the source text of a node."""
+        return node_text(node, self.source)
+
+    def report(self, rule: "Rule", node, message: str, **metadata: Any) -> None:
+        """Record a finding at a node."""
+        self.findings.append(RuleFinding(
+            rule_id=rule.id,
+            path=self.path,
+            line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            message=message,
+            metadata=metadata
+        ))
+
+
+class Rule(ABC):
+    """A syntax rule run as part of the shared traversal.
+
+    ``visit`` is called for every node whose type is listed in
+    ``node_types``. Rules must keep per-file state in ``FileContext.state``
+    so one instance can serve many files.
+    """
+
+    id: str = ""
+    version: str = "1"
+    languages: FrozenSet[Language] = frozenset()
+    node_types: Tuple[str, ...] = ()
+
+    def begin_file(self, ctx: FileContext) -> None:
+        """Called before the traversal of a file."""
+
+    @abstractmethod
+    def visit(self, node, ctx: FileContext) -> None:
+        """Called for each node of one of ``node_types``."""
+
+    def end_file(self, ctx: FileContext) -> None:
+        """Called after the traversal of a file."""
+
+
+# Available rules by ID
+RULES: Dict[str, Type[Rule]] = {}
+
+
+def register_rule(rule_class: Type[Rule]) -> Type[Rule]:
+    """Class decorator registering a rule under its ID."""
+    RULES[rule_class.id] = rule_class
+    return rule_class
+
+
+def rules_version(rules: Iterable["Rule"]) -> str:
+    """Identifier of a set of rules, changing whenever a rule is added or bumped."""
+    return ",".join(sorted(f"{rule.id}@{rule.version}" for rule in rules))
+
+
+class RuleEngine:
+    """Runs a set of rules over files with one traversal per file."""
+
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        max_workers: Optional[int] = None,
+        min_parallel_files: int = 32
+    ):
+        self.rules = list(rules)
+        self.max_workers = max_workers
+        self.min_parallel_files = min_parallel_files
+        self._dispatch: Dict[Language, Dict[str, Tuple[Callable, ...]]] = {}
+        self._rules_by_language: Dict[Language, List[Rule]] = {}
+
+        for language in Language:
+            rules_for_language = [rule for rule in self.rules if language in rule.languages]
+            if not rules_for_language:
+                continue
+            table: Dict[str, List[Callable]] = {}
+            for rule in rules_for_language:
+                for node_type in rule.node_types:
+                    table.setdefault(node_type, []).append(rule.visit)
+            self._dispatch[language] = {
+                node_type: tuple(visitors) for node_type, visitors in table.items()
+            }
+            self._rules_by_language[language] = rules_for_language
+
+    @classmethod
+    def from_rule_ids(cls, rule_ids: Optional[Iterable[str]] = None, **kwargs) -> "RuleEngine":
+        """Build an engine from registered rule IDs (all registered rules by default)."""
+        rule_ids = list(RULES) if rule_ids is None else list(rule_ids)
+        return cls([RULES[rule_id]() for rule_id in rule_ids], **kwargs)
+
+    @property
+    def version(self) -> str:
+        """Identifier of the rule set, changing whenever a rule is added or bumped."""
+        return rules_version(self.rules)
+
+    def supports(self, language: Language) -> bool:
+        """Whether any enabled rule applies to a language."""
+        return language in self._dispatch
+
+    def analyze(self, file: SourceFile) -> List[RuleFinding]:
+        """Parse one file and run every applicable rule in a single traversal."""
+        dispatch = self._dispatch.get(file.language)
+        if not dispatch:
+            return []
+
+        try:
+            tree = parse(file.source, file.language)
+            if tree is None:
+                return []
+
+            ctx = FileContext(file)
+            rules = self._rules_by_language[file.language]
+            for rule in rules:
+                rule.begin_file(ctx)
+
+            cursor = tree.walk()
+            descend = True
+            while True:
+                if descend:
+                    node = cursor.node
+                    visitors = dispatch.get(node.type)
+                    if visitors:
+                        for visit in visitors:
+                            visit(node, ctx)
+                    if cursor.goto_first_child():
+                        continue
+                if cursor.goto_next_sibling():
+                    descend = True
+                    continue
+                if not cursor.goto_parent():
+                    break
+                descend = False
+
+            for rule in rules:
+                rule.end_file(ctx)
+            return ctx.findings
+        except Exception as e:
+            logger.error(f"Rule analysis failed for {file.path}", error=str(e))
+            return []
+
+    def analyze_files(self, files: Iterable[SourceFile]) -> List[RuleFinding]:
+        """Analyze many files, across a process pool when there are enough of them."""
+        files = [file for file in files if file.language in self._dispatch]
+        workers = self.max_workers or os.cpu_count() or 1
+
+        findings: List[RuleFinding] = []
+        if workers <= 1 or len(files) < self.min_parallel_files:
+            for file in files:
+                findings.extend(self.analyze(file))
+            return findings
+
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.rules,)
+        ) as executor:
+            for file_findings in executor.map(_analyze_in_worker, files, chunksize=chunksize):
+                findings.extend(file_findings)
+        return findings
+
+
+# Engine instance of each pool worker, built once from the pickled rules
+_worker_engine: Optional[RuleEngine] = None
+
+
+def _init_worker(rules: List[Rule]) -> None:
+    global _worker_engine
+    _worker_engine = RuleEngine(rules, max_workers=1)
+
+
+def _analyze_in_worker(file: SourceFile) -> List[RuleFinding]:
+    return _worker_engine.analyze(file)
@@ -0,0 +1,70 @@
+"""MinHash signatures and LSH banding for near-duplicate code detection."""
+import hashlib
+import zlib
+from typing import List, Sequence
+
+import numpy as np
+
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16  # 8 rows per band: pairs above ~0.7 Jaccard usually share a band
+SHINGLE_SIZE = 5
+MIN_SIGNATURE_TOKENS = 40  # Shorter functions are too generic to call copies
+DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard similarity reported as a copy
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are persisted and must stay comparable across runs
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+
+def shingle_hashes(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the distinct ``size``-token windows of a token sequence."""
+    count = max(1, len(tokens) - size + 1)
+    hashes = {zlib.crc32("\0".join(tokens[i:i + size]).encode()) for i in range(count)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash(tokens: Sequence[str]) -> List[int]:
+    """MinHash signature of the token shingles of a code fragment.
+
+    Each permutation is a universal hash ``(a * x + b) mod p`` evaluated for
+    every shingle at once; the fraction of equal positions between two
+    signatures estimates the Jaccard similarity of their shingle sets.
+    """
+    shingles = shingle_hashes(tokens)
+    permuted = (np.outer(shingles, _A) + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).tolist()
+
+
+def band_hashes(signature: Sequence[int]) -> List[int]:
+    """LSH bucket of each band of a signature, as signed 64-bit integers.
+
+    Two signatures are candidates when any band lands in the same bucket;
+    the band index is part of the hash so bands never collide with each other.
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * _BAND_ROWS:(band + 1) * _BAND_ROWS]
+        digest = hashlib.blake2b(
+            np.asarray([band, *rows], dtype=np.uint64).tobytes(), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimated_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(np.asarray(first) == np.asarray(second)))
+
+
+def signature_to_bytes(signature: Sequence[int]) -> bytes:
+    """Pack a signature for storage."""
+    return np.asarray(signature, dtype=np.uint64).tobytes()
+
+
+def signature_from_bytes(data: bytes) -> List[int]:
+    """Unpack a stored signature."""
+    return np.frombuffer(data, dtype=np.uint64).tolist()
@@ -0,0 +1,375 @@
+"""Symbol extraction: the functions, methods and classes defined in a file."""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..models.core import Language, Symbol
+from .parsing import node_text, parse
+from .similarity import MIN_SIGNATURE_TOKENS, minhash
+
+# Definition node types of each language -> symbol kind
+SYMBOL_NODES: Dict[Language, Dict[str, str]] = {
+    Language.PYTHON: {
+        "function_definition": "function",
+        "class_definition": "class",
+    },
+    Language.JAVASCRIPT: {
+        "function_declaration": "function",
+        "generator_function_declaration": "function",
+        "method_definition": "method",
+        "class_declaration": "class",
+        "variable_declarator": "function",  # Only when assigned a function
+    },
+    Language.RUST: {
+        "function_item": "function",
+        "struct_item": "class",
+        "trait_item": "class",
+    },
+    Language.GO: {
+        "function_declaration": "function",
+        "method_declaration": "method",
+    },
+    Language.JAVA: {
+        "method_declaration": "method",
+        "constructor_declaration": "method",
+        "class_declaration": "class",
+        "interface_declaration": "class",
+    },
+}
+SYMBOL_NODES[Language.TYPESCRIPT] = {
+    **SYMBOL_NODES[Language.JAVASCRIPT],
+    "interface_declaration": "class",
+}
+
+FUNCTION_VALUES = ("arrow_function", "function_expression", "function", "generator_function")
+
+# Call node types of each language -> field holding the callee
+CALL_NODES: Dict[Language, Dict[str, str]] = {
+    Language.PYTHON: {"call": "function"},
+    Language.JAVASCRIPT: {"call_expression": "function", "new_expression": "constructor"},
+    Language.RUST: {"call_expression": "function"},
+    Language.GO: {"call_expression": "function"},
+    Language.JAVA: {"method_invocation": "name", "object_creation_expression": "type"},
+}
+CALL_NODES[Language.TYPESCRIPT] = CALL_NODES[Language.JAVASCRIPT]
+
+# Fields naming the member of a qualified callee (obj.attr, pkg.Func, mod::func)
+MEMBER_FIELDS = ("attribute", "property", "field", "name")
+
+# Statements wrapping a definition, which its comments and decorators precede
+DEFINITION_WRAPPERS = frozenset({
+    "decorated_definition", "export_statement", "lexical_declaration", "variable_declaration",
+})
+# HTTP route registrations: FastAPI decorators and Express calls by method name
+ROUTE_METHODS = frozenset({"get", "post", "put", "patch", "delete", "head", "options"})
+FASTAPI_ROUTE_METHODS = ROUTE_METHODS | {"api_route", "websocket"}
+EXPRESS_ROUTE_METHODS = ROUTE_METHODS | {"all"}
+ROUTE_DESCRIPTIONS = frozenset({"summary", "description"})  # FastAPI route arguments
+
+# Leaf tokens collapsed to their category, so renamed copies still match
+IDENTIFIER_TOKENS = frozenset({
+    "identifier", "property_identifier", "field_identifier", "type_identifier",
+    "shorthand_property_identifier", "shorthand_property_identifier_pattern",
+    "private_property_identifier", "package_identifier", "statement_identifier",
+})
+STRING_TOKENS = frozenset({
+    "string", "template_string", "interpreted_string_literal", "raw_string_literal",
+    "string_literal", "char_literal", "character_literal", "regex",
+})
+NUMBER_TOKENS = frozenset({
+    "integer", "float", "number", "int_literal", "float_literal", "integer_literal",
+    "decimal_integer_literal", "decimal_floating_point_literal", "hex_integer_literal",
+})
+COMMENT_TOKENS = frozenset({"comment", "line_comment", "block_comment"})
+
+
+def extract_symbols(source: bytes, language: Language, tree=None) -> List[Symbol]:
+    """Get the symbols defined in a file, in order of appearance.
+
+    Names are qualified by their enclosing symbols (``Class.method``).
+    Functions and methods long enough to be worth deduplicating carry a
+    MinHash signature of their normalized token shingles. Pass ``tree`` to
+    reuse a syntax tree parsed by the caller.
+    """
+    node_kinds = SYMBOL_NODES.get(language)
+    if not node_kinds:
+        return []
+    if tree is None:
+        tree = parse(source, language)
+    if tree is None:
+        return []
+
+    symbols = []
+    for name, kind, node in symbol_nodes(tree.root_node, source, node_kinds):
+        signature = []
+        if kind != "class":
+            tokens = normalized_tokens(node)
+            if len(tokens) >= MIN_SIGNATURE_TOKENS:
+                signature = minhash(tokens)
+        route, documented = None, _has_comment(node) or _has_docstring(node, language)
+        if language == Language.PYTHON:
+            route, described = _fastapi_route(node, source)
+            if route is not None:
+                # API docs come from the docstring or the route's own arguments
+                documented = described or _has_docstring(node, language)
+        symbols.append(Symbol(
+            name=name,
+            kind=kind,
+            line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            signature=signature,
+            public=_is_public(node, name, language, source, node_kinds),
+            documented=documented,
+            route=route
+        ))
+    if language in (Language.JAVASCRIPT, Language.TYPESCRIPT):
+        symbols.extend(_express_routes(tree.root_node, source))
+        symbols.sort(key=lambda symbol: symbol.line)
+    return symbols
+
+
+def _definition_anchor(node):
+    """The outermost statement made of a definition alone (decorated, exported...)."""
+    while node.parent is not None and node.parent.type in DEFINITION_WRAPPERS:
+        node = node.parent
+    return node
+
+
+def _has_comment(node) -> bool:
+    """Whether a comment ends on the line right above a definition."""
+    anchor = _definition_anchor(node)
+    previous = anchor.prev_named_sibling
+    return (
+        previous is not None
+        and previous.type in COMMENT_TOKENS
+        and previous.end_point[0] >= anchor.start_point[0] - 1
+    )
+
+
+def _has_docstring(node, language: Language) -> bool:
+    if language != Language.PYTHON:
+        return False
+    body = node.child_by_field_name("body")
+    if body is None or not body.named_children:
+        return False
+    first = body.named_children[0]
+    return first.type == "expression_statement" and first.named_children[0].type == "string"
+
+
+def _is_public(
+    node, name: str, language: Language, source: bytes, node_kinds: Dict[str, str]
+) -> bool:
+    """Whether a symbol is part of its module's interface, by each language's rules.
+
+    Functions nested in functions are never public. Otherwise Python and
+    Go follow naming conventions, JavaScript and TypeScript need an
+    ``export``, and Java and Rust need a ``public``/``pub`` modifier.
+    """
+    top = node
+    parent = node.parent
+    while parent is not None:
+        if node_kinds.get(parent.type) in ("function", "method"):
+            return False
+        if node_kinds.get(parent.type) is not None:
+            top = parent
+        parent = parent.parent
+
+    parts = name.split(".")
+    if language == Language.PYTHON:
+        return not any(part.startswith("_") for part in parts)
+    if language == Language.GO:
+        return parts[-1][:1].isupper()
+    if language in (Language.JAVASCRIPT, Language.TYPESCRIPT):
+        return (
+            _definition_anchor(top).type == "export_statement"
+            and not any(part.startswith(("_", "#")) for part in parts)
+        )
+    if language == Language.RUST:
+        return any(child.type == "visibility_modifier" for child in node.children)
+    if language == Language.JAVA:
+        if node.parent is not None and node.parent.type == "interface_body":
+            return True
+        return any(
+            child.type == "modifiers" and b"public" in source[child.start_byte:child.end_byte]
+            for child in node.children
+        )
+    return False
+
+
+def _string_value(node, source: bytes) -> Optional[str]:
+    """Contents of a string literal without interpolation, if ``node`` is one."""
+    if node.type not in ("string", "template_string"):
+        return None
+    if any(child.type in ("interpolation", "template_substitution") for child in node.children):
+        return None
+    return "".join(
+        node_text(child, source)
+        for child in node.named_children
+        if child.type in ("string_content", "string_fragment")
+    )
+
+
+def _route(method: str, arguments, source: bytes) -> Optional[str]:
+    """Route of a registration call, as "METHOD /path", if its first argument is a path."""
+    if arguments is None or not arguments.named_children:
+        return None
+    path = _string_value(arguments.named_children[0], source)
+    if path is None or not path.startswith("/"):
+        return None
+    method = "ANY" if method in ("api_route", "all") else method.upper()
+    return f"{method} {path}"
+
+
+def _fastapi_route(node, source: bytes) -> Tuple[Optional[str], bool]:
+    """Route of a FastAPI handler, and whether its decorator describes it."""
+    if node.parent is None or node.parent.type != "decorated_definition":
+        return None, False
+    for decorator in node.parent.named_children:
+        call = decorator.named_children[0] if decorator.type == "decorator" else None
+        if call is None or call.type != "call":
+            continue
+        function = call.child_by_field_name("function")
+        if function is None or function.type != "attribute":
+            continue
+        method = node_text(function.child_by_field_name("attribute"), source)
+        if method not in FASTAPI_ROUTE_METHODS:
+            continue
+        arguments = call.child_by_field_name("arguments")
+        route = _route(method, arguments, source)
+        if route is None:
+            continue
+        described = any(
+            argument.type == "keyword_argument"
+            and node_text(argument.child_by_field_name("name"), source) in ROUTE_DESCRIPTIONS
+            for argument in arguments.named_children
+        )
+        return route, described
+    return None, False
+
+
+def _express_routes(root, source: bytes) -> List[Symbol]:
+    """Express route registrations (``app.get("/path", handler)``) as route symbols.
+
+    Their handlers are usually inline functions without a name, so the
+    registration itself stands for the handler; it is documented when a
+    comment (JSDoc or an OpenAPI annotation) sits right above it.
+    """
+    routes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.named_children)
+        if node.type != "call_expression":
+            continue
+        function = node.child_by_field_name("function")
+        if function is None or function.type != "member_expression":
+            continue
+        method = node_text(function.child_by_field_name("property"), source)
+        arguments = node.child_by_field_name("arguments")
+        if method not in EXPRESS_ROUTE_METHODS or arguments.type != "arguments":
+            continue
+        if len(arguments.named_children) < 2:  # app.get("setting") reads a setting
+            continue
+        route = _route(method, arguments, source)
+        if route is None:
+            continue
+        statement = node.parent if node.parent.type == "expression_statement" else node
+        routes.append(Symbol(
+            name=route,
+            kind="route",
+            line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            public=True,
+            documented=_has_comment(statement),
+            route=route
+        ))
+    return routes
+
+
+def extract_calls(source: bytes, language: Language, tree=None) -> Dict[str, int]:
+    """Count the call sites of a file by callee name.
+
+    Callees are reduced to their simple name (``client.fetch()`` counts as a
+    call to ``fetch``), which is how they are matched against symbol names:
+    summed over the files of a ref, the counts approximate the fan-in of
+    each function without resolving types. Pass ``tree`` to reuse a syntax
+    tree parsed by the caller.
+    """
+    call_fields = CALL_NODES.get(language)
+    if not call_fields:
+        return {}
+    if tree is None:
+        tree = parse(source, language)
+    if tree is None:
+        return {}
+
+    calls: Dict[str, int] = {}
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        field = call_fields.get(node.type)
+        if field is not None:
+            name = _callee_name(node.child_by_field_name(field), source)
+            if name:
+                calls[name] = calls.get(name, 0) + 1
+        stack.extend(node.named_children)
+    return calls
+
+
+def _callee_name(node, source: bytes) -> Optional[str]:
+    while node is not None and node.type not in IDENTIFIER_TOKENS:
+        node = next(
+            (member for member in map(node.child_by_field_name, MEMBER_FIELDS) if member),
+            None
+        )
+    return node_text(node, source) if node is not None else None
+
+
+def symbol_nodes(
+    root, source: bytes, node_kinds: Dict[str, str]
+) -> Iterator[Tuple[str, str, object]]:
+    """Walk definitions in source order, yielding (qualified name, kind, node)."""
+    cursor = root.walk()
+    enclosing: List[Tuple[int, str]] = []  # (end byte, name prefix) of enclosing symbols
+    while True:
+        node = cursor.node
+        kind = node_kinds.get(node.type)
+        if kind:
+            name_node = node.child_by_field_name("name")
+            if node.type == "variable_declarator":
+                value = node.child_by_field_name("value")
+                if value is None or value.type not in FUNCTION_VALUES:
+                    name_node = None
+            if name_node is not None:
+                while enclosing and enclosing[-1][0] <= node.start_byte:
+                    enclosing.pop()
+                name = (enclosing[-1][1] if enclosing else "") + node_text(name_node, source)
+                yield name, kind, node
+                enclosing.append((node.end_byte, f"{name}."))
+        if cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
+
+
+def normalized_tokens(node) -> List[str]:
+    """Leaf tokens of a subtree with names, literals and comments abstracted away."""
+    tokens = []
+    cursor = node.walk()
+    while True:
+        node_type = cursor.node.type
+        descend = False
+        if node_type in IDENTIFIER_TOKENS:
+            tokens.append("$id")
+        elif node_type in STRING_TOKENS:
+            tokens.append("$str")
+        elif node_type in NUMBER_TOKENS:
+            tokens.append("$num")
+        elif node_type not in COMMENT_TOKENS:
+            descend = True
+        if descend and cursor.goto_first_child():
+            continue
+        if descend:
+            tokens.append(node_type)  # A leaf: keyword, operator or punctuation
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return tokens
@@ -0,0 +1,546 @@
+"""Intra-procedural taint analysis for SQL injection.
+
+Each function is analyzed once, in source order: values read from request
+and input sources are tainted, taint follows assignments, string building
+and calls, and a finding is reported when tainted data reaches the query
+argument of a SQL sink. Calls to functions of the same file use memoized
+summaries of the callee (which parameters reach a sink, which flow into
+the return value), so a helper shared by many callers is analyzed once.
+
+Every function gets a budget of syntax nodes. A function over budget is
+reported with what was found so far and marked as truncated, which keeps
+the cost of a file linear in its size however large its functions are.
+"""
+import re
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple, Union
+
+from ..models.core import Language
+from ..utils.logging import get_logger
+from .rules import FileContext, Rule, register_rule
+
+logger = get_logger(__name__)
+
+MAX_FUNCTION_NODES = 20_000  # Default node budget of one function
+MAX_SUMMARY_DEPTH = 8  # Callees nested deeper are treated as unknown functions
+
+# Untrusted values, matched on the dotted name or a dotted suffix of it
+SOURCES: Dict[Language, FrozenSet[str]] = {
+    Language.PYTHON: frozenset({
+        "request.args", "request.form", "request.values", "request.json",
+        "request.data", "request.files", "request.cookies", "request.headers",
+        "request.GET", "request.POST", "request.body", "request.query_params",
+        "request.path_params", "sys.argv",
+    }),
+    Language.JAVASCRIPT: frozenset({
+        "req.query", "req.body", "req.params", "req.cookies", "req.headers",
+        "request.query", "request.body", "request.params", "ctx.query",
+        "ctx.params", "ctx.request.body", "process.argv", "location.search",
+        "location.hash",
+    }),
+}
+SOURCES[Language.TYPESCRIPT] = SOURCES[Language.JAVASCRIPT]
+
+# Calls returning untrusted values
+SOURCE_CALLS = frozenset({
+    "input", "raw_input", "request.get_json", "request.get_data", "prompt",
+})
+
+# Methods taking a SQL string as their first argument
+SINK_METHODS = frozenset({
+    "execute", "executemany", "executescript", "raw", "query", "read_sql",
+    "read_sql_query", "$queryRawUnsafe", "$executeRawUnsafe",
+})
+
+# Functions taking a SQL string as their first argument, matched like sources
+SINK_FUNCTIONS = frozenset({"sqlalchemy.text", "sa.text", "read_sql", "read_sql_query"})
+
+# Keyword names of the query argument when it is not passed positionally
+QUERY_KEYWORDS = frozenset({"sql", "query", "statement", "operation"})
+
+# Calls whose result is safe to embed in SQL whatever their argument
+SANITIZERS = frozenset({
+    "int", "float", "bool", "len", "abs", "round", "parseInt", "parseFloat",
+    "Number", "Boolean", "escape", "escapeId", "escapeLiteral", "escapeIdentifier",
+    "escape_string", "Literal", "Identifier",
+})
+
+# Route handler parameters are request input unless typed as a scalar
+ROUTE_DECORATOR = re.compile(r"\.(get|post|put|patch|delete|route|api_route|websocket)\(")
+SAFE_ANNOTATIONS = frozenset({"int", "float", "bool", "UUID", "date", "datetime"})
+
+FUNCTION_NODES = frozenset({
+    "function_definition", "lambda",
+    "function_declaration", "generator_function_declaration", "function_expression",
+    "function", "generator_function", "arrow_function", "method_definition",
+})
+
+# Statements whose body may not run: assignments inside them only add taint
+BRANCH_NODES = frozenset({
+    "if_statement", "elif_clause", "else_clause", "for_statement", "for_in_statement",
+    "while_statement", "do_statement", "try_statement", "except_clause",
+    "catch_clause", "match_statement", "case_clause", "switch_case", "switch_default",
+    "conditional_expression", "ternary_expression",
+})
+
+ASSIGNMENTS = frozenset({
+    "assignment", "augmented_assignment", "variable_declarator",
+    "assignment_expression", "augmented_assignment_expression",
+})
+CALLS = frozenset({"call", "call_expression"})
+PROPAGATING_OPERATORS = frozenset({"+", "%", "||", "&&", "??"})
+RECEIVERS = frozenset({"self", "cls", "this"})
+
+# Taint of a value: source names, and indices of the parameters it derives from
+Label = Union[str, int]
+Labels = FrozenSet[Label]
+NO_LABELS: Labels = frozenset()
+
+
+class TaintSummary(NamedTuple):
+    """What a function does with its parameters, as seen by its callers."""
+    param_sinks: Dict[int, str]  # Parameter index -> SQL sink it reaches
+    returns: Labels  # Taint of the return value
+    truncated: bool = False  # Analysis stopped at the node budget
+
+
+class _Flow(NamedTuple):
+    """Tainted data reaching a sink in the analyzed function."""
+    node: object
+    source: str
+    sink: str
+    via: Optional[str]  # Helper function the flow goes through
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _dotted_name(node, ctx: FileContext) -> str:
+    """Dotted name of an identifier or attribute chain, or "" for other nodes."""
+    if node.type in ("identifier", "attribute", "member_expression", "this"):
+        return ctx.text(node)
+    return ""
+
+
+def _suffix_match(name: str, names: FrozenSet[str]) -> Optional[str]:
+    """The entry of ``names`` that is ``name`` or a dotted suffix of it."""
+    parts = name.split(".")
+    for start in range(len(parts)):
+        candidate = ".".join(parts[start:])
+        if candidate in names:
+            return candidate
+    return None
+
+
+def _function_name(node, ctx: FileContext) -> Optional[str]:
+    """Name a function can be called by within its file, if any."""
+    name = node.child_by_field_name("name")
+    if name is None and node.parent is not None and node.parent.type == "variable_declarator":
+        name = node.parent.child_by_field_name("name")
+    if name is None or name.type not in ("identifier", "property_identifier"):
+        return None
+    return ctx.text(name)
+
+
+def _parameters(node, ctx: FileContext) -> List[Tuple[List[str], bool]]:
+    """Names bound by each parameter, and whether it may carry arbitrary strings."""
+    parameters = node.child_by_field_name("parameters")
+    if parameters is None:
+        single = node.child_by_field_name("parameter")  # JS: x => ...
+        return [([ctx.text(single)], True)] if single is not None else []
+
+    result = []
+    for child in parameters.named_children:
+        if child.type == "comment":
+            continue
+        annotation = child.child_by_field_name("type")
+        safe = annotation is not None and ctx.text(annotation) in SAFE_ANNOTATIONS
+        names = []
+        stack = [child]
+        while stack:
+            current = stack.pop()
+            if current.type in ("identifier", "shorthand_property_identifier_pattern"):
+                names.append(ctx.text(current))
+                continue
+            # Default values and annotations bind no names
+            skipped = [current.child_by_field_name(field) for field in ("value", "right", "type")]
+            stack.extend(
+                grandchild for grandchild in reversed(current.named_children)
+                if grandchild not in skipped
+            )
+        if names and names[0] not in RECEIVERS:
+            result.append((names, not safe))
+    return result
+
+
+def _is_route_handler(node, ctx: FileContext) -> bool:
+    """Whether a Python function is decorated as a web route."""
+    parent = node.parent
+    if parent is None or parent.type != "decorated_definition":
+        return False
+    return any(
+        ROUTE_DECORATOR.search(ctx.text(child))
+        for child in parent.named_children if child.type == "decorator"
+    )
+
+
+class _FileAnalysis:
+    """Taint analysis of the functions of one file, sharing callee summaries."""
+
+    def __init__(self, rule: "SqlInjectionRule", ctx: FileContext, functions: List[object]):
+        self.rule = rule
+        self.ctx = ctx
+        self.sources = SOURCES.get(ctx.language, frozenset())
+        self.functions: Dict[str, object] = {}
+        for function in functions:
+            name = _function_name(function, ctx)
+            if name is not None:
+                self.functions.setdefault(name, function)
+        self.results: Dict[int, Tuple[TaintSummary, List[_Flow]]] = {}
+        self.in_progress: Set[int] = set()
+
+    def analyze(self, function, depth: int = 0) -> Tuple[TaintSummary, List[_Flow]]:
+        """Summary and flows of a function, analyzing it on first use."""
+        key = function.id
+        if key in self.results:
+            return self.results[key]
+        if key in self.in_progress or depth > MAX_SUMMARY_DEPTH:
+            # Recursion, or a call chain too deep to follow: an unknown function
+            return TaintSummary({}, NO_LABELS), []
+
+        self.in_progress.add(key)
+        try:
+            result = _FunctionAnalysis(self, function, depth).run()
+        finally:
+            self.in_progress.discard(key)
+        self.results[key] = result
+        return result
+
+
+class _FunctionAnalysis:
+    """Single pass over the body of one function."""
+
+    def __init__(self, file: _FileAnalysis, function, depth: int):
+        self.file = file
+        self.ctx = file.ctx
+        self.function = function
+        self.depth = depth
+        self.budget = file.rule.max_function_nodes
+        self.tainted: Dict[str, Labels] = {}
+        self.param_sinks: Dict[int, str] = {}
+        self.returns: Set[Label] = set()
+        self.flows: List[_Flow] = []
+
+        self.params: List[List[str]] = []
+        if function.type not in ("module", "program"):
+            route = self.ctx.language == Language.PYTHON and _is_route_handler(function, self.ctx)
+            for index, (names, unsafe) in enumerate(_parameters(function, self.ctx)):
+                self.params.append(names)
+                labels = {index}
+                if route and unsafe:
+                    labels.add(f"parameter {names[0]}")
+                for name in names:
+                    self.tainted[name] = frozenset(labels)
+
+    def run(self) -> Tuple[TaintSummary, List[_Flow]]:
+        truncated = False
+        try:
+            self._walk()
+        except _BudgetExceeded:
+            truncated = True
+            logger.debug(
+                "Taint analysis budget exceeded",
+                path=self.ctx.path, line=self.function.start_point[0] + 1
+            )
+        except RecursionError:
+            truncated = True
+        summary = TaintSummary(self.param_sinks, frozenset(self.returns), truncated)
+        return summary, self.flows
+
+    def _spend(self) -> None:
+        self.budget -= 1
+        if self.budget < 0:
+            raise _BudgetExceeded()
+
+    def _walk(self) -> None:
+        body = self.function
+        if self.function.type not in ("module", "program"):
+            body = self.function.child_by_field_name("body")
+            if body is None:
+                return
+            if body.type not in ("block", "statement_block"):
+                # Arrow function with an expression body
+                self.returns.update(self._eval(body))
+
+        cursor = body.walk()
+        while True:
+            node = cursor.node
+            self._spend()
+            descend = node.type not in FUNCTION_NODES or node == body
+            if node.type in ASSIGNMENTS:
+                self._assign(node)
+            elif node.type in CALLS:
+                self._call(node)
+            elif node.type == "return_statement":
+                for child in node.named_children:
+                    self.returns.update(self._eval(child))
+            elif node.type in ("for_statement", "for_in_statement"):
+                target = node.child_by_field_name("left")
+                iterable = node.child_by_field_name("right")
+                if target is not None and iterable is not None:
+                    self._bind(target, self._eval(iterable), strong=False)
+
+            if descend and cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent() or cursor.node == body:
+                    return
+
+    def _assign(self, node) -> None:
+        if node.type == "variable_declarator":
+            target, value = node.child_by_field_name("name"), node.child_by_field_name("value")
+        else:
+            target, value = node.child_by_field_name("left"), node.child_by_field_name("right")
+        if target is None or value is None:
+            return
+        augmented = node.type.startswith("augmented")
+        self._bind(target, self._eval(value), strong=not augmented and not self._in_branch(node))
+
+    def _bind(self, target, labels: Labels, strong: bool) -> None:
+        """Assign taint to the names bound by an assignment target."""
+        if target.type in ("subscript", "subscript_expression"):
+            # Storing into a container taints the container
+            container = target.child_by_field_name("value") or target.child_by_field_name("object")
+            if container is not None:
+                self._bind(container, labels, strong=False)
+            return
+        if target.type in ("identifier", "attribute", "member_expression"):
+            names = [self.ctx.text(target)]
+        else:
+            names = [
+                self.ctx.text(child) for child in target.named_children
+                if child.type in ("identifier", "shorthand_property_identifier_pattern")
+            ]
+        for name in names:
+            if not strong:
+                labels = labels | self.tainted.get(name, NO_LABELS)
+            if labels:
+                self.tainted[name] = labels
+            else:
+                self.tainted.pop(name, None)
+
+    def _in_branch(self, node) -> bool:
+        """Whether a node may be skipped by control flow within the function."""
+        parent = node.parent
+        while parent is not None and parent != self.function:
+            if parent.type in BRANCH_NODES:
+                return True
+            parent = parent.parent
+        return False
+
+    def _call(self, node) -> None:
+        """Check a call for tainted data reaching a sink, directly or through a helper."""
+        callee = node.child_by_field_name("function")
+        if callee is None:
+            return
+        positional, keywords = self._arguments(node)
+
+        sink = self._sink(callee)
+        if sink is not None:
+            query = positional[0] if positional else next(
+                (value for name, value in keywords.items() if name in QUERY_KEYWORDS), None
+            )
+            if query is not None:
+                self._reach(node, self._eval(query), sink, None)
+            return
+
+        helper = self._helper(callee)
+        if helper is None:
+            return
+        summary, _ = self.file.analyze(helper, self.depth + 1)
+        if not summary.param_sinks:
+            return
+        helper_params = _parameters(helper, self.ctx)
+        helper_name = _function_name(helper, self.ctx)
+        for index, helper_sink in summary.param_sinks.items():
+            argument = self._argument(positional, keywords, helper_params, index)
+            if argument is not None:
+                self._reach(node, self._eval(argument), helper_sink, helper_name)
+
+    def _reach(self, node, labels: Labels, sink: str, via: Optional[str]) -> None:
+        """Record tainted data reaching a sink."""
+        for label in labels:
+            if isinstance(label, int):
+                self.param_sinks.setdefault(label, sink)
+        sources = sorted(label for label in labels if isinstance(label, str))
+        if sources:
+            self.flows.append(_Flow(node, sources[0], sink, via))
+
+    def _sink(self, callee) -> Optional[str]:
+        """The SQL sink a call goes to, if any."""
+        name = _dotted_name(callee, self.ctx)
+        if not name:
+            return None
+        if callee.type in ("attribute", "member_expression"):
+            method = name.rsplit(".", 1)[-1]
+            if method in SINK_METHODS:
+                return name
+        if _suffix_match(name, SINK_FUNCTIONS):
+            return name
+        return None
+
+    def _helper(self, callee):
+        """The function of this file a call goes to, if it can be resolved."""
+        if callee.type == "identifier":
+            return self.file.functions.get(self.ctx.text(callee))
+        if callee.type in ("attribute", "member_expression"):
+            receiver = callee.child_by_field_name("object")
+            member = (
+                callee.child_by_field_name("attribute") or callee.child_by_field_name("property")
+            )
+            if receiver is not None and member is not None and self.ctx.text(receiver) in RECEIVERS:
+                return self.file.functions.get(self.ctx.text(member))
+        return None
+
+    def _arguments(self, call) -> Tuple[List[object], Dict[str, object]]:
+        """Positional and keyword argument nodes of a call."""
+        positional, keywords = [], {}
+        arguments = call.child_by_field_name("arguments")
+        if arguments is None:
+            return positional, keywords
+        for argument in arguments.named_children:
+            if argument.type == "keyword_argument":
+                name = argument.child_by_field_name("name")
+                value = argument.child_by_field_name("value")
+                if name is not None and value is not None:
+                    keywords[self.ctx.text(name)] = value
+            elif argument.type != "comment":
+                positional.append(argument)
+        return positional, keywords
+
+    @staticmethod
+    def _argument(positional, keywords, params, index: int):
+        """The argument node passed for a parameter of a callee."""
+        if index < len(positional):
+            return positional[index]
+        if index < len(params):
+            return keywords.get(params[index][0][0])
+        return None
+
+    def _eval(self, node) -> Labels:
+        """Taint of an expression."""
+        labels: Set[Label] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self._spend()
+            node_type = node.type
+
+            if node_type in ("identifier", "shorthand_property_identifier"):
+                labels.update(self.tainted.get(self.ctx.text(node), NO_LABELS))
+            elif node_type in ("attribute", "member_expression"):
+                name = self.ctx.text(node)
+                source = _suffix_match(name, self.file.sources)
+                if source is not None:
+                    labels.add(source)
+                elif name in self.tainted:
+                    labels.update(self.tainted[name])
+                else:
+                    receiver = node.child_by_field_name("object")
+                    if receiver is not None:
+                        stack.append(receiver)
+            elif node_type in ("subscript", "subscript_expression"):
+                container = node.child_by_field_name("value") or node.child_by_field_name("object")
+                if container is not None:
+                    stack.append(container)
+            elif node_type in CALLS:
+                labels.update(self._eval_call(node))
+            elif node_type in ("binary_operator", "binary_expression"):
+                operator = node.child_by_field_name("operator")
+                if operator is not None and operator.type in PROPAGATING_OPERATORS:
+                    stack.extend(
+                        child for child in (
+                            node.child_by_field_name("left"), node.child_by_field_name("right")
+                        ) if child is not None
+                    )
+            elif node_type in ("keyword_argument", "pair"):
+                value = node.child_by_field_name("value")
+                if value is not None:
+                    stack.append(value)
+            elif node_type in FUNCTION_NODES or node_type in (
+                "comparison_operator", "not_operator", "unary_expression", "unary_operator"
+            ):
+                continue
+            else:
+                # Strings with interpolations, containers, parentheses, awaits...
+                stack.extend(node.named_children)
+        return frozenset(labels)
+
+    def _eval_call(self, node) -> Labels:
+        """Taint of the value returned by a call."""
+        callee = node.child_by_field_name("function")
+        if callee is None:
+            return NO_LABELS
+        name = _dotted_name(callee, self.ctx)
+        if name and _suffix_match(name, SOURCE_CALLS):
+            return frozenset({name})
+        if name and name.rsplit(".", 1)[-1] in SANITIZERS:
+            return NO_LABELS
+
+        positional, keywords = self._arguments(node)
+        helper = self._helper(callee)
+        if helper is not None:
+            summary, _ = self.file.analyze(helper, self.depth + 1)
+            helper_params = _parameters(helper, self.ctx)
+            labels = {label for label in summary.returns if isinstance(label, str)}
+            for label in summary.returns:
+                if isinstance(label, int):
+                    argument = self._argument(positional, keywords, helper_params, label)
+                    if argument is not None:
+                        labels.update(self._eval(argument))
+            return frozenset(labels)
+
+        # Unknown function: its result may be built from the receiver and arguments
+        labels = set()
+        if callee.type in ("attribute", "member_expression"):
+            receiver = callee.child_by_field_name("object")
+            if receiver is not None:
+                labels.update(self._eval(receiver))
+        for argument in [*positional, *keywords.values()]:
+            labels.update(self._eval(argument))
+        return frozenset(labels)
+
+
+@register_rule
+class SqlInjectionRule(Rule):
+    """Untrusted input reaching SQL query strings."""
+
+    id = "sql-injection"
+    languages = frozenset({Language.PYTHON, Language.JAVASCRIPT, Language.TYPESCRIPT})
+    node_types = ("module", "program", *sorted(FUNCTION_NODES - {"lambda"}))
+
+    def __init__(self, max_function_nodes: int = MAX_FUNCTION_NODES):
+        self.max_function_nodes = max_function_nodes
+
+    def begin_file(self, ctx: FileContext) -> None:
+        ctx.state[self.id] = []
+
+    def visit(self, node, ctx: FileContext) -> None:
+        ctx.state[self.id].append(node)
+
+    def end_file(self, ctx: FileContext) -> None:
+        scopes = ctx.state.pop(self.id)
+        analysis = _FileAnalysis(self, ctx, [node for node in scopes if node.parent is not None])
+        for scope in scopes:
+            summary, flows = analysis.analyze(scope)
+            function = "<module>" if scope.parent is None else (
+                _function_name(scope, ctx) or "<anonymous>"
+            )
+            for flow in flows:
+                where = f" via {flow.via}" if flow.via else ""
+                ctx.report(
+                    self, flow.node,
+                    f"Untrusted {flow.source} reaches SQL sink {flow.sink}{where}",
+                    source=flow.source, sink=flow.sink, via=flow.via,
+                    function=function, truncated=summary.truncated
+                )
@@ -0,0 +1,134 @@
+"""Version ordering of package ecosystems."""
+import re
+from functools import lru_cache
+from typing import Optional
+
+PEP440_PATTERN = re.compile(
+    r"""^v?(?:(?P<epoch>\d+)!)?(?P<release>\d+(?:\.\d+)*)
+    (?:[-_.]?(?P<pre_label>a|alpha|b|beta|rc|c|pre|preview)[-_.]?(?P<pre_n>\d*))?
+    (?:-(?P<post_implicit>\d+)|[-_.]?(?:post|rev|r)[-_.]?(?P<post_n>\d*))?
+    (?:[-_.]?dev[-_.]?(?P<dev_n>\d*))?
+    (?:\+[a-z0-9._-]+)?$""",
+    re.VERBOSE
+)
+PRE_RELEASE_ORDER = {"a": 0, "alpha": 0, "b": 1, "beta": 1}  # Everything else is rc
+SEMVER_PATTERN = re.compile(r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+.*)?$")
+SEMVER_ECOSYSTEMS = frozenset({"npm", "crates.io", "Go", "Packagist", "NuGet", "Pub", "Hex"})
+PRERELEASE_WORDS = frozenset({"alpha", "beta", "rc", "pre", "preview", "snapshot", "dev", "m"})
+
+
+def _pep440_key(version: str) -> Optional[tuple]:
+    match = PEP440_PATTERN.match(version.strip().lower())
+    if match is None:
+        return None
+    release = [int(part) for part in match.group("release").split(".")]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    has_post = match.group("post_implicit") is not None or match.group("post_n") is not None
+    has_dev = match.group("dev_n") is not None
+
+    if match.group("pre_label"):
+        label = PRE_RELEASE_ORDER.get(match.group("pre_label"), 2)
+        pre = (0, label, int(match.group("pre_n") or 0))
+    elif has_dev and not has_post:
+        pre = (-1, 0, 0)  # 1.0.dev1 sorts before 1.0a1
+    else:
+        pre = (1, 0, 0)
+    post = int(match.group("post_implicit") or match.group("post_n") or 0) if has_post else -1
+    dev = (0, int(match.group("dev_n") or 0)) if has_dev else (1, 0)
+    return (int(match.group("epoch") or 0), tuple(release), pre, post, dev)
+
+
+def _semver_key(version: str) -> Optional[tuple]:
+    match = SEMVER_PATTERN.match(version.strip())
+    if match is None:
+        return None
+    major, minor, patch, pre = match.groups()
+    release = (int(major), int(minor or 0), int(patch or 0))
+    if pre is None:
+        return (release, (1,))
+    identifiers = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part) for part in pre.split(".")
+    )
+    return (release, (0, identifiers))
+
+
+def _generic_key(version: str) -> Optional[tuple]:
+    parts = re.findall(r"\d+|[A-Za-z]+", version)
+    if not parts:
+        return None
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part.lower()) for part in parts)
+
+
+@lru_cache(maxsize=65536)
+def version_key(ecosystem: str, version: str) -> Optional[tuple]:
+    """Sort key of a version under its ecosystem's ordering, or None if unparsable."""
+    if ecosystem == "PyPI":
+        return _pep440_key(version)
+    if ecosystem in SEMVER_ECOSYSTEMS:
+        return _semver_key(version)
+    return _generic_key(version)
+
+
+def is_prerelease(ecosystem: str, version: str) -> bool:
+    """Whether a version is a pre-release or development release."""
+    key = version_key(ecosystem, version)
+    if key is None:
+        return False
+    if ecosystem == "PyPI":
+        return key[2][0] != 1 or key[4][0] == 0
+    if ecosystem in SEMVER_ECOSYSTEMS:
+        return key[1] != (1,)
+    return any(kind == 1 and word in PRERELEASE_WORDS for kind, _number, word in key)
+
+
+def compatibility_key(ecosystem: str, version: str) -> Optional[tuple]:
+    """Versions sharing this key are expected to be backwards compatible.
+
+    Follows caret semantics: the first non-zero release component must
+    match, so 1.x versions are compatible with each other and 0.3.x only
+    with 0.3.x.
+    """
+    key = version_key(ecosystem, version)
+    if key is None:
+        return None
+    if ecosystem == "PyPI":
+        epoch, release = key[0], key[1] + (0,)
+        return (epoch, release[0]) if release[0] else (epoch, 0, release[1])
+    if ecosystem in SEMVER_ECOSYSTEMS:
+        major, minor, _patch = key[0]
+        return (major,) if major else (0, minor)
+    return key[:1]
+
+
+def _release(ecosystem: str, key: tuple) -> tuple:
+    """Numeric release components of a version key, padded to three."""
+    if ecosystem == "PyPI":
+        release = key[1]  # Epoch changes are major through compatibility_key
+    elif ecosystem in SEMVER_ECOSYSTEMS:
+        release = key[0]
+    else:
+        release = tuple(number for kind, number, _word in key if kind == 0)
+    return tuple(release) + (0,) * (3 - len(release))
+
+
+def version_delta(ecosystem: str, current: str, target: str) -> Optional[str]:
+    """Size of an upgrade: "major", "minor", "patch" or "prerelease".
+
+    An upgrade is major whenever it leaves the compatibility range of
+    :func:`compatibility_key`, so 0.3 to 0.4 is major. None if either
+    version is unparsable or ``target`` is not newer.
+    """
+    current_key = version_key(ecosystem, current)
+    target_key = version_key(ecosystem, target)
+    if current_key is None or target_key is None or target_key <= current_key:
+        return None
+    if compatibility_key(ecosystem, current) != compatibility_key(ecosystem, target):
+        return "major"
+    current_release = _release(ecosystem, current_key)
+    target_release = _release(ecosystem, target_key)
+    if current_release[:2] != target_release[:2]:
+        return "minor"
+    if current_release != target_release:
+        return "patch"
+    return "prerelease"
@@ -1,9 +1,13 @@
 """API routes for AOMaaS."""
+import asyncio
+import json
+import tempfile
 from datetime import timedelta
-from uuid import UUID
+from typing import List, Optional
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from .auth import (
@@ -12,6 +16,11 @@ from .auth import (
 )
 from . import demo
 from ..models.api import (
+    BatchPlanRequest,
+    BatchPlanResult,
+    CampaignResponse,
+    CoverageResponse,
+    CreateCampaignRequest,
     CreatePRRequest,
     GeneratePlanRequest,
     ImplementPlanRequest,
@@ -22,16 +31,23 @@ from ..models.api import (
     OpportunitiesResponse,
     PlanResponse,
     PRResponse,
+    RegistryRefreshRequest,
     ReviewPRRequest,
     ReviewResponse,
     TaskResponse,
 )
+from ..models.core import OpportunityType
+from ..services.campaigns import CampaignService
+from ..services.coverage import CoverageService
+from ..services.history import HistoryService
 from ..services.indexer import IndexerService
 from ..services.miner import MinerService
 from ..services.planner import PlannerService
 from ..services.implementer import ImplementerService
 from ..services.pr_manager import PRManagerService
+from ..services.registry import RegistryService
 from ..services.reviewer import ReviewerService
+from ..storage.opportunity_store import OPPORTUNITY_SORTS, OpportunityFilter
 
 router = APIRouter()
 
@@ -65,9 +81,16 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 indexer_service = IndexerService()
 miner_service = MinerService()
 planner_service = PlannerService()
-implementer_service = ImplementerService()
+implementer_service = ImplementerService(plan_store=planner_service.plan_store)
 pr_manager_service = PRManagerService()
 reviewer_service = ReviewerService()
+registry_service = RegistryService()
+coverage_service = CoverageService()
+history_service = HistoryService()
+campaign_service = CampaignService(planner=planner_service)
+
+# Uploaded coverage reports larger than this are spooled to disk
+COVERAGE_SPOOL_BYTES = 16 * 1024 * 1024
 
 
 @router.post("/index", response_model=IndexResponse)
@@ -81,7 +104,9 @@ async def index_repository(
             url=str(request.url),
             provider_type=request.provider_type,
             branch=request.branch,
-            force_reindex=request.force_reindex
+            force_reindex=request.force_reindex,
+            refs=request.refs,
+            watch=request.watch
         )
         
         return IndexResponse(
@@ -96,23 +121,38 @@ async def index_repository(
         )
 
 
+@router.delete("/repositories/{repository_id}/watch", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_watching_repository(repository_id: UUID) -> Response:
+    """Stop re-indexing a local repository as its files change."""
+    if not indexer_service.stop_watching(repository_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Repository {repository_id} is not being watched"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/mine", response_model=OpportunitiesResponse)
 async def mine_opportunities(
     request: MineOpportunitiesRequest
 ) -> OpportunitiesResponse:
     """Mine maintenance opportunities from a repository."""
     try:
-        opportunities = await miner_service.mine_opportunities(
+        result = await miner_service.mine(
             repository_id=request.repository_id,
             opportunity_types=request.opportunity_types,
             languages=request.languages,
-            max_opportunities=request.max_opportunities
+            max_opportunities=request.max_opportunities,
+            detector_timeout=request.detector_timeout,
+            refresh=request.refresh,
+            profile=request.profile
         )
         
         return OpportunitiesResponse(
             repository_id=request.repository_id,
-            opportunities=[opp.dict() for opp in opportunities],
-            total_count=len(opportunities)
+            opportunities=result.opportunities,
+            total_count=len(result.opportunities),
+            detector_runs=result.detector_runs
         )
     except Exception as e:
         raise HTTPException(
@@ -121,6 +161,101 @@ async def mine_opportunities(
         )
 
 
+@router.get("/detectors")
+async def list_detectors():
+    """List the registered detectors, their inputs and profiles of their recent runs.
+    
+    Timings are those of each detector's current version; they are meant
+    for tuning timeouts and choosing which detectors to disable.
+    """
+    stats = {
+        (entry.detector, entry.version): entry._asdict()
+        for entry in await asyncio.to_thread(miner_service.profile_store.stats)
+    }
+    enabled = {detector.spec.name for detector in miner_service.enabled_detectors()}
+    return {
+        "detectors": [
+            {
+                "name": name,
+                "opportunity_type": detector.spec.opportunity_type,
+                "version": detector.spec.version,
+                "scope": detector.spec.scope,
+                "requires": sorted(detector.spec.requires),
+                "inputs": detector.spec.inputs,
+                "source": miner_service.detector_sources[name],
+                "enabled": name in enabled,
+                "profile": stats.get((name, detector.spec.version))
+            }
+            for name, detector in miner_service.detectors.items()
+        ]
+    }
+
+
+@router.post("/registry/refresh", response_model=TaskResponse)
+async def refresh_registry(
+    request: RegistryRefreshRequest,
+    background_tasks: BackgroundTasks
+) -> TaskResponse:
+    """Refresh cached registry metadata used by the dependency update detector."""
+    if request.repository_id is None:
+        background_tasks.add_task(registry_service.refresh_all, force=request.force)
+    else:
+        background_tasks.add_task(
+            registry_service.refresh_repository, request.repository_id, force=request.force
+        )
+    
+    return TaskResponse(
+        task_id=str(uuid4()),
+        status="pending",
+        message="Registry metadata refresh started"
+    )
+
+
+@router.post("/repositories/{repository_id}/coverage", response_model=CoverageResponse)
+async def upload_coverage(
+    repository_id: UUID,
+    request: Request,
+    report_format: Optional[str] = Query(None, alias="format"),
+    commit_sha: Optional[str] = None,
+    filename: str = ""
+) -> CoverageResponse:
+    """Ingest a coverage report sent as the raw request body.
+    
+    Supports Cobertura ``coverage.xml``, ``lcov.info``, Go ``cover.out`` and
+    JaCoCo XML; the format is detected from the contents unless given.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=COVERAGE_SPOOL_BYTES) as report:
+        async for chunk in request.stream():
+            report.write(chunk)
+        report.seek(0)
+        try:
+            summary = await asyncio.to_thread(
+                coverage_service.ingest,
+                repository_id,
+                report,
+                report_format,
+                filename,
+                commit_sha
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid coverage report: {str(e)}"
+            )
+    
+    totals = summary.report
+    return CoverageResponse(
+        repository_id=repository_id,
+        format=totals.format,
+        commit_sha=totals.commit_sha,
+        files=totals.files,
+        lines=totals.lines,
+        covered_lines=totals.covered_lines,
+        line_rate=round(totals.covered_lines / totals.lines, 4) if totals.lines else 0.0,
+        unmatched_files=summary.unmatched_files
+    )
+
+
 @router.post("/plan", response_model=PlanResponse)
 async def generate_plan(
     request: GeneratePlanRequest
@@ -138,7 +273,13 @@ async def generate_plan(
             description=plan.description,
             steps=plan.steps,
             estimated_effort=plan.estimated_effort,
-            risks=plan.risks
+            risks=plan.risks,
+            blast_radius=plan.blast_radius
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -147,6 +288,41 @@ async def generate_plan(
         )
 
 
+@router.post("/plan/batch")
+async def generate_plans(request: BatchPlanRequest):
+    """Generate the plans of many opportunities, streamed as NDJSON as each completes.
+    
+    Opportunities with the same signature are planned once, and with
+    ``coalesce`` related dependency updates share one plan, listing their
+    ``opportunity_ids``. Each line is a ``BatchPlanResult``; unknown
+    opportunities come back with an error.
+    """
+    async def results():
+        async for result in planner_service.generate_plans(
+            request.opportunity_ids, request.preferences, request.concurrency, request.coalesce
+        ):
+            plan = None
+            if result.plan is not None:
+                plan = PlanResponse(
+                    plan_id=result.plan.id,
+                    title=result.plan.title,
+                    description=result.plan.description,
+                    steps=result.plan.steps,
+                    estimated_effort=result.plan.estimated_effort,
+                    risks=result.plan.risks,
+                    blast_radius=result.plan.blast_radius,
+                    opportunity_ids=result.plan.opportunity_ids
+                )
+            yield BatchPlanResult(
+                opportunity_id=result.opportunity_id,
+                plan=plan,
+                error=result.error,
+                shared=result.shared
+            ).model_dump_json() + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @router.post("/implement", response_model=ImplementationResponse)
 async def implement_plan(
     request: ImplementPlanRequest,
@@ -164,6 +340,11 @@ async def implement_plan(
             status="pending",
             message="Implementation started"
         )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -214,11 +395,20 @@ async def review_pull_request(
     request: ReviewPRRequest,
     background_tasks: BackgroundTasks
 ) -> ReviewResponse:
-    """Review a pull request with AI agents."""
+    """Review a pull request with AI agents, scoped to its plan's blast radius if given."""
+    plan = None
+    if request.plan_id is not None:
+        plan = planner_service.plan_store.get(request.plan_id)
+        if plan is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Plan {request.plan_id} not found"
+            )
     try:
         review = await reviewer_service.review_pull_request(
             pull_request_id=request.pull_request_id,
-            reviewers=request.reviewers
+            reviewers=request.reviewers,
+            blast_radius=plan.blast_radius if plan else None
         )
         
         return ReviewResponse(
@@ -234,6 +424,64 @@ async def review_pull_request(
         )
 
 
+def campaign_response(campaign_id: UUID) -> CampaignResponse:
+    """Current state of a campaign; 404 if it does not exist."""
+    campaign = campaign_service.store.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Campaign {campaign_id} not found"
+        )
+    return CampaignResponse(
+        campaign=campaign,
+        progress=campaign_service.store.progress(campaign_id),
+        targets=campaign_service.store.targets(campaign_id)
+    )
+
+
+@router.post("/campaigns", response_model=CampaignResponse)
+async def create_campaign(
+    request: CreateCampaignRequest,
+    background_tasks: BackgroundTasks
+) -> CampaignResponse:
+    """Plan a dependency update across every indexed repository depending on the package.
+    
+    Repositories already at or above the version are skipped. Unless
+    ``start`` is false, the campaign is applied in the background; poll
+    ``GET /campaigns/{id}`` for progress.
+    """
+    try:
+        campaign = await campaign_service.create(
+            request.ecosystem, request.package, request.version, draft=request.draft
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    if request.start:
+        background_tasks.add_task(campaign_service.run, campaign.id)
+    return campaign_response(campaign.id)
+
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignResponse)
+async def get_campaign(campaign_id: UUID) -> CampaignResponse:
+    """Get a campaign with its progress in each repository."""
+    return campaign_response(campaign_id)
+
+
+@router.post("/campaigns/{campaign_id}/run", response_model=CampaignResponse)
+async def run_campaign(
+    campaign_id: UUID,
+    background_tasks: BackgroundTasks
+) -> CampaignResponse:
+    """Apply a campaign, or resume it for the repositories that are pending or failed."""
+    response = campaign_response(campaign_id)
+    background_tasks.add_task(campaign_service.run, campaign_id)
+    return response
+
+
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
 async def get_task_status(task_id: str) -> TaskResponse:
     """Get the status of a background task."""
@@ -245,14 +493,97 @@ async def get_task_status(task_id: str) -> TaskResponse:
     )
 
 
+def opportunity_filter(
+    opportunity_type: Optional[List[OpportunityType]] = Query(None, alias="type"),
+    min_priority: Optional[int] = Query(None, ge=1, le=10),
+    max_priority: Optional[int] = Query(None, ge=1, le=10),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0)
+) -> OpportunityFilter:
+    """Opportunity listing filters from query parameters."""
+    return OpportunityFilter(opportunity_type, min_priority, max_priority, min_confidence)
+
+
 @router.get("/repositories/{repository_id}/opportunities")
-async def get_repository_opportunities(repository_id: UUID):
-    """Get all opportunities for a repository."""
+async def get_repository_opportunities(
+    repository_id: UUID,
+    filters: OpportunityFilter = Depends(opportunity_filter),
+    sort: str = Query("priority", pattern=f"^({'|'.join(OPPORTUNITY_SORTS)})$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get a page of the opportunities of a repository.
+    
+    Pass the returned ``next_cursor`` back as ``cursor`` to get the next
+    page. Stored opportunity JSON is written out as is, without building
+    models for the page.
+    """
     try:
-        opportunities = await miner_service.get_opportunities(repository_id)
-        return {"opportunities": [opp.dict() for opp in opportunities]}
+        await miner_service.sync_opportunities(repository_id)
+        page = miner_service.opportunity_store.page(repository_id, filters, sort, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get opportunities: {str(e)}"
         )
+    return Response(
+        content=f'{{"opportunities":[{",".join(page.items)}],'
+                f'"next_cursor":{json.dumps(page.next_cursor)}}}',
+        media_type="application/json"
+    )
+
+
+@router.get("/repositories/{repository_id}/opportunities/export")
+async def export_repository_opportunities(
+    repository_id: UUID,
+    filters: OpportunityFilter = Depends(opportunity_filter),
+    sort: str = Query("priority", pattern=f"^({'|'.join(OPPORTUNITY_SORTS)})$")
+):
+    """Stream every matching opportunity of a repository as NDJSON, one per line."""
+    try:
+        await miner_service.sync_opportunities(repository_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get opportunities: {str(e)}"
+        )
+    rows = miner_service.opportunity_store.export(repository_id, filters, sort)
+    return StreamingResponse(
+        (f"{row}\n" for row in rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{repository_id}.ndjson"'}
+    )
+
+
+@router.get("/opportunities/top")
+async def get_top_opportunities(
+    k: int = Query(100, ge=1, le=1000),
+    filters: OpportunityFilter = Depends(opportunity_filter)
+):
+    """Get the most valuable open opportunities across every repository.
+    
+    Served from the fleet-wide index kept up to date as repositories are
+    mined; nothing is mined by this call.
+    """
+    rows = await asyncio.to_thread(miner_service.opportunity_store.top, k, filters)
+    return Response(
+        content=f'{{"opportunities":[{",".join(rows)}]}}',
+        media_type="application/json"
+    )
+
+
+@router.get("/repositories/{repository_id}/hotspots")
+async def get_repository_hotspots(repository_id: UUID, limit: int = Query(20, ge=1, le=500)):
+    """Get the files of a repository with the most recent churn, hottest first."""
+    ref = history_service.index_store.default_ref(repository_id)
+    if ref is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Repository {repository_id} has not been indexed"
+        )
+    hotspots = await asyncio.to_thread(history_service.hotspots, repository_id, ref, limit)
+    return {"ref": ref, "hotspots": hotspots}
@@ -20,6 +20,56 @@ class Settings(BaseModel):
         env="DATABASE_URL"
     )
     
+    # Local index storage (blobs, manifests, analysis results)
+    data_dir: str = Field(default="/tmp/aomass_data", env="DATA_DIR")
+    index_db_path: str = Field(
+        default="/tmp/aomass_data/index.db",
+        env="INDEX_DB_PATH"
+    )
+    blob_store_path: str = Field(default="/tmp/aomass_data/objects", env="BLOB_STORE_PATH")
+    
+    # Mining
+    miner_detector_timeout: float = Field(default=30.0, env="MINER_DETECTOR_TIMEOUT")
+    analysis_workers: Optional[int] = Field(default=None, env="ANALYSIS_WORKERS")  # None = CPU count
+    advisory_db_path: str = Field(default="/tmp/aomass_data/osv", env="ADVISORY_DB_PATH")  # OSV dump
+    taint_max_function_nodes: int = Field(default=20000, env="TAINT_MAX_FUNCTION_NODES")
+    # Detectors skipped by mining passes, by name
+    miner_disabled_detectors: List[str] = Field(
+        default_factory=list, env="MINER_DISABLED_DETECTORS"
+    )
+    # Load detectors installed in the aomass.detectors entry point group
+    miner_detector_plugins: bool = Field(default=True, env="MINER_DETECTOR_PLUGINS")
+    
+    # Git history (churn and hotspots)
+    history_max_days: int = Field(default=365, env="HISTORY_MAX_DAYS")  # Window of a full read
+    history_half_life_days: float = Field(default=90.0, ge=30, env="HISTORY_HALF_LIFE_DAYS")
+    
+    # Package registries (cached locally for dependency update mining)
+    pypi_url: str = Field(default="https://pypi.org", env="PYPI_URL")
+    npm_registry_url: str = Field(default="https://registry.npmjs.org", env="NPM_REGISTRY_URL")
+    crates_index_url: str = Field(default="https://index.crates.io", env="CRATES_INDEX_URL")
+    go_proxy_url: str = Field(default="https://proxy.golang.org", env="GO_PROXY_URL")
+    registry_concurrency: int = Field(default=16, env="REGISTRY_CONCURRENCY")
+    registry_max_age_hours: float = Field(default=24.0, env="REGISTRY_MAX_AGE_HOURS")
+    
+    # Planning: plan templates are reused this long; 0 disables the plan cache
+    plan_cache_ttl_hours: float = Field(default=168.0, ge=0, env="PLAN_CACHE_TTL_HOURS")
+    plan_batch_concurrency: int = Field(default=8, ge=1, env="PLAN_BATCH_CONCURRENCY")  # Plans at once
+    # Most opportunities coalesced into one plan; 1 disables coalescing
+    plan_coalesce_max_opportunities: int = Field(
+        default=10, ge=1, env="PLAN_COALESCE_MAX_OPPORTUNITIES"
+    )
+    # Plan steps executed at once when they do not depend on each other
+    implementation_concurrency: int = Field(default=4, ge=1, env="IMPLEMENTATION_CONCURRENCY")
+    
+    # Dependency update campaigns
+    campaign_concurrency: int = Field(default=8, ge=1, env="CAMPAIGN_CONCURRENCY")  # Repositories at once
+    # Pull requests opened per minute and provider, below hosts' secondary rate limits
+    campaign_pull_requests_per_minute: float = Field(
+        default=20.0, gt=0, env="CAMPAIGN_PULL_REQUESTS_PER_MINUTE"
+    )
+    campaign_max_attempts: int = Field(default=3, ge=1, env="CAMPAIGN_MAX_ATTEMPTS")
+    
     # Redis
     redis_url: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     
@@ -35,6 +85,12 @@ class Settings(BaseModel):
     # Cloud Providers
     default_provider: str = Field(default="github", env="DEFAULT_PROVIDER")
     
+    # Local repositories (paths, file:// URLs and bare repos) must be under one of
+    # these directories; empty disables local repositories
+    local_repository_roots: List[str] = Field(
+        default_factory=list, env="LOCAL_REPOSITORY_ROOTS"
+    )
+    
     # GitHub
     github_token: Optional[str] = Field(default=None, env="GITHUB_TOKEN")
     github_app_id: Optional[str] = Field(default=None, env="GITHUB_APP_ID")
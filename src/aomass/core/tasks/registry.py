@@ -0,0 +1,13 @@
+"""Celery tasks for package registry metadata."""
+import asyncio
+
+from aomass.core.worker import celery_app
+from aomass.services.registry import RegistryService
+
+
+@celery_app.task(bind=True)
+def refresh_registry_task(self, force: bool = False):
+    """Background task refreshing registry metadata of every indexed dependency."""
+    self.update_state(state="PROGRESS", meta={"status": "Refreshing registry metadata"})
+    summary = asyncio.run(RegistryService().refresh_all(force=force))
+    return {"status": "completed", **summary._asdict()}
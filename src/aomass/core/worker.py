@@ -10,6 +10,7 @@ celery_app = Celery(
     backend=settings.celery_result_backend,
     include=[
         "aomass.core.tasks.indexer",
+        "aomass.core.tasks.registry",
         "aomass.core.tasks.implementer",
         "aomass.core.tasks.reviewer",
     ]
@@ -32,6 +33,15 @@ celery_app.conf.update(
 # Task routes
 celery_app.conf.task_routes = {
     "aomass.core.tasks.indexer.*": {"queue": "indexer"},
+    "aomass.core.tasks.registry.*": {"queue": "indexer"},
     "aomass.core.tasks.implementer.*": {"queue": "implementer"},
     "aomass.core.tasks.reviewer.*": {"queue": "reviewer"},
 }
+
+# Periodic tasks
+celery_app.conf.beat_schedule = {
+    "refresh-registry-metadata": {
+        "task": "aomass.core.tasks.registry.refresh_registry_task",
+        "schedule": settings.registry_max_age_hours * 60 * 60,
+    },
+}
@@ -2,19 +2,39 @@
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, HttpUrl
-
-from .core import Language, OpportunityType, TaskStatus
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+
+from .core import (
+    BlastRadius,
+    Campaign,
+    CampaignTarget,
+    DetectorRun,
+    Language,
+    Opportunity,
+    OpportunityType,
+    TaskStatus,
+)
 from .providers import ProviderType
 
 
 # Request Models
 class IndexRepositoryRequest(BaseModel):
     """Request to index a repository."""
-    url: HttpUrl
+    url: str  # Hosted repository URL, file:// URL or absolute local path
     provider_type: Optional[str] = None
     branch: Optional[str] = None
+    refs: List[str] = Field(default_factory=list)  # Branches/tags to index together
     force_reindex: bool = False
+    watch: bool = False  # Local repositories only: re-index files as they change
+    
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, value: str) -> str:
+        """Accept http(s) URLs, file:// URLs and absolute local paths."""
+        if value.startswith(("file://", "/")):
+            return value
+        HttpUrl(value)
+        return value
 
 
 class MineOpportunitiesRequest(BaseModel):
@@ -23,6 +43,15 @@ class MineOpportunitiesRequest(BaseModel):
     opportunity_types: List[OpportunityType] = Field(default_factory=list)
     languages: List[Language] = Field(default_factory=list)
     max_opportunities: int = Field(default=10, ge=1, le=100)
+    detector_timeout: Optional[float] = Field(default=None, gt=0)  # Seconds per detector
+    refresh: bool = False  # Ignore cached detector results
+    profile: bool = False  # Run detectors one at a time, measuring CPU and memory
+
+
+class RegistryRefreshRequest(BaseModel):
+    """Request to refresh cached package registry metadata."""
+    repository_id: Optional[UUID] = None  # If None, refreshes every indexed repository
+    force: bool = False  # Refetch packages fetched within the max age
 
 
 class GeneratePlanRequest(BaseModel):
@@ -31,6 +60,14 @@ class GeneratePlanRequest(BaseModel):
     preferences: Dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchPlanRequest(BaseModel):
+    """Request to generate the plans of many opportunities."""
+    opportunity_ids: List[UUID] = Field(min_length=1, max_length=1000)
+    preferences: Dict[str, Any] = Field(default_factory=dict)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)  # Defaults to the setting
+    coalesce: bool = False  # One plan for related dependency updates
+
+
 class ImplementPlanRequest(BaseModel):
     """Request to implement a plan."""
     plan_id: UUID
@@ -46,10 +83,20 @@ class CreatePRRequest(BaseModel):
     provider_type: Optional[ProviderType] = None  # If None, uses default provider
 
 
+class CreateCampaignRequest(BaseModel):
+    """Request to update a package across every repository depending on it."""
+    ecosystem: str  # OSV ecosystem name, e.g. "PyPI", "npm"
+    package: str
+    version: str  # Version to raise the package to
+    draft: bool = True  # Open the pull requests as drafts
+    start: bool = True  # Apply the campaign right away rather than only planning it
+
+
 class ReviewPRRequest(BaseModel):
     """Request to review pull request."""
     pull_request_id: UUID
     reviewers: List[str] = Field(default_factory=list)  # AI agent names
+    plan_id: Optional[UUID] = None  # Plan of the change, to scope the review to its blast radius
 
 
 # Response Models
@@ -68,8 +115,21 @@ class IndexResponse(TaskResponse):
 class OpportunitiesResponse(BaseModel):
     """Opportunities mining response."""
     repository_id: UUID
-    opportunities: List[Dict[str, Any]]
+    opportunities: List[Opportunity]
     total_count: int
+    detector_runs: List[DetectorRun] = Field(default_factory=list)
+
+
+class CoverageResponse(BaseModel):
+    """Coverage report ingestion response."""
+    repository_id: UUID
+    format: str
+    commit_sha: Optional[str] = None
+    files: int
+    lines: int
+    covered_lines: int
+    line_rate: float
+    unmatched_files: int = 0  # Report files not found in the indexed repository
 
 
 class PlanResponse(BaseModel):
@@ -80,6 +140,16 @@ class PlanResponse(BaseModel):
     steps: List[Dict[str, Any]]
     estimated_effort: str
     risks: List[str]
+    blast_radius: Optional[BlastRadius] = None
+    opportunity_ids: List[UUID] = Field(default_factory=list)  # All of them, for coalesced plans
+
+
+class BatchPlanResult(BaseModel):
+    """One streamed result of batch planning."""
+    opportunity_id: UUID
+    plan: Optional[PlanResponse] = None
+    error: Optional[str] = None
+    shared: bool = False  # Filled in from the plan of an identical opportunity
 
 
 class ImplementationResponse(TaskResponse):
@@ -97,6 +167,13 @@ class PRResponse(BaseModel):
     status: str
 
 
+class CampaignResponse(BaseModel):
+    """Dependency update campaign with its progress per repository."""
+    campaign: Campaign
+    progress: Dict[str, int]  # Number of repositories in each status
+    targets: List[CampaignTarget]
+
+
 class ReviewResponse(BaseModel):
     """Review response."""
     review_id: UUID
@@ -26,6 +26,7 @@ class OpportunityType(str, Enum):
     CODE_OPTIMIZATION = "code_optimization"
     TEST_COVERAGE = "test_coverage"
     DOCUMENTATION = "documentation"
+    SECRET_EXPOSURE = "secret_exposure"
 
 
 class Language(str, Enum):
@@ -64,9 +65,65 @@ class CodeFile(BaseModel):
     content_hash: str
     size: int
     last_modified: datetime
+    blob_sha: Optional[str] = None
     analyzed_at: Optional[datetime] = None
 
 
+class Dependency(BaseModel):
+    """A package dependency declared in a manifest or lock file."""
+    ecosystem: str  # OSV ecosystem name, e.g. "PyPI", "npm"
+    name: str
+    version: Optional[str] = None  # Exact version, when pinned or locked
+    specifier: str = ""  # Requirement as declared
+    path: Optional[str] = None  # Declaring file, when read from a ref
+
+
+class SecretFinding(BaseModel):
+    """A credential found in file contents. The secret itself is never stored."""
+    rule_id: str
+    line: int
+    preview: str  # Redacted, e.g. "AKIA…MPLE"
+    digest: str  # SHA-256 of the secret, to recognize the same secret across files
+    path: Optional[str] = None  # Containing file, when read from a ref
+
+
+class Symbol(BaseModel):
+    """A function, method or class defined in a file."""
+    name: str  # Qualified by enclosing symbols, e.g. "Client.fetch"
+    kind: str  # "function", "method", "class" or "route"
+    line: int
+    end_line: int
+    signature: List[int] = Field(default_factory=list)  # MinHash, for long functions only
+    public: bool = False  # Part of the module's interface
+    documented: bool = False  # Has a docstring or a comment right above it
+    route: Optional[str] = None  # "GET /users/{id}" for HTTP route handlers
+    path: Optional[str] = None  # Defining file, when read from a ref
+
+
+class BlobRecord(BaseModel):
+    """Content-addressed file contents, shared by every ref that contains them."""
+    sha: str  # git blob SHA
+    language: Optional[Language] = None  # None for other files, only scanned for secrets
+    size: int
+    imports: List[str] = Field(default_factory=list)  # Raw import specifiers
+    dependencies: List[Dependency] = Field(default_factory=list)  # Of manifest files
+    secrets: List[SecretFinding] = Field(default_factory=list)
+    symbols: List[Symbol] = Field(default_factory=list)
+    calls: Dict[str, int] = Field(default_factory=dict)  # Callee simple name -> call sites
+    indexed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RefManifest(BaseModel):
+    """Snapshot of one indexed ref: repository paths mapped to blob SHAs."""
+    repository_id: UUID
+    ref: str
+    commit_sha: str
+    entries: Dict[str, str] = Field(default_factory=dict)  # path -> blob SHA
+    parent_commit_sha: Optional[str] = None  # Commit indexed for this ref before
+    changed_paths: List[str] = Field(default_factory=list)  # Changed since the parent
+    indexed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Opportunity(BaseModel):
     """Maintenance opportunity model."""
     id: UUID = Field(default_factory=uuid4)
@@ -78,21 +135,87 @@ class Opportunity(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0)
     files_affected: List[str] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    fingerprint: Optional[str] = None  # Identifies the same finding across runs
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class DetectorRun(BaseModel):
+    """Outcome and timing of one detector during a mining pass."""
+    detector: str
+    opportunity_type: OpportunityType
+    status: TaskStatus
+    duration_ms: float  # Wall time
+    version: str = ""
+    opportunities_found: int = 0
+    cached: bool = False  # Served from a previous run with identical inputs
+    error: Optional[str] = None
+    # CPU time of the detector's worker threads, or of the whole process when profiled
+    cpu_ms: float = 0.0
+    allocated_kb: Optional[float] = None  # Net memory allocated, profiled runs only
+    peak_kb: Optional[float] = None  # Peak memory above the start, profiled runs only
+
+
+class MiningResult(BaseModel):
+    """Opportunities found by a mining pass and how each detector performed."""
+    repository_id: UUID
+    opportunities: List[Opportunity] = Field(default_factory=list)
+    detector_runs: List[DetectorRun] = Field(default_factory=list)
+
+
+class BlastRadius(BaseModel):
+    """Code a change can affect, from the import graph and symbols of an indexed ref."""
+    ref: str
+    commit_sha: str
+    files: List[str] = Field(default_factory=list)  # Changed files and all files importing them
+    symbols: List[str] = Field(default_factory=list)  # "path:name" of the changed symbols
+    tests: List[str] = Field(default_factory=list)  # Test files among the files
+
+
 class Plan(BaseModel):
     """Implementation plan model."""
     id: UUID = Field(default_factory=uuid4)
     opportunity_id: UUID
+    opportunity_ids: List[UUID] = Field(default_factory=list)  # All of them, for coalesced plans
     title: str
     description: str
+    # Each step has a unique "step" number and a "description", and may declare
+    # "files" it edits, "depends_on" (step numbers to finish first; without it a
+    # step follows the previous one) and "needs_tests" (runs the test suite)
     steps: List[Dict[str, Any]] = Field(default_factory=list)
     estimated_effort: str  # e.g., "low", "medium", "high"
     risks: List[str] = Field(default_factory=list)
+    blast_radius: Optional[BlastRadius] = None  # None if the repository is not indexed
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class Campaign(BaseModel):
+    """One dependency update applied across every repository depending on a package."""
+    id: UUID = Field(default_factory=uuid4)
+    ecosystem: str
+    package: str
+    target_version: str
+    plan: Plan  # Generated once and shared by every repository
+    draft: bool = True  # Open pull requests as drafts
+    status: TaskStatus = TaskStatus.PENDING
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CampaignTarget(BaseModel):
+    """Progress of a campaign in one repository."""
+    repository_id: UUID
+    ref: str  # Indexed ref the change is based on
+    status: TaskStatus = TaskStatus.PENDING  # Cancelled when there is nothing to change
+    files: List[str] = Field(default_factory=list)  # Files declaring the package
+    current_versions: List[str] = Field(default_factory=list)
+    branch: Optional[str] = None
+    commit_sha: Optional[str] = None
+    pull_request_url: Optional[str] = None
+    message: Optional[str] = None  # Why the target was skipped or failed
+    attempts: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Implementation(BaseModel):
     """Implementation result model."""
     id: UUID = Field(default_factory=uuid4)
@@ -15,6 +15,7 @@ class ProviderType(str, Enum):
     AZURE_DEVOPS = "azure_devops"
     AWS_CODECOMMIT = "aws_codecommit"
     GENERIC_GIT = "generic_git"
+    LOCAL = "local"
 
 
 class ProviderConfig(BaseModel):
@@ -49,6 +50,14 @@ class PullRequestReference(BaseModel):
     url: Optional[str] = None
 
 
+class RateLimitError(Exception):
+    """Raised by providers when the host's API rate limit is exhausted."""
+    
+    def __init__(self, message: str, retry_after: float = 60.0):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until requests are accepted again
+
+
 class CloudProvider(ABC):
     """Abstract base class for cloud providers."""
     
@@ -62,6 +71,23 @@ class CloudProvider(ABC):
         """Clone repository to target directory."""
         pass
     
+    async def commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        """Commit new contents of files on top of ``base_branch`` to ``branch``.
+        
+        The branch is created, or moved if it exists. Returns the commit SHA.
+        
+        Raises:
+            RateLimitError: If the host's rate limit is exhausted.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot commit files")
+    
     @abstractmethod
     async def create_pull_request(
         self, 
@@ -5,6 +5,7 @@ from ..config.settings import settings
 from ..models.providers import CloudProvider, ProviderType
 from .github_provider import GitHubProvider
 from .gitlab_provider import GitLabProvider
+from .local_provider import LocalProvider
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +17,7 @@ class ProviderFactory:
     _providers: Dict[ProviderType, Type[CloudProvider]] = {
         ProviderType.GITHUB: GitHubProvider,
         ProviderType.GITLAB: GitLabProvider,
+        ProviderType.LOCAL: LocalProvider,
     }
     
     _instances: Dict[ProviderType, CloudProvider] = {}
@@ -47,6 +49,10 @@ class ProviderFactory:
                     token=settings.gitlab_token,
                     url=settings.gitlab_url
                 )
+            elif provider_type == ProviderType.LOCAL:
+                cls._instances[provider_type] = provider_class(
+                    allowed_roots=settings.local_repository_roots
+                )
             # Add other provider initializations here
             
             logger.info(f"Created provider instance: {provider_type}")
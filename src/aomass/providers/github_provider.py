@@ -1,9 +1,11 @@
 """GitHub provider implementation for MCP architecture."""
+import asyncio
 import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
-from github import Github
+from github import Github, GithubException, InputGitTreeElement, RateLimitExceededException
 from github.Repository import Repository as GithubRepository
 from github.PullRequest import PullRequest as GithubPullRequest
 
@@ -11,6 +13,7 @@ from ..config.settings import settings
 from ..models.providers import (
     CloudProvider,
     ProviderType,
+    RateLimitError,
     RepositoryReference,
     PullRequestReference
 )
@@ -19,6 +22,24 @@ from ..utils.logging import get_logger
 logger = get_logger(__name__)
 
 
+def _rate_limit_error(error: GithubException) -> Optional[RateLimitError]:
+    """Translate a primary or secondary rate limit response, None for other errors."""
+    headers = error.headers or {}
+    limited = isinstance(error, RateLimitExceededException) or (
+        error.status in (403, 429)
+        and ("retry-after" in headers or headers.get("x-ratelimit-remaining") == "0")
+    )
+    if not limited:
+        return None
+    if "retry-after" in headers:
+        retry_after = float(headers["retry-after"])
+    elif "x-ratelimit-reset" in headers:
+        retry_after = max(float(headers["x-ratelimit-reset"]) - time.time(), 1.0)
+    else:
+        retry_after = 60.0
+    return RateLimitError(f"GitHub rate limit exceeded: {error.data}", retry_after)
+
+
 class GitHubProvider(CloudProvider):
     """GitHub provider implementation."""
     
@@ -101,8 +122,9 @@ class GitHubProvider(CloudProvider):
             return None
         
         try:
-            github_repo = self.github.get_repo(repo_ref.full_name)
-            pr = github_repo.create_pull(
+            github_repo = await asyncio.to_thread(self.github.get_repo, repo_ref.full_name)
+            pr = await asyncio.to_thread(
+                github_repo.create_pull,
                 title=title,
                 body=description,
                 head=source_branch,
@@ -122,10 +144,58 @@ class GitHubProvider(CloudProvider):
                 status="draft" if draft else "open",
                 url=pr.html_url
             )
+        except GithubException as e:
+            rate_limit = _rate_limit_error(e)
+            if rate_limit is not None:
+                raise rate_limit
+            logger.error(f"Failed to create pull request for {repo_ref.full_name}", error=str(e))
+            return None
         except Exception as e:
             logger.error(f"Failed to create pull request for {repo_ref.full_name}", error=str(e))
             return None
     
+    async def commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        """Commit files to a branch through the Git data API, without cloning."""
+        if not self.github:
+            raise RuntimeError("GitHub client not initialized")
+        try:
+            return await asyncio.to_thread(
+                self._commit_files, repo_ref, branch, base_branch, files, message
+            )
+        except GithubException as e:
+            raise _rate_limit_error(e) or e
+    
+    def _commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        github_repo = self.github.get_repo(repo_ref.full_name)
+        base = github_repo.get_git_commit(github_repo.get_branch(base_branch).commit.sha)
+        elements = [
+            InputGitTreeElement(path, "100644", "blob", content=content.decode("utf-8"))
+            for path, content in files.items()
+        ]
+        tree = github_repo.create_git_tree(elements, base.tree)
+        commit = github_repo.create_git_commit(message, tree, [base])
+        try:
+            github_repo.create_git_ref(f"refs/heads/{branch}", commit.sha)
+        except GithubException as e:
+            if e.status != 422:  # The branch already exists
+                raise
+            github_repo.get_git_ref(f"heads/{branch}").edit(commit.sha, force=True)
+        return commit.sha
+    
     async def add_review_comment(
         self,
         pr_ref: PullRequestReference,
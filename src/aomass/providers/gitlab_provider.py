@@ -1,7 +1,9 @@
 """GitLab provider implementation for MCP architecture."""
+import asyncio
+import base64
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 import gitlab
 from gitlab.v4.objects import Project as GitlabProject
@@ -11,6 +13,7 @@ from ..config.settings import settings
 from ..models.providers import (
     CloudProvider,
     ProviderType,
+    RateLimitError,
     RepositoryReference,
     PullRequestReference
 )
@@ -89,6 +92,52 @@ class GitLabProvider(CloudProvider):
             logger.error(f"Failed to clone repository {repo_ref.full_name}", error=str(e))
             raise
     
+    async def commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        """Commit files to a branch through the commits API, without cloning."""
+        if not self.gitlab:
+            raise RuntimeError("GitLab client not initialized")
+        try:
+            return await asyncio.to_thread(
+                self._commit_files, repo_ref, branch, base_branch, files, message
+            )
+        except gitlab.exceptions.GitlabHttpError as e:
+            if e.response_code == 429:
+                raise RateLimitError(f"GitLab rate limit exceeded: {e.error_message}")
+            raise
+    
+    def _commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        gitlab_project = self.gitlab.projects.get(repo_ref.repository_id)
+        commit = gitlab_project.commits.create({
+            "branch": branch,
+            "start_branch": base_branch,
+            "force": True,  # Restart the branch from the base if it exists
+            "commit_message": message,
+            "actions": [
+                {
+                    "action": "update",
+                    "file_path": path,
+                    "content": base64.b64encode(content).decode(),
+                    "encoding": "base64"
+                }
+                for path, content in files.items()
+            ]
+        })
+        return commit.id
+    
     async def create_pull_request(
         self, 
         repo_ref: RepositoryReference,
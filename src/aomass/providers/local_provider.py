@@ -0,0 +1,231 @@
+"""Local directory and bare-repository provider for on-prem ingestion."""
+import asyncio
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+from ..config.settings import settings
+from ..models.providers import (
+    CloudProvider,
+    ProviderType,
+    RepositoryReference,
+    PullRequestReference
+)
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Ref name used for manifests of plain directories and working trees
+WORKTREE_REF = "worktree"
+
+# Identity of commits made on behalf of the service
+COMMIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "AOMaaS",
+    "GIT_AUTHOR_EMAIL": "aomass@localhost",
+    "GIT_COMMITTER_NAME": "AOMaaS",
+    "GIT_COMMITTER_EMAIL": "aomass@localhost",
+}
+
+# Directories never indexed or watched
+IGNORED_DIRECTORIES = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv"}
+
+
+def path_from_url(url: str) -> Path:
+    """Convert a ``file://`` URL or plain path to an absolute path."""
+    if url.startswith("file://"):
+        url = unquote(urlparse(url).path)
+    return Path(url).expanduser().resolve()
+
+
+def iter_worktree_files(root: Path) -> List[str]:
+    """List files of a directory relative to its root, skipping ignored directories."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRECTORIES]
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return files
+
+
+class LocalProvider(CloudProvider):
+    """Provider for repositories already present on the local filesystem.
+
+    Supports plain directories, git working trees and bare repositories given
+    as a path or ``file://`` URL. Repositories are read in place and never
+    cloned. Pull requests cannot be created for local repositories, but
+    changes can be committed to branches of git repositories.
+    """
+
+    def __init__(self, allowed_roots: Optional[List[str]] = None):
+        """Initialize local provider with the directories it may read."""
+        roots = allowed_roots if allowed_roots is not None else settings.local_repository_roots
+        self.allowed_roots = [Path(root).expanduser().resolve() for root in roots]
+
+    def _is_allowed(self, path: Path) -> bool:
+        """Check that a path is inside the configured roots; none are allowed without roots."""
+        return any(path == root or root in path.parents for root in self.allowed_roots)
+
+    async def get_repository(self, owner: str, repo: str) -> Optional[RepositoryReference]:
+        """Get repository by path; ``repo`` is the local path or ``file://`` URL."""
+        path = path_from_url(repo)
+        if not path.is_dir():
+            logger.error(f"Local repository not found: {path}")
+            return None
+        if not self._is_allowed(path):
+            if not self.allowed_roots:
+                logger.error("Local repositories are disabled: LOCAL_REPOSITORY_ROOTS is not set")
+            else:
+                logger.error(f"Local repository outside allowed roots: {path}")
+            return None
+
+        default_branch = WORKTREE_REF
+        git_repo = self.open_git_repository(path)
+        if git_repo is not None:
+            try:
+                default_branch = git_repo.active_branch.name
+            except TypeError:
+                # Detached HEAD
+                default_branch = git_repo.head.commit.hexsha
+            except Exception:
+                logger.warning(f"Could not determine HEAD of {path}, using worktree")
+
+        name = path.name[:-4] if path.name.endswith(".git") else path.name
+        return RepositoryReference(
+            provider_type=ProviderType.LOCAL,
+            provider_id="local",
+            repository_id=str(path),
+            full_name=f"local/{name}",
+            url=path.as_uri(),
+            default_branch=default_branch
+        )
+
+    @staticmethod
+    def open_git_repository(path: Path):
+        """Open ``path`` as a git repository (bare or not), or return None."""
+        import git
+
+        try:
+            repo = git.Repo(path)
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+            return None
+        # Only accept the repository rooted at ``path``, not a parent of it
+        root = Path(repo.git_dir if repo.bare else repo.working_tree_dir).resolve()
+        return repo if root == path else None
+
+    async def clone_repository(self, repo_ref: RepositoryReference, target_dir: str, branch: str = None) -> str:
+        """Return the repository path; local repositories are read in place."""
+        path = path_from_url(repo_ref.url)
+        if not self._is_allowed(path):
+            raise ValueError(f"Local repository outside allowed roots: {path}")
+        logger.info(f"Using local repository {repo_ref.full_name} at {path}")
+        return str(path)
+
+    async def watch(
+        self, path: Path, debounce: float = 0.5
+    ) -> AsyncIterator[Set[str]]:
+        """Watch a directory tree and yield batches of changed paths.
+
+        Paths are relative to ``path``. Uses ``watchfiles`` (inotify on Linux);
+        events are coalesced for ``debounce`` seconds so that saving several
+        files yields a single batch.
+        """
+        try:
+            from watchfiles import DefaultFilter, awatch
+        except ImportError:
+            raise RuntimeError("Watch mode requires the 'watchfiles' package")
+
+        watch_filter = DefaultFilter(ignore_dirs=tuple(IGNORED_DIRECTORIES))
+        logger.info(f"Watching {path} for changes")
+        async for changes in awatch(
+            path, watch_filter=watch_filter, debounce=int(debounce * 1000)
+        ):
+            yield {os.path.relpath(changed_path, path) for _, changed_path in changes}
+
+    async def commit_files(
+        self,
+        repo_ref: RepositoryReference,
+        branch: str,
+        base_branch: str,
+        files: Dict[str, bytes],
+        message: str
+    ) -> str:
+        """Commit files to a branch with git plumbing, leaving the working tree untouched."""
+        path = path_from_url(repo_ref.url)
+        if not self._is_allowed(path):
+            raise ValueError(f"Local repository outside allowed roots: {path}")
+        return await asyncio.to_thread(
+            self._commit_files, path, branch, base_branch, files, message
+        )
+
+    @staticmethod
+    def _commit_files(
+        path: Path, branch: str, base_branch: str, files: Dict[str, bytes], message: str
+    ) -> str:
+        def git(*args: str, stdin: Optional[bytes] = None, env=None) -> str:
+            result = subprocess.run(
+                ["git", *args], cwd=path, input=stdin, capture_output=True, env=env
+            )
+            if result.returncode:
+                raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode().strip()}")
+            return result.stdout.decode().strip()
+
+        base = git("rev-parse", "--verify", f"{base_branch}^{{commit}}")
+        with tempfile.TemporaryDirectory() as scratch:
+            # A private index keeps the repository's own index and worktree as they are
+            env = {**os.environ, **COMMIT_IDENTITY, "GIT_INDEX_FILE": f"{scratch}/index"}
+            git("read-tree", base, env=env)
+            for file_path, content in files.items():
+                listing = git("ls-tree", base, "--", file_path)
+                mode = listing.split(" ", 1)[0] if listing else "100644"
+                blob = git("hash-object", "-w", "--stdin", stdin=content)
+                git("update-index", "--add", "--cacheinfo", f"{mode},{blob},{file_path}", env=env)
+            tree = git("write-tree", env=env)
+            commit = git("commit-tree", tree, "-p", base, "-m", message, env=env)
+        git("update-ref", f"refs/heads/{branch}", commit)
+        return commit
+
+    async def create_pull_request(
+        self,
+        repo_ref: RepositoryReference,
+        title: str,
+        description: str,
+        source_branch: str,
+        target_branch: str,
+        draft: bool = True
+    ) -> Optional[PullRequestReference]:
+        """Pull requests are not supported for local repositories."""
+        logger.warning(f"Cannot create pull request for local repository {repo_ref.full_name}")
+        return None
+
+    async def add_review_comment(
+        self,
+        pr_ref: PullRequestReference,
+        comment: str,
+        path: Optional[str] = None,
+        line: Optional[int] = None
+    ) -> bool:
+        """Review comments are not supported for local repositories."""
+        logger.warning("Cannot add review comments to local repositories")
+        return False
+
+    async def update_pull_request_status(
+        self,
+        pr_ref: PullRequestReference,
+        status: str
+    ) -> bool:
+        """Pull request status updates are not supported for local repositories."""
+        logger.warning("Cannot update pull requests of local repositories")
+        return False
+
+    async def post_review(
+        self,
+        repo_id: str,
+        pr_id: str,
+        review: object
+    ) -> bool:
+        """Reviews are not supported for local repositories."""
+        logger.warning("Cannot post reviews to local repositories")
+        return False
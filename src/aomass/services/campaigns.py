@@ -0,0 +1,278 @@
+"""Dependency update campaigns across every indexed repository."""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from ..analysis.codemods import DependencyBump
+from ..analysis.dependencies import normalize_package_name
+from ..analysis.versions import version_key
+from ..config.settings import settings
+from ..models.core import Campaign, CampaignTarget, Opportunity, OpportunityType, TaskStatus
+from ..models.providers import ProviderType, RateLimitError
+from ..providers.factory import ProviderFactory
+from ..providers.local_provider import WORKTREE_REF
+from ..storage.blob_store import BlobContentStore
+from ..storage.campaign_store import CampaignStore
+from ..storage.index_store import IndexStore, PackageUse
+from .planner import PlannerService
+
+
+class PullRequestThrottle:
+    """Spaces out pull requests per provider and pauses a provider when rate limited.
+
+    Hosts throttle bursts of pull requests well below their request quotas,
+    so each provider gets at most ``per_minute`` requests, evenly spaced.
+    A rate limit response pushes the provider's next slot past its reset.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self._next: Dict[ProviderType, float] = {}
+        self._locks: Dict[ProviderType, asyncio.Lock] = {}
+
+    async def wait(self, provider_type: ProviderType):
+        """Wait for the next slot of a provider."""
+        lock = self._locks.setdefault(provider_type, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(provider_type, now))
+            self._next[provider_type] = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+    def pause(self, provider_type: ProviderType, seconds: float):
+        """Hold every request to a provider for ``seconds``."""
+        resume = time.monotonic() + seconds
+        self._next[provider_type] = max(self._next.get(provider_type, resume), resume)
+
+
+class CampaignService:
+    """Service applying one dependency update to every repository that needs it.
+
+    Affected repositories come from the fleet dependency index, without
+    mining each of them. The plan is generated once per campaign and the
+    codemod runs once per distinct manifest blob, since repositories often
+    share identical manifests. Workers then commit the rewritten files and
+    open pull requests, a bounded number of repositories at a time.
+    """
+
+    def __init__(
+        self,
+        index_store: Optional[IndexStore] = None,
+        blob_store: Optional[BlobContentStore] = None,
+        store: Optional[CampaignStore] = None,
+        planner: Optional[PlannerService] = None,
+        provider_factory=ProviderFactory
+    ):
+        self.index_store = index_store or IndexStore(settings.index_db_path)
+        self.blob_store = blob_store or BlobContentStore(settings.blob_store_path)
+        self.store = store or CampaignStore(settings.index_db_path)
+        self.planner = planner or PlannerService()
+        self.provider_factory = provider_factory
+
+    async def create(
+        self, ecosystem: str, package: str, version: str, draft: bool = True
+    ) -> Campaign:
+        """Plan a campaign raising a package to ``version`` wherever it is older.
+
+        Raises:
+            ValueError: If no indexed repository declares the package.
+        """
+        package = normalize_package_name(ecosystem, package)
+        uses: Dict[UUID, List[PackageUse]] = {}
+        for use in self.index_store.package_uses(ecosystem, package):
+            uses.setdefault(use.repository_id, []).append(use)
+        if not uses:
+            raise ValueError(f"No indexed repository depends on {ecosystem} package {package}")
+
+        campaign_id = uuid4()
+        target_key = version_key(ecosystem, version)
+        targets = []
+        for repository_id, repository_uses in uses.items():
+            versions = sorted({
+                use.dependency.version for use in repository_uses if use.dependency.version
+            })
+            target = CampaignTarget(
+                repository_id=repository_id,
+                ref=repository_uses[0].ref,
+                files=sorted({use.dependency.path for use in repository_uses}),
+                current_versions=versions
+            )
+            keys = [version_key(ecosystem, current) for current in versions]
+            if keys and target_key is not None and all(
+                key is not None and key >= target_key for key in keys
+            ):
+                target.status = TaskStatus.CANCELLED
+                target.message = f"Already at {', '.join(versions)}"
+            targets.append(target)
+
+        current = sorted({v for target in targets for v in target.current_versions})
+        plan = await self.planner.plan_opportunity(Opportunity(
+            id=campaign_id,
+            repository_id=campaign_id,
+            type=OpportunityType.DEPENDENCY_UPDATE,
+            title=f"Update {package} to {version} across {len(targets)} repositories",
+            description=f"Raise {ecosystem} package {package} to {version}",
+            priority=3,
+            confidence=1.0,
+            files_affected=sorted({path for target in targets for path in target.files}),
+            metadata={
+                "package": package,
+                "current_version": ", ".join(current) if current else "unpinned",
+                "latest_version": version
+            }
+        ))
+        campaign = Campaign(
+            id=campaign_id,
+            ecosystem=ecosystem,
+            package=package,
+            target_version=version,
+            plan=plan,
+            draft=draft
+        )
+        self.store.create(campaign, targets)
+        return campaign
+
+    async def run(self, campaign_id: UUID) -> Dict[str, int]:
+        """Apply a campaign to its pending and failed repositories.
+
+        Returns the number of targets in each status. Running a campaign
+        again resumes it: completed and skipped repositories are left alone.
+
+        Raises:
+            ValueError: If the campaign does not exist.
+        """
+        campaign = self.store.get(campaign_id)
+        if campaign is None:
+            raise ValueError(f"Campaign {campaign_id} not found")
+        targets = self.store.targets(
+            campaign_id, [TaskStatus.PENDING, TaskStatus.IN_PROGRESS, TaskStatus.FAILED]
+        )
+        self.store.set_status(campaign_id, TaskStatus.IN_PROGRESS)
+
+        bump = DependencyBump(campaign.ecosystem, campaign.package, campaign.target_version)
+        rewrites: Dict[Tuple[str, str], Optional[bytes]] = {}
+        throttle = PullRequestThrottle(settings.campaign_pull_requests_per_minute)
+        semaphore = asyncio.Semaphore(settings.campaign_concurrency)
+
+        async def work(target: CampaignTarget):
+            async with semaphore:
+                await self._apply(campaign, target, bump, rewrites, throttle)
+
+        await asyncio.gather(*(work(target) for target in targets))
+        progress = self.store.progress(campaign_id)
+        self.store.set_status(
+            campaign_id,
+            TaskStatus.FAILED if progress.get(TaskStatus.FAILED.value) else TaskStatus.COMPLETED
+        )
+        return progress
+
+    async def _apply(
+        self,
+        campaign: Campaign,
+        target: CampaignTarget,
+        bump: DependencyBump,
+        rewrites: Dict[Tuple[str, str], Optional[bytes]],
+        throttle: PullRequestThrottle
+    ):
+        """Commit the update to one repository and open its pull request."""
+        target.status = TaskStatus.IN_PROGRESS
+        target.message = None
+        self.store.update_target(campaign.id, target)
+        try:
+            await self._publish(campaign, target, bump, rewrites, throttle)
+        except Exception as e:
+            target.status = TaskStatus.FAILED
+            target.message = str(e)
+        self.store.update_target(campaign.id, target)
+
+    async def _publish(
+        self,
+        campaign: Campaign,
+        target: CampaignTarget,
+        bump: DependencyBump,
+        rewrites: Dict[Tuple[str, str], Optional[bytes]],
+        throttle: PullRequestThrottle
+    ):
+        repo_ref = self.index_store.get_repository(target.repository_id)
+        manifest = self.index_store.get_manifest(target.repository_id, target.ref)
+        if repo_ref is None or manifest is None:
+            raise ValueError("Repository is no longer indexed; index it again to resume")
+
+        files = {}
+        for path in target.files:
+            sha = manifest.entries.get(path)
+            if sha is None:
+                continue
+            # Identical manifests share a blob and are rewritten once
+            key = (sha, path.rsplit("/", 1)[-1])
+            if key not in rewrites:
+                content = self.blob_store.get(sha)
+                rewrites[key] = bump.apply(path, content) if content is not None else None
+            if rewrites[key] is not None:
+                files[path] = rewrites[key]
+        if not files:
+            target.status = TaskStatus.CANCELLED
+            target.message = "No pinned manifest to rewrite; lock files need the package manager"
+            return
+
+        provider = self.provider_factory.get_provider(repo_ref.provider_type)
+        if provider is None:
+            raise ValueError(f"Provider not available: {repo_ref.provider_type}")
+        base = repo_ref.default_branch if target.ref == WORKTREE_REF else target.ref
+        target.branch = (
+            f"aomass/update-{re.sub(r'[^A-Za-z0-9._-]+', '-', campaign.package)}-"
+            f"{campaign.target_version}"
+        )
+        title = f"Update {campaign.package} to {campaign.target_version}"
+
+        while True:
+            target.attempts += 1
+            try:
+                if repo_ref.provider_type != ProviderType.LOCAL:
+                    # Local repositories make no API calls to throttle
+                    await throttle.wait(repo_ref.provider_type)
+                if target.commit_sha is None:
+                    target.commit_sha = await provider.commit_files(
+                        repo_ref, target.branch, base, files, title
+                    )
+                pull_request = await provider.create_pull_request(
+                    repo_ref=repo_ref,
+                    title=title,
+                    description=self._describe(campaign, files),
+                    source_branch=target.branch,
+                    target_branch=base,
+                    draft=campaign.draft
+                )
+                break
+            except RateLimitError as e:
+                if target.attempts >= settings.campaign_max_attempts:
+                    raise
+                throttle.pause(repo_ref.provider_type, e.retry_after)
+
+        if pull_request is not None:
+            target.pull_request_url = pull_request.url
+            target.status = TaskStatus.COMPLETED
+        elif repo_ref.provider_type == ProviderType.LOCAL:
+            target.status = TaskStatus.COMPLETED
+            target.message = (
+                f"Committed to branch {target.branch}; local repositories have no pull requests"
+            )
+        else:
+            raise RuntimeError(f"Failed to open a pull request for {repo_ref.full_name}")
+
+    @staticmethod
+    def _describe(campaign: Campaign, files: Dict[str, bytes]) -> str:
+        """Pull request description: the campaign and its shared plan."""
+        steps = "\n".join(
+            f"{step.get('step', index + 1)}. {step.get('description', '')}"
+            for index, step in enumerate(campaign.plan.steps)
+        )
+        risks = "\n".join(f"- {risk}" for risk in campaign.plan.risks)
+        changed = "\n".join(f"- `{path}`" for path in sorted(files))
+        return (
+            f"Updates {campaign.ecosystem} package `{campaign.package}` to "
+            f"{campaign.target_version}, as part of campaign {campaign.id}.\n\n"
+            f"### Changed files\n{changed}\n\n### Plan\n{steps}\n\n### Risks\n{risks}\n"
+        )
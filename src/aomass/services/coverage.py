@@ -0,0 +1,83 @@
+"""Test coverage report ingestion service."""
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+import numpy as np
+
+from ..analysis.coverage import (
+    FileCoverage, PathResolver, collapse, parse_report, sniff_format
+)
+from ..config.settings import settings
+from ..storage.coverage_store import CoverageReport, CoverageStore
+from ..storage.index_store import IndexStore
+
+
+class IngestSummary(NamedTuple):
+    """Outcome of ingesting a coverage report."""
+    report: CoverageReport
+    unmatched_files: int  # Report files not found in the indexed ref
+
+
+class CoverageService:
+    """Service for ingesting test coverage reports of indexed repositories."""
+
+    def __init__(
+        self,
+        store: Optional[CoverageStore] = None,
+        index_store: Optional[IndexStore] = None
+    ):
+        self.store = store or CoverageStore(settings.index_db_path)
+        self.index_store = index_store or IndexStore(settings.index_db_path)
+
+    def ingest(
+        self,
+        repository_id: UUID,
+        stream: BinaryIO,
+        report_format: Optional[str] = None,
+        name: str = "",
+        commit_sha: Optional[str] = None
+    ) -> IngestSummary:
+        """Parse a coverage report and store it against the default ref.
+
+        Report paths are mapped onto the paths of the ref; files that match
+        nothing (generated code, vendored packages) are counted and dropped.
+        Without ``commit_sha`` the report is assumed to come from the
+        indexed commit.
+
+        Raises:
+            ValueError: If the repository is not indexed or the report
+                cannot be parsed.
+        """
+        ref = self.index_store.default_ref(repository_id)
+        manifest = self.index_store.get_manifest(repository_id, ref) if ref else None
+        if manifest is None:
+            raise ValueError(f"Repository {repository_id} has not been indexed")
+
+        report_format = report_format or sniff_format(stream, name)
+        files = parse_report(stream, report_format)
+        resolver = PathResolver(manifest.entries)
+        matched: Dict[str, List[FileCoverage]] = {}
+        unmatched = 0
+        for file in files:
+            path = resolver.resolve(file.path)
+            if path is None:
+                unmatched += 1
+            else:
+                matched.setdefault(path, []).append(file)
+
+        merged = [
+            parts[0]._replace(path=path) if len(parts) == 1 else collapse(
+                path,
+                np.concatenate([part.lines for part in parts]),
+                np.concatenate([part.hits for part in parts])
+            )
+            for path, parts in matched.items()
+        ]
+        report = self.store.save(
+            repository_id,
+            report_format,
+            merged,
+            commit_sha or manifest.commit_sha
+        )
+        return IngestSummary(report, unmatched)
+
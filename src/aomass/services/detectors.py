@@ -0,0 +1,308 @@
+"""Detector registry: built-in and plugin detectors, their inputs and profiles."""
+import asyncio
+import os
+import time
+import tracemalloc
+from contextvars import ContextVar
+from enum import Enum
+from importlib.metadata import entry_points
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from uuid import UUID
+
+from ..analysis.rules import RuleEngine, RuleFinding, SourceFile
+from ..models.core import Language, Opportunity, OpportunityType, RefManifest
+
+if TYPE_CHECKING:
+    from .miner import MinerService
+
+T = TypeVar("T")
+
+# Entry point group of detector plugins
+ENTRY_POINT_GROUP = "aomass.detectors"
+
+
+class DetectorScope(str, Enum):
+    """What a detector has to re-analyze when files change."""
+    REPOSITORY = "repository"  # Everything: findings are not tied to single files
+    # Changed files only: findings depend on their own file. Facts linking
+    # files, such as calls into imported helpers, are joined in ``build``.
+    FILE = "file"
+
+
+class DetectorInput(str, Enum):
+    """Data a detector reads besides the indexed files matching its patterns."""
+    DEPENDENCIES = "dependencies"  # Dependency table extracted from manifests
+    SYNTAX = "syntax"  # Source files, parsed by the detector's rules
+    SYMBOLS = "symbols"  # Symbol table of the indexed ref
+    IMPORTS = "imports"  # Import graph of the indexed ref
+    CORPUS = "corpus"  # Symbols of every indexed repository
+    SECRETS = "secrets"  # Secrets found at index time
+    HISTORY = "history"  # Git churn aggregated at index time
+    COVERAGE = "coverage"  # Latest ingested coverage report
+    ADVISORIES = "advisories"  # Offline vulnerability advisory database
+    REGISTRY = "registry"  # Cached package registry metadata
+
+
+# Inputs kept outside the repository: they change without a new commit, so
+# a detector's cached output is only reused while they are unchanged too
+EXTERNAL_INPUTS = frozenset({
+    DetectorInput.CORPUS,
+    DetectorInput.HISTORY,
+    DetectorInput.COVERAGE,
+    DetectorInput.ADVISORIES,
+    DetectorInput.REGISTRY,
+})
+
+
+class DetectorSpec(NamedTuple):
+    """Identity and inputs of a detector, used to cache its results."""
+    name: str
+    opportunity_type: OpportunityType
+    version: str  # Bump whenever the detector's output for the same inputs changes
+    inputs: Tuple[str, ...] = ()  # File name patterns the detector reads
+    scope: DetectorScope = DetectorScope.REPOSITORY
+    requires: FrozenSet[DetectorInput] = frozenset()
+
+
+class DetectionContext(NamedTuple):
+    """What a detector is run on."""
+    repository_id: UUID
+    languages: List[Language]  # Empty for all languages
+    manifest: Optional[RefManifest]  # Latest indexed ref, None if not indexed
+    miner: "MinerService"  # Gives access to the stores
+    analysis: Optional["SharedAnalysis"] = None  # Syntax pass shared by the rule detectors
+
+
+class Detector:
+    """A detector run by the miner.
+
+    Repository-scoped detectors implement :meth:`detect`. File-scoped ones
+    implement :meth:`analyze`, which only sees the files changed since the
+    last run, and :meth:`build`, which groups the findings of all files
+    into opportunities.
+
+    Plugins subclass this, set ``spec`` and are listed in the
+    ``aomass.detectors`` entry point group; each entry point names a
+    detector class or instance.
+    """
+
+    spec: DetectorSpec
+
+    async def detect(self, context: DetectionContext) -> List[Opportunity]:
+        """Find the opportunities of a repository."""
+        raise NotImplementedError
+
+    def analyze(self, files: List[SourceFile]) -> List[RuleFinding]:
+        """Find issues in source files; runs in a worker thread."""
+        raise NotImplementedError
+
+    def build(
+        self, context: DetectionContext, findings: List[RuleFinding]
+    ) -> List[Opportunity]:
+        """Turn the findings of every input file into opportunities."""
+        raise NotImplementedError
+
+
+class RepositoryDetector(Detector):
+    """Detector delegating to a coroutine function."""
+
+    def __init__(
+        self,
+        spec: DetectorSpec,
+        detect: Callable[[DetectionContext], Awaitable[List[Opportunity]]]
+    ):
+        self.spec = spec
+        self._detect = detect
+
+    async def detect(self, context: DetectionContext) -> List[Opportunity]:
+        return await self._detect(context)
+
+
+class RuleDetector(Detector):
+    """Detector whose findings come from a rule engine.
+
+    Detectors may share an engine and keep the findings of some of its
+    rules only, given by ``rule_ids``; all of its rules by default.
+    """
+
+    def __init__(
+        self,
+        spec: DetectorSpec,
+        engine: RuleEngine,
+        build: Callable[[DetectionContext, List[RuleFinding]], List[Opportunity]],
+        rule_ids: Optional[Iterable[str]] = None
+    ):
+        self.spec = spec
+        self.engine = engine
+        self._build = build
+        self.rule_ids = frozenset(
+            rule_ids if rule_ids is not None else (rule.id for rule in engine.rules)
+        )
+
+    def analyze(self, files: List[SourceFile]) -> List[RuleFinding]:
+        return [
+            finding for finding in self.engine.analyze_files(files)
+            if finding.rule_id in self.rule_ids
+        ]
+
+    def build(
+        self, context: DetectionContext, findings: List[RuleFinding]
+    ) -> List[Opportunity]:
+        return self._build(context, findings)
+
+
+def load_plugins() -> List[Tuple[str, Detector]]:
+    """Load the detectors installed in the ``aomass.detectors`` entry point group.
+
+    A plugin that fails to load is reported and skipped.
+    """
+    plugins = []
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            detector = entry_point.load()
+            if isinstance(detector, type):
+                detector = detector()
+            if not isinstance(getattr(detector, "spec", None), DetectorSpec):
+                raise TypeError("not a detector: it has no DetectorSpec")
+        except Exception as e:
+            print(f"Failed to load detector plugin {entry_point.name}: {str(e)}")
+            continue
+        plugins.append((entry_point.name, detector))
+    return plugins
+
+
+class DetectorProfile(NamedTuple):
+    """Resources used by one detector run."""
+    wall_ms: float
+    cpu_ms: float
+    allocated_kb: Optional[float] = None  # Net growth of traced memory
+    peak_kb: Optional[float] = None  # Peak traced memory above the start
+
+
+# CPU seconds spent in worker threads by the detector running in this context
+_thread_cpu: ContextVar[Optional[List[float]]] = ContextVar("detector_thread_cpu", default=None)
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any) -> T:
+    """Like :func:`asyncio.to_thread`, charging the thread's CPU time to the running detector.
+
+    Detectors offload blocking work through this so their profiles include it.
+    """
+    account = _thread_cpu.get()
+
+    def timed() -> T:
+        started = time.thread_time()
+        try:
+            return func(*args)
+        finally:
+            if account is not None:
+                account[0] += time.thread_time() - started
+
+    return await asyncio.to_thread(timed)
+
+
+class SharedAnalysis:
+    """One traversal per file for every rule detector of a mining pass.
+
+    Rule detectors sharing ``engine`` ask for the files they need. Each
+    file is analyzed once, with all of the engine's rules, however many
+    detectors ask for it and whether or not they do so concurrently; every
+    detector then keeps the findings of its own rules. An analysis outlives
+    a detector cancelled while waiting for it, as others may need it too.
+    """
+
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+        self._findings: Dict[str, "asyncio.Future[List[RuleFinding]]"] = {}  # By path
+
+    async def analyze(
+        self, files: List[SourceFile], rule_ids: FrozenSet[str]
+    ) -> List[RuleFinding]:
+        """Findings of the rules in ``rule_ids`` in ``files``."""
+        pending = [file for file in files if file.path not in self._findings]
+        if pending:
+            loop = asyncio.get_running_loop()
+            futures = {file.path: loop.create_future() for file in pending}
+            self._findings.update(futures)
+
+            def resolve(task: asyncio.Task):
+                if task.cancelled() or task.exception() is not None:
+                    error = asyncio.CancelledError() if task.cancelled() else task.exception()
+                    for future in futures.values():
+                        future.set_exception(error)
+                    return
+                by_path: Dict[str, List[RuleFinding]] = {path: [] for path in futures}
+                for finding in task.result():
+                    by_path[finding.path].append(finding)
+                for path, future in futures.items():
+                    future.set_result(by_path[path])
+
+            asyncio.ensure_future(
+                run_in_thread(self.engine.analyze_files, pending)
+            ).add_done_callback(resolve)
+
+        results = await asyncio.shield(
+            asyncio.gather(*(self._findings[file.path] for file in files))
+        )
+        return [
+            finding for file_findings in results for finding in file_findings
+            if finding.rule_id in rule_ids
+        ]
+
+
+def _process_cpu() -> float:
+    """CPU seconds used by this process and its reaped children, such as analysis pools."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class DetectorMeter:
+    """Measures the detector run in its ``with`` block.
+
+    Detectors normally run concurrently in one process, so only wall time
+    and the CPU time of work passed to :func:`run_in_thread` can be told
+    apart. A traced run must run alone, under :mod:`tracemalloc`: its CPU
+    time then covers the whole process, analysis pools included, and
+    allocations are counted.
+    """
+
+    def __init__(self, traced: bool = False):
+        self.traced = traced
+        self.profile = DetectorProfile(0.0, 0.0)
+
+    def __enter__(self) -> "DetectorMeter":
+        self._account = [0.0]
+        self._token = _thread_cpu.set(self._account)
+        if self.traced:
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+            self._cpu = _process_cpu()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        _thread_cpu.reset(self._token)
+        if not self.traced:
+            self.profile = DetectorProfile(wall_ms, self._account[0] * 1000)
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.profile = DetectorProfile(
+            wall_ms,
+            (_process_cpu() - self._cpu) * 1000,
+            allocated_kb=(current - self._memory) / 1024,
+            peak_kb=(peak - self._memory) / 1024
+        )
@@ -0,0 +1,142 @@
+"""Git history churn service."""
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..analysis.history import ChurnAggregator, git_log_command, heat_now, hotness, parse_log
+from ..config.settings import settings
+from ..models.core import RefManifest
+from ..storage.history_store import Churn, HistoryStore
+from ..storage.index_store import IndexStore
+
+DAY_SECONDS = 86400
+
+
+class HistoryService:
+    """Service keeping per-file and per-symbol churn of indexed refs up to date.
+
+    History is read with one streamed ``git log`` per ref and indexing run.
+    Only commits since the previously read head are read again; when that
+    head is no longer an ancestor (a force-push or rewritten branch), the
+    window of ``history_max_days`` is read from scratch.
+    """
+
+    def __init__(
+        self,
+        store: Optional[HistoryStore] = None,
+        index_store: Optional[IndexStore] = None
+    ):
+        self.store = store or HistoryStore(settings.index_db_path)
+        self.index_store = index_store or IndexStore(settings.index_db_path)
+
+    @property
+    def half_life(self) -> float:
+        """Half-life of commit weights, in seconds."""
+        return settings.history_half_life_days * DAY_SECONDS
+
+    def update(
+        self,
+        repository_id: UUID,
+        repo_path: Path,
+        manifest: RefManifest,
+        revision: Optional[str] = None
+    ) -> int:
+        """Read the history of a ref not yet aggregated and merge it into the store.
+
+        ``revision`` is the commit the ref's files were indexed from, by
+        default the manifest's commit. Returns the number of commits read.
+
+        Raises:
+            RuntimeError: If git fails to resolve the revision or list history.
+        """
+        revision = revision or manifest.commit_sha
+        head = self._git(repo_path, "rev-parse", "--verify", f"{revision}^{{commit}}")
+        previous = self.store.get_head(repository_id, manifest.ref)
+        if previous is not None and previous.commit_sha == head:
+            return 0
+        incremental = previous is not None and self._is_ancestor(
+            repo_path, previous.commit_sha, head
+        )
+
+        symbols: Dict[str, List[Tuple[str, int, int]]] = {path: [] for path in manifest.entries}
+        for symbol in self.index_store.get_symbols(repository_id, manifest.ref):
+            if symbol.kind != "route":
+                symbols[symbol.path].append((symbol.name, symbol.line, symbol.end_line))
+        aggregator = ChurnAggregator(symbols, self.half_life)
+
+        command = git_log_command(
+            f"{previous.commit_sha}..{head}" if incremental else head,
+            None if incremental else settings.history_max_days
+        )
+        with subprocess.Popen(
+            command, cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        ) as process:
+            for commit in parse_log(process.stdout):
+                aggregator.add(commit)
+        if process.returncode:
+            raise RuntimeError(f"git log failed with exit status {process.returncode}")
+
+        self.store.save(repository_id, manifest.ref, head, aggregator, replace=not incremental)
+        return aggregator.commits
+
+    def hotspots(
+        self, repository_id: UUID, ref: str, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """The files of a ref with the most recent churn, hottest first."""
+        files = self.store.file_churn(repository_id, ref)
+        ranked = sorted(
+            self.annotations(files).items(), key=lambda item: -item[1]["recent_commits"]
+        )[:limit]
+        by_path: Dict[str, List[Tuple[float, str]]] = {}
+        symbols = self.store.symbol_churn(repository_id, ref, [path for path, _ in ranked])
+        for (path, name), churn in symbols.items():
+            by_path.setdefault(path, []).append((churn.heat, name))
+        return [
+            {
+                "path": path,
+                **churn,
+                "hottest_symbols": [
+                    name for _, name in sorted(by_path.get(path, []), reverse=True)[:5]
+                ]
+            }
+            for path, churn in ranked
+        ]
+
+    def annotations(self, files: Dict[str, Churn]) -> Dict[str, Dict[str, Any]]:
+        """Churn of files as opportunity metadata, with hotness scaled to [0, 1]."""
+        if not files:
+            return {}
+        now = time.time()
+        recent = np.array([heat_now(churn.heat, self.half_life, now) for churn in files.values()])
+        scaled = hotness(recent)
+        return {
+            path: {
+                "commits": churn.commits,
+                "authors": churn.authors,
+                "lines_changed": churn.added + churn.deleted,
+                "last_commit_at": churn.last_commit_at.isoformat(),
+                "recent_commits": round(float(commits), 2),
+                "hotness": round(float(value), 3)
+            }
+            for (path, churn), commits, value in zip(files.items(), recent, scaled)
+        }
+
+    @staticmethod
+    def _git(repo_path: Path, *args: str) -> str:
+        result = subprocess.run(
+            ["git", *args], cwd=repo_path, capture_output=True, text=True
+        )
+        if result.returncode:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    @staticmethod
+    def _is_ancestor(repo_path: Path, ancestor: str, commit: str) -> bool:
+        return subprocess.run(
+            ["git", "merge-base", "--is-ancestor", ancestor, commit],
+            cwd=repo_path, capture_output=True
+        ).returncode == 0
@@ -1,75 +1,86 @@
 """Code implementation service."""
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 
+from ..config.settings import settings
 from ..models.core import Implementation, Plan, TaskStatus
+from ..storage.plan_store import PlanStore
+from .scheduler import run_steps
 
 
 class ImplementerService:
     """Service for implementing planned changes."""
     
-    def __init__(self):
-        pass
+    def __init__(self, plan_store: Optional[PlanStore] = None):
+        self.plan_store = plan_store or PlanStore(settings.index_db_path)
     
     async def implement_plan(self, plan_id: UUID, dry_run: bool = False) -> str:
-        """Implement a generated plan."""
+        """Implement a generated plan.
+        
+        Raises:
+            ValueError: If no generated plan has this ID.
+        """
+        plan = await self._get_plan(plan_id)
         task_id = str(uuid4())
         
         # Start background implementation
-        asyncio.create_task(self._implement_plan_background(plan_id, dry_run, task_id))
+        asyncio.create_task(self._implement_plan_background(plan, dry_run, task_id))
         
         return task_id
     
     async def _implement_plan_background(
-        self, plan_id: UUID, dry_run: bool, task_id: str
+        self, plan: Plan, dry_run: bool, task_id: str
     ):
         """Background plan implementation."""
+        plan_id = plan.id
         try:
-            # TODO: Fetch plan from database
-            plan = await self._get_plan(plan_id)
-            
             # Create implementation record
             implementation = Implementation(
                 plan_id=plan_id,
                 status=TaskStatus.IN_PROGRESS
             )
             
-            changes = []
+            # Only the tests reached by the change, when the repository is
+            # indexed; the whole suite when the change reaches no test file
+            tests = plan.blast_radius.tests if plan.blast_radius else None
+            tests = tests or None
             
-            # Execute plan steps
-            for step in plan.steps:
-                change = await self._execute_step(step, dry_run)
-                changes.append(change)
+            # Execute plan steps, independent ones concurrently
+            changes = await run_steps(
+                plan.steps, lambda step: self._execute_step(step, dry_run, tests)
+            )
             
-            # Run tests if not dry run
+            # Run tests if not dry run and no step ran them
             if not dry_run:
-                tests_passed = await self._run_tests()
-                implementation.tests_passed = tests_passed
+                test_runs = [change["tests_passed"] for change in changes if "tests_passed" in change]
+                implementation.tests_passed = (
+                    all(test_runs) if test_runs else await self._run_tests(tests)
+                )
             
             implementation.changes = changes
-            implementation.status = TaskStatus.COMPLETED
+            implementation.status = (
+                TaskStatus.FAILED
+                if any(change["status"] in ("failed", "skipped") for change in changes)
+                else TaskStatus.COMPLETED
+            )
             
-            print(f"Plan {plan_id} implemented successfully")
+            print(f"Plan {plan_id} implementation {implementation.status.value}")
             
         except Exception as e:
             print(f"Failed to implement plan: {str(e)}")
             # Update implementation status to failed
     
     async def _get_plan(self, plan_id: UUID) -> Plan:
-        """Get plan by ID."""
-        # TODO: Implement database query
-        return Plan(
-            id=plan_id,
-            opportunity_id=UUID("12345678-1234-5678-9012-123456789012"),
-            title="Mock plan",
-            description="Mock implementation plan",
-            steps=[{"step": 1, "description": "Mock step"}],
-            estimated_effort="low",
-            risks=[]
-        )
+        """Get a generated plan by ID."""
+        plan = self.plan_store.get(plan_id)
+        if plan is None:
+            raise ValueError(f"Plan {plan_id} not found")
+        return plan
     
-    async def _execute_step(self, step: Dict[str, Any], dry_run: bool) -> Dict[str, Any]:
+    async def _execute_step(
+        self, step: Dict[str, Any], dry_run: bool, tests: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """Execute a single implementation step."""
         step_num = step.get("step", 0)
         description = step.get("description", "Unknown step")
@@ -89,17 +100,23 @@ class ImplementerService:
         # Simulate actual implementation
         await asyncio.sleep(1)  # Simulate work
         
-        return {
+        change = {
             "step": step_num,
             "description": description,
             "status": "completed",
             "files_modified": files,
             "changes": f"Implemented: {description}"
         }
+        if step.get("needs_tests"):
+            change["tests_passed"] = await self._run_tests(tests)
+        return change
     
-    async def _run_tests(self) -> bool:
-        """Run tests after implementation."""
-        print("Running tests...")
+    async def _run_tests(self, tests: Optional[List[str]] = None) -> bool:
+        """Run tests after implementation: the given test files, or the whole suite."""
+        if tests is None:
+            print("Running tests...")
+        else:
+            print(f"Running {len(tests)} test files reached by the change...")
         
         # Simulate test execution
         await asyncio.sleep(3)
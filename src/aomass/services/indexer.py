@@ -1,36 +1,96 @@
 """Repository indexing service."""
 import asyncio
 import hashlib
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
-from uuid import UUID, uuid4
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Set, Tuple, Union
+from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
 import aiofiles
 import tree_sitter
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import Distance, VectorParams
 
+from ..analysis.dependencies import extract_dependencies, manifest_format_for_path
+from ..analysis.imports import extract_imports
+from ..analysis.parsing import language_for_path, parse
+from ..analysis.secrets import SecretScanner
+from ..analysis.symbols import extract_calls, extract_symbols
 from ..config.settings import settings
-from ..models.core import CodeFile, Language, Repository
+from ..models.core import BlobRecord, Language, RefManifest, Repository
 from ..models.providers import ProviderType, RepositoryReference
 from ..providers.factory import ProviderFactory
+from ..providers.local_provider import (
+    WORKTREE_REF,
+    LocalProvider,
+    iter_worktree_files,
+)
+from ..storage.blob_store import BlobContentStore
+from ..storage.history_store import HistoryStore
+from ..storage.index_store import IndexStore
+from .history import HistoryService
+
+
+def git_blob_sha(content: bytes) -> str:
+    """Compute the git blob SHA of file contents."""
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+# Version of what is extracted from blobs. Bump it whenever extraction
+# changes, so that blobs stored by an earlier version are indexed again.
+# 2: symbols are qualified by the byte range of their enclosing symbols
+BLOB_INDEX_VERSION = 2
+
+# Extensions of files never read: they cannot hold readable credentials
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf", ".zip", ".gz",
+    ".tgz", ".bz2", ".xz", ".7z", ".jar", ".war", ".whl", ".so", ".dll", ".dylib", ".exe",
+    ".o", ".a", ".class", ".pyc", ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3",
+    ".mp4", ".mov", ".avi", ".wav", ".sqlite", ".db",
+})
+
+
+def is_parsed_path(path: str) -> bool:
+    """Whether a file is parsed: source code or a dependency manifest."""
+    return language_for_path(path) is not None or manifest_format_for_path(path) is not None
+
+
+def is_indexed_path(path: str) -> bool:
+    """Whether a file is indexed: every file but known binary formats.
+    
+    Files that are not parsed are still scanned for secrets, which
+    usually live in configuration, environment files, keys and scripts.
+    """
+    return PurePosixPath(path).suffix.lower() not in BINARY_EXTENSIONS
 
 
 class IndexerService:
     """Service for indexing repositories."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        store: Optional[IndexStore] = None,
+        blob_store: Optional[BlobContentStore] = None,
+        history_store: Optional[HistoryStore] = None
+    ):
         self.qdrant_client = QdrantClient(url=settings.qdrant_url)
         self.temp_dir = Path("/tmp/aomass_repos")
         self.temp_dir.mkdir(exist_ok=True)
         self.provider_factory = ProviderFactory
+        self.store = store or IndexStore(settings.index_db_path)
+        self.blob_store = blob_store or BlobContentStore(settings.blob_store_path)
+        self.secret_scanner = SecretScanner()
+        self.history = HistoryService(history_store, self.store)
+        self._watchers: Dict[UUID, asyncio.Task] = {}  # Repository ID -> watch task
     
     async def index_repository(
         self, 
         url: str, 
         provider_type: str = None,
         branch: str = None, 
-        force_reindex: bool = False
+        force_reindex: bool = False,
+        refs: Optional[List[str]] = None,
+        watch: bool = False
     ) -> str:
         """Index a repository from any supported cloud provider."""
         # Determine provider type from URL if not specified
@@ -50,25 +110,45 @@ class IndexerService:
         if not repo_ref:
             raise ValueError(f"Repository not found: {url}")
         
-        repository_id = uuid4()
+        if watch and repo_ref.provider_type != ProviderType.LOCAL:
+            raise ValueError("Watch mode is only supported for local repositories")
+        
+        # Repository IDs are stable across runs so every ref and re-index
+        # of the same repository shares its stored manifests
+        repository_id = self.repository_id_for_url(repo_ref.url)
+        
+        # Index the requested refs, or the single branch when none are given
+        refs = refs or [branch or repo_ref.default_branch]
         
         # Create task ID for tracking
         task_id = str(uuid4())
         
         # Start background indexing
         asyncio.create_task(self._index_repository_background(
-            repository_id, repo_ref, branch, force_reindex, task_id
+            repository_id, repo_ref, refs, force_reindex, task_id, watch
         ))
         
         return task_id
     
+    @staticmethod
+    def repository_id_for_url(url: str) -> UUID:
+        """Get the stable repository ID for a repository URL."""
+        normalized = url.strip().rstrip('/')
+        if not normalized.startswith("file://"):
+            # Hosted URLs are case-insensitive; local paths may not be
+            normalized = normalized.lower()
+        if normalized.endswith(".git"):
+            normalized = normalized[:-4]
+        return uuid5(NAMESPACE_URL, normalized)
+    
     async def _index_repository_background(
         self,
         repository_id: UUID,
         repo_ref: RepositoryReference,
-        branch: str = None,
+        refs: List[str],
         force_reindex: bool = False,
-        task_id: str = None
+        task_id: str = None,
+        watch: bool = False
     ):
         """Background repository indexing."""
         try:
@@ -77,15 +157,34 @@ class IndexerService:
             if not provider:
                 raise ValueError(f"Provider not available: {repo_ref.provider_type}")
             
-            # Clone repository
-            repo_path = await provider.clone_repository(
+            # Clone repository once; the remaining refs are read from the
+            # same object database. Local repositories are read in place.
+            repo_path = Path(await provider.clone_repository(
                 repo_ref, 
                 str(self.temp_dir / str(repository_id)),
-                branch=branch or repo_ref.default_branch
-            )
+                branch=refs[0]
+            ))
+            
+            manifests = []
+            git_refs = [ref for ref in refs if ref != WORKTREE_REF]
+            if git_refs:
+                manifests.extend(await self._index_refs(
+                    repository_id, repo_path, git_refs, force_reindex
+                ))
+            
+            git_repo = LocalProvider.open_git_repository(repo_path)
+            watch = watch and not (git_repo is not None and git_repo.bare)
+            if WORKTREE_REF in refs or watch:
+                manifests.append(await self._index_worktree(
+                    repository_id, repo_path, force_reindex=force_reindex
+                ))
+            
+            if git_repo is not None:
+                await self._update_history(repository_id, repo_path, manifests)
+            self.store.save_repository(repository_id, repo_ref)
             
             # Analyze repository structure
-            languages = await self._detect_languages(Path(repo_path))
+            languages = await self._detect_languages(manifests)
             
             # Create repository record
             repository = Repository(
@@ -94,30 +193,231 @@ class IndexerService:
                 name=repo_ref.full_name.split('/')[1],
                 full_name=repo_ref.full_name,
                 url=repo_ref.url,
-                default_branch=branch or repo_ref.default_branch,
+                default_branch=refs[0],
                 languages=languages,
                 provider_type=repo_ref.provider_type.value,
                 provider_id=repo_ref.provider_id
             )
             
-            # Index code files
-            await self._index_code_files(repository, Path(repo_path))
-            
             # Create vector collection in Qdrant
-            await self._create_vector_collection(repository_id)
+            await self._create_vector_collection()
+            
+            print(f"Repository {repository.full_name} indexed successfully "
+                  f"({', '.join(refs)})")
             
-            print(f"Repository {repository.full_name} indexed successfully")
+            if watch:
+                self._start_watching(provider, repository_id, repo_path)
             
         except Exception as e:
             print(f"Failed to index repository: {str(e)}")
         finally:
-            # Cleanup
-            if 'repo_path' in locals():
-                await self._cleanup_repository(Path(repo_path))
+            # Cleanup clones only, never repositories indexed in place
+            if 'repo_path' in locals() and self.temp_dir in repo_path.parents:
+                await self._cleanup_repository(repo_path)
+    
+    async def _update_history(
+        self, repository_id: UUID, repo_path: Path, manifests: List[RefManifest]
+    ):
+        """Bring the churn of each indexed ref up to date with its commit.
+        
+        The worktree ref takes the history of ``HEAD``. Failures are
+        reported and skipped: churn only weights findings, so indexing
+        succeeds without it.
+        """
+        for manifest in manifests:
+            revision = "HEAD" if manifest.ref == WORKTREE_REF else manifest.commit_sha
+            try:
+                commits = await asyncio.to_thread(
+                    self.history.update, repository_id, repo_path, manifest, revision
+                )
+                print(f"Read {commits} commits of history for ref {manifest.ref}")
+            except Exception as e:
+                print(f"Failed to read history of ref {manifest.ref}: {str(e)}")
+    
+    async def _index_refs(
+        self,
+        repository_id: UUID,
+        repo_path: Path,
+        refs: List[str],
+        force_reindex: bool = False
+    ) -> List[RefManifest]:
+        """Index several refs of a cloned repository.
+        
+        Blobs shared between refs, or already indexed by an earlier run, are
+        read, parsed and embedded only once.
+        """
+        import git
+        
+        repo = git.Repo(repo_path)
+        
+        manifests = []
+        for ref in refs:
+            commit_sha = self._resolve_ref(repo, ref)
+            manifests.append(RefManifest(
+                repository_id=repository_id,
+                ref=ref,
+                commit_sha=commit_sha,
+                entries=self._list_tree(repo, commit_sha)
+            ))
+        
+        # Path of one occurrence of every blob, used to pick its language
+        blob_paths = {}
+        for manifest in manifests:
+            for path, blob_sha in manifest.entries.items():
+                blob_paths.setdefault(blob_sha, path)
+        
+        if force_reindex:
+            pending = set(blob_paths)
+        else:
+            pending = self.store.missing_blobs(blob_paths, BLOB_INDEX_VERSION)
+        
+        blobs = []
+        for blob_sha in pending:
+            content = repo.odb.stream(bytes.fromhex(blob_sha)).read()
+            blob = await self._index_blob(blob_sha, blob_paths[blob_sha], content)
+            if blob:
+                blobs.append(blob)
+        self.store.add_blobs(blobs, BLOB_INDEX_VERSION)
+        
+        for manifest in manifests:
+            changed = self.store.save_manifest(manifest)
+            print(f"Indexed ref {manifest.ref} @ {manifest.commit_sha[:12]}: "
+                  f"{len(manifest.entries)} files, {len(changed)} changed")
+        print(f"Indexed {len(blobs)} new blobs, reused "
+              f"{len(blob_paths) - len(pending)} stored blobs")
+        
+        return manifests
+    
+    async def _index_worktree(
+        self,
+        repository_id: UUID,
+        root: Path,
+        changed: Optional[Set[str]] = None,
+        force_reindex: bool = False
+    ) -> RefManifest:
+        """Index the files of a directory as its ``worktree`` ref.
+        
+        With ``changed``, only those paths are re-read and the rest of the
+        previously stored worktree manifest is kept.
+        """
+        previous = self.store.get_manifest(repository_id, WORKTREE_REF)
+        if changed is None or previous is None:
+            entries = {}
+            paths = iter_worktree_files(root)
+        else:
+            entries = dict(previous.entries)
+            paths = changed
+        
+        blobs = []
+        seen = set()
+        for path in paths:
+            if not is_indexed_path(path):
+                continue
+            file_path = root / path
+            if not file_path.is_file():
+                entries.pop(path, None)
+                continue
+            
+            async with aiofiles.open(file_path, 'rb') as f:
+                content = await f.read()
+            blob_sha = git_blob_sha(content)
+            entries[path] = blob_sha
+            
+            if blob_sha in seen:
+                continue
+            seen.add(blob_sha)
+            if force_reindex or self.store.missing_blobs([blob_sha], BLOB_INDEX_VERSION):
+                blob = await self._index_blob(blob_sha, path, content)
+                if blob:
+                    blobs.append(blob)
+        self.store.add_blobs(blobs, BLOB_INDEX_VERSION)
+        
+        manifest = RefManifest(
+            repository_id=repository_id,
+            ref=WORKTREE_REF,
+            commit_sha=self._manifest_digest(entries),
+            entries=entries
+        )
+        changed = self.store.save_manifest(manifest)
+        print(f"Indexed worktree {root}: {len(entries)} files, {len(changed)} changed, "
+              f"{len(blobs)} new blobs")
+        
+        return manifest
+    
+    def _start_watching(self, provider: LocalProvider, repository_id: UUID, root: Path):
+        """Watch a local repository, replacing any watch already running for it."""
+        self.stop_watching(repository_id)
+        task = asyncio.create_task(self._watch_worktree(provider, repository_id, root))
+        self._watchers[repository_id] = task
+        
+        def forget(finished: asyncio.Task):
+            if self._watchers.get(repository_id) is finished:
+                del self._watchers[repository_id]
+        
+        task.add_done_callback(forget)
+    
+    def stop_watching(self, repository_id: UUID) -> bool:
+        """Cancel the watch of a repository; False if it was not being watched."""
+        task = self._watchers.pop(repository_id, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+    
+    def is_watching(self, repository_id: UUID) -> bool:
+        """Whether changes to a local repository are being re-indexed."""
+        return repository_id in self._watchers
+    
+    async def _watch_worktree(
+        self, provider: LocalProvider, repository_id: UUID, root: Path
+    ):
+        """Re-index changed files of a local repository until cancelled."""
+        try:
+            async for changed in provider.watch(root):
+                await self._index_worktree(repository_id, root, changed)
+        except asyncio.CancelledError:
+            print(f"Stopped watching {root}")
+            raise
+        except Exception as e:
+            print(f"Watching {root} failed: {str(e)}")
+    
+    @staticmethod
+    def _manifest_digest(entries: Dict[str, str]) -> str:
+        """Content digest identifying a worktree snapshot, in place of a commit SHA."""
+        digest = hashlib.sha1()
+        for path in sorted(entries):
+            digest.update(f"{path}\0{entries[path]}\n".encode())
+        return digest.hexdigest()
+    
+    def _resolve_ref(self, repo, ref: str) -> str:
+        """Resolve a branch, tag or commit to a commit SHA."""
+        import git
+        
+        for candidate in (ref, f"origin/{ref}"):
+            try:
+                return repo.git.rev_parse("--verify", f"{candidate}^{{commit}}")
+            except git.GitCommandError:
+                continue
+        raise ValueError(f"Ref not found: {ref}")
+    
+    def _list_tree(self, repo, commit_sha: str) -> Dict[str, str]:
+        """List indexable files of a commit mapped to their blob SHAs."""
+        entries = {}
+        output = repo.git.ls_tree("-r", "-z", "--full-tree", commit_sha)
+        for record in output.split("\0"):
+            if not record:
+                continue
+            meta, path = record.split("\t", 1)
+            _mode, object_type, blob_sha = meta.split(" ")
+            if object_type == "blob" and is_indexed_path(path):
+                entries[path] = blob_sha
+        return entries
     
     def _detect_provider_from_url(self, url: str) -> Tuple[ProviderType, Dict[str, str]]:
         """Detect provider type from URL and parse repository info."""
-        if "github.com" in url:
+        if url.startswith(("file://", "/", "~")):
+            return ProviderType.LOCAL, self._parse_repository_url(url, ProviderType.LOCAL)
+        elif "github.com" in url:
             return ProviderType.GITHUB, self._parse_repository_url(url, ProviderType.GITHUB)
         elif "gitlab.com" in url or settings.gitlab_url in url:
             return ProviderType.GITLAB, self._parse_repository_url(url, ProviderType.GITLAB)
@@ -134,6 +434,9 @@ class IndexerService:
         """Parse repository URL based on provider type."""
         if provider_type == ProviderType.GITHUB:
             return self._parse_github_url(url)
+        elif provider_type == ProviderType.LOCAL:
+            # The local provider resolves the path itself
+            return {"url": url, "owner": "local", "repo": url}
         elif provider_type == ProviderType.GITLAB:
             # TODO: Implement GitLab URL parsing
             pass
@@ -151,91 +454,84 @@ class IndexerService:
         return {"url": url, "owner": "unknown", "repo": "unknown"}
         return repo_path
     
-    async def _detect_languages(self, repo_path: Path) -> List[Language]:
-        """Detect programming languages in repository."""
+    async def _detect_languages(self, manifests: List[RefManifest]) -> List[Language]:
+        """Detect programming languages from indexed manifests."""
         languages = set()
-        
-        # Language file extensions mapping
-        lang_extensions = {
-            Language.PYTHON: [".py", ".pyw"],
-            Language.JAVASCRIPT: [".js", ".mjs"],
-            Language.TYPESCRIPT: [".ts", ".tsx"],
-            Language.RUST: [".rs"],
-            Language.GO: [".go"],
-            Language.JAVA: [".java"],
-        }
-        
-        for ext_list in lang_extensions.values():
-            for ext in ext_list:
-                if list(repo_path.rglob(f"*{ext}")):
-                    for lang, exts in lang_extensions.items():
-                        if ext in exts:
-                            languages.add(lang)
-                            break
-        
+        for manifest in manifests:
+            for path in manifest.entries:
+                language = language_for_path(path)
+                if language is not None:
+                    languages.add(language)
         return list(languages)
     
-    async def _index_code_files(self, repository: Repository, repo_path: Path):
-        """Index individual code files."""
-        lang_extensions = {
-            Language.PYTHON: [".py", ".pyw"],
-            Language.JAVASCRIPT: [".js", ".mjs"],
-            Language.TYPESCRIPT: [".ts", ".tsx"],
-            Language.RUST: [".rs"],
-            Language.GO: [".go"],
-            Language.JAVA: [".java"],
-        }
-        
-        for language in repository.languages:
-            extensions = lang_extensions[language]
-            for ext in extensions:
-                for file_path in repo_path.rglob(f"*{ext}"):
-                    if file_path.is_file():
-                        await self._index_single_file(
-                            repository.id, file_path, repo_path, language
-                        )
-    
-    async def _index_single_file(
+    async def _index_blob(
         self, 
-        repository_id: UUID, 
-        file_path: Path, 
-        repo_root: Path, 
-        language: Language
-    ):
-        """Index a single code file."""
+        blob_sha: str, 
+        path: str, 
+        content: bytes
+    ) -> Optional[BlobRecord]:
+        """Index the contents of a single blob."""
         try:
-            # Read file content
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
+            if not is_parsed_path(path):
+                # Other text files are only scanned for secrets; binaries not at all
+                binary = b"\0" in content[:8192]
+                return BlobRecord(
+                    sha=blob_sha,
+                    size=len(content),
+                    secrets=[] if binary else self.secret_scanner.scan(content)
+                )
             
-            # Calculate content hash
-            content_hash = hashlib.sha256(content.encode()).hexdigest()
+            manifest_format = manifest_format_for_path(path)
+            if manifest_format is not None:
+                language = manifest_format.language
+            else:
+                language = language_for_path(path)
             
-            # Get relative path
-            relative_path = str(file_path.relative_to(repo_root))
+            # Keep contents for detectors that analyze source at mining time
+            self.blob_store.put(blob_sha, content)
             
-            # Create code file record
-            code_file = CodeFile(
-                repository_id=repository_id,
-                path=relative_path,
+            # Imports feed the import graph used for incremental mining,
+            # dependencies the dependency table matched against advisories,
+            # symbols the duplicate index, call counts the fan-in used to
+            # rank untested functions. Secrets are scanned here, while the
+            # contents are in memory.
+            imports, symbols, calls = [], [], {}
+            if manifest_format is None:
+                tree = parse(content, language)
+                imports = extract_imports(content, language, tree)
+                symbols = extract_symbols(content, language, tree)
+                calls = extract_calls(content, language, tree)
+            dependencies = extract_dependencies(path, content)
+            secrets = self.secret_scanner.scan(content)
+            
+            # TODO: Generate embeddings and store in Qdrant under the blob SHA
+            
+            return BlobRecord(
+                sha=blob_sha,
                 language=language,
-                content_hash=content_hash,
                 size=len(content),
-                last_modified=file_path.stat().st_mtime
+                imports=imports,
+                dependencies=dependencies,
+                secrets=secrets,
+                symbols=symbols,
+                calls=calls
             )
             
-            # TODO: Parse AST and extract semantic information
-            # TODO: Generate embeddings and store in Qdrant
-            # TODO: Store file metadata in database
-            
-            print(f"Indexed file: {relative_path}")
-            
         except Exception as e:
-            print(f"Failed to index file {file_path}: {str(e)}")
+            print(f"Failed to index blob {blob_sha} ({path}): {str(e)}")
+            return None
     
-    async def _create_vector_collection(self, repository_id: UUID):
-        """Create Qdrant collection for repository vectors."""
-        collection_name = f"repo_{repository_id}"
+    def get_manifest(self, repository_id: UUID, ref: str) -> Optional[RefManifest]:
+        """Get the indexed manifest of a repository ref."""
+        return self.store.get_manifest(repository_id, ref)
+    
+    async def _create_vector_collection(self):
+        """Create the shared Qdrant collection for blob vectors.
+        
+        Vectors are keyed by blob SHA, so a single collection serves every
+        repository and ref.
+        """
+        collection_name = "blobs"
         
         try:
             self.qdrant_client.create_collection(
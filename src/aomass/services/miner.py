@@ -1,16 +1,291 @@
 """Opportunity mining service."""
 import asyncio
-from typing import List
-from uuid import UUID, uuid4
+import fnmatch
+import hashlib
+import heapq
+import itertools
+import re
+import tracemalloc
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid5
 
-from ..models.core import Language, Opportunity, OpportunityType
+import numpy as np
+
+from ..analysis.coverage import FileCoverage, function_coverage, is_test_path
+from ..analysis.dependencies import DEPENDENCY_FILES, ECOSYSTEM_LANGUAGES
+from ..analysis.deprecations import JavaScriptDeprecatedApiRule, PythonDeprecatedApiRule
+from ..analysis.imports import ImportGraph
+from ..analysis.loops import OPERATION_COSTS, LoopCostRule, cost_multiplier
+from ..analysis.parsing import LANGUAGE_EXTENSIONS, language_for_path
+from ..analysis.ranking import ranking_score
+from ..analysis.rules import RuleEngine, RuleFinding, SourceFile, rules_version
+from ..analysis.secrets import RULES_BY_ID
+from ..analysis.similarity import DUPLICATE_THRESHOLD, estimated_similarity
+from ..analysis.symbols import SYMBOL_NODES
+from ..analysis.taint import SqlInjectionRule
+from ..analysis.versions import version_key
+from ..config.settings import settings
+from ..models.core import (
+    DetectorRun,
+    Language,
+    MiningResult,
+    Opportunity,
+    OpportunityType,
+    RefManifest,
+    Symbol,
+    TaskStatus,
+)
+from ..storage.advisory_store import AdvisoryMatch, AdvisoryStore
+from ..storage.blob_store import BlobContentStore
+from ..storage.coverage_store import CoverageStore
+from ..storage.history_store import Churn, HistoryStore
+from ..storage.index_store import IndexStore, SymbolKey
+from ..storage.opportunity_store import OpportunityStore
+from ..storage.profile_store import DetectorProfileStore
+from ..storage.registry_store import RegistryStore
+from ..storage.results_store import DetectorResult, DetectorResultStore
+from .detectors import (
+    EXTERNAL_INPUTS,
+    DetectionContext,
+    Detector,
+    DetectorInput,
+    DetectorMeter,
+    DetectorScope,
+    DetectorSpec,
+    RepositoryDetector,
+    RuleDetector,
+    SharedAnalysis,
+    load_plugins,
+    run_in_thread,
+)
+from .history import HistoryService
+
+# Opportunity priority of a vulnerable dependency by advisory severity
+SEVERITY_PRIORITIES = {"CRITICAL": 1, "HIGH": 1, "MODERATE": 2, "MEDIUM": 2, "LOW": 3}
+
+# Optimization type of each kind of loop cost finding
+LOOP_OPTIMIZATIONS = {
+    "query_in_loop": "n_plus_1_queries",
+    "invariant_call": "loop_invariant_call",
+    "list_scan": "quadratic_membership",
+}
+
+
+def _source_patterns(*languages: Language) -> Tuple[str, ...]:
+    return tuple(f"*{ext}" for language in languages for ext in LANGUAGE_EXTENSIONS[language])
+
+
+def fingerprint(*parts: str) -> str:
+    """Stable identity of an opportunity, built from what makes it distinct."""
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+class TopOpportunities:
+    """Bounded heap keeping the best ``k`` opportunities seen so far.
+    
+    Opportunities are ranked by priority, then by :func:`ranking_score`:
+    confidence weighted toward hot code. The heap root is
+    the worst kept opportunity, so each push costs O(log k) and memory stays
+    at ``k`` items however many detectors report.
+    """
+    
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[int, float, int, Opportunity]] = []
+        self._counter = itertools.count()
+    
+    def push_all(self, opportunities: Iterable[Opportunity]):
+        """Offer opportunities to the heap."""
+        for opportunity in opportunities:
+            # Inverted rank so the worst opportunity sits at the root
+            entry = (-opportunity.priority, ranking_score(opportunity),
+                     -next(self._counter), opportunity)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry > self._heap[0]:
+                heapq.heapreplace(self._heap, entry)
+    
+    def sorted(self) -> List[Opportunity]:
+        """Kept opportunities, best first."""
+        return [entry[3] for entry in sorted(self._heap, reverse=True)]
 
 
 class MinerService:
     """Service for mining maintenance opportunities."""
     
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        store: Optional[IndexStore] = None,
+        blob_store: Optional[BlobContentStore] = None,
+        results_store: Optional[DetectorResultStore] = None,
+        advisory_store: Optional[AdvisoryStore] = None,
+        registry_store: Optional[RegistryStore] = None,
+        coverage_store: Optional[CoverageStore] = None,
+        history_store: Optional[HistoryStore] = None,
+        opportunity_store: Optional[OpportunityStore] = None,
+        profile_store: Optional[DetectorProfileStore] = None
+    ):
+        self.store = store or IndexStore(settings.index_db_path)
+        self.blob_store = blob_store or BlobContentStore(settings.blob_store_path)
+        self.results_store = results_store or DetectorResultStore(settings.index_db_path)
+        self.advisory_store = advisory_store or AdvisoryStore(settings.index_db_path)
+        self.registry_store = registry_store or RegistryStore(settings.index_db_path)
+        self.coverage_store = coverage_store or CoverageStore(settings.index_db_path)
+        self.history = HistoryService(history_store, self.store)
+        self.opportunity_store = opportunity_store or OpportunityStore(settings.index_db_path)
+        self.profile_store = profile_store or DetectorProfileStore(settings.index_db_path)
+        deprecations = [PythonDeprecatedApiRule(), JavaScriptDeprecatedApiRule()]
+        sql_injection = SqlInjectionRule(settings.taint_max_function_nodes)
+        loop_cost = LoopCostRule()
+        # Syntax rules of every detector share one traversal per file
+        self.rule_engine = RuleEngine(
+            [*deprecations, sql_injection, loop_cost], max_workers=settings.analysis_workers
+        )
+        script_sources = _source_patterns(
+            Language.PYTHON, Language.JAVASCRIPT, Language.TYPESCRIPT
+        )
+        symbol_sources = _source_patterns(*SYMBOL_NODES)
+        detectors: List[Detector] = [
+            RepositoryDetector(
+                DetectorSpec(
+                    "dependency_update", OpportunityType.DEPENDENCY_UPDATE, "2",
+                    DEPENDENCY_FILES,
+                    requires=frozenset({DetectorInput.DEPENDENCIES, DetectorInput.REGISTRY})
+                ),
+                lambda context: self._mine_dependency_updates(
+                    context.repository_id, context.languages
+                )
+            ),
+            RepositoryDetector(
+                DetectorSpec(
+                    "vulnerable_dependency", OpportunityType.SECURITY_VULNERABILITY, "2",
+                    DEPENDENCY_FILES,
+                    requires=frozenset({DetectorInput.DEPENDENCIES, DetectorInput.ADVISORIES})
+                ),
+                lambda context: self._mine_security_vulnerabilities(
+                    context.repository_id, context.languages
+                )
+            ),
+            RuleDetector(
+                DetectorSpec(
+                    "sql_injection",
+                    OpportunityType.SECURITY_VULNERABILITY,
+                    f"1+{rules_version([sql_injection])}",
+                    script_sources,
+                    DetectorScope.FILE,
+                    frozenset({DetectorInput.SYNTAX})
+                ),
+                self.rule_engine,
+                lambda context, findings: self._build_sql_injections(
+                    context.repository_id, findings
+                ),
+                [sql_injection.id]
+            ),
+            RuleDetector(
+                DetectorSpec(
+                    "api_migration",
+                    OpportunityType.API_MIGRATION,
+                    f"2+{rules_version(deprecations)}",
+                    script_sources,
+                    DetectorScope.FILE,
+                    frozenset({DetectorInput.SYNTAX})
+                ),
+                self.rule_engine,
+                lambda context, findings: self._build_api_migrations(
+                    context.repository_id, findings
+                ),
+                [rule.id for rule in deprecations]
+            ),
+            RepositoryDetector(
+                DetectorSpec(
+                    "duplicate_code", OpportunityType.CODE_OPTIMIZATION, "2", symbol_sources,
+                    requires=frozenset({DetectorInput.SYMBOLS, DetectorInput.CORPUS})
+                ),
+                lambda context: self._mine_code_optimizations(
+                    context.repository_id, context.languages
+                )
+            ),
+            RuleDetector(
+                DetectorSpec(
+                    "loop_cost",
+                    OpportunityType.CODE_OPTIMIZATION,
+                    f"1+{rules_version([loop_cost])}",
+                    script_sources,
+                    DetectorScope.FILE,
+                    frozenset({DetectorInput.SYNTAX, DetectorInput.IMPORTS})
+                ),
+                self.rule_engine,
+                lambda context, findings: self._build_loop_costs(
+                    context.repository_id, findings, context.manifest
+                ),
+                [loop_cost.id]
+            ),
+            RepositoryDetector(
+                DetectorSpec(
+                    "test_coverage", OpportunityType.TEST_COVERAGE, "3", symbol_sources,
+                    requires=frozenset({
+                        DetectorInput.SYMBOLS, DetectorInput.COVERAGE, DetectorInput.HISTORY
+                    })
+                ),
+                lambda context: self._mine_test_coverage(
+                    context.repository_id, context.languages
+                )
+            ),
+            RepositoryDetector(
+                DetectorSpec(
+                    "documentation", OpportunityType.DOCUMENTATION, "2", symbol_sources,
+                    requires=frozenset({DetectorInput.SYMBOLS})
+                ),
+                lambda context: self._mine_documentation(
+                    context.repository_id, context.languages
+                )
+            ),
+            # Secrets are found at index time; every indexed file is an input
+            RepositoryDetector(
+                DetectorSpec(
+                    "secret_exposure", OpportunityType.SECRET_EXPOSURE, "1", ("*",),
+                    requires=frozenset({DetectorInput.SECRETS})
+                ),
+                lambda context: self._mine_secrets(context.repository_id)
+            ),
+        ]
+        self.detectors: Dict[str, Detector] = {}
+        self.detector_sources: Dict[str, str] = {}
+        for detector in detectors:
+            self.register(detector)
+        if settings.miner_detector_plugins:
+            for name, detector in load_plugins():
+                try:
+                    self.register(detector, source=f"plugin:{name}")
+                except ValueError as e:
+                    print(f"Skipped detector plugin {name}: {str(e)}")
+    
+    @property
+    def detector_specs(self) -> Dict[str, DetectorSpec]:
+        """Specs of every registered detector, enabled or not, by name."""
+        return {name: detector.spec for name, detector in self.detectors.items()}
+    
+    def register(self, detector: Detector, source: str = "builtin"):
+        """Add a detector to those run by mining passes.
+        
+        Raises:
+            ValueError: If a detector with the same name is already registered.
+        """
+        name = detector.spec.name
+        if name in self.detectors:
+            raise ValueError(
+                f"Detector {name} is already registered by {self.detector_sources[name]}"
+            )
+        self.detectors[name] = detector
+        self.detector_sources[name] = source
+    
+    def enabled_detectors(self) -> List[Detector]:
+        """Registered detectors not disabled in the settings."""
+        disabled = set(settings.miner_disabled_detectors)
+        return [
+            detector for name, detector in self.detectors.items() if name not in disabled
+        ]
     
     async def mine_opportunities(
         self,
@@ -20,208 +295,1121 @@ class MinerService:
         max_opportunities: int = 10
     ) -> List[Opportunity]:
         """Mine maintenance opportunities from repository."""
-        opportunities = []
+        result = await self.mine(
+            repository_id, opportunity_types, languages, max_opportunities
+        )
+        return result.opportunities
+    
+    async def mine(
+        self,
+        repository_id: UUID,
+        opportunity_types: List[OpportunityType],
+        languages: List[Language],
+        max_opportunities: int = 10,
+        detector_timeout: Optional[float] = None,
+        refresh: bool = False,
+        profile: bool = False
+    ) -> MiningResult:
+        """Mine opportunities, running all enabled detectors concurrently.
+        
+        Each detector gets ``detector_timeout`` seconds and is cancelled when
+        it runs over; its results are then dropped and the run is reported as
+        cancelled. Results are merged into a top-``max_opportunities`` heap as
+        each detector finishes.
         
+        For indexed repositories, detector output is cached per indexed
+        commit. A detector whose version and inputs match an earlier run is
+        not run again unless ``refresh`` is set. Data kept outside the
+        repository is only refreshed when a detector about to run requires it.
+        
+        Opportunities are annotated with the churn of the hottest file they
+        affect, read from the history aggregated at index time.
+        
+        Every run's wall and CPU time is recorded in the profile store. With
+        ``profile``, detectors run one at a time under :mod:`tracemalloc` so
+        their CPU time and allocations can be measured in full.
+        """
         # If no specific types requested, mine all types
         if not opportunity_types:
             opportunity_types = list(OpportunityType)
         
-        for opp_type in opportunity_types:
-            if len(opportunities) >= max_opportunities:
-                break
-            
-            batch_opportunities = await self._mine_specific_type(
-                repository_id, opp_type, languages
+        timeout = detector_timeout or settings.miner_detector_timeout
+        top = TopOpportunities(max_opportunities)
+        manifest = self._default_manifest(repository_id)
+        churn = self._churn_annotations(repository_id, manifest)
+        detectors = [
+            detector for detector in self.enabled_detectors()
+            if detector.spec.opportunity_type in opportunity_types
+        ]
+        external = await self._external_inputs(
+            repository_id,
+            {kind for detector in detectors for kind in detector.spec.requires},
+            manifest
+        )
+        context = DetectionContext(
+            repository_id, languages, manifest, self, SharedAnalysis(self.rule_engine)
+        )
+        
+        def run(detector: Detector):
+            return self._run_detector(
+                detector, context, timeout, top, external, refresh, churn, profile
             )
-            opportunities.extend(batch_opportunities)
         
-        # Sort by priority and confidence
-        opportunities.sort(key=lambda x: (x.priority, -x.confidence))
+        if not profile:
+            detector_runs = await asyncio.gather(*(run(detector) for detector in detectors))
+        else:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            try:
+                detector_runs = [await run(detector) for detector in detectors]
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+        self.profile_store.record(repository_id, detector_runs)
+        
+        return MiningResult(
+            repository_id=repository_id,
+            opportunities=top.sorted(),
+            detector_runs=list(detector_runs)
+        )
+    
+    async def _run_detector(
+        self,
+        detector: Detector,
+        context: DetectionContext,
+        timeout: float,
+        top: TopOpportunities,
+        external: Dict[DetectorInput, Any],
+        refresh: bool = False,
+        churn: Optional[Dict[str, Dict[str, Any]]] = None,
+        traced: bool = False
+    ) -> DetectorRun:
+        """Run one detector within its time budget and merge its results.
+        
+        Cached results are used instead when the detector already ran on
+        this commit, or on another commit with the same inputs.
+        """
+        spec, manifest = detector.spec, context.manifest
+        repository_id = context.repository_id
+        status = TaskStatus.COMPLETED
+        error = None
+        cached = None
+        opportunities: List[Opportunity] = []
+        findings: List[RuleFinding] = []
+        input_digest = ""
+        
+        with DetectorMeter(traced) as meter:
+            try:
+                input_digest = self._input_digest(
+                    spec, manifest, context.languages, self._external_digest(spec, external)
+                )
+                if manifest is not None and not refresh:
+                    cached = self._cached_result(
+                        repository_id, manifest.commit_sha, spec, input_digest
+                    )
+                
+                if cached is not None:
+                    opportunities, findings = cached.opportunities, cached.findings
+                else:
+                    opportunities, findings = await asyncio.wait_for(
+                        self._detect(detector, context, refresh), timeout=timeout
+                    )
+                    self._stamp_identities(repository_id, spec, opportunities)
+                self._annotate_churn(opportunities, churn or {})
+                # Language-filtered runs are partial and leave other rows in place
+                self.opportunity_store.sync(
+                    repository_id,
+                    spec.name,
+                    opportunities,
+                    version=spec.version,
+                    commit_sha=manifest.commit_sha if manifest is not None else None,
+                    prune=not context.languages
+                )
+                top.push_all(opportunities)
+            except asyncio.TimeoutError:
+                status = TaskStatus.CANCELLED
+                error = f"Exceeded time budget of {timeout:g}s"
+            except Exception as e:
+                status = TaskStatus.FAILED
+                error = str(e)
+        
+        profile = meter.profile
+        if manifest is not None and status != TaskStatus.COMPLETED and not context.languages:
+            # Reads serve the rows stored before rather than waiting on it again
+            self.opportunity_store.record_run(
+                repository_id, spec.name, spec.version, manifest.commit_sha, status.value
+            )
+        if manifest is not None and cached is None and status == TaskStatus.COMPLETED:
+            self.results_store.put(repository_id, manifest.commit_sha, DetectorResult(
+                detector=spec.name,
+                version=spec.version,
+                input_digest=input_digest,
+                opportunities=opportunities,
+                duration_ms=profile.wall_ms,
+                findings=findings
+            ))
+        
+        return DetectorRun(
+            detector=spec.name,
+            opportunity_type=spec.opportunity_type,
+            status=status,
+            duration_ms=profile.wall_ms,
+            version=spec.version,
+            opportunities_found=len(opportunities),
+            cached=cached is not None,
+            error=error,
+            cpu_ms=profile.cpu_ms,
+            allocated_kb=profile.allocated_kb,
+            peak_kb=profile.peak_kb
+        )
+    
+    async def _detect(
+        self, detector: Detector, context: DetectionContext, refresh: bool
+    ) -> Tuple[List[Opportunity], List[RuleFinding]]:
+        """Run a detector, re-analyzing only what changed where its scope allows.
+        
+        File-based detectors start from the findings stored for the commit
+        indexed before this one. Findings in files untouched by the last
+        index run are carried over and only affected files are analyzed.
+        """
+        spec, manifest = detector.spec, context.manifest
+        repository_id = context.repository_id
+        if spec.scope == DetectorScope.REPOSITORY:
+            return await detector.detect(context), []
+        if manifest is None:
+            # File-based detectors only analyze indexed files
+            return [], []
+        
+        paths = self._input_paths(spec, manifest)
+        previous = None
+        if manifest.parent_commit_sha and not refresh:
+            previous = self.results_store.get(
+                repository_id, manifest.parent_commit_sha, spec.name, spec.version
+            )
+        
+        if previous is None:
+            targets, carried = paths, []
+        else:
+            affected = set(manifest.changed_paths)
+            targets = paths & affected
+            carried = [
+                finding for finding in previous.findings
+                if finding.path in paths and finding.path not in affected
+            ]
+        
+        files = self._read_sources(manifest, sorted(targets))
+        shared = context.analysis
+        if files and isinstance(detector, RuleDetector) and (
+            shared is not None and detector.engine is shared.engine
+        ):
+            # Analyzed once for every rule detector of this pass
+            carried += await shared.analyze(files, detector.rule_ids)
+        elif files:
+            carried += await run_in_thread(detector.analyze, files)
+        opportunities = self._build_opportunities(detector, context, carried)
+        return opportunities, carried
+    
+    def _churn_annotations(
+        self, repository_id: UUID, manifest: Optional[RefManifest]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Churn metadata of the files of the default ref, keyed by path."""
+        if manifest is None:
+            return {}
+        return self.history.annotations(
+            self.history.store.file_churn(repository_id, manifest.ref)
+        )
+    
+    @staticmethod
+    def _annotate_churn(
+        opportunities: List[Opportunity], churn: Dict[str, Dict[str, Any]]
+    ):
+        """Set the churn of the hottest affected file on each opportunity.
         
-        return opportunities[:max_opportunities]
+        Churn changes with every commit while detector results are cached
+        per input, so stale annotations are replaced or dropped.
+        """
+        for opportunity in opportunities:
+            hottest = max(
+                (path for path in opportunity.files_affected if path in churn),
+                key=lambda path: churn[path]["hotness"],
+                default=None
+            )
+            if hottest is None:
+                opportunity.metadata.pop("churn", None)
+            else:
+                opportunity.metadata["churn"] = {"path": hottest, **churn[hottest]}
     
-    async def _mine_specific_type(
+    @staticmethod
+    def _stamp_identities(
+        repository_id: UUID, spec: DetectorSpec, opportunities: List[Opportunity]
+    ):
+        """Derive opportunity IDs from fingerprints so they survive re-mining."""
+        for opportunity in opportunities:
+            if opportunity.fingerprint is None:
+                opportunity.fingerprint = fingerprint(
+                    spec.name,
+                    opportunity.type.value,
+                    opportunity.metadata.get("rule_id", ""),
+                    *sorted(opportunity.files_affected)
+                )
+            opportunity.id = uuid5(repository_id, opportunity.fingerprint)
+    
+    def _cached_result(
         self,
         repository_id: UUID,
-        opportunity_type: OpportunityType,
-        languages: List[Language]
-    ) -> List[Opportunity]:
-        """Mine opportunities of a specific type."""
-        if opportunity_type == OpportunityType.DEPENDENCY_UPDATE:
-            return await self._mine_dependency_updates(repository_id, languages)
-        elif opportunity_type == OpportunityType.SECURITY_VULNERABILITY:
-            return await self._mine_security_vulnerabilities(repository_id, languages)
-        elif opportunity_type == OpportunityType.API_MIGRATION:
-            return await self._mine_api_migrations(repository_id, languages)
-        elif opportunity_type == OpportunityType.CODE_OPTIMIZATION:
-            return await self._mine_code_optimizations(repository_id, languages)
-        elif opportunity_type == OpportunityType.TEST_COVERAGE:
-            return await self._mine_test_coverage(repository_id, languages)
-        elif opportunity_type == OpportunityType.DOCUMENTATION:
-            return await self._mine_documentation(repository_id, languages)
-        
-        return []
+        commit_sha: str,
+        spec: DetectorSpec,
+        input_digest: str
+    ) -> Optional[DetectorResult]:
+        """Find a reusable result for a detector on a commit."""
+        result = self.results_store.get(repository_id, commit_sha, spec.name, spec.version)
+        if result is not None and result.input_digest == input_digest:
+            return result
+        
+        # Inputs unchanged since an earlier commit: carry its result forward
+        result = self.results_store.find_by_inputs(
+            repository_id, spec.name, spec.version, input_digest
+        )
+        if result is not None:
+            self.results_store.put(repository_id, commit_sha, result)
+        return result
+    
+    async def _external_inputs(
+        self,
+        repository_id: UUID,
+        required: Set[DetectorInput],
+        manifest: Optional[RefManifest]
+    ) -> Dict[DetectorInput, Any]:
+        """Bring the data read from outside the repository up to date and identify it.
+        
+        Only inputs in ``required`` are looked at. Each maps to a version
+        string, or to the exception raised while refreshing it so that only
+        the detectors requiring it fail.
+        """
+        external: Dict[DetectorInput, Any] = {}
+        for kind in sorted(EXTERNAL_INPUTS & required):
+            try:
+                external[kind] = await self._external_input(repository_id, kind, manifest)
+            except Exception as e:
+                external[kind] = e
+        return external
+    
+    async def _external_input(
+        self, repository_id: UUID, kind: DetectorInput, manifest: Optional[RefManifest]
+    ) -> str:
+        """Version of one external input."""
+        if kind == DetectorInput.ADVISORIES:
+            await asyncio.to_thread(self.advisory_store.refresh, settings.advisory_db_path)
+            return self.advisory_store.digest
+        if kind == DetectorInput.REGISTRY:
+            # Refreshed by a separate job; mining only reads the cache
+            return self.registry_store.last_updated()
+        if kind == DetectorInput.CORPUS:
+            return self.store.corpus_version()
+        if kind == DetectorInput.COVERAGE:
+            report = self.coverage_store.get_report(repository_id)
+            return report.ingested_at.isoformat() if report is not None else ""
+        if kind == DetectorInput.HISTORY:
+            head = self.history.store.get_head(repository_id, manifest.ref) if manifest else None
+            return head.commit_sha if head is not None else ""
+        return ""
+    
+    @staticmethod
+    def _external_digest(spec: DetectorSpec, external: Dict[DetectorInput, Any]) -> str:
+        """Versions of the external inputs of a detector, joined.
+        
+        Raises:
+            Exception: The error raised refreshing one of them.
+        """
+        versions = []
+        for kind in sorted(EXTERNAL_INPUTS & spec.requires):
+            version = external.get(kind, "")
+            if isinstance(version, Exception):
+                raise version
+            versions.append(version)
+        return "\0".join(versions)
+    
+    @staticmethod
+    def _input_digest(
+        spec: DetectorSpec,
+        manifest: Optional[RefManifest],
+        languages: List[Language],
+        external: str = ""
+    ) -> str:
+        """Digest of everything a detector's output depends on."""
+        digest = hashlib.sha1(spec.version.encode())
+        digest.update(",".join(sorted(language.value for language in languages)).encode())
+        digest.update(external.encode())
+        if manifest is not None:
+            for path in sorted(MinerService._input_paths(spec, manifest)):
+                digest.update(f"{path}\0{manifest.entries[path]}\n".encode())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _input_paths(spec: DetectorSpec, manifest: RefManifest) -> Set[str]:
+        """Paths of a manifest matching the input patterns of a detector."""
+        if not spec.inputs:
+            return set()
+        pattern = re.compile("|".join(fnmatch.translate(p) for p in spec.inputs))
+        return {path for path in manifest.entries if pattern.match(PurePosixPath(path).name)}
+    
+    def _default_manifest(self, repository_id: UUID) -> Optional[RefManifest]:
+        """Get the manifest of the default ref of a repository."""
+        ref = self.store.default_ref(repository_id)
+        if ref is None:
+            return None
+        return self.store.get_manifest(repository_id, ref)
     
     async def _mine_dependency_updates(
         self, repository_id: UUID, languages: List[Language]
     ) -> List[Opportunity]:
-        """Mine dependency update opportunities."""
-        opportunities = []
+        """Mine dependency update opportunities.
         
-        # Mock dependency updates - in production, check package managers
-        if Language.PYTHON in languages:
-            opportunities.append(Opportunity(
-                repository_id=repository_id,
-                type=OpportunityType.DEPENDENCY_UPDATE,
-                title="Update FastAPI to latest version",
-                description="FastAPI 0.104.1 is available with bug fixes and performance improvements",
-                priority=3,
-                confidence=0.9,
-                files_affected=["requirements.txt", "pyproject.toml"],
-                metadata={
-                    "current_version": "0.103.0",
-                    "latest_version": "0.104.1",
-                    "package": "fastapi"
-                }
-            ))
+        Resolves the pinned dependencies of the default ref against
+        the local registry metadata cache, one opportunity per outdated
+        package version. Never touches the network: packages the refresh
+        job has not fetched yet are simply not reported.
+        """
+        ref = self.store.default_ref(repository_id)
+        if ref is None:
+            return []
+        dependencies = [
+            dep for dep in self.store.get_dependencies(repository_id, ref)
+            if not languages or ECOSYSTEM_LANGUAGES.get(dep.ecosystem) in languages
+        ]
+        resolutions = await run_in_thread(self.registry_store.resolve, dependencies)
+        
+        by_package = {}
+        for resolution in resolutions:
+            if resolution.latest is None:
+                continue
+            dep = resolution.dependency
+            by_package.setdefault((dep.ecosystem, dep.name, dep.version), []).append(resolution)
         
-        if Language.JAVASCRIPT in languages:
+        opportunities = []
+        for (ecosystem, name, version), package_resolutions in sorted(by_package.items()):
+            latest = package_resolutions[0].latest
+            latest_compatible = package_resolutions[0].latest_compatible
+            if latest_compatible is not None:
+                target, update_type = latest_compatible, "compatible"
+                priority, confidence = 3, 0.9
+                description = f"{name} {latest_compatible} is a compatible release"
+            else:
+                target, update_type = latest, "major"
+                priority, confidence = 6, 0.6
+                description = f"{name} {latest} is a new major release and may break callers"
+            if latest != target:
+                description += f"; {latest} is the latest release"
+            
             opportunities.append(Opportunity(
                 repository_id=repository_id,
                 type=OpportunityType.DEPENDENCY_UPDATE,
-                title="Update React to v18.2.0",
-                description="React 18.2.0 includes important bug fixes and performance improvements",
-                priority=2,
-                confidence=0.85,
-                files_affected=["package.json", "package-lock.json"],
+                title=f"Update {name} from {version} to {target}",
+                description=description,
+                priority=priority,
+                confidence=confidence,
+                files_affected=sorted({r.dependency.path for r in package_resolutions}),
+                fingerprint=fingerprint("dependency_update", ecosystem, name, version),
                 metadata={
-                    "current_version": "18.1.0",
-                    "latest_version": "18.2.0",
-                    "package": "react"
+                    "ecosystem": ecosystem,
+                    "package": name,
+                    "current_version": version,
+                    "latest_version": latest,
+                    "latest_compatible": latest_compatible,
+                    "update_type": update_type
                 }
             ))
-        
         return opportunities
     
     async def _mine_security_vulnerabilities(
         self, repository_id: UUID, languages: List[Language]
     ) -> List[Opportunity]:
-        """Mine security vulnerability opportunities."""
+        """Mine security vulnerability opportunities.
+        
+        Matches the dependency table of the default ref against the
+        offline OSV advisory dump, one opportunity per vulnerable package.
+        """
+        ref = self.store.default_ref(repository_id)
+        if ref is None:
+            return []
+        dependencies = [
+            dep for dep in self.store.get_dependencies(repository_id, ref)
+            if not languages or ECOSYSTEM_LANGUAGES.get(dep.ecosystem) in languages
+        ]
+        matches = await run_in_thread(self.advisory_store.match, dependencies)
+        
+        by_package = {}
+        for match in matches:
+            dep = match.dependency
+            by_package.setdefault((dep.ecosystem, dep.name, dep.version), []).append(match)
+        
         opportunities = []
+        for (ecosystem, name, version), package_matches in sorted(by_package.items()):
+            opportunities.append(self._vulnerability_opportunity(
+                repository_id, ecosystem, name, version, package_matches
+            ))
+        return opportunities
+    
+    @staticmethod
+    def _vulnerability_opportunity(
+        repository_id: UUID,
+        ecosystem: str,
+        name: str,
+        version: str,
+        matches: List[AdvisoryMatch]
+    ) -> Opportunity:
+        """Build the opportunity of one vulnerable package version."""
+        advisories = {}
+        for match in matches:
+            advisories.setdefault(match.advisory.advisory_id, match)
+        severities = [match.advisory.severity for match in advisories.values()]
+        priority = min(SEVERITY_PRIORITIES.get(severity, 2) for severity in severities)
+        fixed_versions = {match.fixed_version for match in advisories.values()}
+        # Upgrading is only a complete fix when every advisory names a fixed version
+        fixed_version = None
+        if None not in fixed_versions:
+            fixed_version = max(
+                fixed_versions, key=lambda fixed: version_key(ecosystem, fixed) or ()
+            )
         
-        # Mock security vulnerabilities
-        opportunities.append(Opportunity(
+        return Opportunity(
             repository_id=repository_id,
             type=OpportunityType.SECURITY_VULNERABILITY,
-            title="Fix potential SQL injection vulnerability",
-            description="Raw SQL query construction detected in user input handling",
-            priority=1,  # High priority for security
-            confidence=0.7,
-            files_affected=["src/database/queries.py"],
+            title=f"Upgrade vulnerable {name} {version}",
+            description=(
+                f"{name} {version} is affected by {len(advisories)} known "
+                f"vulnerabilities: {', '.join(sorted(advisories))}"
+                + (f"; fixed in {fixed_version}" if fixed_version else "")
+            ),
+            priority=priority,
+            confidence=0.95,
+            files_affected=sorted({match.dependency.path for match in matches}),
+            fingerprint=fingerprint("osv", ecosystem, name, version),
             metadata={
-                "vulnerability_type": "sql_injection",
-                "cwe_id": "CWE-89",
-                "severity": "high"
+                "ecosystem": ecosystem,
+                "package": name,
+                "current_version": version,
+                "fixed_version": fixed_version,
+                "advisories": [
+                    {
+                        "id": advisory_id,
+                        "aliases": match.advisory.aliases,
+                        "summary": match.advisory.summary,
+                        "severity": match.advisory.severity,
+                        "fixed_version": match.fixed_version
+                    }
+                    for advisory_id, match in sorted(advisories.items())
+                ]
             }
-        ))
+        )
+    
+    async def _mine_secrets(self, repository_id: UUID) -> List[Opportunity]:
+        """Mine exposed secret opportunities.
         
+        Reads the secrets found by the indexer in the files of the latest
+        indexed ref, one opportunity per distinct secret. Secrets are
+        reported whatever the requested languages: a leaked credential in a
+        manifest matters as much as one in code.
+        """
+        ref = self.store.default_ref(repository_id)
+        if ref is None:
+            return []
+        
+        by_secret = {}
+        for secret in self.store.get_secrets(repository_id, ref):
+            by_secret.setdefault((secret.rule_id, secret.digest), []).append(secret)
+        
+        opportunities = []
+        for (rule_id, digest), secrets in sorted(by_secret.items()):
+            rule = RULES_BY_ID.get(rule_id)
+            description = rule.description if rule else rule_id
+            paths = sorted({secret.path for secret in secrets})
+            location = paths[0] + (f" and {len(paths) - 1} more files" if len(paths) > 1 else "")
+            opportunities.append(Opportunity(
+                repository_id=repository_id,
+                type=OpportunityType.SECRET_EXPOSURE,
+                title=f"Rotate {description} exposed in {location}",
+                description=(
+                    f"A {description} ({secrets[0].preview}) is committed to the repository. "
+                    "Revoke it, move it to a secret store and remove it from the code"
+                ),
+                priority=1,
+                confidence=rule.confidence if rule else 0.6,
+                files_affected=paths,
+                fingerprint=fingerprint("secret", rule_id, digest),
+                metadata={
+                    "rule_id": rule_id,
+                    "preview": secrets[0].preview,
+                    "occurrences": [
+                        {"path": secret.path, "line": secret.line} for secret in secrets
+                    ]
+                }
+            ))
         return opportunities
     
-    async def _mine_api_migrations(
-        self, repository_id: UUID, languages: List[Language]
+    @staticmethod
+    def _build_opportunities(
+        detector: Detector, context: DetectionContext, findings: List[RuleFinding]
+    ) -> List[Opportunity]:
+        """Turn the findings of a file-based detector into opportunities."""
+        if context.languages:
+            findings = [
+                finding for finding in findings
+                if language_for_path(finding.path) in context.languages
+            ]
+        return detector.build(context, findings)
+    
+    def _build_api_migrations(
+        self, repository_id: UUID, findings: List[RuleFinding]
     ) -> List[Opportunity]:
-        """Mine API migration opportunities."""
+        """Group deprecated API findings into opportunities."""
+        findings = sorted(findings, key=lambda finding: (finding.path, finding.line))
+        
+        # One opportunity per deprecated API, covering all of its uses
+        by_api = {}
+        for finding in findings:
+            by_api.setdefault(finding.metadata["api"], []).append(finding)
+        
         opportunities = []
+        for api, api_findings in by_api.items():
+            files_affected = sorted({finding.path for finding in api_findings})
+            replacement = api_findings[0].metadata["replacement"]
+            opportunities.append(Opportunity(
+                repository_id=repository_id,
+                type=OpportunityType.API_MIGRATION,
+                title=f"Migrate from deprecated {api}",
+                description=(
+                    f"{len(api_findings)} uses of deprecated {api} in "
+                    f"{len(files_affected)} files, replace with {replacement}"
+                ),
+                priority=4,
+                confidence=0.9,
+                files_affected=files_affected,
+                fingerprint=fingerprint(api_findings[0].rule_id, api),
+                metadata={
+                    "rule_id": api_findings[0].rule_id,
+                    "api": api,
+                    "replacement": replacement,
+                    "occurrences": [
+                        {"path": finding.path, "line": finding.line}
+                        for finding in api_findings[:100]
+                    ]
+                }
+            ))
         
-        # Mock API migrations
-        opportunities.append(Opportunity(
-            repository_id=repository_id,
-            type=OpportunityType.API_MIGRATION,
-            title="Migrate deprecated GitHub API endpoints",
-            description="Several GitHub API v3 endpoints are deprecated, migrate to v4 GraphQL API",
-            priority=4,
-            confidence=0.8,
-            files_affected=["src/integrations/github.py"],
-            metadata={
-                "api_provider": "github",
-                "deprecated_endpoints": ["/repos/:owner/:repo/issues"],
-                "replacement": "GraphQL API"
-            }
-        ))
+        return opportunities
+    
+    def _build_sql_injections(
+        self, repository_id: UUID, findings: List[RuleFinding]
+    ) -> List[Opportunity]:
+        """Group SQL injection findings into one opportunity per vulnerable function."""
+        findings = sorted(findings, key=lambda finding: (finding.path, finding.line))
+        by_function = {}
+        for finding in findings:
+            by_function.setdefault((finding.path, finding.metadata["function"]), []).append(finding)
+        
+        opportunities = []
+        for (path, function), function_findings in by_function.items():
+            sources = sorted({finding.metadata["source"] for finding in function_findings})
+            sinks = sorted({finding.metadata["sink"] for finding in function_findings})
+            # Flows through helpers and cut-off analyses are less certain
+            indirect = any(
+                finding.metadata["via"] or finding.metadata["truncated"]
+                for finding in function_findings
+            )
+            opportunities.append(Opportunity(
+                repository_id=repository_id,
+                type=OpportunityType.SECURITY_VULNERABILITY,
+                title=f"Fix SQL injection in {function} ({path})",
+                description=(
+                    f"Untrusted {', '.join(sources)} reaches {', '.join(sinks)} "
+                    f"in {len(function_findings)} places; pass values as query parameters"
+                ),
+                priority=1,
+                confidence=0.7 if indirect else 0.85,
+                files_affected=[path],
+                fingerprint=fingerprint("sql_injection", path, function),
+                metadata={
+                    "rule_id": function_findings[0].rule_id,
+                    "vulnerability_type": "sql_injection",
+                    "severity": "HIGH",
+                    "function": function,
+                    "occurrences": [
+                        {
+                            "path": finding.path,
+                            "line": finding.line,
+                            "source": finding.metadata["source"],
+                            "sink": finding.metadata["sink"],
+                            "via": finding.metadata["via"]
+                        }
+                        for finding in function_findings
+                    ]
+                }
+            ))
+        return opportunities
+    
+    def _build_loop_costs(
+        self, repository_id: UUID, findings: List[RuleFinding], manifest: RefManifest
+    ) -> List[Opportunity]:
+        """Group loop cost findings into opportunities.
+        
+        Calls made in loops to functions of other files are followed one
+        level deep: they are resolved by name against the query-issuing
+        functions of the files the caller imports.
+        """
+        reported, loop_calls = [], []
+        query_functions: Dict[str, Dict[str, RuleFinding]] = {}  # path -> name -> fact
+        for finding in findings:
+            kind = finding.metadata["kind"]
+            if kind == "query_function":
+                query_functions.setdefault(finding.path, {}).setdefault(
+                    finding.metadata["name"], finding
+                )
+            elif kind == "loop_call":
+                loop_calls.append(finding)
+            else:
+                reported.append(finding)
         
+        if loop_calls and query_functions:
+            graph = ImportGraph.build(
+                manifest.entries, self.store.get_imports(manifest.entries.values())
+            )
+            for call in loop_calls:
+                for target in sorted(graph.edges.get(call.path, ())):
+                    fact = query_functions.get(target, {}).get(call.metadata["callee"])
+                    if fact is None:
+                        continue
+                    depth = call.metadata["depth"]
+                    via = f"{target}:{fact.metadata['function']}"
+                    query = fact.metadata["query"]
+                    reported.append(call._replace(
+                        message=f"{query} through {via} issues one query per iteration",
+                        metadata={
+                            "kind": "query_in_loop",
+                            "function": call.metadata["function"],
+                            "call": query,
+                            "depth": depth,
+                            "via": via,
+                            "invariant": False,
+                            "cost_multiplier": cost_multiplier("query_in_loop", depth)
+                        }
+                    ))
+                    break
+        
+        groups = {}
+        for finding in sorted(reported, key=lambda finding: (finding.path, finding.line)):
+            metadata = finding.metadata
+            key = (finding.path, metadata["function"], metadata["kind"], metadata["call"])
+            groups.setdefault(key, []).append(finding)
+        
+        opportunities = []
+        for (path, function, kind, call), group in groups.items():
+            multiplier = max(finding.metadata["cost_multiplier"] for finding in group)
+            impact = OPERATION_COSTS[kind] * multiplier
+            if kind == "query_in_loop":
+                verb = "Hoist" if all(f.metadata["invariant"] for f in group) else "Batch"
+                title = f"{verb} {call} queries made in a loop in {function}"
+                confidence = 0.65 if any(f.metadata["via"] for f in group) else 0.8
+            elif kind == "invariant_call":
+                title = f"Hoist {call}() out of the loop in {function}"
+                confidence = 0.7
+            else:
+                title = f"Use a set for lookups in {call} in {function}"
+                confidence = 0.6
+            opportunities.append(Opportunity(
+                repository_id=repository_id,
+                type=OpportunityType.CODE_OPTIMIZATION,
+                title=title,
+                description=f"{group[0].message} (about {multiplier}x the necessary work)",
+                priority=3 if impact >= 10**6 else 4 if impact >= 10**4 else 5,
+                confidence=confidence,
+                files_affected=[path],
+                fingerprint=fingerprint("loop_cost", kind, path, function, call),
+                metadata={
+                    "rule_id": group[0].rule_id,
+                    "optimization_type": LOOP_OPTIMIZATIONS[kind],
+                    "function": function,
+                    "call": call,
+                    "cost_multiplier": multiplier,
+                    "estimated_improvement": f"up to {multiplier}x less work in the loop",
+                    "occurrences": [
+                        {"path": f.path, "line": f.line, "via": f.metadata["via"]}
+                        for f in group
+                    ]
+                }
+            ))
         return opportunities
     
+    def _read_sources(self, manifest: RefManifest, paths: Iterable[str]) -> List[SourceFile]:
+        """Read the stored contents of manifest paths."""
+        files = []
+        for path in paths:
+            language = language_for_path(path)
+            content = self.blob_store.get(manifest.entries[path])
+            if language is not None and content is not None:
+                files.append(SourceFile(path, language, content))
+        return files
+    
     async def _mine_code_optimizations(
         self, repository_id: UUID, languages: List[Language]
     ) -> List[Opportunity]:
-        """Mine code optimization opportunities."""
+        """Mine duplicated code opportunities."""
+        return await run_in_thread(self._find_duplicates, repository_id, languages)
+    
+    def _find_duplicates(
+        self, repository_id: UUID, languages: List[Language]
+    ) -> List[Opportunity]:
+        """Find functions copied within the repository or from other indexed repositories.
+        
+        Candidates come from the LSH band index built at index time, so the
+        cost grows with the number of actual near-duplicates rather than the
+        square of the corpus size. Candidates are confirmed by comparing
+        their MinHash signatures, then grouped into clusters of copies.
+        """
+        manifest = self._default_manifest(repository_id)
+        if manifest is None:
+            return []
+        repository_blobs = {
+            blob_sha for path, blob_sha in manifest.entries.items()
+            if language_for_path(path) is not None
+            and (not languages or language_for_path(path) in languages)
+        }
+        pairs = self.store.similar_symbol_candidates(repository_blobs)
+        if not pairs:
+            return []
+        
+        symbols = self.store.get_symbol_details({key[0] for pair in pairs for key in pair})
+        parents: Dict[SymbolKey, SymbolKey] = {}
+        
+        def find(key: SymbolKey) -> SymbolKey:
+            while parents.setdefault(key, key) != key:
+                parents[key] = parents[parents[key]]
+                key = parents[key]
+            return key
+        
+        similarities: Dict[SymbolKey, float] = {}
+        for first, second in pairs:
+            if first not in symbols or second not in symbols:
+                continue
+            similarity = estimated_similarity(symbols[first].signature, symbols[second].signature)
+            if similarity >= DUPLICATE_THRESHOLD:
+                parents[find(first)] = find(second)
+                for key in (first, second):
+                    similarities[key] = min(similarities.get(key, 1.0), similarity)
+        
+        clusters: Dict[SymbolKey, List[SymbolKey]] = {}
+        for key in parents:
+            clusters.setdefault(find(key), []).append(key)
+        locations = self.store.blob_locations({key[0] for key in parents})
+        
         opportunities = []
+        for keys in clusters.values():
+            opportunity = self._duplicate_opportunity(
+                repository_id, manifest, keys, symbols, similarities, locations
+            )
+            if opportunity is not None:
+                opportunities.append(opportunity)
+        return opportunities
+    
+    @staticmethod
+    def _duplicate_opportunity(
+        repository_id: UUID,
+        manifest: RefManifest,
+        keys: List[SymbolKey],
+        symbols: Dict[SymbolKey, Symbol],
+        similarities: Dict[SymbolKey, float],
+        locations: Dict[str, List[Tuple[UUID, str, str]]]
+    ) -> Optional[Opportunity]:
+        """Build the opportunity of one cluster of copies, if it touches the repository."""
+        occurrences, external = [], {}
+        for key in keys:
+            blob_sha, name, line = key
+            symbol = symbols[key]
+            for location_repository, ref, path in locations.get(blob_sha, ()):
+                if location_repository == repository_id:
+                    if ref == manifest.ref and manifest.entries.get(path) == blob_sha:
+                        occurrences.append({
+                            "path": path, "symbol": name, "line": line,
+                            "end_line": symbol.end_line
+                        })
+                else:
+                    external.setdefault((str(location_repository), path, name), line)
+        if not occurrences or len(occurrences) + len(external) < 2:
+            return None
         
-        # Mock code optimizations
-        opportunities.append(Opportunity(
+        occurrences.sort(key=lambda occurrence: (occurrence["path"], occurrence["line"]))
+        first = occurrences[0]
+        copies = len(occurrences) + len(external)
+        duplicated_lines = sum(
+            occurrence["end_line"] - occurrence["line"] + 1 for occurrence in occurrences[1:]
+        )
+        where = (
+            f"{len(occurrences) - 1} other places in this repository"
+            if len(occurrences) > 1 else "no other place in this repository"
+        )
+        if external:
+            where += f" and {len(external)} in other repositories"
+        
+        return Opportunity(
             repository_id=repository_id,
             type=OpportunityType.CODE_OPTIMIZATION,
-            title="Optimize database query performance",
-            description="Multiple N+1 queries detected, can be optimized with eager loading",
-            priority=5,
-            confidence=0.75,
-            files_affected=["src/services/user.py", "src/services/project.py"],
+            title=f"Deduplicate {copies} copies of {first['symbol']}",
+            description=(
+                f"{first['symbol']} in {first['path']} is copied in {where}; "
+                "extract a shared implementation"
+            ),
+            # Copies inside the repository can be merged by one change
+            priority=6 if len(occurrences) > 1 else 7,
+            confidence=round(min(similarities[key] for key in keys), 2),
+            files_affected=sorted({occurrence["path"] for occurrence in occurrences}),
+            fingerprint=fingerprint("duplicate_code", first["path"], first["symbol"]),
             metadata={
-                "optimization_type": "n_plus_1_queries",
-                "estimated_improvement": "50% query time reduction"
+                "optimization_type": "duplicate_code",
+                "duplicated_lines": duplicated_lines,
+                "occurrences": occurrences,
+                "external_occurrences": [
+                    {"repository_id": other, "path": path, "symbol": name, "line": line}
+                    for (other, path, name), line in sorted(external.items())
+                ]
             }
-        ))
-        
-        return opportunities
+        )
     
     async def _mine_test_coverage(
         self, repository_id: UUID, languages: List[Language]
     ) -> List[Opportunity]:
-        """Mine test coverage opportunities."""
+        """Mine untested functions from the latest ingested coverage report."""
+        return await run_in_thread(self._find_untested_functions, repository_id, languages)
+    
+    def _find_untested_functions(
+        self, repository_id: UUID, languages: List[Language]
+    ) -> List[Opportunity]:
+        """Find functions that no test runs, most called first.
+        
+        Line hits of the coverage report are mapped onto the symbol table of
+        the default ref: a function is untested when it has executable
+        lines and none of them ran. Untested functions are ranked by fan-in,
+        the call sites naming them across the ref, so the code most others
+        depend on gets tested first; ties go to the most often changed.
+        """
+        manifest = self._default_manifest(repository_id)
+        report = self.coverage_store.get_report(repository_id)
+        if manifest is None or report is None:
+            return []
+        
+        functions: Dict[str, List[Symbol]] = {}
+        for symbol in self.store.get_symbols(repository_id, manifest.ref):
+            if symbol.kind not in ("function", "method") or is_test_path(symbol.path):
+                continue
+            if languages and language_for_path(symbol.path) not in languages:
+                continue
+            functions.setdefault(symbol.path, []).append(symbol)
+        coverage = self.coverage_store.get_files(repository_id, functions)
+        fan_in = self.store.call_counts(repository_id, manifest.ref)
+        churn = self.history.store.symbol_churn(repository_id, manifest.ref, coverage)
+        # Lines may have moved if the report was produced on another commit
+        confidence = 0.9 if report.commit_sha == manifest.commit_sha else 0.7
+        
         opportunities = []
+        for path, symbols in functions.items():
+            if path not in coverage:
+                continue
+            opportunity = self._untested_functions_opportunity(
+                repository_id, path, symbols, coverage[path], fan_in, churn, confidence
+            )
+            if opportunity is not None:
+                opportunities.append(opportunity)
+        return opportunities
+    
+    @staticmethod
+    def _untested_functions_opportunity(
+        repository_id: UUID,
+        path: str,
+        symbols: List[Symbol],
+        coverage: FileCoverage,
+        fan_in: Dict[str, int],
+        churn: Dict[Tuple[str, str], Churn],
+        confidence: float
+    ) -> Optional[Opportunity]:
+        """Build the opportunity of the untested functions of one file, if any.
+        
+        Only body lines count: a ``def`` line runs when its module is
+        imported, whether or not the function is ever called.
+        """
+        executable, covered = function_coverage(
+            coverage,
+            np.fromiter((symbol.line + 1 for symbol in symbols), np.int32, len(symbols)),
+            np.fromiter((symbol.end_line for symbol in symbols), np.int32, len(symbols))
+        )
+        untested = [
+            {
+                "name": symbol.name,
+                "line": symbol.line,
+                "end_line": symbol.end_line,
+                "executable_lines": int(lines),
+                # Calls are matched on the simple name of the callee
+                "fan_in": fan_in.get(symbol.name.rsplit(".", 1)[-1], 0),
+                "commits": churn[path, symbol.name].commits if (path, symbol.name) in churn else 0
+            }
+            for symbol, lines, hit in zip(symbols, executable, covered)
+            if lines and not hit
+        ]
+        if not untested:
+            return None
         
-        # Mock test coverage issues
-        opportunities.append(Opportunity(
+        untested.sort(
+            key=lambda function: (-function["fan_in"], -function["commits"], function["line"])
+        )
+        first = untested[0]
+        current = np.count_nonzero(coverage.hits) / len(coverage.lines)
+        count = f"{len(untested)} untested function{'s' if len(untested) > 1 else ''}"
+        description = f"{count} in {path} never run under test"
+        if first["fan_in"]:
+            description += f"; {first['name']} is called from {first['fan_in']} places"
+        
+        return Opportunity(
             repository_id=repository_id,
             type=OpportunityType.TEST_COVERAGE,
-            title="Increase test coverage for authentication module",
-            description="Authentication module has only 45% test coverage, critical paths untested",
-            priority=6,
-            confidence=0.9,
-            files_affected=["src/auth/", "tests/test_auth.py"],
+            title=f"Add tests for {count} in {path}",
+            description=description,
+            priority=4 if first["fan_in"] >= 10 else 5 if first["fan_in"] >= 3 else 6,
+            confidence=confidence,
+            files_affected=[path],
+            fingerprint=fingerprint("test_coverage", path),
             metadata={
-                "current_coverage": 0.45,
+                "current_coverage": round(current, 4),
                 "target_coverage": 0.80,
-                "untested_functions": ["validate_token", "refresh_token"]
+                "untested_lines": sum(function["executable_lines"] for function in untested),
+                "untested_functions": untested
             }
-        ))
-        
-        return opportunities
+        )
     
     async def _mine_documentation(
         self, repository_id: UUID, languages: List[Language]
     ) -> List[Opportunity]:
-        """Mine documentation opportunities."""
-        opportunities = []
+        """Mine undocumented public symbols and API routes."""
+        return await run_in_thread(self._find_undocumented, repository_id, languages)
+    
+    def _find_undocumented(
+        self, repository_id: UUID, languages: List[Language]
+    ) -> List[Opportunity]:
+        """Find public symbols without docstrings and routes without descriptions.
+        
+        Documentation flags are recorded when files are parsed, so this is a
+        few array operations over the columns of the symbol table, with no
+        source read back. Each file with gaps yields one opportunity for its
+        route handlers and one for its other public symbols.
+        """
+        manifest = self._default_manifest(repository_id)
+        if manifest is None:
+            return []
+        table = self.store.symbol_table(repository_id, manifest.ref)
+        if not len(table.path):
+            return []
+        
+        # Rows come ordered by path: files start wherever the path changes
+        new_file = np.ones(len(table.path), dtype=bool)
+        new_file[1:] = table.path[1:] != table.path[:-1]
+        paths, file_index = table.path[new_file], np.cumsum(new_file) - 1
+        in_scope = np.fromiter(
+            (
+                not is_test_path(path)
+                and (not languages or language_for_path(path) in languages)
+                for path in paths
+            ),
+            bool,
+            len(paths)
+        )[file_index] & table.public
+        is_route = np.not_equal(table.route, None)
+        symbols = in_scope & ~is_route
+        public = np.bincount(file_index[symbols], minlength=len(paths))
+        documented = np.bincount(file_index[symbols & table.documented], minlength=len(paths))
         
-        # Mock documentation issues
-        opportunities.append(Opportunity(
+        opportunities = []
+        for routes, mask in ((True, in_scope & is_route), (False, symbols)):
+            missing = np.flatnonzero(mask & ~table.documented)
+            boundaries = np.flatnonzero(np.diff(file_index[missing])) + 1
+            for group in np.split(missing, boundaries) if len(missing) else []:
+                file = file_index[group[0]]
+                names = (table.route if routes else table.name)[group].tolist()
+                if routes:
+                    opportunities.append(
+                        self._undocumented_routes_opportunity(repository_id, paths[file], names)
+                    )
+                else:
+                    opportunities.append(self._undocumented_symbols_opportunity(
+                        repository_id, paths[file], names, documented[file] / public[file]
+                    ))
+        return opportunities
+    
+    @staticmethod
+    def _undocumented_routes_opportunity(
+        repository_id: UUID, path: str, routes: List[str]
+    ) -> Opportunity:
+        """Build the opportunity of the undescribed route handlers of one file."""
+        count = f"{len(routes)} API endpoint{'s' if len(routes) > 1 else ''}"
+        return Opportunity(
+            repository_id=repository_id,
+            type=OpportunityType.DOCUMENTATION,
+            title=f"Document {count} in {path}",
+            description=f"{count} in {path} have no description: {', '.join(routes[:5])}",
+            # Undescribed endpoints leave the published API reference empty
+            priority=6,
+            confidence=0.9,
+            files_affected=[path],
+            fingerprint=fingerprint("documentation", "api_reference", path),
+            metadata={"doc_type": "api_reference", "missing_docs": routes}
+        )
+    
+    @staticmethod
+    def _undocumented_symbols_opportunity(
+        repository_id: UUID, path: str, names: List[str], coverage: float
+    ) -> Opportunity:
+        """Build the opportunity of the undocumented public symbols of one file."""
+        count = f"{len(names)} public symbol{'s' if len(names) > 1 else ''}"
+        return Opportunity(
             repository_id=repository_id,
             type=OpportunityType.DOCUMENTATION,
-            title="Add API documentation for new endpoints",
-            description="5 new API endpoints lack proper documentation and examples",
+            title=f"Document {count} in {path}",
+            description=(
+                f"{count} in {path} have neither a docstring nor a comment: "
+                f"{', '.join(names[:5])}"
+            ),
             priority=7,
             confidence=0.85,
-            files_affected=["docs/api.md", "src/api/routes.py"],
+            files_affected=[path],
+            fingerprint=fingerprint("documentation", "docstring", path),
             metadata={
-                "missing_docs": ["/api/v1/users", "/api/v1/projects"],
-                "doc_type": "api_reference"
+                "doc_type": "docstring",
+                "missing_docs": names,
+                "documentation_coverage": round(float(coverage), 4)
             }
-        ))
-        
-        return opportunities
+        )
     
-    async def get_opportunities(self, repository_id: UUID) -> List[Opportunity]:
-        """Get all existing opportunities for a repository."""
-        # TODO: Implement database query to fetch stored opportunities
-        return await self.mine_opportunities(repository_id, [], [], 50)
+    async def get_opportunities(
+        self, repository_id: UUID, limit: int = 50
+    ) -> List[Opportunity]:
+        """Get all existing opportunities for a repository, best first."""
+        await self.sync_opportunities(repository_id)
+        return self.opportunity_store.list(repository_id, limit=limit)
+    
+    async def sync_opportunities(self, repository_id: UUID):
+        """Bring the stored opportunities of a repository up to date.
+        
+        Nothing runs for repositories that are not indexed, or when every
+        enabled detector has run on the default ref's commit, including
+        runs that failed or went over their time budget: those are retried
+        by explicit mining passes only. Otherwise a mining pass runs, served
+        from cached detector results where inputs are unchanged.
+        """
+        manifest = self._default_manifest(repository_id)
+        if manifest is None:
+            return
+        current = {
+            (detector.spec.name, detector.spec.version)
+            for detector in self.enabled_detectors()
+        }
+        synced = self.opportunity_store.synced_detectors(repository_id, manifest.commit_sha)
+        if current <= synced:
+            return
+        await self.mine(repository_id, [], [], max_opportunities=1)
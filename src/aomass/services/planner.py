@@ -1,66 +1,494 @@
 """Implementation planning service."""
-from typing import Any, Dict
+import asyncio
+import hashlib
+import json
+import re
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple
 from uuid import UUID
 
-from ..models.core import Opportunity, OpportunityType, Plan
+from ..analysis.dependencies import LOCK_FILES, manifest_format_for_path
+from ..analysis.impact import ImpactIndex
+from ..analysis.versions import version_delta
+from ..config.settings import settings
+from ..models.core import BlastRadius, Opportunity, OpportunityType, Plan
+from ..storage.index_store import IndexStore
+from ..storage.opportunity_store import OpportunityStore
+from ..storage.plan_store import PlanStore, PlanTemplateStore
+
+# Bump whenever the plan generated for the same opportunity changes, so
+# that plan templates cached by the previous planner are no longer used
+PLANNER_VERSION = "2"
+
+# Metadata deciding what the plan of an opportunity says, for the types
+# whose plans are cached. Everything else a plan mentions is a parameter:
+# the versions below, the opportunity title and the affected files. Test
+# coverage and documentation plans list the functions of one repository,
+# so they are not cached.
+PLAN_SIGNATURE_FIELDS = {
+    OpportunityType.DEPENDENCY_UPDATE: ("ecosystem", "package", "update_type"),
+    OpportunityType.SECURITY_VULNERABILITY: (
+        "ecosystem", "package", "vulnerability_type", "severity"
+    ),
+    OpportunityType.API_MIGRATION: ("api_provider", "deprecated_endpoints", "api", "replacement"),
+    OpportunityType.CODE_OPTIMIZATION: ("optimization_type", "cost_multiplier"),
+    OpportunityType.SECRET_EXPOSURE: ("rule_id",),
+}
+PLAN_PARAMETERS = ("current_version", "latest_version", "fixed_version")
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+# Key of the placeholder standing for the affected files of some kinds
+FILES_PLACEHOLDER = "{{files}}"
+
+# How each kind of code optimization is implemented
+OPTIMIZATION_FIXES = {
+    "n_plus_1_queries": "Load the rows of all iterations with one batched or eager-loaded query",
+    "loop_invariant_call": "Move the call before the loop and reuse its result",
+    "quadratic_membership": "Build a set or dict once and look values up in it",
+    "duplicate_code": "Extract the copies into one shared implementation",
+}
+
+# Churn hotness from which the files of an opportunity count as hot code
+HOT_CODE_THRESHOLD = 0.5
+
+# Indexed commits whose import graph and symbols are kept for blast radii
+IMPACT_INDEX_CACHE_SIZE = 16
+
+# Opportunity types whose changes can be coalesced into one plan
+COALESCED_TYPES = frozenset({OpportunityType.DEPENDENCY_UPDATE})
+
+
+def _file_kind(path: str) -> str:
+    """Manifest file name, or extension of other files, for plan signatures."""
+    name = PurePosixPath(path).name
+    return name if manifest_format_for_path(path) else PurePosixPath(name).suffix
+
+
+class PlanResult(NamedTuple):
+    """Outcome of planning one opportunity of a batch."""
+    opportunity_id: UUID
+    plan: Optional[Plan] = None
+    error: Optional[str] = None
+    shared: bool = False  # Filled in from the plan of an opportunity with the same signature
 
 
 class PlannerService:
     """Service for generating implementation plans."""
     
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        opportunity_store: Optional[OpportunityStore] = None,
+        template_store: Optional[PlanTemplateStore] = None,
+        index_store: Optional[IndexStore] = None,
+        plan_store: Optional[PlanStore] = None
+    ):
+        self.opportunity_store = opportunity_store or OpportunityStore(settings.index_db_path)
+        self.template_store = template_store or PlanTemplateStore(settings.index_db_path)
+        self.index_store = index_store or IndexStore(settings.index_db_path)
+        self.plan_store = plan_store or PlanStore(settings.index_db_path)
+        self._impact_indexes: "OrderedDict[Tuple[UUID, str], ImpactIndex]" = OrderedDict()
     
     async def generate_plan(
         self, 
         opportunity_id: UUID, 
         preferences: Dict[str, Any] = None
     ) -> Plan:
-        """Generate implementation plan for an opportunity."""
+        """Generate implementation plan for an opportunity.
+        
+        Raises:
+            ValueError: If no mined opportunity has this ID.
+        """
+        opportunity = await self._get_opportunity(opportunity_id)
+        return await self.plan_opportunity(opportunity, preferences)
+    
+    async def plan_opportunity(
+        self,
+        opportunity: Opportunity,
+        preferences: Dict[str, Any] = None
+    ) -> Plan:
+        """Generate the implementation plan of an opportunity, stored or not.
+        
+        Opportunities with the same signature share one plan template: a
+        dependency bump planned for one repository is re-parameterized for
+        the next instead of being generated again.
+        """
         if preferences is None:
             preferences = {}
         
-        # TODO: Fetch opportunity from database
-        # For now, create a mock opportunity
-        opportunity = await self._get_opportunity(opportunity_id)
+        signature = self.plan_signature(opportunity, preferences)
+        plan, _template = await self._plan(opportunity, preferences, signature)
+        return plan
+    
+    async def generate_plans(
+        self,
+        opportunity_ids: Iterable[UUID],
+        preferences: Dict[str, Any] = None,
+        concurrency: Optional[int] = None,
+        coalesce: bool = False
+    ) -> AsyncIterator[PlanResult]:
+        """Plan many opportunities concurrently, yielding each result as it completes.
+        
+        Opportunities sharing a signature are planned once: the others wait
+        for that plan's template and are filled in from it. With
+        ``coalesce``, the opportunities grouped by :meth:`coalesce` get one
+        combined plan, yielded once under the ID of the group's first
+        opportunity. Unknown opportunities and failed plans are yielded
+        with their error.
+        """
+        if preferences is None:
+            preferences = {}
+        semaphore = asyncio.Semaphore(concurrency or settings.plan_batch_concurrency)
+        # Template planned for each signature, None if it could not be templated
+        leaders: Dict[str, asyncio.Future] = {}
+        
+        async def load_and_plan(opportunity_id: UUID) -> PlanResult:
+            try:
+                opportunity = await self._get_opportunity(opportunity_id)
+            except Exception as e:
+                return PlanResult(opportunity_id, error=str(e))
+            return await plan_one(opportunity)
         
+        async def plan_one(opportunity: Opportunity) -> PlanResult:
+            opportunity_id = opportunity.id
+            try:
+                signature = self.plan_signature(opportunity, preferences)
+                leader = leaders.get(signature) if signature is not None else None
+                if leader is not None:
+                    template = await asyncio.shield(leader)
+                    if template is not None:
+                        plan, _template = await self._plan(
+                            opportunity, preferences, signature, template
+                        )
+                        return PlanResult(opportunity_id, plan, shared=True)
+                elif signature is not None:
+                    leader = leaders[signature] = asyncio.get_running_loop().create_future()
+                
+                template = None
+                try:
+                    async with semaphore:
+                        plan, template = await self._plan(opportunity, preferences, signature)
+                finally:
+                    if leader is not None and not leader.done():
+                        leader.set_result(template)
+                return PlanResult(opportunity_id, plan)
+            except Exception as e:
+                return PlanResult(opportunity_id, error=str(e))
+        
+        async def plan_group(group: List[Opportunity]) -> PlanResult:
+            try:
+                async with semaphore:
+                    plan = await self.plan_coalesced(group, preferences)
+                return PlanResult(group[0].id, plan)
+            except Exception as e:
+                return PlanResult(group[0].id, error=str(e))
+        
+        opportunity_ids = list(dict.fromkeys(opportunity_ids))
+        if not coalesce:
+            tasks = [
+                asyncio.ensure_future(load_and_plan(opportunity_id))
+                for opportunity_id in opportunity_ids
+            ]
+        else:
+            opportunities = []
+            for opportunity_id in opportunity_ids:
+                try:
+                    opportunities.append(await self._get_opportunity(opportunity_id))
+                except ValueError as e:
+                    yield PlanResult(opportunity_id, error=str(e))
+            tasks = [
+                asyncio.ensure_future(plan_one(group[0]) if len(group) == 1 else plan_group(group))
+                for group in self.coalesce(opportunities)
+            ]
+        try:
+            for result in asyncio.as_completed(tasks):
+                yield await result
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    @staticmethod
+    def coalesce(
+        opportunities: Iterable[Opportunity], max_size: Optional[int] = None
+    ) -> List[List[Opportunity]]:
+        """Group opportunities whose changes can ship as one plan, in their order.
+        
+        Dependency updates of one repository and ecosystem affecting the
+        same manifests are grouped, at most ``max_size`` per group and
+        never two updates of the same package, whose edits would conflict.
+        Every other opportunity is a group of its own.
+        """
+        max_size = max_size or settings.plan_coalesce_max_opportunities
+        groups: List[List[Opportunity]] = []
+        open_groups: Dict[Tuple[UUID, str, Tuple[str, ...]], List[List[Opportunity]]] = {}
+        for opportunity in opportunities:
+            ecosystem = opportunity.metadata.get("ecosystem")
+            package = opportunity.metadata.get("package")
+            if opportunity.type not in COALESCED_TYPES or not ecosystem or not package:
+                groups.append([opportunity])
+                continue
+            key = (opportunity.repository_id, ecosystem, tuple(sorted(opportunity.files_affected)))
+            candidates = open_groups.setdefault(key, [])
+            for group in candidates:
+                if len(group) < max_size and all(
+                    other.metadata["package"].lower() != package.lower() for other in group
+                ):
+                    group.append(opportunity)
+                    break
+            else:
+                candidates.append([opportunity])
+                groups.append(candidates[-1])
+        return groups
+    
+    async def plan_coalesced(
+        self,
+        opportunities: List[Opportunity],
+        preferences: Dict[str, Any] = None
+    ) -> Plan:
+        """Generate one plan addressing a group of opportunities from :meth:`coalesce`."""
+        if len(opportunities) == 1:
+            return await self.plan_opportunity(opportunities[0], preferences)
+        
+        plan = await self._plan_dependency_updates(opportunities, preferences or {})
+        for opportunity in opportunities:
+            self._add_churn_risk(plan, opportunity)
+        # Coalesced opportunities share their files, hence their hotspot warnings
+        plan.risks = list(dict.fromkeys(plan.risks))
+        plan.blast_radius = await self.blast_radius(*opportunities)
+        self.plan_store.put(plan)
+        return plan
+    
+    async def _plan(
+        self,
+        opportunity: Opportunity,
+        preferences: Dict[str, Any],
+        signature: Optional[str],
+        template: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Plan, Optional[Dict[str, Any]]]:
+        """Plan an opportunity from the given or cached template, or from scratch.
+        
+        Also returns the plan's template, None if it cannot be templated.
+        """
+        max_age = timedelta(hours=settings.plan_cache_ttl_hours)
+        if template is None and signature is not None and max_age:
+            template = self.template_store.get(signature, PLANNER_VERSION, max_age)
+        
+        if template is not None:
+            plan = Plan(
+                opportunity_id=opportunity.id,
+                **self._render(template, self._plan_parameters(opportunity), opportunity)
+            )
+        else:
+            plan = await self._build_plan(opportunity, preferences)
+            if signature is not None:
+                template = self._template(plan, opportunity)
+            if template is not None and max_age:
+                self.template_store.put(signature, PLANNER_VERSION, template)
+        
+        self._add_churn_risk(plan, opportunity)
+        plan.blast_radius = await self.blast_radius(opportunity)
+        self.plan_store.put(plan)
+        return plan, template
+    
+    async def blast_radius(self, *opportunities: Opportunity) -> Optional[BlastRadius]:
+        """Files, symbols and tests affected by the change of opportunities of one repository.
+        
+        Computed in the repository's default ref; None if it has not
+        been indexed.
+        """
+        index = await self._impact_index(opportunities[0].repository_id)
+        if index is None:
+            return None
+        files, names, lines, packages = [], [], [], []
+        for opportunity in opportunities:
+            metadata = opportunity.metadata
+            files.extend(opportunity.files_affected)
+            if isinstance(metadata.get("function"), str):
+                names.append(metadata["function"])
+            names.extend(function["name"] for function in metadata.get("untested_functions", []))
+            names.extend(metadata.get("missing_docs", []))
+            occurrences = [
+                occurrence for occurrence in metadata.get("occurrences", [])
+                if isinstance(occurrence, dict) and "path" in occurrence
+            ]
+            names.extend(
+                occurrence["symbol"] for occurrence in occurrences if "symbol" in occurrence
+            )
+            lines.extend(
+                (occurrence["path"], occurrence["line"])
+                for occurrence in occurrences if "line" in occurrence
+            )
+            if metadata.get("ecosystem") and metadata.get("package"):
+                packages.append((metadata["ecosystem"], metadata["package"]))
+        return index.blast_radius(files, names=names, lines=lines, packages=packages)
+    
+    async def _impact_index(self, repository_id: UUID) -> Optional[ImpactIndex]:
+        """Impact index of the default ref, built once per commit."""
+        ref = self.index_store.default_ref(repository_id)
+        if ref is None:
+            return None
+        key = (repository_id, self.index_store.list_refs(repository_id)[ref])
+        index = self._impact_indexes.get(key)
+        if index is None:
+            def build() -> Optional[ImpactIndex]:
+                manifest = self.index_store.get_manifest(repository_id, ref)
+                if manifest is None:
+                    return None
+                return ImpactIndex.build(
+                    manifest,
+                    self.index_store.get_imports(manifest.entries.values()),
+                    self.index_store.get_symbols(repository_id, ref)
+                )
+            
+            index = await asyncio.to_thread(build)
+            if index is None:
+                return None
+            self._impact_indexes[key] = index
+            while len(self._impact_indexes) > IMPACT_INDEX_CACHE_SIZE:
+                self._impact_indexes.popitem(last=False)
+        self._impact_indexes.move_to_end(key)
+        return index
+    
+    @staticmethod
+    def plan_signature(
+        opportunity: Opportunity, preferences: Dict[str, Any]
+    ) -> Optional[str]:
+        """Key of the plan template of an opportunity; None if its plan is not cached.
+        
+        Covers the type, the metadata in :data:`PLAN_SIGNATURE_FIELDS`, the
+        size of the version update and the kinds and number of affected files.
+        """
+        fields = PLAN_SIGNATURE_FIELDS.get(opportunity.type)
+        if fields is None:
+            return None
+        metadata = opportunity.metadata
+        current = metadata.get("current_version")
+        target = metadata.get("latest_version") or metadata.get("fixed_version")
+        delta = None
+        if current and target:
+            delta = version_delta(metadata.get("ecosystem", ""), current, target)
+        shape = Counter(_file_kind(path) for path in opportunity.files_affected)
+        key = {
+            "type": opportunity.type.value,
+            "fields": {field: metadata.get(field) for field in fields},
+            "parameters": sorted(PlannerService._plan_parameters(opportunity)),
+            "delta": delta,
+            "files": sorted(shape.items()),
+            "preferences": preferences,
+        }
+        encoded = json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+    
+    @staticmethod
+    def _plan_parameters(opportunity: Opportunity) -> Dict[str, str]:
+        """Values of an opportunity that a plan template leaves as placeholders."""
+        values = {"title": opportunity.title}
+        values.update((name, opportunity.metadata.get(name)) for name in PLAN_PARAMETERS)
+        return {name: value for name, value in values.items() if isinstance(value, str) and value}
+    
+    @classmethod
+    def _template(cls, plan: Plan, opportunity: Opportunity) -> Optional[Dict[str, Any]]:
+        """Replace the parameters of an opportunity in its plan with placeholders.
+        
+        Lists of affected files become the affected files of the same kinds.
+        None if the template would not render back into the same plan, as
+        when a list leaves out some files of its kinds.
+        """
+        parameters = cls._plan_parameters(opportunity)
+        values = sorted(parameters.items(), key=lambda item: len(item[1]), reverse=True)
+        pattern = re.compile(
+            r"(?<![\w.])(" + "|".join(re.escape(value) for _name, value in values) + r")(?![\w.])"
+        )
+        names = {value: name for name, value in reversed(values)}
+        
+        files = set(opportunity.files_affected)
+        
+        def replace(node):
+            if isinstance(node, str):
+                return pattern.sub(lambda match: "{{" + names[match.group(1)] + "}}", node)
+            if isinstance(node, list):
+                if node and all(isinstance(item, str) and item in files for item in node):
+                    # Stands for the affected files of the same kinds
+                    return {FILES_PLACEHOLDER: sorted({_file_kind(path) for path in node})}
+                return [replace(item) for item in node]
+            if isinstance(node, dict):
+                return {key: replace(value) for key, value in node.items()}
+            return node
+        
+        content = plan.model_dump(mode="json", include={
+            "title", "description", "steps", "estimated_effort", "risks"
+        })
+        template = replace(content)
+        if cls._render(template, parameters, opportunity) != content:
+            return None
+        return template
+    
+    @classmethod
+    def _render(
+        cls, node: Any, parameters: Dict[str, str], opportunity: Opportunity
+    ) -> Any:
+        """Fill the placeholders of a plan template in with an opportunity's values."""
+        if isinstance(node, dict) and set(node) == {FILES_PLACEHOLDER}:
+            kinds = set(node[FILES_PLACEHOLDER])
+            return [path for path in opportunity.files_affected if _file_kind(path) in kinds]
+        if isinstance(node, str):
+            return PLACEHOLDER.sub(
+                lambda match: parameters.get(match.group(1), match.group(0)), node
+            )
+        if isinstance(node, list):
+            return [cls._render(item, parameters, opportunity) for item in node]
+        if isinstance(node, dict):
+            return {key: cls._render(value, parameters, opportunity) for key, value in node.items()}
+        return node
+    
+    async def _build_plan(
+        self, opportunity: Opportunity, preferences: Dict[str, Any]
+    ) -> Plan:
+        """Generate a plan from scratch, by opportunity type."""
         if opportunity.type == OpportunityType.DEPENDENCY_UPDATE:
-            return await self._plan_dependency_update(opportunity, preferences)
+            plan = await self._plan_dependency_update(opportunity, preferences)
         elif opportunity.type == OpportunityType.SECURITY_VULNERABILITY:
-            return await self._plan_security_fix(opportunity, preferences)
+            plan = await self._plan_security_fix(opportunity, preferences)
         elif opportunity.type == OpportunityType.API_MIGRATION:
-            return await self._plan_api_migration(opportunity, preferences)
+            plan = await self._plan_api_migration(opportunity, preferences)
         elif opportunity.type == OpportunityType.CODE_OPTIMIZATION:
-            return await self._plan_code_optimization(opportunity, preferences)
+            plan = await self._plan_code_optimization(opportunity, preferences)
         elif opportunity.type == OpportunityType.TEST_COVERAGE:
-            return await self._plan_test_improvement(opportunity, preferences)
+            plan = await self._plan_test_improvement(opportunity, preferences)
         elif opportunity.type == OpportunityType.DOCUMENTATION:
-            return await self._plan_documentation(opportunity, preferences)
-        
-        # Default generic plan
-        return Plan(
-            opportunity_id=opportunity_id,
-            title=f"Implementation plan for {opportunity.title}",
-            description=f"Generated plan to address: {opportunity.description}",
-            steps=[{"step": 1, "description": "Analyze current implementation"}],
-            estimated_effort="medium",
-            risks=["Unknown complexity"]
+            plan = await self._plan_documentation(opportunity, preferences)
+        elif opportunity.type == OpportunityType.SECRET_EXPOSURE:
+            plan = await self._plan_secret_rotation(opportunity, preferences)
+        else:
+            # Default generic plan
+            plan = Plan(
+                opportunity_id=opportunity.id,
+                title=f"Implementation plan for {opportunity.title}",
+                description=f"Generated plan to address: {opportunity.description}",
+                steps=[{"step": 1, "description": "Analyze current implementation"}],
+                estimated_effort="medium",
+                risks=["Unknown complexity"]
+            )
+        return plan
+    
+    @staticmethod
+    def _add_churn_risk(plan: Plan, opportunity: Opportunity):
+        """Warn when the change lands in code under heavy recent development."""
+        churn = opportunity.metadata.get("churn")
+        if not churn or churn["hotness"] < HOT_CODE_THRESHOLD:
+            return
+        plan.risks.append(
+            f"{churn['path']} is a hotspot ({churn['commits']} commits by "
+            f"{churn['authors']} authors, last on {churn['last_commit_at'][:10]}): "
+            "expect merge conflicts and coordinate with its recent authors"
         )
     
     async def _get_opportunity(self, opportunity_id: UUID) -> Opportunity:
         """Get opportunity by ID."""
-        # TODO: Implement database query
-        # For now, return a mock opportunity
-        return Opportunity(
-            id=opportunity_id,
-            repository_id=UUID("12345678-1234-5678-9012-123456789012"),
-            type=OpportunityType.DEPENDENCY_UPDATE,
-            title="Update FastAPI to latest version",
-            description="FastAPI 0.104.1 is available with bug fixes",
-            priority=3,
-            confidence=0.9,
-            files_affected=["requirements.txt"]
-        )
+        opportunity = self.opportunity_store.get(opportunity_id)
+        if opportunity is None:
+            raise ValueError(f"Opportunity {opportunity_id} not found")
+        return opportunity
     
     async def _plan_dependency_update(
         self, opportunity: Opportunity, preferences: Dict[str, Any]
@@ -70,27 +498,36 @@ class PlannerService:
         current_version = opportunity.metadata.get("current_version", "unknown")
         latest_version = opportunity.metadata.get("latest_version", "unknown")
         
+        lock_files = [
+            path for path in opportunity.files_affected if PurePosixPath(path).name in LOCK_FILES
+        ]
         steps = [
             {
                 "step": 1,
                 "description": f"Review changelog for {package} {current_version} -> {latest_version}",
-                "estimated_time": "5 minutes"
+                "estimated_time": "5 minutes",
+                "depends_on": []
             },
             {
                 "step": 2,
                 "description": f"Update {package} version in dependency files",
                 "estimated_time": "2 minutes",
-                "files": opportunity.files_affected
+                "files": [path for path in opportunity.files_affected if path not in lock_files],
+                "depends_on": [1]
             },
             {
                 "step": 3,
-                "description": "Run tests to ensure compatibility",
-                "estimated_time": "10 minutes"
+                "description": "Update lock files if necessary",
+                "estimated_time": "3 minutes",
+                "files": lock_files,
+                "depends_on": [2]
             },
             {
                 "step": 4,
-                "description": "Update lock files if necessary",
-                "estimated_time": "3 minutes"
+                "description": "Run tests to ensure compatibility",
+                "estimated_time": "10 minutes",
+                "depends_on": [3],
+                "needs_tests": True
             }
         ]
         
@@ -109,6 +546,82 @@ class PlannerService:
             risks=risks
         )
     
+    async def _plan_dependency_updates(
+        self, opportunities: List[Opportunity], preferences: Dict[str, Any]
+    ) -> Plan:
+        """Plan several dependency updates of the same manifests as one change.
+        
+        Each package gets its own update step after the shared changelog
+        review; the scheduler runs edits of the same manifest one after
+        another. Lock files are resolved once, for all updates.
+        """
+        ecosystem = opportunities[0].metadata.get("ecosystem", "unknown")
+        updates = [
+            (
+                opportunity.metadata.get("package", "unknown"),
+                opportunity.metadata.get("current_version", "unknown"),
+                opportunity.metadata.get("latest_version", "unknown")
+            )
+            for opportunity in opportunities
+        ]
+        files = opportunities[0].files_affected
+        lock_files = [path for path in files if PurePosixPath(path).name in LOCK_FILES]
+        
+        steps = [
+            {
+                "step": 1,
+                "description": "Review changelogs for " + ", ".join(
+                    f"{package} {current} -> {latest}" for package, current, latest in updates
+                ),
+                "estimated_time": f"{5 * len(updates)} minutes",
+                "depends_on": []
+            }
+        ]
+        for package, _current, latest in updates:
+            steps.append({
+                "step": len(steps) + 1,
+                "description": f"Update {package} to {latest} in dependency files",
+                "estimated_time": "2 minutes",
+                "files": [path for path in files if path not in lock_files],
+                "depends_on": [1]
+            })
+        steps.append({
+            "step": len(steps) + 1,
+            "description": "Update lock files if necessary",
+            "estimated_time": "3 minutes",
+            "files": lock_files,
+            "depends_on": list(range(2, len(steps) + 1))
+        })
+        steps.append({
+            "step": len(steps) + 1,
+            "description": "Run tests to ensure compatibility",
+            "estimated_time": "10 minutes",
+            "depends_on": [len(steps)],
+            "needs_tests": True
+        })
+        
+        risks = [
+            "Breaking changes in new versions",
+            "Dependency conflicts with other packages",
+            "Test failures due to API changes",
+            "Updates are tested together: drop updates from the change to find one that breaks tests"
+        ]
+        major = any(
+            opportunity.metadata.get("update_type") == "major" for opportunity in opportunities
+        )
+        
+        return Plan(
+            opportunity_id=opportunities[0].id,
+            opportunity_ids=[opportunity.id for opportunity in opportunities],
+            title=f"Update {len(updates)} {ecosystem} dependencies",
+            description="Safely update " + "; ".join(
+                f"{package} from {current} to {latest}" for package, current, latest in updates
+            ),
+            steps=steps,
+            estimated_effort="medium" if major else "low",
+            risks=risks
+        )
+    
     async def _plan_security_fix(
         self, opportunity: Opportunity, preferences: Dict[str, Any]
     ) -> Plan:
@@ -120,28 +633,34 @@ class PlannerService:
             {
                 "step": 1,
                 "description": f"Analyze {vuln_type} vulnerability in affected files",
-                "estimated_time": "15 minutes"
+                "estimated_time": "15 minutes",
+                "depends_on": []
             },
             {
                 "step": 2,
                 "description": "Implement secure coding practices",
                 "estimated_time": "30 minutes",
-                "files": opportunity.files_affected
+                "files": opportunity.files_affected,
+                "depends_on": [1]
             },
             {
                 "step": 3,
                 "description": "Add input validation and sanitization",
-                "estimated_time": "20 minutes"
+                "estimated_time": "20 minutes",
+                "depends_on": [2]
             },
             {
                 "step": 4,
                 "description": "Write security tests",
-                "estimated_time": "25 minutes"
+                "estimated_time": "25 minutes",
+                "depends_on": [1]
             },
             {
                 "step": 5,
                 "description": "Run security scanning tools",
-                "estimated_time": "10 minutes"
+                "estimated_time": "10 minutes",
+                "depends_on": [3, 4],
+                "needs_tests": True
             }
         ]
         
@@ -171,28 +690,34 @@ class PlannerService:
             {
                 "step": 1,
                 "description": f"Review {api_provider} migration documentation",
-                "estimated_time": "20 minutes"
+                "estimated_time": "20 minutes",
+                "depends_on": []
             },
             {
                 "step": 2,
                 "description": "Map deprecated endpoints to new API",
-                "estimated_time": "30 minutes"
+                "estimated_time": "30 minutes",
+                "depends_on": [1]
             },
             {
                 "step": 3,
                 "description": "Update API client implementation",
                 "estimated_time": "45 minutes",
-                "files": opportunity.files_affected
+                "files": opportunity.files_affected,
+                "depends_on": [2]
             },
             {
                 "step": 4,
                 "description": "Update error handling for new API responses",
-                "estimated_time": "20 minutes"
+                "estimated_time": "20 minutes",
+                "depends_on": [3]
             },
             {
                 "step": 5,
                 "description": "Test API integration thoroughly",
-                "estimated_time": "30 minutes"
+                "estimated_time": "30 minutes",
+                "depends_on": [4],
+                "needs_tests": True
             }
         ]
         
@@ -209,16 +734,31 @@ class PlannerService:
         self, opportunity: Opportunity, preferences: Dict[str, Any]
     ) -> Plan:
         """Plan code optimization implementation."""
+        optimization_type = opportunity.metadata.get("optimization_type")
+        fix = OPTIMIZATION_FIXES.get(optimization_type, "Implement optimizations")
+        multiplier = opportunity.metadata.get("cost_multiplier")
+        description = "Implement performance improvements"
+        if multiplier:
+            description = f"Remove repeated work estimated at {multiplier}x what is needed"
+        
         return Plan(
             opportunity_id=opportunity.id,
-            title="Optimize code performance",
-            description="Implement performance improvements",
+            title=f"Optimize code performance: {opportunity.title}",
+            description=description,
             steps=[
-                {"step": 1, "description": "Profile current performance"},
-                {"step": 2, "description": "Implement optimizations"},
-                {"step": 3, "description": "Benchmark improvements"}
+                {"step": 1, "description": "Profile current performance", "depends_on": []},
+                {
+                    "step": 2,
+                    "description": fix,
+                    "files": opportunity.files_affected,
+                    "depends_on": [1]
+                },
+                {"step": 3, "description": "Benchmark improvements", "depends_on": [2]}
             ],
-            estimated_effort="medium",
+            estimated_effort=(
+                "low" if optimization_type in ("loop_invariant_call", "quadratic_membership")
+                else "medium"
+            ),
             risks=["Code complexity increase"]
         )
     
@@ -226,14 +766,33 @@ class PlannerService:
         self, opportunity: Opportunity, preferences: Dict[str, Any]
     ) -> Plan:
         """Plan test coverage improvement."""
+        untested = [
+            function["name"] for function in opportunity.metadata.get("untested_functions", [])
+        ]
+        write_tests = "Write unit tests"
+        if untested:
+            write_tests = f"Write unit tests for {', '.join(untested[:5])}"
+        
         return Plan(
             opportunity_id=opportunity.id,
             title="Improve test coverage",
             description="Add comprehensive tests for untested code",
             steps=[
-                {"step": 1, "description": "Identify untested code paths"},
-                {"step": 2, "description": "Write unit tests"},
-                {"step": 3, "description": "Add integration tests"}
+                {"step": 1, "description": "Identify untested code paths", "depends_on": []},
+                {
+                    "step": 2,
+                    "description": write_tests,
+                    "files": opportunity.files_affected,
+                    "depends_on": [1]
+                },
+                # Separate test files, written alongside the unit tests
+                {"step": 3, "description": "Add integration tests", "depends_on": [1]},
+                {
+                    "step": 4,
+                    "description": "Run the new tests",
+                    "depends_on": [2, 3],
+                    "needs_tests": True
+                }
             ],
             estimated_effort="medium",
             risks=["Time-consuming test writing"]
@@ -243,15 +802,59 @@ class PlannerService:
         self, opportunity: Opportunity, preferences: Dict[str, Any]
     ) -> Plan:
         """Plan documentation improvement."""
+        missing = opportunity.metadata.get("missing_docs", [])
+        write_docs = "Write missing documentation"
+        if missing and opportunity.metadata.get("doc_type") == "api_reference":
+            write_docs = f"Add summaries and descriptions to {', '.join(missing[:5])}"
+        elif missing:
+            write_docs = f"Write docstrings for {', '.join(missing[:5])}"
+        
         return Plan(
             opportunity_id=opportunity.id,
             title="Improve documentation",
             description="Add comprehensive documentation",
             steps=[
-                {"step": 1, "description": "Audit existing documentation"},
-                {"step": 2, "description": "Write missing documentation"},
-                {"step": 3, "description": "Review and validate docs"}
+                {"step": 1, "description": "Audit existing documentation", "depends_on": []},
+                {
+                    "step": 2,
+                    "description": write_docs,
+                    "files": opportunity.files_affected,
+                    "depends_on": [1]
+                },
+                {"step": 3, "description": "Review and validate docs", "depends_on": [2]}
             ],
             estimated_effort="low",
             risks=["Documentation becoming outdated"]
         )
+    
+    async def _plan_secret_rotation(
+        self, opportunity: Opportunity, preferences: Dict[str, Any]
+    ) -> Plan:
+        """Plan exposed secret remediation."""
+        rule_id = opportunity.metadata.get("rule_id", "secret")
+        return Plan(
+            opportunity_id=opportunity.id,
+            title=f"Rotate exposed {rule_id}",
+            description="Revoke the committed credential and load it from configuration",
+            steps=[
+                {
+                    "step": 1,
+                    "description": "Revoke the credential and issue a new one",
+                    "depends_on": []
+                },
+                # The code change does not wait for the new credential
+                {
+                    "step": 2,
+                    "description": "Read the credential from the environment or a secret store",
+                    "files": opportunity.files_affected,
+                    "depends_on": []
+                },
+                {
+                    "step": 3,
+                    "description": "Purge the secret from history if it must stay private",
+                    "depends_on": [2]
+                }
+            ],
+            estimated_effort="low",
+            risks=["Services using the old credential fail until redeployed"]
+        )
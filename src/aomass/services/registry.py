@@ -0,0 +1,210 @@
+"""Package registry metadata refresh service."""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+from uuid import UUID
+
+import httpx
+
+from ..analysis.dependencies import package_key
+from ..config.settings import settings
+from ..storage.index_store import IndexStore
+from ..storage.registry_store import RegistryStore, RegistryVersion
+
+
+class Registry(NamedTuple):
+    """How to fetch and read the version list of a package from a registry."""
+    url: Callable[[str], str]
+    parse: Callable[[bytes], List[RegistryVersion]]
+    headers: Dict[str, str] = {}
+
+
+class RefreshSummary(NamedTuple):
+    """Outcome of a registry refresh job."""
+    fetched: int = 0  # New or changed metadata
+    not_modified: int = 0  # Unchanged according to the registry's ETag
+    missing: int = 0
+    failed: int = 0
+    skipped: int = 0  # Fetched recently enough
+
+
+def _pypi_url(name: str) -> str:
+    return f"{settings.pypi_url}/pypi/{quote(name)}/json"
+
+
+def _parse_pypi(content: bytes) -> List[RegistryVersion]:
+    releases = json.loads(content)["releases"]
+    return [
+        # A release without files, or with only yanked files, cannot be installed
+        RegistryVersion(version, not files or all(file.get("yanked") for file in files))
+        for version, files in releases.items()
+    ]
+
+
+def _npm_url(name: str) -> str:
+    return f"{settings.npm_registry_url}/{quote(name, safe='@')}"
+
+
+def _parse_npm(content: bytes) -> List[RegistryVersion]:
+    versions = json.loads(content)["versions"]
+    return [
+        RegistryVersion(version, bool(metadata.get("deprecated")))
+        for version, metadata in versions.items()
+    ]
+
+
+def _crates_url(name: str) -> str:
+    # Sparse index layout: 1/a, 2/ab, 3/a/abc, ab/cd/abcd...
+    name = name.lower()
+    if len(name) <= 2:
+        path = f"{len(name)}/{name}"
+    elif len(name) == 3:
+        path = f"3/{name[0]}/{name}"
+    else:
+        path = f"{name[:2]}/{name[2:4]}/{name}"
+    return f"{settings.crates_index_url}/{path}"
+
+
+def _parse_crates(content: bytes) -> List[RegistryVersion]:
+    versions = []
+    for line in content.decode("utf-8").splitlines():
+        if line.strip():
+            entry = json.loads(line)
+            versions.append(RegistryVersion(entry["vers"], bool(entry.get("yanked"))))
+    return versions
+
+
+def _go_url(module: str) -> str:
+    # The module proxy protocol escapes upper case letters as "!" + lower case
+    escaped = "".join(f"!{char.lower()}" if char.isupper() else char for char in module)
+    return f"{settings.go_proxy_url}/{escaped}/@v/list"
+
+
+def _parse_go(content: bytes) -> List[RegistryVersion]:
+    return [
+        RegistryVersion(line.strip().lstrip("v"))
+        for line in content.decode("utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+REGISTRIES: Dict[str, Registry] = {
+    "PyPI": Registry(_pypi_url, _parse_pypi),
+    "npm": Registry(_npm_url, _parse_npm, {
+        # Abbreviated metadata: versions without readmes, much smaller
+        "Accept": "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"
+    }),
+    "crates.io": Registry(_crates_url, _parse_crates),
+    "Go": Registry(_go_url, _parse_go),
+}
+
+
+class RegistryService:
+    """Keeps the local registry metadata cache up to date.
+
+    Refreshes run as bulk jobs, off the mining path: every package is
+    fetched concurrently with its stored ETag, so unchanged packages cost
+    a 304 response and no parsing. Mining then resolves newer versions
+    from the cache alone.
+    """
+
+    def __init__(
+        self,
+        store: Optional[RegistryStore] = None,
+        index_store: Optional[IndexStore] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.store = store or RegistryStore(settings.index_db_path)
+        self.index_store = index_store or IndexStore(settings.index_db_path)
+        self.transport = transport
+
+    async def refresh_all(self, force: bool = False) -> RefreshSummary:
+        """Refresh every package depended on by an indexed repository."""
+        return await self.refresh(self.index_store.dependency_packages(), force)
+
+    async def refresh_repository(self, repository_id: UUID, force: bool = False) -> RefreshSummary:
+        """Refresh the dependencies of the default ref of a repository."""
+        ref = self.index_store.default_ref(repository_id)
+        if ref is None:
+            return RefreshSummary()
+        dependencies = self.index_store.get_dependencies(repository_id, ref)
+        return await self.refresh(((dep.ecosystem, dep.name) for dep in dependencies), force)
+
+    async def refresh(
+        self, packages: Iterable[Tuple[str, str]], force: bool = False
+    ) -> RefreshSummary:
+        """Fetch metadata of packages not fetched within the configured max age.
+
+        With ``force``, every package is fetched unconditionally.
+        """
+        packages = {
+            package_key(ecosystem, name): (ecosystem, name)
+            for ecosystem, name in packages
+            if ecosystem in REGISTRIES
+        }
+        states = self.store.fetch_states(packages)
+        cutoff = datetime.utcnow() - timedelta(hours=settings.registry_max_age_hours)
+        due = [
+            key for key in packages
+            if force or key not in states or states[key].fetched_at < cutoff
+        ]
+
+        semaphore = asyncio.Semaphore(settings.registry_concurrency)
+        async with httpx.AsyncClient(
+            transport=self.transport, timeout=30.0, follow_redirects=True
+        ) as client:
+            outcomes = await asyncio.gather(*(
+                self._refresh_package(
+                    client, semaphore, *packages[key],
+                    etag=None if force or key not in states else states[key].etag
+                )
+                for key in due
+            ))
+
+        return RefreshSummary(
+            fetched=outcomes.count("fetched"),
+            not_modified=outcomes.count("not_modified"),
+            missing=outcomes.count("missing"),
+            failed=outcomes.count("failed"),
+            skipped=len(packages) - len(due)
+        )
+
+    async def _refresh_package(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        ecosystem: str,
+        name: str,
+        etag: Optional[str] = None
+    ) -> str:
+        """Conditionally fetch one package, returning the outcome."""
+        registry = REGISTRIES[ecosystem]
+        headers = dict(registry.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+
+        async with semaphore:
+            try:
+                response = await client.get(registry.url(name), headers=headers)
+            except httpx.HTTPError as e:
+                print(f"Failed to fetch {ecosystem} package {name}: {e}")
+                return "failed"
+
+        if response.status_code == 304:
+            self.store.mark_fetched(ecosystem, name)
+            return "not_modified"
+        if response.status_code in (404, 410):
+            self.store.mark_fetched(ecosystem, name, status="missing")
+            return "missing"
+        if response.status_code != 200:
+            return "failed"
+
+        try:
+            versions = registry.parse(response.content)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Failed to read {ecosystem} package {name}: {e}")
+            return "failed"
+        self.store.save_versions(ecosystem, name, versions, response.headers.get("ETag"))
+        return "fetched"
@@ -4,7 +4,7 @@ from typing import List, Optional
 from uuid import UUID
 
 from ..config.settings import get_settings
-from ..models.core import PullRequest, Repository, Review
+from ..models.core import BlastRadius, PullRequest, Repository, Review
 from ..providers.factory import ProviderFactory
 
 
@@ -25,9 +25,14 @@ class ReviewerService:
     async def review_pull_request(
         self,
         pull_request_id: UUID,
-        reviewers: List[str] = None
+        reviewers: List[str] = None,
+        blast_radius: Optional[BlastRadius] = None
     ) -> Review:
-        """Review pull request with AI agents."""
+        """Review pull request with AI agents.
+        
+        With the blast radius of the change's plan, line comments are
+        limited to the files the change can affect.
+        """
         # Use default reviewers if none specified
         if not reviewers:
             reviewers = self.available_reviewers[:3]  # Use first 3 agents
@@ -41,7 +46,10 @@ class ReviewerService:
         
         for reviewer in reviewers:
             agent_review = await self._conduct_agent_review(pr, reviewer)
-            all_comments.extend(agent_review["comments"])
+            all_comments.extend(
+                comment for comment in agent_review["comments"]
+                if self._in_scope(comment, blast_radius)
+            )
             total_score += agent_review["score"]
         
         # Calculate average score
@@ -177,6 +185,13 @@ class ReviewerService:
             "score": 8.0
         }
     
+    @staticmethod
+    def _in_scope(comment: dict, blast_radius: Optional[BlastRadius]) -> bool:
+        """Whether a comment is about the change: general comments always are."""
+        if blast_radius is None or not comment.get("line"):
+            return True
+        return comment.get("file") in blast_radius.files
+    
     def _determine_review_status(self, average_score: float, comments: List[dict]) -> str:
         """Determine review status based on score and comments."""
         high_severity_issues = [c for c in comments if c.get("severity") == "high"]
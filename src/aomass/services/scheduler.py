@@ -0,0 +1,116 @@
+"""Concurrent execution of plan steps along their dependencies."""
+import asyncio
+from graphlib import TopologicalSorter
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from ..config.settings import settings
+
+Step = Dict[str, Any]
+
+
+def step_dependencies(steps: List[Step]) -> Dict[int, FrozenSet[int]]:
+    """Steps each plan step waits for, by step number.
+
+    A step waits for the steps in its ``depends_on`` and for every earlier
+    step editing one of its ``files``, so two edits of a file never
+    overlap. Steps without ``depends_on``, as in plans generated before
+    dependencies were declared, wait for the previous step.
+
+    Raises:
+        ValueError: If step numbers repeat, a dependency is unknown or
+            dependencies form a cycle.
+    """
+    numbers = [step["step"] for step in steps]
+    if len(set(numbers)) != len(numbers):
+        raise ValueError("Plan step numbers are not unique")
+
+    graph: Dict[int, FrozenSet[int]] = {}
+    for index, step in enumerate(steps):
+        if "depends_on" in step:
+            waits = set(step["depends_on"])
+        else:
+            waits = {numbers[index - 1]} if index else set()
+        unknown = waits - set(numbers)
+        if unknown:
+            raise ValueError(f"Step {step['step']} depends on unknown steps {sorted(unknown)}")
+        files = set(step.get("files") or ())
+        waits.update(
+            earlier["step"] for earlier in steps[:index]
+            if files & set(earlier.get("files") or ())
+        )
+        graph[step["step"]] = frozenset(waits)
+
+    # Raises CycleError, a ValueError, on circular dependencies
+    tuple(TopologicalSorter(graph).static_order())
+    return graph
+
+
+async def run_steps(
+    steps: List[Step],
+    execute: Callable[[Step], Awaitable[Step]],
+    concurrency: Optional[int] = None
+) -> List[Step]:
+    """Execute plan steps, running those that do not wait for each other concurrently.
+
+    ``execute`` returns the result of a step, a dict whose ``status`` is
+    "failed" when the step did not succeed; exceptions count as failures.
+    Steps waiting for a failed step are skipped. Steps with ``needs_tests``
+    run one at a time, since they share the test suite. Returns the
+    results in plan order.
+
+    Raises:
+        ValueError: If the step dependencies are invalid.
+    """
+    graph = step_dependencies(steps)
+    by_number = {step["step"]: step for step in steps}
+    semaphore = asyncio.Semaphore(concurrency or settings.implementation_concurrency)
+    test_suite = asyncio.Lock()
+
+    async def run(step: Step) -> Step:
+        async with semaphore:
+            try:
+                if step.get("needs_tests"):
+                    async with test_suite:
+                        return await execute(step)
+                return await execute(step)
+            except Exception as e:
+                return {
+                    "step": step["step"],
+                    "description": step.get("description", ""),
+                    "status": "failed",
+                    "error": str(e)
+                }
+
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()
+    results: Dict[int, Step] = {}
+    failed = set()
+    running: Dict[asyncio.Task, int] = {}
+    try:
+        while sorter.is_active():
+            for number in sorter.get_ready():
+                blocked = graph[number] & failed
+                if blocked:
+                    failed.add(number)
+                    results[number] = {
+                        "step": number,
+                        "description": by_number[number].get("description", ""),
+                        "status": "skipped",
+                        "error": f"Waits for failed steps {sorted(blocked)}"
+                    }
+                    sorter.done(number)
+                else:
+                    running[asyncio.ensure_future(run(by_number[number]))] = number
+            if not running:
+                continue
+            finished, _pending = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                number = running.pop(task)
+                results[number] = task.result()
+                if results[number].get("status") == "failed":
+                    failed.add(number)
+                sorter.done(number)
+    finally:
+        for task in running:
+            task.cancel()
+    return [results[step["step"]] for step in steps]
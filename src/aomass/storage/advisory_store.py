@@ -0,0 +1,227 @@
+"""Persistent copy of an OSV advisory dump, indexed by package."""
+import contextlib
+import hashlib
+import json
+import threading
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..analysis.advisories import AffectedPackage, CompiledAdvisory, parse_osv
+from ..analysis.dependencies import package_key
+from ..analysis.versions import version_key
+from ..models.core import Dependency
+from .base import SQLiteStore
+
+
+class AdvisoryMatch(NamedTuple):
+    """A dependency version affected by an advisory."""
+    dependency: Dependency
+    advisory: AffectedPackage
+    fixed_version: Optional[str]
+
+
+class RefreshStats(NamedTuple):
+    """Outcome of reloading an advisory dump."""
+    loaded: int  # Dump files read because they are new or changed
+    removed: int
+    unchanged: int
+
+
+class AdvisoryStore(SQLiteStore):
+    """Affected packages of OSV advisories, keyed by (ecosystem, package).
+
+    Each row remembers the dump file it was loaded from, and each dump file
+    its last seen state, so a refresh only reloads files that changed.
+    Version ranges are stored pre-split into intervals and compiled to
+    version sort keys once per package, so matching a dependency is a
+    dictionary lookup plus a few tuple comparisons.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS advisory_sources (
+        source TEXT PRIMARY KEY,
+        state TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS advisories (
+        source TEXT NOT NULL,
+        advisory_id TEXT NOT NULL,
+        package_key TEXT NOT NULL,
+        ecosystem TEXT NOT NULL,
+        package TEXT NOT NULL,
+        ranges TEXT NOT NULL,
+        versions TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        aliases TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_advisories_package ON advisories (package_key);
+    CREATE INDEX IF NOT EXISTS idx_advisories_source ON advisories (source);
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._compiled: Dict[str, List[CompiledAdvisory]] = {}
+        self._lock = threading.Lock()
+        self.digest = ""  # Identifies the dump contents as of the last refresh
+
+    def refresh(self, dump_path: str) -> RefreshStats:
+        """Bring the store in line with an OSV dump on disk.
+
+        The dump is a directory of advisory JSON files, optionally packed in
+        per-ecosystem zip archives as published by OSV. Only files whose
+        modification time and size (or CRC, inside archives) changed since
+        the last refresh are parsed again.
+        """
+        stored = self.source_states()
+        updates = []
+        with contextlib.ExitStack() as archives:
+            current = self._scan_dump(Path(dump_path), archives)
+            changed = [
+                source for source, (state, _read) in current.items()
+                if stored.get(source) != state
+            ]
+            for source in changed:
+                state, read = current[source]
+                updates.append((source, state, self._parse_dump_file(read())))
+        removed = [source for source in stored if source not in current]
+
+        if updates:
+            self.replace_sources(updates)
+        if removed:
+            self.remove_sources(removed)
+        if updates or removed:
+            with self._lock:
+                self._compiled.clear()
+
+        digest = hashlib.sha1()
+        for source in sorted(current):
+            digest.update(f"{source}\0{current[source][0]}\n".encode())
+        self.digest = digest.hexdigest()
+        return RefreshStats(len(changed), len(removed), len(current) - len(changed))
+
+    @staticmethod
+    def _parse_dump_file(content: bytes) -> List[AffectedPackage]:
+        """Parse a dump file holding one advisory or a list of them."""
+        try:
+            data = json.loads(content)
+            advisories = data if isinstance(data, list) else [data]
+            return [affected for advisory in advisories for affected in parse_osv(advisory)]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return []
+
+    @staticmethod
+    def _scan_dump(
+        root: Path, archives: contextlib.ExitStack
+    ) -> Dict[str, Tuple[str, Callable[[], bytes]]]:
+        """List the advisory files of a dump with their state and a reader."""
+        sources: Dict[str, Tuple[str, Callable[[], bytes]]] = {}
+        if not root.is_dir():
+            return sources
+        for path in sorted(root.rglob("*")):
+            relative = path.relative_to(root).as_posix()
+            if path.suffix == ".json" and path.is_file():
+                stat = path.stat()
+                sources[relative] = (f"{stat.st_mtime_ns}:{stat.st_size}", path.read_bytes)
+            elif path.suffix == ".zip" and path.is_file():
+                archive = archives.enter_context(zipfile.ZipFile(path))
+                for info in archive.infolist():
+                    if info.filename.endswith(".json"):
+                        sources[f"{relative}/{info.filename}"] = (
+                            f"{info.CRC}:{info.file_size}",
+                            lambda archive=archive, name=info.filename: archive.read(name)
+                        )
+        return sources
+
+    def match(self, dependencies: Iterable[Dependency]) -> List[AdvisoryMatch]:
+        """Find the advisories affecting dependencies with a known version.
+
+        Advisories are fetched for all packages in one pass and compiled on
+        first use; later calls for the same packages only compare versions.
+        """
+        dependencies = [dep for dep in dependencies if dep.version]
+        keys = {package_key(dep.ecosystem, dep.name) for dep in dependencies}
+        with self._lock:
+            missing = keys - self._compiled.keys()
+        if missing:
+            compiled: Dict[str, List[CompiledAdvisory]] = {key: [] for key in missing}
+            for affected in self.affected(missing):
+                compiled[package_key(affected.ecosystem, affected.package)].append(
+                    CompiledAdvisory.compile(affected)
+                )
+            with self._lock:
+                self._compiled.update(compiled)
+
+        matches = []
+        for dep in dependencies:
+            advisories = self._compiled.get(package_key(dep.ecosystem, dep.name), ())
+            if not advisories:
+                continue
+            key = version_key(dep.ecosystem, dep.version)
+            for advisory in advisories:
+                affected, fixed_version = advisory.match(dep.version, key)
+                if affected:
+                    matches.append(AdvisoryMatch(dep, advisory.affected, fixed_version))
+        return matches
+
+    def source_states(self) -> Dict[str, str]:
+        """Get the state of every loaded dump file."""
+        rows = self.connection().execute("SELECT source, state FROM advisory_sources")
+        return {row["source"]: row["state"] for row in rows}
+
+    def replace_sources(
+        self, sources: Iterable[Tuple[str, str, List[AffectedPackage]]]
+    ) -> None:
+        """Replace the advisories loaded from dump files, given as (source, state, affected)."""
+        with self.connection() as conn:
+            for source, state, affected in sources:
+                conn.execute("DELETE FROM advisories WHERE source = ?", (source,))
+                conn.executemany(
+                    "INSERT INTO advisories (source, advisory_id, package_key, ecosystem, "
+                    "package, ranges, versions, summary, severity, aliases) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            source, item.advisory_id,
+                            package_key(item.ecosystem, item.package),
+                            item.ecosystem, item.package,
+                            json.dumps(item.ranges), json.dumps(item.versions),
+                            item.summary, item.severity, json.dumps(item.aliases)
+                        )
+                        for item in affected
+                    ]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO advisory_sources (source, state) VALUES (?, ?)",
+                    (source, state)
+                )
+
+    def remove_sources(self, sources: Iterable[str]) -> None:
+        """Forget dump files and their advisories."""
+        sources = list(sources)
+        with self.connection() as conn:
+            conn.executemany("DELETE FROM advisories WHERE source = ?", [(s,) for s in sources])
+            conn.executemany(
+                "DELETE FROM advisory_sources WHERE source = ?", [(s,) for s in sources]
+            )
+
+    def affected(self, package_keys: Iterable[str]) -> List[AffectedPackage]:
+        """Get the advisories affecting any of the given packages."""
+        rows = self._select_in(
+            "SELECT * FROM advisories WHERE package_key IN ({placeholders})", set(package_keys)
+        )
+        return [
+            AffectedPackage(
+                advisory_id=row["advisory_id"],
+                ecosystem=row["ecosystem"],
+                package=row["package"],
+                ranges=[tuple(r) for r in json.loads(row["ranges"])],
+                versions=json.loads(row["versions"]),
+                summary=row["summary"],
+                severity=row["severity"],
+                aliases=json.loads(row["aliases"])
+            )
+            for row in rows
+        ]
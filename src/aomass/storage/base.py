@@ -0,0 +1,71 @@
+"""SQLite storage helpers for AOMaaS."""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Set, TypeVar
+
+T = TypeVar("T")
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older builds
+MAX_SQL_VARIABLES = 900
+
+
+def chunked(items: Sequence[T], size: int = MAX_SQL_VARIABLES) -> Iterator[Sequence[T]]:
+    """Yield consecutive slices of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteStore:
+    """Base class for stores backed by a local SQLite database.
+
+    Subclasses declare their tables and indexes in ``schema``; it is applied
+    idempotently when the store is opened. ``CREATE TABLE IF NOT EXISTS``
+    leaves tables of earlier versions alone, so stores changing a table
+    bring it up to date in :meth:`migrate`, which runs first. Connections
+    are kept per thread so a store can be shared by the API and background
+    workers.
+    """
+
+    schema: str = ""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self.connection() as conn:
+            self.migrate(conn)
+            conn.executescript(self.schema)
+
+    def migrate(self, conn: sqlite3.Connection) -> None:
+        """Bring tables created by earlier versions up to ``schema``."""
+
+    @staticmethod
+    def table_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+        """Column names of a table, empty if it does not exist yet."""
+        return {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _select_in(
+        self, query: str, values: Iterable, *params
+    ) -> List[sqlite3.Row]:
+        """Run ``query`` with its ``{placeholders}`` bound to ``values`` in chunks."""
+        values = list(values)
+        rows: List[sqlite3.Row] = []
+        conn = self.connection()
+        for chunk in chunked(values):
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(conn.execute(
+                query.format(placeholders=placeholders), (*params, *chunk)
+            ))
+        return rows
@@ -0,0 +1,48 @@
+"""On-disk content store for indexed blobs."""
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Optional
+
+
+class BlobContentStore:
+    """Compressed file contents addressed by git blob SHA.
+
+    Laid out like git loose objects (``ab/cdef...``) so a directory never
+    holds more than a few thousand entries. Contents are immutable, which
+    makes writes idempotent and safe to race.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, sha: str) -> Path:
+        return self.root / sha[:2] / sha[2:]
+
+    def has(self, sha: str) -> bool:
+        """Whether contents for a blob are stored."""
+        return self._path(sha).exists()
+
+    def put(self, sha: str, content: bytes) -> None:
+        """Store the contents of a blob if not stored yet."""
+        path = self._path(sha)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(content, 1))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, sha: str) -> Optional[bytes]:
+        """Get the contents of a blob."""
+        try:
+            return zlib.decompress(self._path(sha).read_bytes())
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,151 @@
+"""Storage for dependency update campaigns and their progress per repository."""
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from ..models.core import Campaign, CampaignTarget, Plan, TaskStatus
+from .base import SQLiteStore
+
+
+class CampaignStore(SQLiteStore):
+    """Campaigns and one progress row per targeted repository.
+
+    Targets are updated one at a time as workers move through them, so a
+    campaign interrupted midway resumes from the rows not yet completed.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS campaigns (
+        id TEXT PRIMARY KEY,
+        ecosystem TEXT NOT NULL,
+        package TEXT NOT NULL,
+        target_version TEXT NOT NULL,
+        plan TEXT NOT NULL,
+        draft INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS campaign_targets (
+        campaign_id TEXT NOT NULL,
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        status TEXT NOT NULL,
+        files TEXT NOT NULL,
+        current_versions TEXT NOT NULL,
+        branch TEXT,
+        commit_sha TEXT,
+        pull_request_url TEXT,
+        message TEXT,
+        attempts INTEGER NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (campaign_id, repository_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_campaign_targets_status
+        ON campaign_targets (campaign_id, status);
+    """
+
+    def create(self, campaign: Campaign, targets: Iterable[CampaignTarget]) -> None:
+        """Store a new campaign with its targets."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO campaigns (id, ecosystem, package, target_version, plan, draft, "
+                "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(campaign.id), campaign.ecosystem, campaign.package,
+                 campaign.target_version, campaign.plan.model_dump_json(), campaign.draft,
+                 campaign.status.value, campaign.created_at.isoformat(),
+                 campaign.updated_at.isoformat())
+            )
+            conn.executemany(
+                "INSERT INTO campaign_targets (campaign_id, repository_id, ref, status, files, "
+                "current_versions, branch, commit_sha, pull_request_url, message, attempts, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._target_row(campaign.id, target) for target in targets]
+            )
+
+    def get(self, campaign_id: UUID) -> Optional[Campaign]:
+        """Get a campaign by ID."""
+        row = self.connection().execute(
+            "SELECT * FROM campaigns WHERE id = ?", (str(campaign_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return Campaign(
+            id=UUID(row["id"]),
+            ecosystem=row["ecosystem"],
+            package=row["package"],
+            target_version=row["target_version"],
+            plan=Plan.model_validate_json(row["plan"]),
+            draft=bool(row["draft"]),
+            status=TaskStatus(row["status"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"])
+        )
+
+    def set_status(self, campaign_id: UUID, status: TaskStatus) -> None:
+        """Update the overall status of a campaign."""
+        with self.connection() as conn:
+            conn.execute(
+                "UPDATE campaigns SET status = ?, updated_at = ? WHERE id = ?",
+                (status.value, datetime.utcnow().isoformat(), str(campaign_id))
+            )
+
+    def targets(
+        self, campaign_id: UUID, statuses: Optional[Iterable[TaskStatus]] = None
+    ) -> List[CampaignTarget]:
+        """Get the targets of a campaign, optionally only those in some statuses."""
+        query = "SELECT * FROM campaign_targets WHERE campaign_id = ?"
+        params: list = [str(campaign_id)]
+        if statuses is not None:
+            statuses = [status.value for status in statuses]
+            query += f" AND status IN ({','.join('?' * len(statuses))})"
+            params.extend(statuses)
+        rows = self.connection().execute(query + " ORDER BY repository_id", params)
+        return [
+            CampaignTarget(
+                repository_id=UUID(row["repository_id"]),
+                ref=row["ref"],
+                status=TaskStatus(row["status"]),
+                files=json.loads(row["files"]),
+                current_versions=json.loads(row["current_versions"]),
+                branch=row["branch"],
+                commit_sha=row["commit_sha"],
+                pull_request_url=row["pull_request_url"],
+                message=row["message"],
+                attempts=row["attempts"],
+                updated_at=datetime.fromisoformat(row["updated_at"])
+            )
+            for row in rows
+        ]
+
+    def update_target(self, campaign_id: UUID, target: CampaignTarget) -> None:
+        """Record the progress of a campaign in one repository."""
+        target.updated_at = datetime.utcnow()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO campaign_targets (campaign_id, repository_id, ref, "
+                "status, files, current_versions, branch, commit_sha, pull_request_url, "
+                "message, attempts, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._target_row(campaign_id, target)
+            )
+
+    def progress(self, campaign_id: UUID) -> Dict[str, int]:
+        """Count the targets of a campaign by status."""
+        rows = self.connection().execute(
+            "SELECT status, COUNT(*) FROM campaign_targets WHERE campaign_id = ? "
+            "GROUP BY status",
+            (str(campaign_id),)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    @staticmethod
+    def _target_row(campaign_id: UUID, target: CampaignTarget) -> tuple:
+        return (
+            str(campaign_id), str(target.repository_id), target.ref, target.status.value,
+            json.dumps(target.files), json.dumps(target.current_versions), target.branch,
+            target.commit_sha, target.pull_request_url, target.message, target.attempts,
+            target.updated_at.isoformat()
+        )
@@ -0,0 +1,121 @@
+"""Storage for ingested test coverage reports."""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+import numpy as np
+
+from ..analysis.coverage import FileCoverage
+from .base import SQLiteStore
+
+
+class CoverageReport(NamedTuple):
+    """Totals of the coverage report last ingested for a repository."""
+    format: str
+    commit_sha: Optional[str]  # Commit the report was produced on, if known
+    files: int
+    lines: int  # Executable lines
+    covered_lines: int
+    ingested_at: datetime
+
+
+class CoverageStore(SQLiteStore):
+    """Line hits of the latest coverage report of each repository.
+
+    Only the most recent report is kept: ingesting a report replaces the
+    previous one. Lines and hits are stored per file as packed arrays, so
+    reading a file back costs one row however many lines it has.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS coverage_reports (
+        repository_id TEXT PRIMARY KEY,
+        format TEXT NOT NULL,
+        commit_sha TEXT,
+        files INTEGER NOT NULL,
+        lines INTEGER NOT NULL,
+        covered_lines INTEGER NOT NULL,
+        ingested_at TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS coverage_files (
+        repository_id TEXT NOT NULL,
+        path TEXT NOT NULL,
+        lines BLOB NOT NULL,
+        hits BLOB NOT NULL,
+        PRIMARY KEY (repository_id, path)
+    );
+    """
+
+    def save(
+        self,
+        repository_id: UUID,
+        report_format: str,
+        files: List[FileCoverage],
+        commit_sha: Optional[str] = None
+    ) -> CoverageReport:
+        """Replace the coverage of a repository with a newly ingested report."""
+        report = CoverageReport(
+            format=report_format,
+            commit_sha=commit_sha,
+            files=len(files),
+            lines=sum(len(file.lines) for file in files),
+            covered_lines=sum(int(np.count_nonzero(file.hits)) for file in files),
+            ingested_at=datetime.utcnow()
+        )
+        with self.connection() as conn:
+            conn.execute(
+                "DELETE FROM coverage_files WHERE repository_id = ?", (str(repository_id),)
+            )
+            conn.executemany(
+                "INSERT INTO coverage_files (repository_id, path, lines, hits) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (str(repository_id), file.path,
+                     file.lines.astype(np.int32).tobytes(), file.hits.astype(np.int64).tobytes())
+                    for file in files
+                ]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage_reports "
+                "(repository_id, format, commit_sha, files, lines, covered_lines, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(repository_id), report.format, report.commit_sha, report.files,
+                 report.lines, report.covered_lines, report.ingested_at.isoformat())
+            )
+        return report
+
+    def get_report(self, repository_id: UUID) -> Optional[CoverageReport]:
+        """Get the totals of the latest report of a repository."""
+        row = self.connection().execute(
+            "SELECT * FROM coverage_reports WHERE repository_id = ?", (str(repository_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return CoverageReport(
+            format=row["format"],
+            commit_sha=row["commit_sha"],
+            files=row["files"],
+            lines=row["lines"],
+            covered_lines=row["covered_lines"],
+            ingested_at=datetime.fromisoformat(row["ingested_at"])
+        )
+
+    def get_files(
+        self, repository_id: UUID, paths: Iterable[str]
+    ) -> Dict[str, FileCoverage]:
+        """Get the line hits of files of a repository, keyed by path."""
+        rows = self._select_in(
+            "SELECT path, lines, hits FROM coverage_files "
+            "WHERE repository_id = ? AND path IN ({placeholders})",
+            set(paths),
+            str(repository_id)
+        )
+        return {
+            row["path"]: FileCoverage(
+                row["path"],
+                np.frombuffer(row["lines"], dtype=np.int32),
+                np.frombuffer(row["hits"], dtype=np.int64)
+            )
+            for row in rows
+        }
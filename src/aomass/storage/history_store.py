@@ -0,0 +1,174 @@
+"""Storage for churn aggregates mined from git history."""
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from ..analysis.history import ChurnAggregator
+from .base import SQLiteStore
+
+
+class HistoryHead(NamedTuple):
+    """The newest commit whose history is included in a ref's aggregates."""
+    commit_sha: str
+    commits: int  # Commits read so far
+    updated_at: datetime
+
+
+class Churn(NamedTuple):
+    """Aggregated history of one file or symbol."""
+    commits: int
+    added: int
+    deleted: int
+    authors: int
+    last_commit_at: datetime
+    heat: float  # Sum of decayed commit weights, see analysis.history.commit_weight
+
+
+class HistoryStore(SQLiteStore):
+    """Churn, authors and recency per file and per symbol of each indexed ref.
+
+    Aggregates are additive: history read from the previous head to a new
+    one is merged into the stored rows, so each commit is read from git
+    once. File rows have an empty symbol name.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS history_heads (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        commit_sha TEXT NOT NULL,
+        commits INTEGER NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (repository_id, ref)
+    );
+
+    CREATE TABLE IF NOT EXISTS history_churn (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        path TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        commits INTEGER NOT NULL,
+        added INTEGER NOT NULL,
+        deleted INTEGER NOT NULL,
+        last_commit_at INTEGER NOT NULL,
+        heat REAL NOT NULL,
+        PRIMARY KEY (repository_id, ref, path, symbol)
+    );
+
+    CREATE TABLE IF NOT EXISTS history_authors (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        path TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        author TEXT NOT NULL,
+        PRIMARY KEY (repository_id, ref, path, symbol, author)
+    );
+    """
+
+    def get_head(self, repository_id: UUID, ref: str) -> Optional[HistoryHead]:
+        """Get the commit the aggregates of a ref were last brought up to."""
+        row = self.connection().execute(
+            "SELECT commit_sha, commits, updated_at FROM history_heads "
+            "WHERE repository_id = ? AND ref = ?",
+            (str(repository_id), ref)
+        ).fetchone()
+        if row is None:
+            return None
+        return HistoryHead(
+            row["commit_sha"], row["commits"], datetime.fromisoformat(row["updated_at"])
+        )
+
+    def save(
+        self,
+        repository_id: UUID,
+        ref: str,
+        commit_sha: str,
+        aggregator: ChurnAggregator,
+        replace: bool = False
+    ) -> None:
+        """Merge the history read up to ``commit_sha`` into a ref's aggregates.
+
+        With ``replace``, stored aggregates are dropped first; use it when
+        history was read from scratch rather than from the stored head.
+        """
+        key = (str(repository_id), ref)
+        totals = [
+            ((path, ""), file_totals) for path, file_totals in aggregator.files.items()
+        ] + list(aggregator.symbols.items())
+        with self.connection() as conn:
+            if replace:
+                for table in ("history_heads", "history_churn", "history_authors"):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE repository_id = ? AND ref = ?", key
+                    )
+            conn.executemany(
+                "INSERT INTO history_churn (repository_id, ref, path, symbol, commits, added, "
+                "deleted, last_commit_at, heat) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (repository_id, ref, path, symbol) DO UPDATE SET "
+                "commits = commits + excluded.commits, added = added + excluded.added, "
+                "deleted = deleted + excluded.deleted, "
+                "last_commit_at = MAX(last_commit_at, excluded.last_commit_at), "
+                "heat = heat + excluded.heat",
+                [
+                    (*key, path, symbol, churn.commits, churn.added, churn.deleted,
+                     churn.last_commit_at, churn.heat)
+                    for (path, symbol), churn in totals
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO history_authors "
+                "(repository_id, ref, path, symbol, author) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (*key, path, symbol, author)
+                    for (path, symbol), churn in totals
+                    for author in churn.authors
+                ]
+            )
+            conn.execute(
+                "INSERT INTO history_heads (repository_id, ref, commit_sha, commits, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (repository_id, ref) DO UPDATE SET "
+                "commit_sha = excluded.commit_sha, commits = commits + excluded.commits, "
+                "updated_at = excluded.updated_at",
+                (*key, commit_sha, aggregator.commits, datetime.utcnow().isoformat())
+            )
+
+    def file_churn(self, repository_id: UUID, ref: str) -> Dict[str, Churn]:
+        """Get the churn of every file of a ref that has history, keyed by path."""
+        return {
+            path: churn
+            for (path, _), churn in self._churn(repository_id, ref, "c.symbol = ''").items()
+        }
+
+    def symbol_churn(
+        self, repository_id: UUID, ref: str, paths: Optional[Iterable[str]] = None
+    ) -> Dict[Tuple[str, str], Churn]:
+        """Get the churn of the symbols of a ref, keyed by (path, qualified name)."""
+        churn = self._churn(repository_id, ref, "c.symbol != ''")
+        if paths is not None:
+            paths = set(paths)
+            churn = {key: value for key, value in churn.items() if key[0] in paths}
+        return churn
+
+    def _churn(
+        self, repository_id: UUID, ref: str, condition: str
+    ) -> Dict[Tuple[str, str], Churn]:
+        rows = self.connection().execute(
+            "SELECT c.path, c.symbol, c.commits, c.added, c.deleted, c.last_commit_at, c.heat, "
+            "COUNT(a.author) AS authors FROM history_churn c "
+            "LEFT JOIN history_authors a ON a.repository_id = c.repository_id "
+            "AND a.ref = c.ref AND a.path = c.path AND a.symbol = c.symbol "
+            f"WHERE c.repository_id = ? AND c.ref = ? AND {condition} "
+            "GROUP BY c.path, c.symbol",
+            (str(repository_id), ref)
+        )
+        return {
+            (row["path"], row["symbol"]): Churn(
+                commits=row["commits"],
+                added=row["added"],
+                deleted=row["deleted"],
+                authors=row["authors"],
+                last_commit_at=datetime.utcfromtimestamp(row["last_commit_at"]),
+                heat=row["heat"]
+            )
+            for row in rows
+        }
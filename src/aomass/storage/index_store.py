@@ -0,0 +1,622 @@
+"""Content-addressed storage for indexed repositories."""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..analysis.similarity import band_hashes, signature_from_bytes, signature_to_bytes
+from ..models.core import BlobRecord, Dependency, Language, RefManifest, SecretFinding, Symbol
+from ..models.providers import ProviderType, RepositoryReference
+from ..providers.local_provider import WORKTREE_REF
+from .base import SQLiteStore, chunked
+
+# Identity of a symbol across the corpus: (blob SHA, qualified name, line)
+SymbolKey = Tuple[str, str, int]
+
+# Tables of what is extracted from blobs, replaced whenever a blob is indexed again
+BLOB_TABLES = (
+    "blob_imports", "blob_dependencies", "blob_secrets", "blob_symbols", "blob_calls",
+    "symbol_bands",
+)
+
+# Also created by migrations that copy the table
+BLOBS_TABLE = """
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha TEXT PRIMARY KEY,
+        language TEXT,
+        size INTEGER NOT NULL,
+        indexed_at TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0
+    )"""
+
+# Ref of a repository that analysis reads: its working tree when indexed
+# (watched or asked for), else its default branch when indexed, else its
+# most recently indexed ref. Formatted with the repository ID column or
+# parameter, which it uses three times.
+DEFAULT_REF_SQL = (
+    f"COALESCE((SELECT w.ref FROM refs w WHERE w.repository_id = {{repository}} "
+    f"AND w.ref = '{WORKTREE_REF}'), "
+    "(SELECT d.ref FROM refs d JOIN repositories p "
+    "ON p.repository_id = d.repository_id AND p.default_branch = d.ref "
+    "WHERE d.repository_id = {repository}), "
+    "(SELECT l.ref FROM refs l WHERE l.repository_id = {repository} "
+    "ORDER BY l.indexed_at DESC LIMIT 1))"
+)
+
+
+class PackageUse(NamedTuple):
+    """A declaration of a package in the default ref of a repository."""
+    repository_id: UUID
+    ref: str
+    dependency: Dependency
+
+
+class SymbolTable(NamedTuple):
+    """Symbols of a ref as parallel arrays, one entry per symbol, ordered by path."""
+    path: np.ndarray
+    name: np.ndarray
+    kind: np.ndarray
+    line: np.ndarray
+    public: np.ndarray
+    documented: np.ndarray
+    route: np.ndarray  # None for symbols that are not route handlers
+
+
+class IndexStore(SQLiteStore):
+    """Blob and per-ref manifest storage.
+
+    File contents are stored once per git blob SHA, so a file that is
+    unchanged across branches (or repositories) is parsed and embedded a
+    single time. Each indexed ref only records a manifest mapping its paths
+    to blob SHAs, along with the paths that changed since the commit
+    indexed for that ref before, so later stages can work incrementally.
+    """
+
+    schema = BLOBS_TABLE + """;
+
+    CREATE TABLE IF NOT EXISTS refs (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        commit_sha TEXT NOT NULL,
+        parent_commit_sha TEXT,
+        indexed_at TEXT NOT NULL,
+        PRIMARY KEY (repository_id, ref)
+    );
+
+    CREATE TABLE IF NOT EXISTS ref_changes (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        path TEXT NOT NULL,
+        PRIMARY KEY (repository_id, ref, path)
+    );
+
+    CREATE TABLE IF NOT EXISTS blob_imports (
+        blob_sha TEXT NOT NULL,
+        specifier TEXT NOT NULL,
+        PRIMARY KEY (blob_sha, specifier)
+    );
+
+    CREATE TABLE IF NOT EXISTS blob_dependencies (
+        blob_sha TEXT NOT NULL,
+        ecosystem TEXT NOT NULL,
+        name TEXT NOT NULL,
+        version TEXT,
+        specifier TEXT NOT NULL,
+        PRIMARY KEY (blob_sha, ecosystem, name, specifier)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_blob_dependencies_package
+        ON blob_dependencies (ecosystem, name);
+
+    CREATE TABLE IF NOT EXISTS blob_secrets (
+        blob_sha TEXT NOT NULL,
+        rule_id TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        preview TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (blob_sha, rule_id, digest)
+    );
+
+    CREATE TABLE IF NOT EXISTS blob_symbols (
+        blob_sha TEXT NOT NULL,
+        name TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        end_line INTEGER NOT NULL,
+        signature BLOB,
+        public INTEGER NOT NULL DEFAULT 0,
+        documented INTEGER NOT NULL DEFAULT 0,
+        route TEXT,
+        PRIMARY KEY (blob_sha, name, line)
+    );
+
+    CREATE TABLE IF NOT EXISTS blob_calls (
+        blob_sha TEXT NOT NULL,
+        name TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (blob_sha, name)
+    );
+
+    CREATE TABLE IF NOT EXISTS symbol_bands (
+        band_hash INTEGER NOT NULL,
+        blob_sha TEXT NOT NULL,
+        name TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        PRIMARY KEY (band_hash, blob_sha, name, line)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_symbol_bands_blob ON symbol_bands (blob_sha);
+
+    CREATE TABLE IF NOT EXISTS manifest_entries (
+        repository_id TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        path TEXT NOT NULL,
+        blob_sha TEXT NOT NULL,
+        PRIMARY KEY (repository_id, ref, path)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_manifest_entries_blob
+        ON manifest_entries (blob_sha);
+
+    CREATE TABLE IF NOT EXISTS repositories (
+        repository_id TEXT PRIMARY KEY,
+        provider_type TEXT NOT NULL,
+        provider_id TEXT NOT NULL,
+        provider_repository_id TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        url TEXT NOT NULL,
+        default_branch TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    """
+
+    def migrate(self, conn) -> None:
+        """Bring blobs tables of earlier versions up to date.
+
+        Tables from before other files were scanned for secrets require a
+        language. SQLite cannot drop a NOT NULL constraint in place, so they
+        are copied into one created from the current schema. Tables from
+        before extraction was versioned get the version column. Either way
+        their rows are at version 0 and indexed again.
+        """
+        columns = {row["name"]: row for row in conn.execute("PRAGMA table_info(blobs)")}
+        if columns and columns["language"]["notnull"]:
+            conn.execute("ALTER TABLE blobs RENAME TO blobs_before_migration")
+            conn.execute(BLOBS_TABLE)
+            conn.execute(
+                "INSERT INTO blobs (sha, language, size, indexed_at) "
+                "SELECT sha, language, size, indexed_at FROM blobs_before_migration"
+            )
+            conn.execute("DROP TABLE blobs_before_migration")
+        elif columns and "version" not in columns:
+            conn.execute("ALTER TABLE blobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def missing_blobs(self, shas: Iterable[str], version: int = 0) -> Set[str]:
+        """Return the subset of ``shas`` not indexed yet, or indexed before ``version``."""
+        wanted = set(shas)
+        rows = self._select_in(
+            "SELECT sha FROM blobs WHERE version >= ? AND sha IN ({placeholders})",
+            wanted, version
+        )
+        return wanted - {row["sha"] for row in rows}
+
+    def add_blobs(self, blobs: Iterable[BlobRecord], version: int = 0) -> None:
+        """Store blob records indexed at ``version``, replacing what was stored for them."""
+        blobs = list(blobs)
+        with self.connection() as conn:
+            for chunk in chunked([blob.sha for blob in blobs]):
+                placeholders = ",".join("?" * len(chunk))
+                for table in BLOB_TABLES:
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE blob_sha IN ({placeholders})", chunk
+                    )
+            conn.executemany(
+                "INSERT OR REPLACE INTO blobs (sha, language, size, indexed_at, version) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (blob.sha, blob.language.value if blob.language else None, blob.size,
+                     blob.indexed_at.isoformat(), version)
+                    for blob in blobs
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO blob_imports (blob_sha, specifier) VALUES (?, ?)",
+                [(blob.sha, specifier) for blob in blobs for specifier in blob.imports]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO blob_dependencies "
+                "(blob_sha, ecosystem, name, version, specifier) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (blob.sha, dep.ecosystem, dep.name, dep.version, dep.specifier)
+                    for blob in blobs
+                    for dep in blob.dependencies
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO blob_secrets (blob_sha, rule_id, line, preview, digest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (blob.sha, secret.rule_id, secret.line, secret.preview, secret.digest)
+                    for blob in blobs
+                    for secret in blob.secrets
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO blob_symbols "
+                "(blob_sha, name, kind, line, end_line, signature, public, documented, route) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (blob.sha, symbol.name, symbol.kind, symbol.line, symbol.end_line,
+                     signature_to_bytes(symbol.signature) if symbol.signature else None,
+                     symbol.public, symbol.documented, symbol.route)
+                    for blob in blobs
+                    for symbol in blob.symbols
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO blob_calls (blob_sha, name, count) VALUES (?, ?, ?)",
+                [
+                    (blob.sha, name, count)
+                    for blob in blobs
+                    for name, count in blob.calls.items()
+                ]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO symbol_bands (band_hash, blob_sha, name, line) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (band_hash, blob.sha, symbol.name, symbol.line)
+                    for blob in blobs
+                    for symbol in blob.symbols
+                    if symbol.signature
+                    for band_hash in band_hashes(symbol.signature)
+                ]
+            )
+
+    def get_imports(self, shas: Iterable[str]) -> Dict[str, List[str]]:
+        """Get the import specifiers of blobs, keyed by SHA."""
+        imports: Dict[str, List[str]] = {}
+        rows = self._select_in(
+            "SELECT blob_sha, specifier FROM blob_imports WHERE blob_sha IN ({placeholders})",
+            set(shas)
+        )
+        for row in rows:
+            imports.setdefault(row["blob_sha"], []).append(row["specifier"])
+        return imports
+
+    def get_blob(self, sha: str) -> Optional[BlobRecord]:
+        """Get a blob record by SHA."""
+        row = self.connection().execute(
+            "SELECT sha, language, size, indexed_at FROM blobs WHERE sha = ?", (sha,)
+        ).fetchone()
+        if row is None:
+            return None
+        return BlobRecord(
+            sha=row["sha"],
+            language=Language(row["language"]) if row["language"] else None,
+            size=row["size"],
+            indexed_at=datetime.fromisoformat(row["indexed_at"])
+        )
+
+    def get_dependencies(self, repository_id: UUID, ref: str) -> List[Dependency]:
+        """Get the dependency table of a ref: every dependency of its manifest files."""
+        rows = self.connection().execute(
+            "SELECT m.path, d.ecosystem, d.name, d.version, d.specifier "
+            "FROM manifest_entries m JOIN blob_dependencies d ON d.blob_sha = m.blob_sha "
+            "WHERE m.repository_id = ? AND m.ref = ? ORDER BY m.path",
+            (str(repository_id), ref)
+        )
+        return [
+            Dependency(
+                ecosystem=row["ecosystem"],
+                name=row["name"],
+                version=row["version"],
+                specifier=row["specifier"],
+                path=row["path"]
+            )
+            for row in rows
+        ]
+
+    def get_secrets(self, repository_id: UUID, ref: str) -> List[SecretFinding]:
+        """Get the secrets found in the files of a ref."""
+        rows = self.connection().execute(
+            "SELECT m.path, s.rule_id, s.line, s.preview, s.digest "
+            "FROM manifest_entries m JOIN blob_secrets s ON s.blob_sha = m.blob_sha "
+            "WHERE m.repository_id = ? AND m.ref = ? ORDER BY m.path, s.line",
+            (str(repository_id), ref)
+        )
+        return [
+            SecretFinding(
+                rule_id=row["rule_id"],
+                line=row["line"],
+                preview=row["preview"],
+                digest=row["digest"],
+                path=row["path"]
+            )
+            for row in rows
+        ]
+
+    def get_symbols(self, repository_id: UUID, ref: str) -> List[Symbol]:
+        """Get the symbols defined in the files of a ref, without signatures."""
+        rows = self.connection().execute(
+            "SELECT m.path, s.name, s.kind, s.line, s.end_line, s.public, s.documented, s.route "
+            "FROM manifest_entries m JOIN blob_symbols s ON s.blob_sha = m.blob_sha "
+            "WHERE m.repository_id = ? AND m.ref = ? ORDER BY m.path, s.line",
+            (str(repository_id), ref)
+        )
+        return [
+            Symbol(
+                name=row["name"],
+                kind=row["kind"],
+                line=row["line"],
+                end_line=row["end_line"],
+                public=bool(row["public"]),
+                documented=bool(row["documented"]),
+                route=row["route"],
+                path=row["path"]
+            )
+            for row in rows
+        ]
+
+    def symbol_table(self, repository_id: UUID, ref: str) -> SymbolTable:
+        """Get the symbols of a ref as columns, for whole-table array operations."""
+        rows = self.connection().execute(
+            "SELECT m.path, s.name, s.kind, s.line, s.public, s.documented, s.route "
+            "FROM manifest_entries m JOIN blob_symbols s ON s.blob_sha = m.blob_sha "
+            "WHERE m.repository_id = ? AND m.ref = ? ORDER BY m.path, s.line",
+            (str(repository_id), ref)
+        ).fetchall()
+        columns = list(zip(*rows)) or [()] * len(SymbolTable._fields)
+        path, name, kind, line, public, documented, route = columns
+        return SymbolTable(
+            path=np.array(path, dtype=object),
+            name=np.array(name, dtype=object),
+            kind=np.array(kind, dtype=object),
+            line=np.array(line, dtype=np.int64),
+            public=np.array(public, dtype=bool),
+            documented=np.array(documented, dtype=bool),
+            route=np.array(route, dtype=object)
+        )
+
+    def call_counts(self, repository_id: UUID, ref: str) -> Dict[str, int]:
+        """Call sites of each callee name across the files of a ref."""
+        rows = self.connection().execute(
+            "SELECT c.name, SUM(c.count) AS calls "
+            "FROM manifest_entries m JOIN blob_calls c ON c.blob_sha = m.blob_sha "
+            "WHERE m.repository_id = ? AND m.ref = ? GROUP BY c.name",
+            (str(repository_id), ref)
+        )
+        return {row["name"]: row["calls"] for row in rows}
+
+    def similar_symbol_candidates(self, shas: Iterable[str]) -> Set[Tuple[SymbolKey, SymbolKey]]:
+        """Pairs of symbols sharing an LSH bucket, where the first is in one of ``shas``.
+
+        The second symbol may come from any indexed blob, so a repository is
+        compared against the whole corpus through the band index, never
+        symbol by symbol.
+        """
+        rows = self._select_in(
+            "SELECT DISTINCT a.blob_sha, a.name, a.line, "
+            "b.blob_sha AS other_sha, b.name AS other_name, b.line AS other_line "
+            "FROM symbol_bands a JOIN symbol_bands b ON b.band_hash = a.band_hash "
+            "WHERE a.blob_sha IN ({placeholders})",
+            set(shas)
+        )
+        pairs = set()
+        for row in rows:
+            first = (row["blob_sha"], row["name"], row["line"])
+            second = (row["other_sha"], row["other_name"], row["other_line"])
+            if first != second:
+                pairs.add((first, second))
+        return pairs
+
+    def get_symbol_details(self, shas: Iterable[str]) -> Dict[SymbolKey, Symbol]:
+        """Get the symbols of blobs that have a signature, keyed by (blob SHA, name, line)."""
+        rows = self._select_in(
+            "SELECT * FROM blob_symbols "
+            "WHERE signature IS NOT NULL AND blob_sha IN ({placeholders})",
+            set(shas)
+        )
+        return {
+            (row["blob_sha"], row["name"], row["line"]): Symbol(
+                name=row["name"],
+                kind=row["kind"],
+                line=row["line"],
+                end_line=row["end_line"],
+                signature=signature_from_bytes(row["signature"])
+            )
+            for row in rows
+        }
+
+    def blob_locations(self, shas: Iterable[str]) -> Dict[str, List[Tuple[UUID, str, str]]]:
+        """Where blobs appear in indexed refs, as (repository ID, ref, path), keyed by SHA."""
+        locations: Dict[str, List[Tuple[UUID, str, str]]] = {}
+        rows = self._select_in(
+            "SELECT blob_sha, repository_id, ref, path FROM manifest_entries "
+            "WHERE blob_sha IN ({placeholders}) ORDER BY repository_id, ref, path",
+            set(shas)
+        )
+        for row in rows:
+            locations.setdefault(row["blob_sha"], []).append(
+                (UUID(row["repository_id"]), row["ref"], row["path"])
+            )
+        return locations
+
+    def corpus_version(self) -> str:
+        """Changes whenever indexed symbols or any ref's manifest change."""
+        conn = self.connection()
+        symbols = conn.execute("SELECT MAX(rowid) FROM blob_symbols").fetchone()[0]
+        refs = conn.execute("SELECT MAX(indexed_at), COUNT(*) FROM refs").fetchone()
+        return f"{symbols}:{refs[0]}:{refs[1]}"
+
+    def dependency_packages(self) -> List[Tuple[str, str]]:
+        """Get every package depended on by an indexed ref, as (ecosystem, name)."""
+        rows = self.connection().execute(
+            "SELECT DISTINCT d.ecosystem, d.name FROM blob_dependencies d "
+            "WHERE EXISTS (SELECT 1 FROM manifest_entries m WHERE m.blob_sha = d.blob_sha)"
+        )
+        return [(row["ecosystem"], row["name"]) for row in rows]
+
+    def package_uses(self, ecosystem: str, name: str) -> List[PackageUse]:
+        """Get every declaration of a package in the default ref of each repository."""
+        rows = self.connection().execute(
+            "SELECT r.repository_id, r.ref, m.path, d.version, d.specifier "
+            "FROM blob_dependencies d "
+            "JOIN manifest_entries m ON m.blob_sha = d.blob_sha "
+            "JOIN refs r ON r.repository_id = m.repository_id AND r.ref = m.ref "
+            "WHERE d.ecosystem = ? AND d.name = ? "
+            f"AND r.ref = {DEFAULT_REF_SQL.format(repository='r.repository_id')} "
+            "ORDER BY r.repository_id, m.path",
+            (ecosystem, name)
+        )
+        return [
+            PackageUse(
+                repository_id=UUID(row["repository_id"]),
+                ref=row["ref"],
+                dependency=Dependency(
+                    ecosystem=ecosystem,
+                    name=name,
+                    version=row["version"],
+                    specifier=row["specifier"],
+                    path=row["path"]
+                )
+            )
+            for row in rows
+        ]
+
+    def save_repository(self, repository_id: UUID, repo_ref: RepositoryReference) -> None:
+        """Record where an indexed repository is hosted."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO repositories (repository_id, provider_type, "
+                "provider_id, provider_repository_id, full_name, url, default_branch, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(repository_id), repo_ref.provider_type.value, repo_ref.provider_id,
+                 repo_ref.repository_id, repo_ref.full_name, repo_ref.url,
+                 repo_ref.default_branch, datetime.utcnow().isoformat())
+            )
+
+    def get_repository(self, repository_id: UUID) -> Optional[RepositoryReference]:
+        """Get where an indexed repository is hosted."""
+        row = self.connection().execute(
+            "SELECT * FROM repositories WHERE repository_id = ?", (str(repository_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return RepositoryReference(
+            provider_type=ProviderType(row["provider_type"]),
+            provider_id=row["provider_id"],
+            repository_id=row["provider_repository_id"],
+            full_name=row["full_name"],
+            url=row["url"],
+            default_branch=row["default_branch"]
+        )
+
+    def save_manifest(self, manifest: RefManifest) -> Set[str]:
+        """Replace the stored manifest for a ref.
+
+        Returns the paths added, modified or removed since the manifest
+        previously stored for the ref. Re-saving the same commit keeps the
+        recorded parent and changes.
+        """
+        repository_id = str(manifest.repository_id)
+        previous = self.get_manifest(manifest.repository_id, manifest.ref)
+        if previous is not None and previous.commit_sha == manifest.commit_sha:
+            return set(previous.changed_paths)
+        if previous is None:
+            parent_commit_sha = None
+            changed = set(manifest.entries)
+        else:
+            parent_commit_sha = previous.commit_sha
+            changed = {
+                path
+                for path in set(previous.entries) | set(manifest.entries)
+                if previous.entries.get(path) != manifest.entries.get(path)
+            }
+
+        with self.connection() as conn:
+            conn.execute(
+                "DELETE FROM manifest_entries WHERE repository_id = ? AND ref = ?",
+                (repository_id, manifest.ref)
+            )
+            conn.executemany(
+                "INSERT INTO manifest_entries (repository_id, ref, path, blob_sha) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (repository_id, manifest.ref, path, blob_sha)
+                    for path, blob_sha in manifest.entries.items()
+                ]
+            )
+            conn.execute(
+                "DELETE FROM ref_changes WHERE repository_id = ? AND ref = ?",
+                (repository_id, manifest.ref)
+            )
+            conn.executemany(
+                "INSERT INTO ref_changes (repository_id, ref, path) VALUES (?, ?, ?)",
+                [(repository_id, manifest.ref, path) for path in changed]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO refs (repository_id, ref, commit_sha, "
+                "parent_commit_sha, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (repository_id, manifest.ref, manifest.commit_sha, parent_commit_sha,
+                 manifest.indexed_at.isoformat())
+            )
+        return changed
+
+    def get_manifest(self, repository_id: UUID, ref: str) -> Optional[RefManifest]:
+        """Get the stored manifest for a ref."""
+        conn = self.connection()
+        ref_row = conn.execute(
+            "SELECT commit_sha, parent_commit_sha, indexed_at FROM refs "
+            "WHERE repository_id = ? AND ref = ?",
+            (str(repository_id), ref)
+        ).fetchone()
+        if ref_row is None:
+            return None
+        rows = conn.execute(
+            "SELECT path, blob_sha FROM manifest_entries "
+            "WHERE repository_id = ? AND ref = ?",
+            (str(repository_id), ref)
+        )
+        changed = conn.execute(
+            "SELECT path FROM ref_changes WHERE repository_id = ? AND ref = ?",
+            (str(repository_id), ref)
+        )
+        return RefManifest(
+            repository_id=repository_id,
+            ref=ref,
+            commit_sha=ref_row["commit_sha"],
+            entries={row["path"]: row["blob_sha"] for row in rows},
+            parent_commit_sha=ref_row["parent_commit_sha"],
+            changed_paths=sorted(row["path"] for row in changed),
+            indexed_at=datetime.fromisoformat(ref_row["indexed_at"])
+        )
+
+    def default_ref(self, repository_id: UUID) -> Optional[str]:
+        """Get the ref of a repository that analysis reads.
+
+        A worktree ref is only indexed for plain directories, working trees
+        asked for explicitly and watched ones, so when present it is what
+        analysis reads: watched edits land there. Otherwise it is the
+        indexed default branch. Only when the default branch was not
+        indexed, or the repository's hosting was not recorded, is the most
+        recently indexed ref used instead.
+        """
+        row = self.connection().execute(
+            f"SELECT {DEFAULT_REF_SQL.format(repository='?')} AS ref",
+            (str(repository_id),) * 3
+        ).fetchone()
+        return row["ref"]
+
+    def list_refs(self, repository_id: UUID) -> Dict[str, str]:
+        """Get the indexed refs of a repository mapped to their commit SHAs."""
+        rows = self.connection().execute(
+            "SELECT ref, commit_sha FROM refs WHERE repository_id = ?",
+            (str(repository_id),)
+        )
+        return {row["ref"]: row["commit_sha"] for row in rows}
+
+    def count_blobs(self) -> int:
+        """Get the number of stored blobs."""
+        return self.connection().execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
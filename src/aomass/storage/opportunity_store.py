@@ -0,0 +1,417 @@
+"""Storage for mined opportunities."""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..analysis.ranking import RANKING_VERSION, fleet_values, hotness_of, rank_scores
+from ..models.core import Opportunity, OpportunityType
+from .base import SQLiteStore
+
+RESCORE_BATCH_SIZE = 10000
+
+# Indexes over rank columns; a rescore rebuilds them instead of updating them row by row
+RANKED_INDEXES = {
+    "idx_opportunities_rank": "opportunities (repository_id, type, priority, score DESC, id)",
+    "idx_opportunities_priority": "opportunities (repository_id, priority, score DESC, id)",
+    "idx_opportunities_value": "opportunities (value DESC, id)",
+    "idx_opportunities_type_value": "opportunities (type, value DESC, id)",
+}
+
+# Orderings of opportunity listings; every ordering ends with the ID so it is total
+OPPORTUNITY_SORTS = {
+    "priority": (("priority", "ASC"), ("score", "DESC")),
+    "confidence": (("confidence", "DESC"), ("priority", "ASC")),
+    "type": (("type", "ASC"), ("priority", "ASC"), ("score", "DESC")),
+}
+
+
+class OpportunityFilter(NamedTuple):
+    """Restricts an opportunity listing; ``None`` fields match everything."""
+    types: Optional[Sequence[OpportunityType]] = None
+    min_priority: Optional[int] = None  # Priority numbers: 1 is the most urgent
+    max_priority: Optional[int] = None
+    min_confidence: Optional[float] = None
+
+
+class OpportunityPage(NamedTuple):
+    """One page of a listing, as the stored JSON of each opportunity."""
+    items: List[str]
+    next_cursor: Optional[str]  # None on the last page
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor resuming a listing after the row with these sort values."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """Sort values of a cursor made by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another ordering.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+class OpportunityStore(SQLiteStore):
+    """Current opportunities of each repository, one row per fingerprint.
+
+    Opportunity IDs are derived from their fingerprints, so re-mining a
+    repository updates the rows of findings seen before and keeps their
+    IDs and first-seen times. Each detector's rows are replaced as a set:
+    findings a detector no longer reports are deleted when it syncs.
+
+    Rows also carry their fleet-wide value, so the table doubles as a
+    global priority queue: the top ``k`` of every repository is an index
+    scan of ``k`` rows. Values are recomputed in batches whenever the
+    ranking formulas change.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS opportunities (
+        id TEXT PRIMARY KEY,
+        repository_id TEXT NOT NULL,
+        detector TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        type TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        confidence REAL NOT NULL,
+        hotness REAL NOT NULL,
+        score REAL NOT NULL,
+        value REAL NOT NULL,
+        data TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        seen_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_opportunities_confidence
+        ON opportunities (repository_id, confidence DESC, priority, id);
+
+    CREATE INDEX IF NOT EXISTS idx_opportunities_detector
+        ON opportunities (repository_id, detector, seen_at);
+
+    CREATE TABLE IF NOT EXISTS opportunity_syncs (
+        repository_id TEXT NOT NULL,
+        detector TEXT NOT NULL,
+        version TEXT NOT NULL,
+        commit_sha TEXT,
+        synced_at TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'completed',
+        PRIMARY KEY (repository_id, detector)
+    );
+
+    CREATE TABLE IF NOT EXISTS opportunity_ranking (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version TEXT NOT NULL
+    );
+    """ + "".join(
+        f"\n    CREATE INDEX IF NOT EXISTS {name} ON {columns};"
+        for name, columns in RANKED_INDEXES.items()
+    )
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        row = self.connection().execute(
+            "SELECT version FROM opportunity_ranking WHERE id = 1"
+        ).fetchone()
+        if row is None or row["version"] != RANKING_VERSION:
+            self.rescore()
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO opportunity_ranking (id, version) VALUES (1, ?)",
+                    (RANKING_VERSION,)
+                )
+
+    def migrate(self, conn) -> None:
+        """Add the ranking columns to tables from before fleet ranking.
+
+        Hotness is read back from the stored opportunities; scores and values
+        are filled in by the rescore run on open, as those tables have no
+        ranking version. Syncs recorded before failed runs were recorded
+        all completed.
+        """
+        columns = self.table_columns(conn, "opportunities")
+        if columns and "hotness" not in columns:
+            conn.execute("ALTER TABLE opportunities ADD COLUMN hotness REAL NOT NULL DEFAULT 0")
+            conn.execute(
+                "UPDATE opportunities SET hotness = "
+                "COALESCE(json_extract(data, '$.metadata.churn.hotness'), 0)"
+            )
+        if columns and "value" not in columns:
+            conn.execute("ALTER TABLE opportunities ADD COLUMN value REAL NOT NULL DEFAULT 0")
+        columns = self.table_columns(conn, "opportunity_syncs")
+        if columns and "status" not in columns:
+            conn.execute(
+                "ALTER TABLE opportunity_syncs ADD COLUMN status TEXT NOT NULL DEFAULT 'completed'"
+            )
+
+    @staticmethod
+    def _from_row(row) -> Opportunity:
+        return Opportunity.model_validate_json(row["data"])
+
+    def sync(
+        self,
+        repository_id: UUID,
+        detector: str,
+        opportunities: List[Opportunity],
+        version: str = "",
+        commit_sha: Optional[str] = None,
+        prune: bool = True
+    ) -> None:
+        """Upsert the opportunities a detector reported for a repository.
+
+        With ``prune``, the detector's output is taken as complete and its
+        rows missing from ``opportunities`` are deleted; pass ``prune=False``
+        for partial runs, such as language-filtered ones.
+        """
+        priority = np.fromiter((opp.priority for opp in opportunities), float, len(opportunities))
+        confidence = np.fromiter(
+            (opp.confidence for opp in opportunities), float, len(opportunities)
+        )
+        hotness = np.fromiter((hotness_of(opp) for opp in opportunities), float, len(opportunities))
+        scores = rank_scores(confidence, hotness)
+        values = fleet_values(priority, scores)
+        seen_at = datetime.utcnow().isoformat()
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT INTO opportunities (id, repository_id, detector, fingerprint, type, "
+                "priority, confidence, hotness, score, value, data, created_at, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+                "detector = excluded.detector, fingerprint = excluded.fingerprint, "
+                "type = excluded.type, priority = excluded.priority, "
+                "confidence = excluded.confidence, hotness = excluded.hotness, "
+                "score = excluded.score, value = excluded.value, "
+                # Stored JSON keeps the first-seen time, so it can be served as is
+                "data = json_set(excluded.data, '$.created_at', opportunities.created_at), "
+                "seen_at = excluded.seen_at",
+                [
+                    (
+                        str(opportunity.id), str(repository_id), detector,
+                        opportunity.fingerprint or "", opportunity.type.value,
+                        opportunity.priority, opportunity.confidence, float(hot),
+                        float(score), float(value), opportunity.model_dump_json(),
+                        opportunity.created_at.isoformat(), seen_at
+                    )
+                    for opportunity, hot, score, value in zip(
+                        opportunities, hotness, scores, values
+                    )
+                ]
+            )
+            if prune:
+                conn.execute(
+                    "DELETE FROM opportunities WHERE repository_id = ? AND detector = ? "
+                    "AND seen_at != ?",
+                    (str(repository_id), detector, seen_at)
+                )
+                self._record_sync(conn, repository_id, detector, version, commit_sha, "completed")
+
+    def record_run(
+        self,
+        repository_id: UUID,
+        detector: str,
+        version: str,
+        commit_sha: str,
+        status: str
+    ) -> None:
+        """Record a detector run on a commit that stored no output, such as a failed one.
+
+        The detector's rows from earlier runs are left in place, and reads
+        serve them instead of running the detector again on that commit.
+        """
+        with self.connection() as conn:
+            self._record_sync(conn, repository_id, detector, version, commit_sha, status)
+
+    @staticmethod
+    def _record_sync(
+        conn,
+        repository_id: UUID,
+        detector: str,
+        version: str,
+        commit_sha: Optional[str],
+        status: str
+    ) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO opportunity_syncs "
+            "(repository_id, detector, version, commit_sha, synced_at, status) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(repository_id), detector, version, commit_sha,
+             datetime.utcnow().isoformat(), status)
+        )
+
+    def get(self, opportunity_id: UUID) -> Optional[Opportunity]:
+        """Get an opportunity by ID."""
+        row = self.connection().execute(
+            "SELECT data FROM opportunities WHERE id = ?", (str(opportunity_id),)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def list(
+        self,
+        repository_id: UUID,
+        opportunity_type: Optional[OpportunityType] = None,
+        limit: int = 50
+    ) -> List[Opportunity]:
+        """Get the best opportunities of a repository: by priority, then score."""
+        query = "SELECT data FROM opportunities WHERE repository_id = ?"
+        params = [str(repository_id)]
+        if opportunity_type is not None:
+            query += " AND type = ?"
+            params.append(opportunity_type.value)
+        query += " ORDER BY priority, score DESC, id LIMIT ?"
+        rows = self.connection().execute(query, (*params, limit))
+        return [self._from_row(row) for row in rows]
+
+    def synced_detectors(self, repository_id: UUID, commit_sha: str) -> Set[Tuple[str, str]]:
+        """(detector, version) pairs run on a commit, whether or not they completed."""
+        rows = self.connection().execute(
+            "SELECT detector, version FROM opportunity_syncs "
+            "WHERE repository_id = ? AND commit_sha = ?",
+            (str(repository_id), commit_sha)
+        )
+        return {(row["detector"], row["version"]) for row in rows}
+
+    @staticmethod
+    def _filter_conditions(filters: OpportunityFilter) -> Tuple[List[str], List[Any]]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        if filters.types:
+            conditions.append(f"type IN ({','.join('?' * len(filters.types))})")
+            params.extend(OpportunityType(value).value for value in filters.types)
+        for column, operator, value in (
+            ("priority", ">=", filters.min_priority),
+            ("priority", "<=", filters.max_priority),
+            ("confidence", ">=", filters.min_confidence),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        return conditions, params
+
+    def page(
+        self,
+        repository_id: UUID,
+        filters: OpportunityFilter = OpportunityFilter(),
+        sort: str = "priority",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> OpportunityPage:
+        """Get a page of the opportunities of a repository, resuming after ``cursor``.
+
+        Pages are keyset-paginated: a cursor holds the sort values of the
+        last row served and the next page starts right after them, so each
+        page costs an index seek whatever its depth, and rows inserted or
+        deleted in between neither repeat nor shift the listing.
+
+        Raises:
+            ValueError: If the ordering or the cursor is invalid.
+        """
+        if sort not in OPPORTUNITY_SORTS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        columns = OPPORTUNITY_SORTS[sort] + (("id", "ASC"),)
+        names = [name for name, _ in columns]
+
+        conditions, params = self._filter_conditions(filters)
+        conditions.insert(0, "repository_id = ?")
+        params.insert(0, str(repository_id))
+        if cursor is not None:
+            # (a, b, c) after (x, y, z): a past x, or a = x and b past y, ...
+            after = decode_cursor(cursor, len(columns))
+            alternatives = []
+            for index, (name, direction) in enumerate(columns):
+                past = f"{name} {'>' if direction == 'ASC' else '<'} ?"
+                equal = [f"{column} = ?" for column in names[:index]]
+                alternatives.append(f"({' AND '.join(equal + [past])})")
+                params.extend(after[:index + 1])
+            conditions.append(f"({' OR '.join(alternatives)})")
+
+        order = ", ".join(f"{name} {direction}" for name, direction in columns)
+        rows = self.connection().execute(
+            f"SELECT data, {', '.join(names)} FROM opportunities "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][name] for name in names])
+        return OpportunityPage([row["data"] for row in rows], next_cursor)
+
+    def export(
+        self,
+        repository_id: UUID,
+        filters: OpportunityFilter = OpportunityFilter(),
+        sort: str = "priority",
+        batch_size: int = 500
+    ) -> Iterator[str]:
+        """Stream the stored JSON of every matching opportunity, a page at a time.
+
+        Each page is read whole, so the generator can be resumed from any
+        thread: the store's connections are per thread.
+        """
+        cursor = None
+        while True:
+            page = self.page(repository_id, filters, sort, cursor, batch_size)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def top(
+        self, k: int = 100, filters: OpportunityFilter = OpportunityFilter()
+    ) -> List[str]:
+        """Stored JSON of the ``k`` most valuable opportunities across all repositories."""
+        conditions, params = self._filter_conditions(filters)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self.connection().execute(
+            f"SELECT data FROM opportunities {where}ORDER BY value DESC, id LIMIT ?",
+            (*params, k)
+        )
+        return [row["data"] for row in rows]
+
+    def rescore(self, batch_size: int = RESCORE_BATCH_SIZE) -> int:
+        """Recompute the rank score and fleet value of every row; returns the rows updated.
+
+        Rows are read in rowid order a batch at a time and scored as
+        arrays. The indexes over scores and values are dropped and built
+        again afterwards, in the same transaction, which is several times
+        faster than maintaining them through every row update.
+        """
+        updated, last = 0, 0
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            for name in RANKED_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            while True:
+                rows = conn.execute(
+                    "SELECT rowid, priority, confidence, hotness FROM opportunities "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                rowid, priority, confidence, hotness = (
+                    np.array(column, dtype=float) for column in zip(*rows)
+                )
+                scores = rank_scores(confidence, hotness)
+                values = fleet_values(priority, scores)
+                conn.executemany(
+                    "UPDATE opportunities SET score = ?, value = ? WHERE rowid = ?",
+                    zip(scores.tolist(), values.tolist(), rowid.astype(int).tolist())
+                )
+                updated += len(rows)
+                last = int(rowid[-1])
+            for name, columns in RANKED_INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON {columns}")
+        return updated
@@ -0,0 +1,84 @@
+"""Generated plans, and cached plan templates shared by opportunities with the same signature."""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from ..models.core import Plan
+from .base import SQLiteStore
+
+
+class PlanStore(SQLiteStore):
+    """Generated plans by ID, for the implementer and reviewer to read back."""
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS plans (
+        id TEXT PRIMARY KEY,
+        opportunity_id TEXT NOT NULL,
+        plan TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    """
+
+    def put(self, plan: Plan) -> None:
+        """Store a generated plan."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plans (id, opportunity_id, plan, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (str(plan.id), str(plan.opportunity_id), plan.model_dump_json(),
+                 plan.created_at.isoformat())
+            )
+
+    def get(self, plan_id: UUID) -> Optional[Plan]:
+        """Get a generated plan by ID."""
+        row = self.connection().execute(
+            "SELECT plan FROM plans WHERE id = ?", (str(plan_id),)
+        ).fetchone()
+        return Plan.model_validate_json(row["plan"]) if row else None
+
+
+class PlanTemplateStore(SQLiteStore):
+    """Plan templates keyed by opportunity signature and planner version.
+
+    A template is a generated plan whose repository-specific values were
+    replaced by placeholders. Templates of another planner version, or
+    older than the maximum age given on lookup, are never returned.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS plan_templates (
+        signature TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        template TEXT NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL
+    );
+    """
+
+    def get(
+        self, signature: str, version: str, max_age: timedelta
+    ) -> Optional[Dict[str, Any]]:
+        """Get a fresh template of a planner version, counting the hit."""
+        oldest = (datetime.utcnow() - max_age).isoformat()
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT template FROM plan_templates WHERE signature = ? AND version = ? "
+                "AND created_at >= ?",
+                (signature, version, oldest)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE plan_templates SET hits = hits + 1 WHERE signature = ?", (signature,)
+            )
+        return json.loads(row["template"])
+
+    def put(self, signature: str, version: str, template: Dict[str, Any]) -> None:
+        """Store the template of a signature, replacing any older one."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plan_templates (signature, version, template, hits, "
+                "created_at) VALUES (?, ?, ?, 0, ?)",
+                (signature, version, json.dumps(template), datetime.utcnow().isoformat())
+            )
@@ -0,0 +1,111 @@
+"""Resource profiles of detector runs, kept for tuning."""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+import numpy as np
+
+from ..models.core import DetectorRun
+from .base import SQLiteStore
+
+# Runs kept per detector; older profiles are dropped as new ones arrive
+PROFILE_RETENTION = 1000
+
+
+class DetectorStats(NamedTuple):
+    """Resource use of a detector version over its recent runs.
+
+    Timings cover runs that actually executed; cached runs are only counted.
+    """
+    detector: str
+    version: str
+    runs: int
+    cached_runs: int
+    failed_runs: int  # Failed or cancelled
+    wall_ms_p50: Optional[float]
+    wall_ms_p95: Optional[float]
+    cpu_ms_mean: Optional[float]
+    allocated_kb_mean: Optional[float]  # Traced runs only
+    peak_kb_max: Optional[float]  # Traced runs only
+    last_run_at: datetime
+
+
+class DetectorProfileStore(SQLiteStore):
+    """Wall time, CPU time and memory of each detector run."""
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS detector_profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        repository_id TEXT NOT NULL,
+        detector TEXT NOT NULL,
+        version TEXT NOT NULL,
+        status TEXT NOT NULL,
+        cached INTEGER NOT NULL,
+        wall_ms REAL NOT NULL,
+        cpu_ms REAL NOT NULL,
+        allocated_kb REAL,
+        peak_kb REAL,
+        created_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_detector_profiles_detector
+        ON detector_profiles (detector, id);
+    """
+
+    def record(self, repository_id: UUID, runs: Iterable[DetectorRun]) -> None:
+        """Store the profiles of the detector runs of a mining pass."""
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (str(repository_id), run.detector, run.version, run.status.value, run.cached,
+             run.duration_ms, run.cpu_ms, run.allocated_kb, run.peak_kb, now)
+            for run in runs
+        ]
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT INTO detector_profiles (repository_id, detector, version, status, "
+                "cached, wall_ms, cpu_ms, allocated_kb, peak_kb, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            for detector in {row[1] for row in rows}:
+                conn.execute(
+                    "DELETE FROM detector_profiles WHERE detector = ? AND id <= ("
+                    "SELECT id FROM detector_profiles WHERE detector = ? "
+                    "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (detector, detector, PROFILE_RETENTION)
+                )
+
+    def stats(self, detector: Optional[str] = None) -> List[DetectorStats]:
+        """Summarize the kept runs of each detector version, by detector name."""
+        query = "SELECT * FROM detector_profiles"
+        params = ()
+        if detector is not None:
+            query += " WHERE detector = ?"
+            params = (detector,)
+        groups: Dict[tuple, list] = {}
+        for row in self.connection().execute(query + " ORDER BY id", params):
+            groups.setdefault((row["detector"], row["version"]), []).append(row)
+
+        stats = []
+        for (name, version), rows in sorted(groups.items()):
+            executed = [row for row in rows if not row["cached"]]
+            wall = np.array([row["wall_ms"] for row in executed])
+            cpu = np.array([row["cpu_ms"] for row in executed])
+            allocated = np.array([
+                row["allocated_kb"] for row in executed if row["allocated_kb"] is not None
+            ])
+            peak = np.array([row["peak_kb"] for row in executed if row["peak_kb"] is not None])
+            stats.append(DetectorStats(
+                detector=name,
+                version=version,
+                runs=len(rows),
+                cached_runs=len(rows) - len(executed),
+                failed_runs=sum(row["status"] in ("failed", "cancelled") for row in rows),
+                wall_ms_p50=float(np.percentile(wall, 50)) if len(wall) else None,
+                wall_ms_p95=float(np.percentile(wall, 95)) if len(wall) else None,
+                cpu_ms_mean=float(cpu.mean()) if len(cpu) else None,
+                allocated_kb_mean=float(allocated.mean()) if len(allocated) else None,
+                peak_kb_max=float(peak.max()) if len(peak) else None,
+                last_run_at=datetime.fromisoformat(rows[-1]["created_at"])
+            ))
+        return stats
@@ -0,0 +1,166 @@
+"""Local cache of package registry metadata."""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from ..analysis.dependencies import package_key
+from ..analysis.versions import compatibility_key, is_prerelease, version_key
+from ..models.core import Dependency
+from .base import SQLiteStore
+
+
+class RegistryVersion(NamedTuple):
+    """A published version of a package."""
+    version: str
+    yanked: bool = False  # Yanked, deprecated or without installable files
+
+
+class VersionResolution(NamedTuple):
+    """Newer versions available for a dependency."""
+    dependency: Dependency
+    latest: Optional[str]  # Newest stable release, if newer than the dependency
+    latest_compatible: Optional[str]  # Newest stable release within the compatible range
+
+
+class FetchState(NamedTuple):
+    """When and at which ETag a package was last fetched."""
+    etag: Optional[str]
+    fetched_at: datetime
+
+
+class RegistryStore(SQLiteStore):
+    """Published versions of packages, with the HTTP validators they were fetched at.
+
+    Versions are stored with their rank in the ecosystem's version order,
+    and indexed by (package, rank), so the newest versions of a package
+    are read off the index in order without sorting at query time.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS registry_packages (
+        package_key TEXT PRIMARY KEY,
+        ecosystem TEXT NOT NULL,
+        name TEXT NOT NULL,
+        etag TEXT,
+        status TEXT NOT NULL,
+        fetched_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS registry_versions (
+        package_key TEXT NOT NULL,
+        version TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        prerelease INTEGER NOT NULL,
+        yanked INTEGER NOT NULL,
+        PRIMARY KEY (package_key, version)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_registry_versions_rank
+        ON registry_versions (package_key, rank);
+    """
+
+    def fetch_states(self, keys: Iterable[str]) -> Dict[str, FetchState]:
+        """Get the fetch state of packages, keyed by package key."""
+        rows = self._select_in(
+            "SELECT package_key, etag, fetched_at FROM registry_packages "
+            "WHERE package_key IN ({placeholders})",
+            set(keys)
+        )
+        return {
+            row["package_key"]: FetchState(row["etag"], datetime.fromisoformat(row["fetched_at"]))
+            for row in rows
+        }
+
+    def save_versions(
+        self,
+        ecosystem: str,
+        name: str,
+        versions: List[RegistryVersion],
+        etag: Optional[str] = None
+    ) -> None:
+        """Replace the known versions of a package."""
+        key = package_key(ecosystem, name)
+        ranked = sorted(
+            (version for version in versions if version_key(ecosystem, version.version)),
+            key=lambda version: version_key(ecosystem, version.version)
+        )
+        now = datetime.utcnow().isoformat()
+        with self.connection() as conn:
+            conn.execute("DELETE FROM registry_versions WHERE package_key = ?", (key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO registry_versions "
+                "(package_key, version, rank, prerelease, yanked) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, version.version, rank, is_prerelease(ecosystem, version.version),
+                     version.yanked)
+                    for rank, version in enumerate(ranked)
+                ]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO registry_packages "
+                "(package_key, ecosystem, name, etag, status, fetched_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'ok', ?, ?)",
+                (key, ecosystem, name, etag, now, now)
+            )
+
+    def mark_fetched(self, ecosystem: str, name: str, status: str = "ok") -> None:
+        """Record a fetch that did not change the versions of a package."""
+        now = datetime.utcnow().isoformat()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO registry_packages "
+                "(package_key, ecosystem, name, etag, status, fetched_at, updated_at) "
+                "VALUES (?, ?, ?, NULL, ?, ?, ?) "
+                "ON CONFLICT (package_key) DO UPDATE SET status = excluded.status, "
+                "fetched_at = excluded.fetched_at",
+                (package_key(ecosystem, name), ecosystem, name, status, now, now)
+            )
+
+    def last_updated(self) -> str:
+        """When the versions of any package last changed, as an ISO timestamp."""
+        row = self.connection().execute(
+            "SELECT MAX(updated_at) FROM registry_packages"
+        ).fetchone()
+        return row[0] or ""
+
+    def stable_versions(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Get the stable, non-yanked versions of packages, newest first."""
+        versions: Dict[str, List[str]] = {}
+        rows = self._select_in(
+            "SELECT package_key, version FROM registry_versions "
+            "WHERE package_key IN ({placeholders}) AND prerelease = 0 AND yanked = 0 "
+            "ORDER BY package_key, rank DESC",
+            set(keys)
+        )
+        for row in rows:
+            versions.setdefault(row["package_key"], []).append(row["version"])
+        return versions
+
+    def resolve(self, dependencies: Iterable[Dependency]) -> List[VersionResolution]:
+        """Find newer versions of dependencies with a known version.
+
+        A purely local lookup: packages that were never fetched resolve to
+        no newer version.
+        """
+        dependencies = [dep for dep in dependencies if dep.version]
+        versions = self.stable_versions(
+            package_key(dep.ecosystem, dep.name) for dep in dependencies
+        )
+
+        resolutions = []
+        for dep in dependencies:
+            current = version_key(dep.ecosystem, dep.version)
+            if current is None:
+                continue
+            compatible = compatibility_key(dep.ecosystem, dep.version)
+            latest = latest_compatible = None
+            for version in versions.get(package_key(dep.ecosystem, dep.name), ()):
+                if version_key(dep.ecosystem, version) <= current:
+                    break
+                if latest is None:
+                    latest = version
+                if compatibility_key(dep.ecosystem, version) == compatible:
+                    latest_compatible = version
+                    break
+            resolutions.append(VersionResolution(dep, latest, latest_compatible))
+        return resolutions
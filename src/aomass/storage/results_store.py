@@ -0,0 +1,106 @@
+"""Cached detector output per repository commit."""
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+from uuid import UUID
+
+from ..analysis.rules import RuleFinding
+from ..models.core import Opportunity
+from .base import SQLiteStore
+
+
+class DetectorResult(NamedTuple):
+    """Stored output of one detector run."""
+    detector: str
+    version: str
+    input_digest: str
+    opportunities: List[Opportunity]
+    duration_ms: float
+    # Per-file findings of file-based detectors, carried over between commits
+    findings: List[RuleFinding] = []
+
+
+class DetectorResultStore(SQLiteStore):
+    """Detector output keyed by (repository, commit, detector, version).
+
+    Each row also records a digest of the detector's inputs, so a result
+    computed for one commit can be reused for another commit on which
+    those inputs did not change.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS detector_results (
+        repository_id TEXT NOT NULL,
+        commit_sha TEXT NOT NULL,
+        detector TEXT NOT NULL,
+        version TEXT NOT NULL,
+        input_digest TEXT NOT NULL,
+        opportunities TEXT NOT NULL,
+        findings TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (repository_id, commit_sha, detector, version)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_detector_results_digest
+        ON detector_results (repository_id, detector, version, input_digest);
+    """
+
+    @staticmethod
+    def _from_row(row) -> DetectorResult:
+        return DetectorResult(
+            detector=row["detector"],
+            version=row["version"],
+            input_digest=row["input_digest"],
+            opportunities=[
+                Opportunity.model_validate(item) for item in json.loads(row["opportunities"])
+            ],
+            duration_ms=row["duration_ms"],
+            findings=[RuleFinding(**item) for item in json.loads(row["findings"])]
+        )
+
+    def get(
+        self, repository_id: UUID, commit_sha: str, detector: str, version: str
+    ) -> Optional[DetectorResult]:
+        """Get the result of a detector version for a commit."""
+        row = self.connection().execute(
+            "SELECT * FROM detector_results WHERE repository_id = ? AND commit_sha = ? "
+            "AND detector = ? AND version = ?",
+            (str(repository_id), commit_sha, detector, version)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def find_by_inputs(
+        self, repository_id: UUID, detector: str, version: str, input_digest: str
+    ) -> Optional[DetectorResult]:
+        """Get the latest result of a detector version computed from identical inputs."""
+        row = self.connection().execute(
+            "SELECT * FROM detector_results WHERE repository_id = ? AND detector = ? "
+            "AND version = ? AND input_digest = ? ORDER BY created_at DESC LIMIT 1",
+            (str(repository_id), detector, version, input_digest)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def put(self, repository_id: UUID, commit_sha: str, result: DetectorResult) -> None:
+        """Store the result of a detector run for a commit."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO detector_results (repository_id, commit_sha, "
+                "detector, version, input_digest, opportunities, findings, duration_ms, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(repository_id), commit_sha, result.detector, result.version,
+                    result.input_digest,
+                    json.dumps([opp.model_dump(mode="json") for opp in result.opportunities]),
+                    json.dumps([finding._asdict() for finding in result.findings]),
+                    result.duration_ms, datetime.utcnow().isoformat()
+                )
+            )
+
+    def for_commit(self, repository_id: UUID, commit_sha: str) -> List[DetectorResult]:
+        """Get every stored detector result for a commit."""
+        rows = self.connection().execute(
+            "SELECT * FROM detector_results WHERE repository_id = ? AND commit_sha = ?",
+            (str(repository_id), commit_sha)
+        )
+        return [self._from_row(row) for row in rows]
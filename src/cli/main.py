@@ -1,4 +1,5 @@
 """Command-line interface for AOMaaS."""
+import json
 from typing import List, Optional
 from uuid import UUID
 
@@ -23,13 +24,21 @@ class AOMaaSClient:
         self.base_url = base_url
         self.client = httpx.AsyncClient()
     
-    async def index_repository(self, url: str, branch: str = "main", force: bool = False):
+    async def index_repository(
+        self, url: str, branch: Optional[str] = None, force: bool = False, watch: bool = False
+    ):
         response = await self.client.post(
             f"{self.base_url}/api/v1/index",
-            json={"url": url, "branch": branch, "force_reindex": force}
+            json={"url": url, "branch": branch, "force_reindex": force, "watch": watch}
         )
         return response.json()
     
+    async def stop_watching(self, repo_id: str):
+        response = await self.client.delete(
+            f"{self.base_url}/api/v1/repositories/{repo_id}/watch"
+        )
+        response.raise_for_status()
+    
     async def mine_opportunities(self, repo_id: str, types: List[str] = None, max_count: int = 10):
         response = await self.client.post(
             f"{self.base_url}/api/v1/mine",
@@ -40,16 +49,58 @@ class AOMaaSClient:
             }
         )
         return response.json()
+    
+    async def top_opportunities(self, k: int = 100, types: List[str] = None):
+        response = await self.client.get(
+            f"{self.base_url}/api/v1/opportunities/top",
+            params={"k": k, "type": types or []}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def plan_batch(
+        self, opportunity_ids: List[str], preferences: dict = None, coalesce: bool = False
+    ):
+        async with self.client.stream(
+            "POST",
+            f"{self.base_url}/api/v1/plan/batch",
+            json={
+                "opportunity_ids": opportunity_ids,
+                "preferences": preferences or {},
+                "coalesce": coalesce
+            },
+            timeout=None
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+    
+    async def create_campaign(self, ecosystem: str, package: str, version: str, draft: bool = True):
+        response = await self.client.post(
+            f"{self.base_url}/api/v1/campaigns",
+            json={"ecosystem": ecosystem, "package": package, "version": version, "draft": draft}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_campaign(self, campaign_id: str):
+        response = await self.client.get(f"{self.base_url}/api/v1/campaigns/{campaign_id}")
+        response.raise_for_status()
+        return response.json()
 
 client = AOMaaSClient()
 
 @app.command()
 def index(
-    url: str = typer.Argument(..., help="Repository URL to index"),
-    branch: str = typer.Option("main", "--branch", "-b", help="Branch to index"),
-    force: bool = typer.Option(False, "--force", "-f", help="Force reindexing")
+    url: str = typer.Argument(..., help="Repository URL or local path to index"),
+    branch: Optional[str] = typer.Option(
+        None, "--branch", "-b", help="Branch to index (default: the repository's default branch)"
+    ),
+    force: bool = typer.Option(False, "--force", "-f", help="Force reindexing"),
+    watch: bool = typer.Option(False, "--watch", "-w", help="Re-index a local repository as files change")
 ):
-    """Index a GitHub repository."""
+    """Index a GitHub repository or a local directory."""
     console.print(f"[blue]Indexing repository:[/blue] {url}")
     
     with Progress(
@@ -61,7 +112,7 @@ def index(
         
         try:
             import asyncio
-            result = asyncio.run(client.index_repository(url, branch, force))
+            result = asyncio.run(client.index_repository(url, branch, force, watch))
             progress.update(task, description="Index complete!")
             
             console.print(f"[green]✓[/green] Repository indexed successfully")
@@ -71,6 +122,17 @@ def index(
             console.print(f"[red]✗[/red] Failed to index repository: {e}")
             raise typer.Exit(1)
 
+@app.command()
+def unwatch(repo_id: str = typer.Argument(..., help="Repository ID")):
+    """Stop re-indexing a local repository as its files change."""
+    try:
+        import asyncio
+        asyncio.run(client.stop_watching(repo_id))
+        console.print(f"[green]✓[/green] Stopped watching repository {repo_id}")
+    except Exception as e:
+        console.print(f"[red]✗[/red] Failed to stop watching: {e}")
+        raise typer.Exit(1)
+
 @app.command()
 def mine(
     repo_id: str = typer.Argument(..., help="Repository ID"),
@@ -108,6 +170,88 @@ def mine(
         console.print(f"[red]✗[/red] Failed to mine opportunities: {e}")
         raise typer.Exit(1)
 
+@app.command()
+def queue(
+    top: int = typer.Option(100, "--top", "-k", help="Number of opportunities to return"),
+    types: Optional[List[str]] = typer.Option(None, "--type", "-t", help="Opportunity types to include")
+):
+    """Show the most valuable open opportunities across all repositories."""
+    try:
+        import asyncio
+        result = asyncio.run(client.top_opportunities(top, types))
+        
+        opportunities = result['opportunities']
+        table = Table(title=f"Top {len(opportunities)} Opportunities")
+        table.add_column("#", style="dim", no_wrap=True)
+        table.add_column("Repository", style="cyan", no_wrap=True)
+        table.add_column("Priority", style="red", no_wrap=True)
+        table.add_column("Type", style="blue")
+        table.add_column("Title", style="white")
+        table.add_column("Confidence", style="green")
+        
+        for rank, opp in enumerate(opportunities, 1):
+            table.add_row(
+                str(rank),
+                opp['repository_id'][:8],
+                str(opp['priority']),
+                opp['type'].replace('_', ' ').title(),
+                opp['title'][:50] + ("..." if len(opp['title']) > 50 else ""),
+                f"{opp['confidence']:.1%}"
+            )
+        
+        console.print(table)
+        
+    except Exception as e:
+        console.print(f"[red]✗[/red] Failed to get the opportunity queue: {e}")
+        raise typer.Exit(1)
+
+@app.command()
+def campaign(
+    package: str = typer.Argument(None, help="Package to update across all repositories"),
+    version: str = typer.Argument(None, help="Version to update the package to"),
+    ecosystem: str = typer.Option("PyPI", "--ecosystem", "-e", help="Package ecosystem, e.g. PyPI, npm, Go"),
+    draft: bool = typer.Option(True, "--draft/--ready", help="Open pull requests as drafts"),
+    show: Optional[str] = typer.Option(None, "--show", "-s", help="Show the progress of a campaign by ID")
+):
+    """Update a dependency in every indexed repository that declares an older version."""
+    try:
+        import asyncio
+        if show:
+            result = asyncio.run(client.get_campaign(show))
+        elif package and version:
+            result = asyncio.run(client.create_campaign(ecosystem, package, version, draft))
+        else:
+            console.print("[red]✗[/red] Give a package and version, or --show a campaign")
+            raise typer.Exit(1)
+        
+        info = result['campaign']
+        console.print(
+            f"[green]✓[/green] Campaign {info['id']}: {info['package']} → "
+            f"{info['target_version']} ({info['status']})"
+        )
+        table = Table(title="Repositories")
+        table.add_column("Repository", style="cyan", no_wrap=True)
+        table.add_column("Status", style="yellow")
+        table.add_column("Current", style="dim")
+        table.add_column("Pull Request / Message", style="white")
+        
+        for target in result['targets']:
+            table.add_row(
+                target['repository_id'][:8],
+                target['status'],
+                ", ".join(target['current_versions']) or "-",
+                target['pull_request_url'] or target['message'] or ""
+            )
+        
+        console.print(table)
+        console.print(", ".join(f"{count} {status}" for status, count in result['progress'].items()))
+        
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]✗[/red] Campaign failed: {e}")
+        raise typer.Exit(1)
+
 @app.command()
 def maintain(
     repo_url: str = typer.Argument(..., help="Repository URL"),
@@ -122,8 +266,7 @@ def maintain(
         import asyncio
         
         # Step 1: Index repository
-        console.print("
-[yellow]Step 1:[/yellow] Indexing repository...")
+        console.print("\n[yellow]Step 1:[/yellow] Indexing repository...")
         index_result = asyncio.run(client.index_repository(repo_url))
         console.print(f"[green]✓[/green] Repository indexed (Task ID: {index_result['task_id']})")
         
@@ -132,28 +275,43 @@ def maintain(
         mock_repo_id = "12345678-1234-5678-9012-123456789012"
         
         # Step 2: Mine opportunities
-        console.print("
-[yellow]Step 2:[/yellow] Mining opportunities...")
+        console.print("\n[yellow]Step 2:[/yellow] Mining opportunities...")
         mine_result = asyncio.run(client.mine_opportunities(mock_repo_id, None, max_opportunities))
         opportunities = mine_result['opportunities']
         console.print(f"[green]✓[/green] Found {len(opportunities)} opportunities")
         
-        # Step 3: Process each opportunity
-        for i, opp in enumerate(opportunities[:max_opportunities], 1):
-            console.print(f"
-[yellow]Processing opportunity {i}/{len(opportunities)}:[/yellow] {opp['title']}")
-            
-            # TODO: Implement plan generation, implementation, and PR creation
-            # For now, just show what would be done
-            if dry_run:
-                console.print(f"  [dim]Would generate plan and implement changes[/dim]")
-                if auto_pr:
-                    console.print(f"  [dim]Would create GitHub PR[/dim]")
-            else:
-                console.print(f"  [dim]Plan generation not implemented yet[/dim]")
-        
-        console.print(f"
-[bold green]✓ Maintenance workflow completed![/bold green]")
+        # Step 3: Plan all opportunities in one batch, related updates together
+        selected = {opp['id']: opp for opp in opportunities[:max_opportunities]}
+        console.print(f"\n[yellow]Step 3:[/yellow] Planning {len(selected)} opportunities...")
+        
+        async def plan_all():
+            done = 0
+            async for result in client.plan_batch(list(selected), coalesce=True):
+                covered = (result['plan'] or {}).get('opportunity_ids') or [result['opportunity_id']]
+                done += len(covered)
+                titles = "; ".join(selected[opp_id]['title'] for opp_id in covered)
+                console.print(f"\n[yellow]Opportunity {done}/{len(selected)}:[/yellow] {titles}")
+                if result['error']:
+                    console.print(f"  [red]✗[/red] Planning failed: {result['error']}")
+                    continue
+                plan = result['plan']
+                reused = " [dim](shared plan)[/dim]" if result['shared'] else ""
+                console.print(
+                    f"  [green]✓[/green] {plan['title']}: {len(plan['steps'])} steps, "
+                    f"{plan['estimated_effort']} effort{reused}"
+                )
+                # TODO: Implement implementation and PR creation
+                # For now, just show what would be done
+                if dry_run:
+                    console.print(f"  [dim]Would implement changes[/dim]")
+                    if auto_pr:
+                        console.print(f"  [dim]Would create GitHub PR[/dim]")
+                else:
+                    console.print(f"  [dim]Implementation not automated yet[/dim]")
+        
+        asyncio.run(plan_all())
+        
+        console.print(f"\n[bold green]✓ Maintenance workflow completed![/bold green]")
         
     except Exception as e:
         console.print(f"[red]✗[/red] Maintenance workflow failed: {e}")
@@ -192,8 +350,7 @@ def status():
 @app.command()
 def config():
     """Show current configuration."""
-    console.print("[bold blue]AOMaaS Configuration[/bold blue]
-")
+    console.print("[bold blue]AOMaaS Configuration[/bold blue]\n")
     
     table = Table(title="Configuration Settings")
     table.add_column("Setting", style="blue")
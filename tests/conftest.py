@@ -8,13 +8,34 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from aomass.api import routes
 from aomass.api.main import app
 from aomass.config.settings import settings
 
 
 @pytest.fixture
-def client():
-    """FastAPI test client."""
+def isolated_storage(tmp_path, monkeypatch):
+    """Point the stores at a temporary directory and rebuild the route services on it."""
+    monkeypatch.setattr(settings, "index_db_path", str(tmp_path / "data" / "index.db"))
+    monkeypatch.setattr(settings, "blob_store_path", str(tmp_path / "data" / "objects"))
+    planner_service = routes.PlannerService()
+    services = {
+        "indexer_service": routes.IndexerService(),
+        "miner_service": routes.MinerService(),
+        "planner_service": planner_service,
+        "implementer_service": routes.ImplementerService(plan_store=planner_service.plan_store),
+        "registry_service": routes.RegistryService(),
+        "coverage_service": routes.CoverageService(),
+        "history_service": routes.HistoryService(),
+        "campaign_service": routes.CampaignService(planner=planner_service),
+    }
+    for name, service in services.items():
+        monkeypatch.setattr(routes, name, service)
+
+
+@pytest.fixture
+def client(isolated_storage):
+    """FastAPI test client, on stores of its own."""
     return TestClient(app)
 
 
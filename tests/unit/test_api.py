@@ -1,8 +1,13 @@
 """Unit tests for API routes."""
+import json
+
 import pytest
+from uuid import uuid4
 from fastapi.testclient import TestClient
 
+from aomass.api import routes
 from aomass.models.api import IndexRepositoryRequest, MineOpportunitiesRequest
+from aomass.models.core import Opportunity, OpportunityType
 
 
 def test_health_check(client: TestClient):
@@ -49,13 +54,34 @@ def test_mine_opportunities(client: TestClient, mock_repo_id: str):
     assert isinstance(data["opportunities"], list)
 
 
-def test_generate_plan(client: TestClient, mock_opportunity_id: str):
+def test_upload_coverage_requires_indexed_repository(client: TestClient, mock_repo_id: str):
+    """Test that coverage reports are rejected for repositories never indexed."""
+    response = client.post(
+        f"/api/v1/repositories/{mock_repo_id}/coverage",
+        content=b"SF:app.py\nDA:1,1\nend_of_record\n"
+    )
+    assert response.status_code == 400
+    assert "has not been indexed" in response.json()["detail"]
+
+
+def test_generate_plan(client: TestClient, mock_repo_id, mock_opportunity_id):
     """Test plan generation endpoint."""
     request_data = {
         "opportunity_id": str(mock_opportunity_id),
         "preferences": {}
     }
+    response = client.post("/api/v1/plan", json=request_data)
+    assert response.status_code == 404
     
+    routes.planner_service.opportunity_store.sync(mock_repo_id, "test", [Opportunity(
+        id=mock_opportunity_id,
+        repository_id=mock_repo_id,
+        type=OpportunityType.DOCUMENTATION,
+        title="Document the public API",
+        description="3 public functions have no docstring",
+        priority=7,
+        confidence=0.85
+    )])
     response = client.post("/api/v1/plan", json=request_data)
     assert response.status_code == 200
     
@@ -66,13 +92,61 @@ def test_generate_plan(client: TestClient, mock_opportunity_id: str):
     assert isinstance(data["steps"], list)
 
 
-def test_implement_plan(client: TestClient, mock_plan_id: str):
+def test_generate_plans_streams_results(client: TestClient, mock_repo_id, mock_opportunity_id):
+    """Test that batch planning streams one NDJSON result per opportunity."""
+    routes.planner_service.opportunity_store.sync(mock_repo_id, "batch", [Opportunity(
+        id=mock_opportunity_id,
+        repository_id=mock_repo_id,
+        type=OpportunityType.CODE_OPTIMIZATION,
+        title="Hoist the invariant call out of the loop",
+        description="The call returns the same value on every iteration",
+        priority=5,
+        confidence=0.8,
+        metadata={"optimization_type": "loop_invariant_call"}
+    )])
+    unknown = uuid4()
+    response = client.post(
+        "/api/v1/plan/batch",
+        json={"opportunity_ids": [str(mock_opportunity_id), str(unknown)]}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    results = {
+        line["opportunity_id"]: line
+        for line in map(json.loads, response.text.splitlines())
+    }
+    planned = results[str(mock_opportunity_id)]
+    assert planned["error"] is None
+    assert planned["plan"]["title"].endswith("Hoist the invariant call out of the loop")
+    assert results[str(unknown)]["plan"] is None and "not found" in results[str(unknown)]["error"]
+    
+    assert client.post("/api/v1/plan/batch", json={"opportunity_ids": []}).status_code == 422
+
+
+def test_implement_plan(
+    client: TestClient, mock_plan_id: str, mock_repo_id, mock_opportunity_id
+):
     """Test plan implementation endpoint."""
     request_data = {
         "plan_id": str(mock_plan_id),
         "dry_run": True
     }
     
+    response = client.post("/api/v1/implement", json=request_data)
+    assert response.status_code == 404
+    
+    routes.planner_service.opportunity_store.sync(mock_repo_id, "implement", [Opportunity(
+        id=mock_opportunity_id,
+        repository_id=mock_repo_id,
+        type=OpportunityType.DOCUMENTATION,
+        title="Document the public API",
+        description="3 public functions have no docstring",
+        priority=7,
+        confidence=0.85
+    )])
+    plan = client.post("/api/v1/plan", json={"opportunity_id": str(mock_opportunity_id)}).json()
+    request_data["plan_id"] = plan["plan_id"]
     response = client.post("/api/v1/implement", json=request_data)
     assert response.status_code == 200
     
@@ -92,3 +166,75 @@ def test_invalid_repository_url(client: TestClient):
     response = client.post("/api/v1/index", json=request_data)
     # Should still accept the request but validation might catch it later
     assert response.status_code in [200, 422]  # 422 for validation error
+
+
+def test_list_and_export_opportunities(client: TestClient, mock_repo_id):
+    """Test cursor pagination and NDJSON export of stored opportunities."""
+    routes.miner_service.opportunity_store.sync(mock_repo_id, "test", [
+        Opportunity(
+            repository_id=mock_repo_id,
+            type=OpportunityType.DOCUMENTATION,
+            title=f"Document module {i}",
+            description="",
+            priority=5 + i % 2,
+            confidence=0.8
+        )
+        for i in range(5)
+    ])
+    url = f"/api/v1/repositories/{mock_repo_id}/opportunities"
+    
+    first = client.get(url, params={"limit": 3}).json()
+    assert [opp["priority"] for opp in first["opportunities"]] == [5, 5, 5]
+    rest = client.get(url, params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert [opp["priority"] for opp in rest["opportunities"]] == [6, 6]
+    assert rest["next_cursor"] is None
+    
+    filtered = client.get(url, params={"type": "documentation", "min_priority": 6}).json()
+    assert len(filtered["opportunities"]) == 2
+    assert client.get(url, params={"cursor": "bogus"}).status_code == 400
+    
+    response = client.get(f"{url}/export", params={"sort": "confidence"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 5
+
+
+def test_top_opportunities(client: TestClient, mock_repo_id):
+    """Test that the fleet-wide queue serves opportunities by value."""
+    urgent = Opportunity(
+        repository_id=mock_repo_id,
+        type=OpportunityType.SECRET_EXPOSURE,
+        title="Rotate leaked token",
+        description="",
+        priority=1,
+        confidence=1.0
+    )
+    routes.miner_service.opportunity_store.sync(mock_repo_id, "test", [urgent])
+    
+    response = client.get(
+        "/api/v1/opportunities/top", params={"k": 1000, "type": "secret_exposure"}
+    )
+    assert response.status_code == 200
+    rows = response.json()["opportunities"]
+    assert str(urgent.id) in {row["id"] for row in rows}
+    assert [row["priority"] for row in rows] == sorted(row["priority"] for row in rows)
+
+
+def test_list_detectors(client: TestClient):
+    """Test that detectors are listed with their inputs."""
+    response = client.get("/api/v1/detectors")
+    assert response.status_code == 200
+    detectors = {detector["name"]: detector for detector in response.json()["detectors"]}
+    assert detectors["vulnerable_dependency"]["requires"] == ["advisories", "dependencies"]
+    assert detectors["loop_cost"]["scope"] == "file"
+    assert all(detector["source"] == "builtin" for detector in detectors.values())
+
+
+def test_campaign_requires_dependent_repositories(client: TestClient):
+    """Test that campaigns are only created for packages some repository depends on."""
+    response = client.post(
+        "/api/v1/campaigns",
+        json={"ecosystem": "PyPI", "package": "no-such-package-anywhere", "version": "1.0"}
+    )
+    assert response.status_code == 404
+    assert client.get(f"/api/v1/campaigns/{uuid4()}").status_code == 404